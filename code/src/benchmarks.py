@@ -0,0 +1,1331 @@
+# =============================================================================
+# Benchmarks and accuracy reports for the headless simulation engine
+# =============================================================================
+# Each benchmark runs the simulation engine without any GUI and returns its
+# results as a dictionary, which is also printed when the benchmark is run
+# from the command line, e.g.
+#
+#     python benchmarks.py integrator_energy_drift
+# =============================================================================
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+import taichi as ti
+from taichi.lang import impl
+
+from domain_decomposition import DecomposedSimulation
+from ensemble_engine import EnsembleEngine
+from simulation_engine import (
+    GaussianStampCache,
+    SimulationEngine,
+    create_gaussian_perturb_array,
+    domain_options,
+    integrator_options,
+    laplacian_stencils,
+    layout_options,
+    precision_options,
+    stencil_options
+)
+
+
+# =============================================================================
+# Time integrators
+# =============================================================================
+def compare_integrator_energy_drift(
+        grid_size=61,
+        number_of_steps=30000,
+        report_interval=3000,
+        timestep=1e-7
+    ):
+    """
+    Compare the long-run energy behaviour and the throughput of the time 
+    integrators of the engine.
+
+    Each integrator is run on the same closed system: the two stationary 
+    perturbations of the test runs are overlaid on the first step, and the
+    boundary damping is switched off, so that the mechanical energy of the 
+    lattice ought to be conserved. The energy is sampled every 
+    'report_interval' steps.
+
+    Parameters:
+        - grid_size (int): The size of the grid.
+        - number_of_steps (int): The number of steps after the first one.
+        - report_interval (int): The number of steps between energy samples.
+        - timestep (float): The integration timestep.
+
+    Returns:
+        dict: For each of the 'integrator_options', a dictionary holding
+        'relative_energy_changes' (list of (E - E0) / E0 at each sample),
+        'final_relative_energy_change', 'max_relative_energy_change'
+        (largest magnitude) and 'steps_per_second'.
+
+    Notes:
+        - A symplectic integrator shows a bounded fluctuation of the energy
+          whose size depends on the timestep; a non-symplectic one shows a 
+          change that grows with the number of steps (a drift).
+    """
+    results = {}
+    for integrator in integrator_options:
+        engine = SimulationEngine(
+            grid_size=grid_size,
+            run_option="Test 2 - all four borders damped",
+            max_damping_factor=0.0,
+            timestep=timestep,
+            integrator=integrator
+        )
+        engine.step()  # Overlay the perturbations and compile the kernels.
+        initial_energy = engine.lattice_energy()
+
+        relative_energy_changes = []
+        start_time = time.perf_counter()
+        for _ in range(number_of_steps // report_interval):
+            engine.step(report_interval)
+            relative_energy_changes.append(
+                engine.lattice_energy() / initial_energy - 1.0
+            )
+        elapsed_time = time.perf_counter() - start_time
+
+        results[integrator] = {
+            "relative_energy_changes": relative_energy_changes,
+            "final_relative_energy_change": relative_energy_changes[-1],
+            "max_relative_energy_change": max(relative_energy_changes,
+                                              key=abs),
+            "steps_per_second": (number_of_steps // report_interval
+                                 * report_interval / elapsed_time)
+        }
+    return results
+
+
+def print_integrator_energy_drift(results):
+    print("Integrator Energy Drift")
+    print("=======================")
+    print(f"{'integrator':<22}{'final dE/E0':>14}{'max |dE/E0|':>14}"
+          f"{'steps/s':>10}")
+    for integrator, result in results.items():
+        print(f"{integrator:<22}"
+              f"{result['final_relative_energy_change']:>14.2e}"
+              f"{abs(result['max_relative_energy_change']):>14.2e}"
+              f"{result['steps_per_second']:>10.1f}")
+    print("")
+
+
+# =============================================================================
+# Laplacian stencils
+# =============================================================================
+def stencil_phase_speed_error(stencil, points_per_wavelength, direction):
+    """
+    Relative error in the phase speed of a plane wave on the lattice.
+
+    A plane wave of wavenumber q has the squared lattice frequency 
+    (k / m) * sum(w * (1 - cos(q . d))) over the stencil entries of offset 
+    d and weight w, against (k / m) * |q|^2 for the continuous membrane.
+
+    Parameters:
+        - stencil (str): One of 'stencil_options'.
+        - points_per_wavelength (float): Grid elements per wavelength.
+        - direction (float): Direction of propagation [rad] relative to the
+          grid axes.
+
+    Returns:
+        float: The relative error of the phase speed (negative when the 
+        lattice wave lags behind).
+    """
+    wavenumber = 2 * math.pi / points_per_wavelength
+    q_x = wavenumber * math.cos(direction)
+    q_y = wavenumber * math.sin(direction)
+    lattice_symbol = sum(
+        weight * (1 - math.cos(q_x * x_offset + q_y * y_offset))
+        for x_offset, y_offset, weight in laplacian_stencils[stencil]
+    )
+    return math.sqrt(lattice_symbol) / wavenumber - 1.0
+
+
+def compare_stencil_dispersion(
+        grid_size=301,
+        number_of_steps=200,
+        points_per_wavelength=(4, 6, 8, 12, 16),
+        error_tolerance=0.01
+    ):
+    """
+    Compare the grid dispersion and the throughput of the Laplacian 
+    stencils.
+
+    For each stencil, the phase speed error is evaluated along a grid axis
+    and along the diagonal, and the smallest resolution with an error 
+    below 'error_tolerance' in every direction is found. Waves of a given
+    physical wavelength are reproduced equally well on grids whose size is
+    in proportion to that resolution.
+
+    Parameters:
+        - grid_size (int): The size of the grid for the throughput test.
+        - number_of_steps (int): The number of timed steps.
+        - points_per_wavelength (tuple): Resolutions at which the phase 
+          speed errors are reported.
+        - error_tolerance (float): Accepted magnitude of the phase speed 
+          error.
+
+    Returns:
+        dict: For each of the 'stencil_options', a dictionary holding 
+        'axis_errors' and 'diagonal_errors' (lists matching 
+        'points_per_wavelength'), 'points_per_wavelength_needed' and 
+        'steps_per_second' (velocity Verlet).
+    """
+    results = {}
+    for stencil in stencil_options:
+        def worst_error(resolution):
+            return max(abs(stencil_phase_speed_error(stencil, resolution,
+                                                     direction))
+                       for direction in (0.0, math.pi / 8, math.pi / 4))
+        points_per_wavelength_needed = 2.0
+        while worst_error(points_per_wavelength_needed) > error_tolerance:
+            points_per_wavelength_needed += 0.1
+
+        engine = SimulationEngine(
+            grid_size=grid_size,
+            run_option="Test 2 - all four borders damped",
+            integrator="Velocity Verlet",
+            stencil=stencil
+        )
+        engine.step()  # Overlay the perturbations and compile the kernels.
+        start_time = time.perf_counter()
+        engine.step(number_of_steps)
+        elapsed_time = time.perf_counter() - start_time
+
+        results[stencil] = {
+            "points_per_wavelength": list(points_per_wavelength),
+            "axis_errors": [
+                stencil_phase_speed_error(stencil, resolution, 0.0)
+                for resolution in points_per_wavelength
+            ],
+            "diagonal_errors": [
+                stencil_phase_speed_error(stencil, resolution, math.pi / 4)
+                for resolution in points_per_wavelength
+            ],
+            "points_per_wavelength_needed": points_per_wavelength_needed,
+            "steps_per_second": number_of_steps / elapsed_time
+        }
+    return results
+
+
+def print_stencil_dispersion(results):
+    print("Stencil Dispersion")
+    print("==================")
+    for stencil, result in results.items():
+        print(f"{stencil}: {result['steps_per_second']:.1f} steps/s, "
+              f"{result['points_per_wavelength_needed']:.1f} points per "
+              f"wavelength for a 1% phase speed error")
+        print(f"  {'points/wavelength':<20}{'axis error':>14}"
+              f"{'diagonal error':>16}")
+        for resolution, axis_error, diagonal_error in zip(
+                result["points_per_wavelength"],
+                result["axis_errors"],
+                result["diagonal_errors"]):
+            print(f"  {resolution:<20}{axis_error:>14.2e}"
+                  f"{diagonal_error:>16.2e}")
+    print("")
+
+
+# =============================================================================
+# Floating point precision
+# =============================================================================
+def compare_precision_accuracy(
+        grid_size=301,
+        number_of_steps=2000,
+        integrator="Legacy RK4",
+        probe_coords=None
+    ):
+    """
+    Compare the single precision modes of the engine against the f64 run.
+
+    The same orbital run (the first sphere at its default orbital radius)
+    is repeated in each of the 'precision_options', recording the height 
+    at a probe oscillator on every step. Against the f64 run, the report 
+    gives the RMS error of the heights over the sheet at the end of the run
+    and the phase drift of the probe signal, measured at the dominant 
+    frequency of the f64 signal over the second half of the run.
+
+    Parameters:
+        - grid_size (int): The size of the grid.
+        - number_of_steps (int): The number of steps of each run.
+        - integrator (str): One of 'integrator_options'.
+        - probe_coords (tuple): Grid indices (i, j) of the probe. Defaults 
+          to the grid centre, where the waves of the two spheres meet.
+
+    Returns:
+        dict: For each of the 'precision_options', a dictionary holding
+        'height_rms_error' and 'relative_height_rms_error' (relative to the
+        RMS height of the f64 run), 'probe_phase_drift' [rad] and 
+        'steps_per_second'.
+    """
+    if probe_coords is None:
+        probe_coords = ((grid_size - 1) // 2, (grid_size - 1) // 2)
+
+    final_heights = {}
+    probe_signals = {}
+    steps_per_second = {}
+    for precision in precision_options:
+        engine = SimulationEngine(
+            grid_size=grid_size,
+            integrator=integrator,
+            precision=precision
+        )
+        engine.step()  # Compile the kernels outside of the timing.
+        probe_signal = np.empty(number_of_steps)
+        start_time = time.perf_counter()
+        for step in range(number_of_steps):
+            engine.step()
+            probe_signal[step] = engine.oscillator_positions[probe_coords]
+        elapsed_time = time.perf_counter() - start_time
+
+        final_heights[precision] = (
+            engine.state()["oscillator_positions"].astype(np.float64)
+        )
+        probe_signals[precision] = probe_signal
+        steps_per_second[precision] = number_of_steps / elapsed_time
+
+    # Dominant frequency of the f64 probe signal, once the waves have 
+    # reached the probe.
+    reference_precision = precision_options[0]
+    window = slice(number_of_steps // 2, number_of_steps)
+    window_steps = np.arange(number_of_steps)[window]
+    reference_signal = probe_signals[reference_precision][window]
+    spectrum = np.fft.rfft(reference_signal - reference_signal.mean())
+    dominant_bin = 1 + np.argmax(np.abs(spectrum[1:]))
+    angular_frequency = 2 * np.pi * dominant_bin / len(reference_signal)
+
+    def probe_phase(signal):
+        return np.angle(np.sum(signal[window]
+                               * np.exp(-1j * angular_frequency
+                                        * window_steps)))
+
+    reference_heights = final_heights[reference_precision]
+    reference_rms_height = np.sqrt(np.mean(reference_heights ** 2))
+    reference_phase = probe_phase(probe_signals[reference_precision])
+    results = {}
+    for precision in precision_options:
+        height_rms_error = np.sqrt(
+            np.mean((final_heights[precision] - reference_heights) ** 2)
+        )
+        results[precision] = {
+            "height_rms_error": height_rms_error,
+            "relative_height_rms_error": (height_rms_error
+                                          / reference_rms_height),
+            "probe_phase_drift": np.angle(
+                np.exp(1j * (probe_phase(probe_signals[precision])
+                             - reference_phase))
+            ),
+            "steps_per_second": steps_per_second[precision]
+        }
+    return results
+
+
+def print_precision_accuracy(results):
+    print("Precision Accuracy (against f64)")
+    print("================================")
+    print(f"{'precision':<28}{'RMS error':>12}{'relative':>12}"
+          f"{'phase [rad]':>13}{'steps/s':>10}")
+    for precision, result in results.items():
+        print(f"{precision:<28}"
+              f"{result['height_rms_error']:>12.2e}"
+              f"{result['relative_height_rms_error']:>12.2e}"
+              f"{result['probe_phase_drift']:>13.2e}"
+              f"{result['steps_per_second']:>10.1f}")
+    print("")
+
+
+# =============================================================================
+# Memory layouts
+# =============================================================================
+def compare_layout_throughput(
+        grid_sizes=(301, 1001, 2001, 4001),
+        integrator="Legacy RK4",
+        tile_size=16,
+        time_budget=2.0
+    ):
+    """
+    Compare the throughput of the memory layouts of the fields of the 
+    sheet over a range of grid sizes.
+
+    Each layout is stepped for 'time_budget' seconds (at least three steps)
+    on an orbital run. Taichi is reinitialised, on the same architecture,
+    before each grid size, so that the fields of the largest grids do not 
+    accumulate in memory.
+
+    Parameters:
+        - grid_sizes (tuple): The grid sizes to test.
+        - integrator (str): One of 'integrator_options'.
+        - tile_size (int): The tile size of the blocked layouts.
+        - time_budget (float): The wall clock time (s) for each run.
+
+    Returns:
+        dict: For each grid size, a dictionary giving the steps per second
+        of each of the 'layout_options'.
+    """
+    # Taichi's configuration, of which the architecture is a part, is freed
+    # by 'ti.reset', so the architecture is looked up anew by name.
+    arch = getattr(ti, impl.current_cfg().arch.name)
+    results = {}
+    for grid_size in grid_sizes:
+        ti.reset()
+        ti.init(arch=arch,
+                default_fp=ti.f64)
+        results[grid_size] = {}
+        for layout in layout_options:
+            engine = SimulationEngine(
+                grid_size=grid_size,
+                integrator=integrator,
+                layout=layout,
+                tile_size=tile_size
+            )
+            engine.step()  # Compile the kernels outside of the timing.
+            start_time = time.perf_counter()
+            steps_taken = engine.step_for(time_budget, min_steps=3)
+            ti.sync()
+            elapsed_time = time.perf_counter() - start_time
+            results[grid_size][layout] = steps_taken / elapsed_time
+    return results
+
+
+def print_layout_throughput(results):
+    print("Layout Throughput [steps/s]")
+    print("===========================")
+    print(f"{'grid size':<12}"
+          + "".join(f"{layout:>16}" for layout in layout_options))
+    for grid_size, layout_results in results.items():
+        print(f"{grid_size:<12}"
+              + "".join(f"{layout_results[layout]:>16.2f}"
+                        for layout in layout_options))
+    print("")
+
+
+def compare_temporal_blocking_throughput(
+        grid_sizes=(301, 1001, 2001),
+        configurations=(("Velocity Verlet", (1, 4, 8, 16), 128),
+                        ("Stage-buffered RK4", (1, 2, 4), 128)),
+        time_budget=2.0
+    ):
+    """
+    Compare the throughput of the integrators supporting temporal blocking
+    with and without it, over a range of grid sizes.
+
+    Each number of steps per pass (1 meaning no blocking) is run for 
+    'time_budget' seconds on an orbital run, and the final heights are 
+    compared with those of the unblocked run after as many steps, which 
+    they should match exactly.
+
+    Parameters:
+        - grid_sizes (tuple): The grid sizes to test.
+        - configurations (tuple): For each integrator, a tuple of its name,
+          the values of 'temporal_block_steps' to test and the side of the
+          regions of the tiles. The halos of the stage-buffered RK4 are 
+          four times as deep as those of the velocity Verlet integrator, 
+          so it is tested with fewer steps per pass.
+        - time_budget (float): The wall clock time (s) for each run.
+
+    Returns:
+        dict: For each integrator and grid size, a dictionary giving, for 
+        each number of steps per pass, the steps per second and the largest
+        difference in height from the unblocked run.
+    """
+    # Taichi's configuration, of which the architecture is a part, is freed
+    # by 'ti.reset', so the architecture is looked up anew by name.
+    arch = getattr(ti, impl.current_cfg().arch.name)
+    results = {}
+    for integrator, block_steps, temporal_tile_size in configurations:
+        results[integrator] = {}
+        for grid_size in grid_sizes:
+            ti.reset()
+            ti.init(arch=arch,
+                    default_fp=ti.f64)
+            results[integrator][grid_size] = {}
+            for temporal_block_steps in block_steps:
+                engine = SimulationEngine(
+                    grid_size=grid_size,
+                    integrator=integrator,
+                    temporal_block_steps=temporal_block_steps,
+                    temporal_tile_size=temporal_tile_size
+                )
+                # Compile the kernels outside of the timing.
+                engine.step(2 * temporal_block_steps)
+                ti.sync()
+                start_step = engine.simulation_step_counter
+                start_time = time.perf_counter()
+                engine.step_for(time_budget, min_steps=3)
+                ti.sync()
+                elapsed_time = time.perf_counter() - start_time
+                steps_taken = engine.simulation_step_counter
+
+                reference_engine = SimulationEngine(
+                    grid_size=grid_size,
+                    integrator=integrator
+                )
+                reference_engine.step(steps_taken)
+                height_difference = np.max(np.abs(
+                    engine.state()["oscillator_positions"]
+                    - reference_engine.state()["oscillator_positions"]
+                ))
+                results[integrator][grid_size][temporal_block_steps] = {
+                    "steps_per_second": (
+                        (steps_taken - start_step) / elapsed_time
+                    ),
+                    "height_difference": height_difference
+                }
+    return results
+
+
+def print_temporal_blocking_throughput(results):
+    print("Temporal Blocking Throughput")
+    print("============================")
+    print(f"{'integrator':<20}{'grid size':>10}{'steps/pass':>12}"
+          f"{'steps/s':>12}{'max |dh|':>12}")
+    for integrator, grid_results in results.items():
+        for grid_size, block_results in grid_results.items():
+            for temporal_block_steps, result in block_results.items():
+                print(f"{integrator:<20}{grid_size:>10}"
+                      f"{temporal_block_steps:>12}"
+                      f"{result['steps_per_second']:>12.2f}"
+                      f"{result['height_difference']:>12.2e}")
+    print("")
+
+
+def compare_activity_tracking_throughput(
+        grid_sizes=(1001, 2001, 4001),
+        integrators=("Legacy RK4", "Velocity Verlet"),
+        number_of_steps=200
+    ):
+    """
+    Compare the early-run throughput of dense and activity-tracked stepping
+    over a range of grid sizes.
+
+    Each integrator is run for 'number_of_steps' steps from the start of 
+    an inspiralling run, during which the waves spread over only a small 
+    part of the sheet, with and without activity tracking. Taichi is 
+    reinitialised before each grid size, as in 'compare_layout_throughput'.
+
+    Parameters:
+        - grid_sizes (tuple): The grid sizes to test.
+        - integrators (tuple): The integrators to test, from those which 
+          support activity tracking.
+        - number_of_steps (int): The number of steps of each run.
+
+    Returns:
+        dict: For each grid size and integrator, the steps per second of 
+        the dense and the activity-tracked runs, the fraction of blocks 
+        active at the end, and the largest difference in height between 
+        the two runs.
+    """
+    # Taichi's configuration, of which the architecture is a part, is freed
+    # by 'ti.reset', so the architecture is looked up anew by name.
+    arch = getattr(ti, impl.current_cfg().arch.name)
+    results = {}
+    for grid_size in grid_sizes:
+        ti.reset()
+        ti.init(arch=arch,
+                default_fp=ti.f64)
+        for integrator in integrators:
+            result = {}
+            heights = {}
+            for activity_tracking in [False, True]:
+                engine = SimulationEngine(
+                    grid_size=grid_size,
+                    run_option="Inspiralling",
+                    integrator=integrator,
+                    activity_tracking=activity_tracking
+                )
+                engine.step()  # Compile the kernels outside of the timing.
+                start_time = time.perf_counter()
+                engine.step(number_of_steps)
+                ti.sync()
+                elapsed_time = time.perf_counter() - start_time
+                mode = "tracked" if activity_tracking else "dense"
+                result[mode + "_steps_per_second"] = (number_of_steps
+                                                      / elapsed_time)
+                snapshot = engine.state()
+                heights[mode] = snapshot["oscillator_positions"]
+                result["active_block_fraction"] = (
+                    snapshot["active_block_fraction"]
+                )
+            result["height_difference"] = np.max(
+                np.abs(heights["tracked"] - heights["dense"])
+            )
+            results[(grid_size, integrator)] = result
+    return results
+
+
+def print_activity_tracking_throughput(results):
+    print("Activity Tracking Throughput (early run)")
+    print("========================================")
+    print(f"{'grid size':<12}{'integrator':<18}{'dense steps/s':>15}"
+          f"{'tracked steps/s':>17}{'active':>9}{'max |dh|':>12}")
+    for (grid_size, integrator), result in results.items():
+        print(f"{grid_size:<12}{integrator:<18}"
+              f"{result['dense_steps_per_second']:>15.2f}"
+              f"{result['tracked_steps_per_second']:>17.2f}"
+              f"{result['active_block_fraction']:>9.3f}"
+              f"{result['height_difference']:>12.2e}")
+    print("")
+
+
+def compare_fused_step_throughput(
+        grid_sizes=(31, 101, 301),
+        integrators=("Legacy RK4", "Velocity Verlet"),
+        run_options=("Set first sphere orbital radius", "Inspiralling"),
+        number_of_steps=300
+    ):
+    """
+    Compare the throughput of separate kernel launches and of the fused 
+    step (a single launch per step), on the small grids on which the cost
+    of the launches dominates.
+
+    The steps are taken one call of 'step' at a time, as the interactive
+    application takes them, from the start of each run. Each inspiralling
+    run is made with the default orbital radius, and the grid of 31 cells 
+    merges its binary within the steps.
+
+    Parameters:
+        - grid_sizes (tuple): The grid sizes to test.
+        - integrators (tuple): The integrators to test, from those with a 
+          fused step.
+        - run_options (tuple): The run options to test.
+        - number_of_steps (int): The number of steps of each run.
+
+    Returns:
+        dict: For each grid size, integrator and run option, the steps per
+        second with separate launches and with the fused step, and the 
+        largest difference in height between the two runs.
+    """
+    results = {}
+    for grid_size in grid_sizes:
+        for integrator in integrators:
+            for run_option in run_options:
+                result = {}
+                heights = {}
+                for fused_steps in [False, True]:
+                    engine = SimulationEngine(grid_size=grid_size,
+                                              run_option=run_option,
+                                              integrator=integrator,
+                                              fused_steps=fused_steps)
+                    # Compile the kernels outside of the timing.
+                    engine.step()
+                    start_time = time.perf_counter()
+                    for _ in range(number_of_steps):
+                        engine.step()
+                    ti.sync()
+                    elapsed_time = time.perf_counter() - start_time
+                    mode = "fused" if fused_steps else "separate"
+                    result[mode + "_steps_per_second"] = (number_of_steps
+                                                          / elapsed_time)
+                    heights[mode] = engine.state()["oscillator_positions"]
+                result["height_difference"] = np.max(
+                    np.abs(heights["fused"] - heights["separate"])
+                )
+                results[(grid_size, integrator, run_option)] = result
+    return results
+
+
+def print_fused_step_throughput(results):
+    print("Fused Step Throughput (one step per call)")
+    print("=========================================")
+    print(f"{'grid size':<12}{'integrator':<18}{'run option':<34}"
+          f"{'separate steps/s':>18}{'fused steps/s':>15}{'max |dh|':>12}")
+    for (grid_size, integrator, run_option), result in results.items():
+        print(f"{grid_size:<12}{integrator:<18}{run_option:<34}"
+              f"{result['separate_steps_per_second']:>18.2f}"
+              f"{result['fused_steps_per_second']:>15.2f}"
+              f"{result['height_difference']:>12.2e}")
+    print("")
+
+
+# =============================================================================
+# Gaussian stamp cache
+# =============================================================================
+def compare_stamp_creation_and_lookup(
+        masses=tuple(range(1, 41)),
+        number_of_lookups=1000
+    ):
+    """
+    Compare the creation of the stamp of a perturbation in a field of its
+    own, as each engine formerly did for each of its masses, with its 
+    building in a slot of a 'GaussianStampCache' (a miss) and its lookup 
+    there (a hit), for the radius and depth of each mass.
+
+    A field of its own costs the allocation of the field, and a kernel 
+    compiled for it (as are all the kernels then taking it); a slot only 
+    costs the launch of 'create_gaussian_stamp', compiled once.
+
+    Parameters:
+        - masses (tuple): The masses whose stamps are compared, from 1 to 
+          the sum of the largest masses of the sliders of the application.
+        - number_of_lookups (int): The number of lookups timed per stamp.
+
+    Returns:
+        dict: The mean time (s) to create a stamp in a field, to build one
+        in the cache and to look one up, and the largest difference between
+        the stamps created in fields and those of the cache.
+    """
+    cache = GaussianStampCache(capacity=len(masses), max_radius=max(masses))
+    creation_time = 0.0
+    build_time = 0.0
+    lookup_time = 0.0
+    stamp_difference = 0.0
+    for mass in masses:
+        start_time = time.perf_counter()
+        perturb_array = ti.field(dtype=ti.f64, 
+                                 shape=(2 * mass + 1, 2 * mass + 1))
+        create_gaussian_perturb_array(mass, mass, perturb_array)
+        ti.sync()
+        creation_time += time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        key, slot = cache.acquire(mass, mass)
+        ti.sync()
+        build_time += time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        for _ in range(number_of_lookups):
+            cache.acquire(mass, mass)
+        lookup_time += time.perf_counter() - start_time
+        cache.release([key] * (number_of_lookups + 1))
+
+        stamp_difference = max(stamp_difference, np.max(np.abs(
+            perturb_array.to_numpy()
+            - cache.stamps.to_numpy()[slot, :2 * mass + 1, :2 * mass + 1]
+        )))
+    return {
+        "creation_seconds": creation_time / len(masses),
+        "build_seconds": build_time / len(masses),
+        "lookup_seconds": lookup_time / len(masses) / number_of_lookups,
+        "stamp_difference": stamp_difference
+    }
+
+
+def print_stamp_creation_and_lookup(results):
+    print("Gaussian Stamp Creation and Lookup (mean per stamp)")
+    print("===================================================")
+    print(f"{'stamp in its own field':<32}"
+          f"{results['creation_seconds'] * 1e3:>12.3f} ms")
+    print(f"{'stamp built in the cache':<32}"
+          f"{results['build_seconds'] * 1e3:>12.3f} ms")
+    print(f"{'stamp looked up in the cache':<32}"
+          f"{results['lookup_seconds'] * 1e3:>12.5f} ms")
+    print(f"{'max |difference| of the stamps':<32}"
+          f"{results['stamp_difference']:>12.2e}")
+    print("")
+
+
+# =============================================================================
+# Absorbing boundaries
+# =============================================================================
+def resolved_wave_energy(
+        heights,
+        velocities,
+        elastic_constant,
+        oscillator_mass,
+        cutoff_wavenumber
+    ):
+    """
+    The mechanical energy of the waves of a patch of the sheet whose 
+    wavenumber is below 'cutoff_wavenumber' [rad per cell].
+
+    The cut-off leaves out the waves of a few cells in wavelength, such as 
+    those made by the sharp edges of the perturbations, which are not 
+    resolved by the lattice and travel too slowly to be absorbed in good
+    time by any boundary.
+    """
+    def resolved(field):
+        spectrum = np.fft.fft2(field)
+        wavenumbers = [2 * np.pi * np.fft.fftfreq(size) 
+                       for size in field.shape]
+        wavenumber_i, wavenumber_j = np.meshgrid(*wavenumbers, indexing="ij")
+        spectrum[np.hypot(wavenumber_i, wavenumber_j) 
+                 > cutoff_wavenumber] = 0
+        return np.fft.ifft2(spectrum).real
+
+    heights = resolved(heights)
+    velocities = resolved(velocities)
+    spring_extensions = (np.sum(np.diff(heights, axis=0) ** 2)
+                         + np.sum(np.diff(heights, axis=1) ** 2))
+    return (0.5 * oscillator_mass * np.sum(velocities ** 2)
+            + 0.5 * elastic_constant * spring_extensions)
+
+
+def measure_boundary_reflection(
+        configurations=(("Linear sponge", 10),
+                        ("Linear sponge", 20),
+                        ("PML", 5),
+                        ("PML", 10),
+                        ("PML", 20)),
+        grid_size=201,
+        reference_margin=300,
+        first_orbital_radius=20,
+        incident_step=300,
+        sample_steps=(1200, 1600, 2000, 2400),
+        cutoff_wavenumber=1.0,
+        domain="Square"
+    ):
+    """
+    Measure the reflection coefficient and the cost of the absorbing 
+    boundaries of the engine.
+
+    The two stationary perturbations of the test runs are overlaid on the 
+    first step and then released, sending a ring of waves out over the 
+    sheet. The run is repeated on a reference grid, larger by 
+    'reference_margin' cells on each side, on which the waves do not reach
+    the border within the run. Any difference between the two runs within 
+    the interior of the grid tested (inside its absorbing layers) is then
+    reflected from its boundary. The reflection coefficient is the square 
+    root of the largest energy of that difference over the 'sample_steps',
+    relative to the energy of the released waves (taken from the reference
+    run at 'incident_step', before they reach the absorbing layer). Both
+    energies count only the waves resolved by the lattice (see 
+    'resolved_wave_energy').
+
+    Parameters:
+        - configurations (tuple): The (boundary, damping layer depth) pairs
+          to test, the boundaries being from 'boundary_options'.
+        - grid_size (int): The size of the grid tested.
+        - reference_margin (int): The margin of the reference grid.
+        - first_orbital_radius (float): The distance of the perturbations 
+          from the grid centre.
+        - incident_step (int): The step at which the energy of the released
+          waves is taken.
+        - sample_steps (tuple): The steps at which the reflected energy is
+          sampled, in increasing order.
+        - cutoff_wavenumber (float): The largest wavenumber counted 
+          [rad per cell].
+        - domain (str): One of 'domain_options', the domain of the grid 
+          tested (that of the reference grid being square). The interior of
+          the circular domain is the disc within its damping ring.
+
+    Returns:
+        dict: For each configuration, the 'reflection_coefficient', the 
+        'reflection_coefficients' at each sample, the fraction of the 
+        cells of the domain in the absorbing layers ('layer_fraction') and 
+        the 'steps_per_second' of the run after the incident step.
+    """
+    def sample_run(engine_grid_size, boundary, damping_layer_depth,
+                   engine_domain):
+        engine = SimulationEngine(
+            grid_size=engine_grid_size,
+            first_orbital_radius=first_orbital_radius,
+            run_option="Test 2 - all four borders damped",
+            integrator="Velocity Verlet",
+            boundary=boundary,
+            damping_layer_depth=damping_layer_depth,
+            domain=engine_domain
+        )
+        samples = {}
+        # The kernels are compiled before the incident step, so only the 
+        # steps after it are timed.
+        elapsed_time = 0.0
+        for step in (incident_step,) + tuple(sample_steps):
+            start_time = time.perf_counter()
+            engine.step(step - engine.simulation_step_counter)
+            ti.sync()
+            if step > incident_step:
+                elapsed_time += time.perf_counter() - start_time
+            snapshot = engine.state()
+            samples[step] = (
+                snapshot["oscillator_positions"].astype(np.float64),
+                snapshot["oscillator_velocities"].astype(np.float64)
+            )
+        steps_per_second = (sample_steps[-1] - incident_step) / elapsed_time
+        return engine, samples, steps_per_second
+
+    reference_engine, reference_samples, _ = sample_run(
+        grid_size + 2 * reference_margin, "Linear sponge", None, "Square"
+    )
+
+    def energy(heights, velocities):
+        return resolved_wave_energy(heights,
+                                    velocities,
+                                    reference_engine.elastic_constant,
+                                    reference_engine.oscillator_mass,
+                                    cutoff_wavenumber)
+
+    incident_energy = energy(*reference_samples[incident_step])
+    results = {}
+    for boundary, damping_layer_depth in configurations:
+        engine, samples, steps_per_second = sample_run(
+            grid_size, boundary, damping_layer_depth, domain
+        )
+        # The interior of the grid tested, and the same cells of the 
+        # reference grid.
+        interior_start = engine.reduced_grid_start + damping_layer_depth
+        interior_end = engine.reduced_grid_end - damping_layer_depth
+        interior = (slice(interior_start, interior_end),) * 2
+        reference_interior = (
+            slice(interior_start + reference_margin,
+                  interior_end + reference_margin),
+        ) * 2
+        # Within the square interior, the cells outside the interior of 
+        # the circular domain are left out.
+        interior_mask = 1.0
+        if domain == "Circular":
+            offsets = (np.arange(interior_start, interior_end) 
+                       - engine.grid_centre[None][0])
+            interior_mask = (
+                np.hypot(offsets[:, None], offsets[None, :])
+                < engine.domain_radius - damping_layer_depth
+            )
+        reflection_coefficients = []
+        for step in sample_steps:
+            heights, velocities = samples[step]
+            reference_heights, reference_velocities = reference_samples[step]
+            reflected_energy = energy(
+                (heights[interior] - reference_heights[reference_interior])
+                * interior_mask,
+                (velocities[interior]
+                 - reference_velocities[reference_interior])
+                * interior_mask
+            )
+            reflection_coefficients.append(
+                math.sqrt(reflected_energy / incident_energy)
+            )
+        if domain == "Circular":
+            domain_cells = sum(end - start for start, end 
+                               in engine.domain_row_spans.to_numpy())
+            layer_fraction = 1 - np.sum(interior_mask) / domain_cells
+        else:
+            reduced_grid_size = (engine.reduced_grid_end 
+                                 - engine.reduced_grid_start)
+            layer_fraction = 1 - ((interior_end - interior_start)
+                                  / reduced_grid_size) ** 2
+        results[(boundary, damping_layer_depth)] = {
+            "reflection_coefficient": max(reflection_coefficients),
+            "reflection_coefficients": reflection_coefficients,
+            "layer_fraction": layer_fraction,
+            "steps_per_second": steps_per_second
+        }
+    return results
+
+
+def print_boundary_reflection(results):
+    print("Boundary Reflection (resolved waves)")
+    print("====================================")
+    print(f"{'boundary':<16}{'depth':>7}{'reflection':>13}"
+          f"{'layer cells':>13}{'steps/s':>10}")
+    for (boundary, damping_layer_depth), result in results.items():
+        print(f"{boundary:<16}{damping_layer_depth:>7}"
+              f"{result['reflection_coefficient']:>13.2e}"
+              f"{result['layer_fraction']:>13.1%}"
+              f"{result['steps_per_second']:>10.1f}")
+    print("")
+
+
+def compare_domains(
+        grid_size=201,
+        damping_layer_depth=10,
+        **reflection_arguments
+    ):
+    """
+    Compare the square and circular domains of the engine, with the linear 
+    sponge, for their reflection, the number of cells updated per step and
+    their throughput.
+
+    The reflection is measured as in 'measure_boundary_reflection', to 
+    which any further arguments are passed. The ring of the circular 
+    domain damps the waves at normal incidence all around the rim, where 
+    those of the square grid meet the borders obliquely towards the 
+    corners.
+
+    Parameters:
+        - grid_size (int): The size of the grid.
+        - damping_layer_depth (int): The depth of the damping layer, or 
+          the width of the damping ring, in cells.
+
+    Returns:
+        dict: For each of the 'domain_options', the 'reflection_coefficient',
+        the 'layer_fraction' of the domain, the fraction of the cells of 
+        the grid updated on each step ('updated_fraction') and the 
+        'steps_per_second'.
+    """
+    results = {}
+    for domain in domain_options:
+        reflection = measure_boundary_reflection(
+            configurations=(("Linear sponge", damping_layer_depth),),
+            grid_size=grid_size,
+            domain=domain,
+            **reflection_arguments
+        )[("Linear sponge", damping_layer_depth)]
+        engine = SimulationEngine(grid_size=grid_size,
+                                  damping_layer_depth=damping_layer_depth,
+                                  domain=domain)
+        updated_cells = sum(end - start for start, end 
+                            in engine.domain_row_spans.to_numpy())
+        if domain == "Square":
+            updated_cells = ((engine.reduced_grid_end 
+                              - engine.reduced_grid_start) ** 2)
+        results[domain] = {
+            "reflection_coefficient": reflection["reflection_coefficient"],
+            "layer_fraction": reflection["layer_fraction"],
+            "updated_fraction": updated_cells / grid_size ** 2,
+            "steps_per_second": reflection["steps_per_second"]
+        }
+    return results
+
+
+def print_domain_comparison(results):
+    print("Computational Domains (linear sponge)")
+    print("=====================================")
+    print(f"{'domain':<12}{'reflection':>13}{'layer cells':>13}"
+          f"{'updated':>10}{'steps/s':>10}")
+    for domain, result in results.items():
+        print(f"{domain:<12}{result['reflection_coefficient']:>13.2e}"
+              f"{result['layer_fraction']:>13.1%}"
+              f"{result['updated_fraction']:>10.1%}"
+              f"{result['steps_per_second']:>10.1f}")
+    print("")
+
+
+# =============================================================================
+# Spectral propagator
+# =============================================================================
+def compare_spectral_propagator(
+        grid_size=201,
+        simulated_time=5e-5,
+        explicit_integrator="Velocity Verlet",
+        explicit_timesteps=(4e-7, 1e-7, 2.5e-8),
+        spectral_steps=(1, 10, 500)
+    ):
+    """
+    Compare the spectral integrator with an explicit stencil integrator, 
+    for their accuracy and their cost over the same simulated time.
+
+    The two stationary perturbations of the test runs are overlaid on the
+    first step and left to radiate, with the boundary damping switched 
+    off. The free lattice is then solved exactly by the spectral integrator
+    whatever its timestep, so its run in a single step is the reference. 
+    The explicit integrator is limited in its timestep by stability 
+    (about 2 / omega_max for velocity Verlet, 7e-7 with the default 
+    parameters) as well as by accuracy. With moving sources, the timestep
+    of the spectral integrator is bounded instead by how finely the orbit
+    is to be sampled, the perturbations being overlaid once per step.
+
+    Parameters:
+        - grid_size (int): The size of the grid.
+        - simulated_time (float): The time over which the lattice is 
+          advanced, short enough for the waves to stay clear of the grid
+          edges.
+        - explicit_integrator (str): The explicit integrator compared.
+        - explicit_timesteps (tuple): The timesteps of the explicit runs.
+        - spectral_steps (tuple): The numbers of steps of the spectral 
+          runs.
+
+    Returns:
+        dict: For each (integrator, timestep) run, the 'number_of_steps',
+        the 'relative_height_rms_error' against the reference, and the 
+        'elapsed_time' [s] of the steps. Under the key
+        'equal_accuracy': the error of the explicit run at the default 
+        timestep ('tolerance'), and, for each integrator, the fastest run 
+        within it ('timestep' and 'elapsed_time').
+    """
+    def run(integrator, number_of_steps):
+        # A first step of zero timestep overlays the perturbations and 
+        # compiles the kernels outside of the timing, and leaves the 
+        # accelerations of velocity Verlet consistent with the heights.
+        engine = SimulationEngine(
+            grid_size=grid_size,
+            run_option="Test 2 - all four borders damped",
+            max_damping_factor=0.0,
+            timestep=0.0,
+            integrator=integrator
+        )
+        engine.step()
+        engine.set_params(timestep=simulated_time / number_of_steps)
+        start_time = time.perf_counter()
+        engine.step(number_of_steps)
+        elapsed_time = time.perf_counter() - start_time
+        return (engine.state()["oscillator_positions"].astype(np.float64),
+                elapsed_time)
+
+    reference_heights, _ = run("Spectral", 1)
+    reference_rms_height = np.sqrt(np.mean(reference_heights ** 2))
+    runs = [(explicit_integrator, round(simulated_time / timestep))
+            for timestep in explicit_timesteps]
+    runs += [("Spectral", number_of_steps)
+             for number_of_steps in spectral_steps]
+    results = {}
+    for integrator, number_of_steps in runs:
+        heights, elapsed_time = run(integrator, number_of_steps)
+        results[(integrator, simulated_time / number_of_steps)] = {
+            "number_of_steps": number_of_steps,
+            "relative_height_rms_error": (
+                np.sqrt(np.mean((heights - reference_heights) ** 2))
+                / reference_rms_height
+            ),
+            "elapsed_time": elapsed_time
+        }
+
+    default_timestep = SimulationEngine.__init__.__defaults__[
+        SimulationEngine.__init__.__code__.co_varnames.index("timestep") - 1
+    ]
+    tolerance = min(
+        result["relative_height_rms_error"]
+        for (integrator, timestep), result in results.items()
+        if integrator == explicit_integrator
+        and math.isclose(timestep, default_timestep)
+    )
+    equal_accuracy = {"tolerance": tolerance}
+    for integrator in (explicit_integrator, "Spectral"):
+        timestep, result = min(
+            ((timestep, result)
+             for (run_integrator, timestep), result in results.items()
+             if run_integrator == integrator
+             and result["relative_height_rms_error"] <= tolerance),
+            key=lambda run: run[1]["elapsed_time"]
+        )
+        equal_accuracy[integrator] = {
+            "timestep": timestep,
+            "elapsed_time": result["elapsed_time"]
+        }
+    results["equal_accuracy"] = equal_accuracy
+    return results
+
+
+def print_spectral_propagator(results):
+    print("Spectral Propagator (against the exact free lattice)")
+    print("====================================================")
+    print(f"{'integrator':<18}{'timestep':>10}{'steps':>8}"
+          f"{'RMS error':>12}{'time [s]':>10}")
+    for key, result in results.items():
+        if key == "equal_accuracy":
+            continue
+        integrator, timestep = key
+        print(f"{integrator:<18}{timestep:>10.1e}"
+              f"{result['number_of_steps']:>8}"
+              f"{result['relative_height_rms_error']:>12.2e}"
+              f"{result['elapsed_time']:>10.3f}")
+    equal_accuracy = results["equal_accuracy"]
+    print(f"At a relative RMS error of at most "
+          f"{equal_accuracy['tolerance']:.2e}:")
+    for integrator, run in equal_accuracy.items():
+        if integrator == "tolerance":
+            continue
+        print(f"  {integrator:<16} timestep {run['timestep']:.1e}, "
+              f"{run['elapsed_time']:.3f} s")
+    print("")
+
+
+# =============================================================================
+# Domain decomposition
+# =============================================================================
+def compare_domain_decomposition_throughput(
+        grid_size=2001,
+        number_of_steps=200,
+        strip_counts=None
+    ):
+    """
+    Compare the throughput of domain-decomposed runs, split into different
+    numbers of strips (worker processes), with that of a single engine.
+
+    Each run is an orbital run with the velocity Verlet integrator. The
+    heights at the end of each decomposed run are compared with those of
+    the single engine, which they should match to rounding.
+
+    Parameters:
+        - grid_size (int): The size of the grid.
+        - number_of_steps (int): The number of steps timed, after a first
+          step which compiles the kernels.
+        - strip_counts (tuple): The numbers of strips. Defaults to the 
+          powers of 2 up to the number of CPUs available (and at least 2).
+
+    Returns:
+        dict: For the single engine (key 'single engine') and each number of
+        strips, the 'steps_per_second' and the 'max_height_difference' from
+        the single engine.
+    """
+    if strip_counts is None:
+        cpu_count = (len(os.sched_getaffinity(0)) 
+                     if hasattr(os, "sched_getaffinity")
+                     else os.cpu_count())
+        strip_counts = [1]
+        while strip_counts[-1] < max(cpu_count, 2):
+            strip_counts.append(2 * strip_counts[-1])
+
+    engine_arguments = {
+        "grid_size": grid_size,
+        "integrator": "Velocity Verlet"
+    }
+
+    def timed_run(simulation):
+        simulation.step()  # Compile the kernels outside of the timing.
+        start_time = time.perf_counter()
+        simulation.step(number_of_steps)
+        elapsed_time = time.perf_counter() - start_time
+        return (simulation.state()["oscillator_positions"],
+                number_of_steps / elapsed_time)
+
+    reference_heights, steps_per_second = timed_run(
+        SimulationEngine(**engine_arguments)
+    )
+    results = {
+        "single engine": {
+            "steps_per_second": steps_per_second,
+            "max_height_difference": 0.0
+        }
+    }
+    for number_of_strips in strip_counts:
+        with DecomposedSimulation(number_of_strips=number_of_strips,
+                                  **engine_arguments) as simulation:
+            heights, steps_per_second = timed_run(simulation)
+        results[number_of_strips] = {
+            "steps_per_second": steps_per_second,
+            "max_height_difference": np.max(np.abs(heights 
+                                                   - reference_heights))
+        }
+    return results
+
+
+def print_domain_decomposition_throughput(results):
+    print("Domain Decomposition Throughput (velocity Verlet)")
+    print("=================================================")
+    print(f"{'strips':<16}{'steps/s':>10}{'max |dh|':>12}")
+    for number_of_strips, result in results.items():
+        print(f"{str(number_of_strips):<16}"
+              f"{result['steps_per_second']:>10.1f}"
+              f"{result['max_height_difference']:>12.2e}")
+    print("")
+
+
+def compare_ensemble_throughput(
+        grid_size=101,
+        number_of_steps=200,
+        number_of_members=16
+    ):
+    """
+    Compare the time taken to run an ensemble of orbital runs, differing in
+    the sphere masses and the initial orbital radius, one engine after the
+    other and as a single batched 'EnsembleEngine'.
+
+    The times include the creation of the engines and the compilation of
+    their kernels, which a parameter study pays once per run with separate
+    engines. The heights of every member of the ensemble are compared with
+    those of its separate run, which they should match exactly.
+
+    Parameters:
+        - grid_size (int): The size of the grid.
+        - number_of_steps (int): The number of steps of each run.
+        - number_of_members (int): The number of runs of the ensemble.
+
+    Returns:
+        dict: For the separate engines (key 'separate engines') and the 
+        ensemble (key 'ensemble'), the 'elapsed_time' (s), the 
+        'member_steps_per_second' and the 'max_height_difference' from the
+        separate runs.
+    """
+    members = [
+        (1 + member % 4,
+         1 + member % 4 + member // 4,
+         grid_size / 8 * (1 + member % 3))
+        for member in range(number_of_members)
+    ]
+    engine_arguments = {
+        "grid_size": grid_size,
+        "run_option": "Inspiralling"
+    }
+
+    start_time = time.perf_counter()
+    reference_heights = []
+    for first_sphere_mass, second_sphere_mass, first_orbital_radius in members:
+        engine = SimulationEngine(first_sphere_mass=first_sphere_mass,
+                                  second_sphere_mass=second_sphere_mass,
+                                  first_orbital_radius=first_orbital_radius,
+                                  integrator="Velocity Verlet",
+                                  inspiral="Per-step update",
+                                  **engine_arguments)
+        engine.step(number_of_steps)
+        reference_heights.append(engine.state()["oscillator_positions"])
+    separate_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    ensemble = EnsembleEngine(members=members, **engine_arguments)
+    ensemble.step(number_of_steps)
+    heights = ensemble.state()["oscillator_positions"]
+    ensemble_time = time.perf_counter() - start_time
+
+    member_steps = number_of_members * number_of_steps
+    return {
+        "separate engines": {
+            "elapsed_time": separate_time,
+            "member_steps_per_second": member_steps / separate_time,
+            "max_height_difference": 0.0
+        },
+        "ensemble": {
+            "elapsed_time": ensemble_time,
+            "member_steps_per_second": member_steps / ensemble_time,
+            "max_height_difference": np.max(
+                np.abs(heights - np.array(reference_heights))
+            )
+        }
+    }
+
+
+def print_ensemble_throughput(results):
+    print("Ensemble Throughput (velocity Verlet)")
+    print("=====================================")
+    print(f"{'run':<18}{'time (s)':>10}{'steps/s':>10}{'max |dh|':>12}")
+    for name, result in results.items():
+        print(f"{name:<18}"
+              f"{result['elapsed_time']:>10.2f}"
+              f"{result['member_steps_per_second']:>10.1f}"
+              f"{result['max_height_difference']:>12.2e}")
+    print("")
+
+
+# =============================================================================
+# Command line entry point
+# =============================================================================
+# Each entry maps a benchmark name to the function running it and the
+# function printing its results.
+benchmarks = {
+    "integrator_energy_drift": (compare_integrator_energy_drift,
+                                print_integrator_energy_drift),
+    "stencil_dispersion": (compare_stencil_dispersion,
+                           print_stencil_dispersion),
+    "precision_accuracy": (compare_precision_accuracy,
+                           print_precision_accuracy),
+    "layout_throughput": (compare_layout_throughput,
+                          print_layout_throughput),
+    "temporal_blocking": (compare_temporal_blocking_throughput,
+                          print_temporal_blocking_throughput),
+    "activity_tracking": (compare_activity_tracking_throughput,
+                          print_activity_tracking_throughput),
+    "fused_step": (compare_fused_step_throughput,
+                   print_fused_step_throughput),
+    "stamp_cache": (compare_stamp_creation_and_lookup,
+                    print_stamp_creation_and_lookup),
+    "boundary_reflection": (measure_boundary_reflection,
+                            print_boundary_reflection),
+    "circular_domain": (compare_domains,
+                        print_domain_comparison),
+    "spectral_propagator": (compare_spectral_propagator,
+                            print_spectral_propagator),
+    "domain_decomposition": (compare_domain_decomposition_throughput,
+                             print_domain_decomposition_throughput),
+    "ensemble_throughput": (compare_ensemble_throughput,
+                            print_ensemble_throughput)
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run benchmarks of the headless simulation engine."
+    )
+    parser.add_argument("names",
+                        nargs="*",
+                        default=list(benchmarks),
+                        help="benchmarks to run (default: all), from: "
+                             + ", ".join(benchmarks))
+    arguments = parser.parse_args()
+    for name in arguments.names:
+        if name not in benchmarks:
+            parser.error(f"unknown benchmark: {name}")
+
+    ti.init(arch=ti.cpu,
+            default_fp=ti.f64)
+    for name in arguments.names:
+        run_benchmark, print_results = benchmarks[name]
+        print_results(run_benchmark())
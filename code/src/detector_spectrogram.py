@@ -0,0 +1,225 @@
+# =============================================================================
+# Streaming spectrogram of the signals of the virtual detectors
+# =============================================================================
+# The waves radiated by the binary chirp: their frequency rises as the orbit
+# shrinks. The 'StreamingSpectrogram' follows this from the samples of the
+# virtual detectors of an engine (see 'SimulationEngine.add_detectors'), as
+# a short-time Fourier transform over a window sliding along the samples.
+#
+# The transform is incremental. The samples are only appended to a sliding
+# window; every 'hop_length' samples the window of every detector is
+# detrended, tapered with a Hann window and transformed at once, with one
+# real FFT over the detectors, the windows and power spectra being kept in 
+# buffers allocated once (NumPy keeps the FFT plan of the window length 
+# cached between calls). A few dozen detectors then cost far less than a
+# step of the sheet.
+#
+# The chirp frequency of each frame is the peak of the power spectrum summed
+# over the detectors. For the quadrupole radiation of a binary it is twice
+# the orbital frequency, i.e. 2 * 'model_omega' once converted to rad/s:
+#
+#     engine.add_detectors(ring_detector_points(301, 110, 16))
+#     spectrogram = StreamingSpectrogram(16)
+#     for _ in range(100):
+#         engine.step(100)
+#         spectrogram.update(engine.detector_samples())
+#     chirp_omega = spectrogram.chirp_angular_frequency(engine.step_duration)
+# =============================================================================
+import numpy as np
+
+
+class StreamingSpectrogram:
+    """
+    Incremental short-time Fourier transform of the height signals of the
+    virtual detectors of an engine.
+
+    Parameters:
+        - number_of_detectors (int): The number of detectors sampled.
+        - window_length (int): The number of samples of each transformed
+          window. The frequency resolution is 1 / 'window_length' cycles per
+          sample, so the window should span a few periods of the waves.
+        - hop_length (int): The number of samples between frames.
+        - history_frames (int): The number of frames kept by the history
+          of the spectrogram.
+
+    Attributes:
+        - sample_spacing (int): The number of steps between samples, taken
+          from the first two samples (None until then).
+        - frames_computed (int): The number of frames computed so far.
+
+    Raises:
+        ValueError: If the hop length is not between 1 and the window
+        length.
+    """
+
+    def __init__(
+            self,
+            number_of_detectors,
+            window_length=2048,
+            hop_length=128,
+            history_frames=256
+        ):
+        if not 1 <= hop_length <= window_length:
+            raise ValueError(
+                f"The hop length must be between 1 and the window length "
+                f"({window_length}), not {hop_length}"
+            )
+        self.number_of_detectors = number_of_detectors
+        self.window_length = window_length
+        self.hop_length = hop_length
+        self.history_frames = history_frames
+        self.sample_spacing = None
+        self.frames_computed = 0
+
+        # The sliding window of the samples of each detector, filled from
+        # its end, and the step of its last sample.
+        self.window = np.zeros((number_of_detectors, window_length))
+        self.samples_in_window = 0
+        self.samples_since_frame = 0
+        self.last_step = None
+        # The buffers of the transform of a frame.
+        self.taper = np.hanning(window_length)
+        self.tapered = np.empty((number_of_detectors, window_length))
+        self.power = np.empty((number_of_detectors, window_length // 2 + 1))
+        # The ring buffer of the history: the step of the last sample of
+        # each frame, its power spectrum summed over the detectors and its
+        # chirp frequency.
+        self.frame_steps = np.zeros(history_frames, dtype=np.int64)
+        self.frame_power = np.zeros((history_frames, window_length // 2 + 1))
+        self.frame_chirp_frequencies = np.zeros(history_frames)
+
+    def update(self, samples):
+        """
+        Append the samples of the detectors, as returned by
+        'SimulationEngine.detector_samples', and compute the frames they
+        complete.
+
+        Returns:
+            int: The number of frames computed.
+        """
+        steps = samples["steps"]
+        heights = samples["heights"]
+        if len(steps) == 0:
+            return 0
+        if self.sample_spacing is None:
+            if self.last_step is not None:
+                self.sample_spacing = int(steps[0] - self.last_step)
+            elif len(steps) > 1:
+                self.sample_spacing = int(steps[1] - steps[0])
+
+        frames_before = self.frames_computed
+        first = 0
+        while first < len(steps):
+            # Append samples up to the next frame, or to the last sample.
+            count = min(self.hop_length - self.samples_since_frame,
+                        len(steps) - first)
+            self.window[:, :-count] = self.window[:, count:]
+            self.window[:, -count:] = heights[first:first + count].T
+            self.samples_in_window = min(self.samples_in_window + count,
+                                         self.window_length)
+            self.samples_since_frame += count
+            first += count
+            self.last_step = int(steps[first - 1])
+            if (self.samples_since_frame == self.hop_length
+                    and self.samples_in_window == self.window_length):
+                self._compute_frame()
+            if self.samples_since_frame == self.hop_length:
+                self.samples_since_frame = 0
+        return self.frames_computed - frames_before
+
+    def frequencies(self):
+        """
+        The frequencies of the bins of the spectra, in cycles per step.
+        """
+        return np.fft.rfftfreq(self.window_length,
+                               d=self.sample_spacing or 1)
+
+    def latest_power(self):
+        """
+        The power spectrum of each detector in the last frame, of shape
+        (detectors, bins), or None before the first frame.
+        """
+        return self.power if self.frames_computed else None
+
+    def chirp_frequency(self):
+        """
+        The chirp frequency of the last frame, in cycles per step, or 0.0
+        before the first frame.
+        """
+        if self.frames_computed == 0:
+            return 0.0
+        return self.frame_chirp_frequencies[
+            (self.frames_computed - 1) % self.history_frames
+        ]
+
+    def chirp_angular_frequency(self, step_duration):
+        """
+        The chirp frequency of the last frame in rad/s, for steps of
+        'step_duration' seconds, as the 'model_omega' of the engine.
+        """
+        if step_duration == 0.0:
+            return 0.0
+        return 2 * np.pi * self.chirp_frequency() / step_duration
+
+    def history(self):
+        """
+        The frames of the history, oldest first.
+
+        Returns:
+            dict: The 'steps' of the last sample of each frame, of shape
+            (frames,), the 'power' spectrum of each frame summed over the
+            detectors, of shape (frames, bins), the 'chirp_frequencies' of
+            the frames and the 'frequencies' of the bins, in cycles per
+            step.
+        """
+        number_of_frames = min(self.frames_computed, self.history_frames)
+        slots = (np.arange(self.frames_computed - number_of_frames,
+                           self.frames_computed) % self.history_frames)
+        return {
+            "steps": self.frame_steps[slots],
+            "power": self.frame_power[slots],
+            "chirp_frequencies": self.frame_chirp_frequencies[slots],
+            "frequencies": self.frequencies()
+        }
+
+    def _compute_frame(self):
+        """
+        Transform the windows of all the detectors, and add the frame to
+        the history.
+        """
+        # Remove the mean height, which would otherwise leak from the
+        # zero-frequency bin over the lowest frequencies, then taper.
+        np.subtract(self.window,
+                    self.window.mean(axis=1, keepdims=True),
+                    out=self.tapered)
+        self.tapered *= self.taper
+        # The 'out' argument of the FFT functions needs NumPy 2.0.
+        spectrum = np.fft.rfft(self.tapered, axis=1)
+        np.absolute(spectrum, out=self.power)
+        np.square(self.power, out=self.power)
+
+        slot = self.frames_computed % self.history_frames
+        summed_power = self.frame_power[slot]
+        self.power.sum(axis=0, out=summed_power)
+        self.frame_steps[slot] = self.last_step
+        self.frame_chirp_frequencies[slot] = (
+            _peak_bin(summed_power) / self.window_length
+            / (self.sample_spacing or 1)
+        )
+        self.frames_computed += 1
+
+
+def _peak_bin(power):
+    """
+    The fractional bin of the peak of a power spectrum, ignoring the
+    zero-frequency bin, refined by a parabola through the logarithm of the
+    power of the highest bin and its neighbours.
+    """
+    peak = int(np.argmax(power[1:])) + 1
+    if peak == len(power) - 1:
+        return float(peak)
+    below, centre, above = np.log(power[peak - 1:peak + 2] + 1e-300)
+    curvature = below - 2 * centre + above
+    if curvature >= 0:
+        return float(peak)
+    return peak + 0.5 * (below - above) / curvature
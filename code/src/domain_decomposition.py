@@ -0,0 +1,417 @@
+# =============================================================================
+# Domain-decomposed runs of the simulation engine across worker processes
+# =============================================================================
+# A single Taichi runtime lives in a single process, so one engine can only
+# use the cores (and the memory bandwidth) that its runtime is given. For
+# grids far larger than that of the GUI, e.g. 10001 x 10001, the sheet is
+# split here into strips of rows, each owned by a 'SimulationEngine' in its
+# own worker process, pinned to its own share of the CPUs of the node.
+#
+# Every strip holds a halo of rows on either side, as deep as the stencil
+# reach, which is refreshed once per step by a halo exchange with the
+# neighbouring strips. The exchange buffers live in a block of
+# multiprocessing shared memory. Each strip computes the orbit of the
+# binary itself (it is cheap and deterministic), and overlays the parts of
+# the perturbations falling within its rows, so the strips exchange nothing
+# else, and the run gives the same heights as a single engine would (to the
+# rounding of the stencil sum, which the compiler may order differently).
+#
+# The engine only sees the interface of the halo exchange ('sides',
+# 'outgoing_rows' and 'exchange'), so that a transport over sockets between
+# hosts can later take the place of 'SharedMemoryHaloExchange'.
+#
+#     with DecomposedSimulation(number_of_strips=4, grid_size=10001,
+#                               integrator="Velocity Verlet") as simulation:
+#         simulation.step(1000)
+#         heights = simulation.state()['oscillator_positions']
+# =============================================================================
+import multiprocessing
+import os
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from simulation_engine import stencil_reach
+
+
+def split_rows(grid_size, number_of_strips):
+    """
+    Split the rows of the grid into contiguous strips of as equal a number
+    of rows as possible.
+
+    Returns:
+        list: The (first_row, end_row) of each strip, from the first row of
+        the grid to the last.
+    """
+    boundaries = [round(strip * grid_size / number_of_strips)
+                  for strip in range(number_of_strips + 1)]
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def split_cpus(number_of_strips):
+    """
+    Split the CPUs available to the process into contiguous groups, one
+    per strip. The CPUs of a socket are numbered contiguously on most
+    systems, so that a strip mostly stays within one socket and its memory.
+
+    Returns:
+        list: The CPUs of each strip, or None for each strip where the
+        affinity of a process cannot be set.
+    """
+    if not hasattr(os, "sched_getaffinity"):
+        return [None] * number_of_strips
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) < number_of_strips:
+        return [cpus] * number_of_strips
+    boundaries = split_rows(len(cpus), number_of_strips)
+    return [cpus[first:end] for first, end in boundaries]
+
+
+class SharedMemoryHaloExchange:
+    """
+    The halo exchange of one strip of a domain-decomposed run with its
+    neighbours, through buffers in shared memory.
+
+    The buffer holds, for each boundary between two adjacent strips, the
+    rows sent up across it (by the lower strip) and those sent down (by the
+    upper strip), each twice over: the exchanges alternate between the two
+    copies, so that a strip may write its next rows while its neighbour is
+    still reading the previous ones, and a single barrier per step keeps
+    all the strips in step.
+
+    Parameters:
+        - buffer_name (str): The name of the shared memory block of the
+          buffers (see 'buffer_shape').
+        - barrier (multiprocessing.Barrier): The barrier shared by all the
+          strips of the run.
+        - strip_index (int): The index of the strip, from the first rows of
+          the grid.
+        - number_of_strips (int): The number of strips of the run.
+        - halo_depth (int): The number of rows of each halo.
+        - grid_size (int): The size of the grid.
+        - dtype: The NumPy data type of the fields of the sheet.
+    """
+
+    def __init__(
+            self,
+            buffer_name,
+            barrier,
+            strip_index,
+            number_of_strips,
+            halo_depth,
+            grid_size,
+            dtype
+        ):
+        self.shared_buffer = shared_memory.SharedMemory(name=buffer_name)
+        self.buffers = np.ndarray(
+            self.buffer_shape(number_of_strips, halo_depth, grid_size),
+            dtype=dtype,
+            buffer=self.shared_buffer.buf
+        )
+        self.barrier = barrier
+        # The boundary on each side of the strip with a neighbour, and the
+        # direction (0 up, 1 down) of the rows sent across it.
+        self.boundaries = {}
+        if strip_index > 0:
+            self.boundaries["lower"] = (strip_index - 1, 1)
+        if strip_index < number_of_strips - 1:
+            self.boundaries["upper"] = (strip_index, 0)
+        self.sides = tuple(self.boundaries)
+        self.copy = 0
+
+    @staticmethod
+    def buffer_shape(number_of_strips, halo_depth, grid_size):
+        """
+        The shape of the array of buffers: (boundary, direction, copy, row,
+        column).
+        """
+        return (max(number_of_strips - 1, 1), 2, 2, halo_depth, grid_size)
+
+    def outgoing_rows(self, side):
+        """The array to fill with the rows to send on a side."""
+        boundary, direction = self.boundaries[side]
+        return self.buffers[boundary, direction, self.copy]
+
+    def exchange(self):
+        """
+        Send the outgoing rows to the neighbours, once all the strips have
+        written theirs.
+
+        Returns:
+            dict: The rows received from the neighbour on each side.
+        """
+        self.barrier.wait()
+        incoming_rows = {
+            side: self.buffers[boundary, 1 - direction, self.copy]
+            for side, (boundary, direction) in self.boundaries.items()
+        }
+        self.copy = 1 - self.copy
+        return incoming_rows
+
+    def close(self):
+        self.buffers = None
+        self.shared_buffer.close()
+
+
+def run_strip(
+        connection,
+        strip,
+        strip_index,
+        number_of_strips,
+        buffer_name,
+        barrier,
+        cpus,
+        engine_arguments
+    ):
+    """
+    The main function of the worker process of a strip: create its engine
+    and carry out the commands received from 'DecomposedSimulation' until
+    told to close.
+
+    Each command is a (name, argument) tuple, and is answered with an
+    ("ok", result) or an ("error", exception) tuple. After an error, the
+    barrier of the halo exchange is broken, so that no strip waits for it
+    forever, and the worker stops.
+    """
+    # Taichi is imported here, so that each worker initialises its own
+    # runtime with the CPUs of its strip.
+    import taichi as ti
+    from simulation_engine import SimulationEngine
+
+    if cpus is not None:
+        os.sched_setaffinity(0, cpus)
+    halo_exchange = None
+    try:
+        init_arguments = {}
+        if cpus is not None:
+            init_arguments["cpu_max_num_threads"] = len(cpus)
+        ti.init(arch=ti.cpu, default_fp=ti.f64, **init_arguments)
+        halo_exchange = SharedMemoryHaloExchange(
+            buffer_name,
+            barrier,
+            strip_index,
+            number_of_strips,
+            stencil_reach(engine_arguments.get("stencil", "5-point")),
+            engine_arguments["grid_size"],
+            precision_dtype(engine_arguments.get("precision", "f64"))
+        )
+        engine = SimulationEngine(**engine_arguments,
+                                  strip=strip,
+                                  halo_exchange=halo_exchange)
+        connection.send(("ok", None))
+        while True:
+            name, argument = connection.recv()
+            if name == "close":
+                break
+            if name == "step":
+                engine.step(argument)
+                result = engine.state(include_fields=False)
+            elif name == "set_params":
+                engine.set_params(**argument)
+                result = None
+            elif name == "energies":
+                result = (engine.total_energy(), engine.lattice_energy())
+            elif name == "gather":
+                result = gather_strip(engine, argument)
+            else:
+                raise ValueError(f"Unknown command: {name!r}")
+            connection.send(("ok", result))
+    except Exception as exception:
+        barrier.abort()
+        connection.send(("error", exception))
+    finally:
+        if halo_exchange is not None:
+            halo_exchange.close()
+        connection.close()
+
+
+def gather_strip(engine, fields_name):
+    """
+    Copy the heights and velocities of the rows of a strip into the shared
+    memory block 'fields_name', an array of shape (2, grid size, grid size).
+    """
+    from simulation_engine import copy_rows_to_array
+
+    fields_buffer = shared_memory.SharedMemory(name=fields_name)
+    grid_size = engine.grid_size
+    fields = np.ndarray((2, grid_size, grid_size),
+                        dtype=precision_dtype(engine.precision),
+                        buffer=fields_buffer.buf)
+    first_row, end_row = engine.strip_rows
+    for index, field in enumerate([engine.oscillator_positions,
+                                   engine.oscillator_velocities]):
+        copy_rows_to_array(first_row, field, fields[index, first_row:end_row])
+    del fields
+    fields_buffer.close()
+
+
+def precision_dtype(precision):
+    """The NumPy data type of the fields of the sheet in a precision."""
+    return np.float64 if precision == "f64" else np.float32
+
+
+class DecomposedSimulation:
+    """
+    A simulation whose sheet is split into strips of rows, each advanced by
+    a 'SimulationEngine' in its own worker process, with a halo exchange
+    through shared memory on every step.
+
+    The interface follows that of the engine: 'step', 'set_params',
+    'state', 'total_energy' and 'lattice_energy'. The run is the same as
+    that of a single engine with the same arguments, which must select the
+    velocity Verlet integrator, the linear sponge, the square domain and
+    the Dense layout.
+
+    Parameters:
+        - number_of_strips (int): The number of strips (worker processes).
+          Defaults to the number of CPUs available.
+        - grid_size (int): The size of the grid.
+        - engine_arguments: Further arguments of each 'SimulationEngine'.
+
+    Notes:
+        - The workers are started with the "spawn" method, each one
+          initialising Taichi for itself with its own share of the CPUs, so
+          Taichi need not be initialised by the caller.
+        - 'close' (or leaving a 'with' block) stops the workers and frees
+          the shared memory.
+    """
+
+    def __init__(self, number_of_strips=None, grid_size=301,
+                 **engine_arguments):
+        if number_of_strips is None:
+            number_of_strips = (len(os.sched_getaffinity(0))
+                                if hasattr(os, "sched_getaffinity")
+                                else os.cpu_count())
+        self.number_of_strips = number_of_strips
+        self.grid_size = grid_size
+        self.strips = split_rows(grid_size, number_of_strips)
+        halo_depth = stencil_reach(engine_arguments.get("stencil", "5-point"))
+        dtype = precision_dtype(engine_arguments.get("precision", "f64"))
+        self.dtype = dtype
+
+        buffer_shape = SharedMemoryHaloExchange.buffer_shape(
+            number_of_strips, halo_depth, grid_size
+        )
+        self.shared_buffer = shared_memory.SharedMemory(
+            create=True,
+            size=int(np.prod(buffer_shape)) * np.dtype(dtype).itemsize
+        )
+        context = multiprocessing.get_context("spawn")
+        barrier = context.Barrier(number_of_strips)
+        self.connections = []
+        self.workers = []
+        for strip_index, (strip, cpus) in enumerate(
+                zip(self.strips, split_cpus(number_of_strips))):
+            connection, worker_connection = context.Pipe()
+            worker = context.Process(
+                target=run_strip,
+                args=(worker_connection,
+                      strip,
+                      strip_index,
+                      number_of_strips,
+                      self.shared_buffer.name,
+                      barrier,
+                      cpus,
+                      dict(engine_arguments, grid_size=grid_size)),
+                daemon=True
+            )
+            worker.start()
+            self.connections.append(connection)
+            self.workers.append(worker)
+        try:
+            self._receive()
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception_info):
+        self.close()
+
+    def step(self, n=1):
+        """
+        Advance the simulation by 'n' steps.
+
+        Returns:
+            dict: The snapshot of the orbital state of the first strip after
+            the steps, as returned by 'SimulationEngine.state' without the
+            fields (the orbital state being the same in every strip).
+        """
+        return self._command("step", n)[0]
+
+    def set_params(self, **params):
+        """Alter simulation parameters between steps, in every strip."""
+        self._command("set_params", params)
+
+    def state(self, include_fields=True):
+        """
+        Return a snapshot of the simulation state, as
+        'SimulationEngine.state' does, the fields of the strips being
+        gathered into arrays covering the whole grid.
+        """
+        snapshot = self._command("step", 0)[0]
+        if include_fields:
+            shape = (2, self.grid_size, self.grid_size)
+            fields_buffer = shared_memory.SharedMemory(
+                create=True,
+                size=int(np.prod(shape)) * np.dtype(self.dtype).itemsize
+            )
+            try:
+                self._command("gather", fields_buffer.name)
+                fields = np.ndarray(shape, dtype=self.dtype,
+                                    buffer=fields_buffer.buf)
+                snapshot["oscillator_positions"] = fields[0].copy()
+                snapshot["oscillator_velocities"] = fields[1].copy()
+                del fields
+            finally:
+                fields_buffer.close()
+                fields_buffer.unlink()
+        return snapshot
+
+    def total_energy(self):
+        """The total energy of the sheet, summed over the strips."""
+        return sum(energies[0] for energies in self._command("energies"))
+
+    def lattice_energy(self):
+        """The mechanical energy of the lattice, summed over the strips."""
+        return sum(energies[1] for energies in self._command("energies"))
+
+    def close(self):
+        """Stop the workers and free the shared memory."""
+        if self.shared_buffer is None:
+            return
+        for connection, worker in zip(self.connections, self.workers):
+            if worker.is_alive():
+                try:
+                    connection.send(("close", None))
+                except (BrokenPipeError, OSError):
+                    pass
+            worker.join()
+            connection.close()
+        self.shared_buffer.close()
+        self.shared_buffer.unlink()
+        self.shared_buffer = None
+
+    def _command(self, name, argument=None):
+        """Send a command to every strip, and return their results."""
+        for connection in self.connections:
+            connection.send((name, argument))
+        return self._receive()
+
+    def _receive(self):
+        """
+        Receive the answer of every strip to a command, and return their
+        results, or raise the first error of a strip other than the broken
+        barrier it causes in the others.
+        """
+        answers = [connection.recv() for connection in self.connections]
+        errors = [result for status, result in answers if status == "error"]
+        if errors:
+            errors.sort(key=lambda error: isinstance(
+                error, threading.BrokenBarrierError
+            ))
+            raise errors[0]
+        return [result for _, result in answers]
@@ -0,0 +1,554 @@
+# =============================================================================
+# Batched ensemble of independent simulations on the same grid
+# =============================================================================
+# A parameter study runs the same scenario for many combinations of the
+# sphere masses and the initial orbital radius. Run one engine at a time,
+# each combination allocates its own fields and compiles its own kernels,
+# and a small grid leaves most of the cores idle.
+#
+# The 'EnsembleEngine' advances B such simulations (the members of the
+# ensemble) together instead. The fields of the sheet carry a leading
+# member axis, the parameters and orbital state of each member live in a
+# field of the 'fused_step_state' structs of the engine, and each step is
+# four kernel launches for the whole ensemble: the orbital update of every
+# member (the 'advance_orbit' of the engine), the overlay of their
+# perturbations (its 'overlay_perturbations', from the shared stamp cache),
+# and the two halves of a velocity Verlet step. Each member follows the
+# same run as a 'SimulationEngine' with the velocity Verlet integrator,
+# the "Per-step update" inspiral and the same arguments would.
+#
+#     ti.init(arch=ti.cpu, default_fp=ti.f64)
+#     ensemble = EnsembleEngine(members=[(3, 3, None), (2, 5, 60.0)],
+#                               grid_size=151,
+#                               run_option="Inspiralling")
+#     ensemble.step(1000)
+#     heights = ensemble.state()['oscillator_positions']  # (B, 151, 151)
+# =============================================================================
+import weakref
+
+import numpy as np
+import taichi as ti
+
+from simulation_engine import (
+    advance_orbit,
+    compute_damping_map,
+    fused_step_state,
+    laplacian_stencils,
+    lightspeed,
+    load_fused_step_state,
+    m_sun,
+    newtons_const,
+    orbital_run_options,
+    overlay_perturbations,
+    precision_options,
+    shared_gaussian_stamp_cache,
+    stencil_options,
+    stencil_reach,
+    test_run_options,
+    update_stacked_oscillator_accelerations
+)
+
+# =============================================================================
+# Taichi kernels and functions
+# =============================================================================
+@ti.kernel
+def advance_ensemble_orbits(
+        grid_centre: ti.template(),
+        orbits: ti.template(),
+        first_orbital_coords: ti.template(),
+        second_orbital_coords: ti.template()
+    ):
+    """
+    Make the orbital update of one step for every member of the ensemble,
+    with the 'advance_orbit' of the engine, and set the perturbations to 
+    overlay.
+
+    Parameters:
+        - grid_centre (ti.template()): The centre of the grid.
+        - orbits (ti.template()): The field of 'fused_step_state' structs 
+          of the members, updated in place.
+        - first_orbital_coords, second_orbital_coords (ti.template()): The
+          fields of the coordinates of the spheres of the members, updated
+          in place.
+    """
+    for member in orbits:
+        advance_orbit(grid_centre, orbits, member, first_orbital_coords,
+                      second_orbital_coords)
+
+
+@ti.kernel
+def place_ensemble_test_perturbations(
+        grid_centre: ti.template(),
+        orbits: ti.template(),
+        first_orbital_coords: ti.template(),
+        second_orbital_coords: ti.template()
+    ):
+    """
+    Place the two stationary perturbations of the test runs of every
+    member symmetrically about the grid centre along the x axis, as
+    'SimulationEngine._place_test_perturbations' does.
+    """
+    for member in orbits:
+        first_orbital_radius = orbits[member].first_orbital_radius
+        first_orbital_coords[member] = ti.Vector([
+            grid_centre[None][0] + first_orbital_radius,
+            0.0,
+            grid_centre[None][2]
+        ])
+        second_orbital_coords[member] = ti.Vector([
+            grid_centre[None][0] - first_orbital_radius,
+            0.0,
+            grid_centre[None][2]
+        ])
+        orbits[member].stamp_kind = 1
+
+
+@ti.kernel
+def overlay_ensemble_perturbations(
+        perturb_stamps: ti.template(),
+        orbits: ti.template(),
+        first_orbital_coords: ti.template(),
+        second_orbital_coords: ti.template(),
+        oscillator_positions: ti.template(),
+        oscillator_velocities: ti.template()
+    ):
+    """
+    Overlay the perturbations set by the orbital update onto the sheet of
+    every member, with the 'overlay_perturbations' of the engine.
+
+    Parameters:
+        - perturb_stamps (ti.template()): The stamps of the shared 
+          'GaussianStampCache', in the slots given by the states of the 
+          members.
+        - orbits (ti.template()): The field of 'fused_step_state' structs
+          of the members.
+        - first_orbital_coords, second_orbital_coords (ti.template()): The
+          fields of the coordinates of the spheres of the members.
+        - oscillator_positions, oscillator_velocities (ti.template()): The
+          fields of the heights and velocities of the members, of shape
+          (members, grid size, grid size).
+    """
+    for member in orbits:
+        overlay_perturbations(perturb_stamps, orbits, member,
+                              first_orbital_coords, second_orbital_coords,
+                              oscillator_positions, oscillator_velocities)
+
+
+@ti.kernel
+def ensemble_verlet_half_kick_and_drift(
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        damping_map: ti.template(),
+        oscillator_velocities: ti.template(),
+        oscillator_positions: ti.template(),
+        oscillator_accelerations: ti.template(),
+        timestep: ti.f64
+    ):
+    """
+    As 'verlet_half_kick_and_drift', for the sheets of all the members of
+    the ensemble, stacked along the first axis of the fields. The damping
+    map is shared by the members.
+    """
+    for member, i in ti.ndrange(oscillator_positions.shape[0],
+                                (reduced_grid_start, reduced_grid_end)):
+        for j in range(reduced_grid_start, reduced_grid_end):
+            damping_factor = damping_map[i, j]
+            oscillator_velocities[member, i, j] *= damping_factor
+            oscillator_positions[member, i, j] *= damping_factor
+            oscillator_velocities[member, i, j] += ti.cast(
+                0.5 * timestep * oscillator_accelerations[member, i, j],
+                oscillator_velocities.dtype
+            )
+            oscillator_positions[member, i, j] += ti.cast(
+                timestep * oscillator_velocities[member, i, j],
+                oscillator_positions.dtype
+            )
+
+
+@ti.kernel
+def ensemble_verlet_update_accelerations_and_half_kick(
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        elastic_constant: ti.f64,
+        adjacent_grid_elements: ti.template(),
+        accumulation_dtype: ti.template(),
+        oscillator_velocities: ti.template(),
+        oscillator_positions: ti.template(),
+        oscillator_accelerations: ti.template(),
+        oscillator_mass: ti.f64,
+        timestep: ti.f64
+    ):
+    """
+    As 'verlet_update_accelerations_and_half_kick', for the sheets of all
+    the members of the ensemble, stacked along the first axis of the
+    fields.
+    """
+    for member, i in ti.ndrange(oscillator_positions.shape[0],
+                                (reduced_grid_start, reduced_grid_end)):
+        for j in range(reduced_grid_start, reduced_grid_end):
+            acceleration = update_stacked_oscillator_accelerations(
+                member, i, j, adjacent_grid_elements, accumulation_dtype,
+                oscillator_positions, oscillator_positions[member, i, j],
+                elastic_constant, oscillator_mass
+            )
+            oscillator_accelerations[member, i, j] = ti.cast(
+                acceleration, oscillator_accelerations.dtype
+            )
+            oscillator_velocities[member, i, j] += ti.cast(
+                0.5 * timestep * acceleration, oscillator_velocities.dtype
+            )
+
+
+# =============================================================================
+# Ensemble engine
+# =============================================================================
+class EnsembleEngine:
+    """
+    Headless owner of the fields and orbital states of an ensemble of
+    independent simulations on grids of the same size, advanced together
+    with the velocity Verlet integrator.
+
+    Parameters:
+        - members (list): The (first_sphere_mass, second_sphere_mass,
+          first_orbital_radius) of each member, the radius being None for
+          the default of a quarter of the grid size. As in the engine, a
+          zero mass is replaced by one and the masses of a member are
+          swapped if necessary, so that its first sphere is never the
+          heavier one.
+        - grid_size, run_option, astro_length_scaling, elastic_constant,
+          oscillator_mass, timestep, max_damping_factor,
+          default_polar_angle_step, step_duration, stencil, precision,
+          damping_layer_depth: As for 'SimulationEngine', shared by all
+          the members.
+
+    Notes:
+        - Taichi must be initialised (with 'default_fp=ti.f64') before the
+          ensemble is created.
+        - The sheets of the members are stacked along the first axis of
+          the fields, each member's sheet being contiguous, and the kernels
+          run in parallel over the rows of all the members at once.
+    """
+
+    # The parameters of the orbital updates shared by the members, copied 
+    # into the 'fused_step_state' of each, with 'inspiralling'.
+    shared_orbit_parameters = (
+        "default_first_orbital_radius",
+        "default_polar_angle_step",
+        "step_duration",
+        "astro_length_scaling",
+        "orbital_decay_factor"
+    )
+
+    # The members of the 'fused_step_state' of the members returned by
+    # 'state'.
+    member_quantities = (
+        "first_sphere_mass",
+        "second_sphere_mass",
+        "sphere_mass_ratio",
+        "merging_distance",
+        "astro_summed_masses",
+        "binary_energy_loss_factor",
+        "first_orbital_radius",
+        "second_orbital_radius",
+        "model_binary_separation",
+        "current_polar_angle",
+        "astro_binary_separation",
+        "astro_first_sphere_orbital_speed",
+        "astro_omega",
+        "model_omega",
+        "binary_energy_loss",
+        "astro_orbital_decay",
+        "merged"
+    )
+
+    # Parameters shared by the members which may be altered between steps
+    # with 'set_params' (see 'SimulationEngine.set_params').
+    adjustable_params = (
+        "elastic_constant",
+        "oscillator_mass",
+        "timestep",
+        "max_damping_factor",
+        "default_polar_angle_step",
+        "step_duration"
+    )
+
+    def __init__(
+            self,
+            members,
+            grid_size=301,
+            run_option="Set first sphere orbital radius",
+            astro_length_scaling=1e3,
+            elastic_constant=1e12,
+            oscillator_mass=1.0,
+            timestep=1e-7,
+            max_damping_factor=0.03,
+            default_polar_angle_step=1.0,
+            step_duration=1 / 60,
+            stencil="5-point",
+            precision="f64",
+            damping_layer_depth=None
+        ):
+        if run_option not in orbital_run_options + test_run_options:
+            raise ValueError(f"Unknown run option: {run_option!r}")
+        if stencil not in stencil_options:
+            raise ValueError(f"Unknown stencil: {stencil!r}")
+        if precision not in precision_options:
+            raise ValueError(f"Unknown precision: {precision!r}")
+        if not members:
+            raise ValueError("An ensemble needs at least one member")
+        self.number_of_members = len(members)
+        self.grid_size = grid_size
+        self.run_option = run_option
+        self.astro_length_scaling = astro_length_scaling
+        self.elastic_constant = elastic_constant
+        self.oscillator_mass = oscillator_mass
+        self.timestep = timestep
+        self.max_damping_factor = max_damping_factor
+        self.default_polar_angle_step = default_polar_angle_step
+        self.step_duration = step_duration
+        self.stencil = stencil
+        self.precision = precision
+        self.state_dtype = ti.f64 if precision == "f64" else ti.f32
+        self.accumulation_dtype = ti.f32 if precision == "f32" else ti.f64
+        self.adjacent_grid_elements = laplacian_stencils[stencil]
+        self.test_perturbations_placed = False
+        self.simulation_step_counter = 0
+
+        # ---------------------------------------------------------------------
+        # Grid and damping parameters, as in the engine
+        # ---------------------------------------------------------------------
+        self.grid_centre = ti.Vector.field(3, dtype=ti.i32, shape=())
+        self.grid_centre[None][0] = int((grid_size - 1) / 2)
+        self.grid_centre[None][2] = int((grid_size - 1) / 2)
+        if run_option == "Test 1 - two of four borders damped":
+            self.number_of_damped_borders = 2
+        else:
+            self.number_of_damped_borders = 4
+        self.depth_zeroised_grid_edges = stencil_reach(stencil)
+        if damping_layer_depth is None:
+            damping_layer_depth = grid_size // 20
+        self.damping_layer_depth = damping_layer_depth
+        self.reduced_grid_start = self.depth_zeroised_grid_edges
+        self.reduced_grid_end = grid_size - self.depth_zeroised_grid_edges
+        self.damping_map = ti.field(dtype=self.state_dtype,
+                                    shape=(grid_size, grid_size))
+        self._compute_damping_map()
+
+        # ---------------------------------------------------------------------
+        # Sheet surface fields, with a leading member axis
+        # ---------------------------------------------------------------------
+        sheet_shape = (self.number_of_members, grid_size, grid_size)
+        self.oscillator_positions = ti.field(dtype=self.state_dtype,
+                                             shape=sheet_shape)
+        self.oscillator_velocities = ti.field(dtype=self.state_dtype,
+                                              shape=sheet_shape)
+        self.oscillator_accelerations = ti.field(dtype=self.state_dtype,
+                                                 shape=sheet_shape)
+
+        # ---------------------------------------------------------------------
+        # Parameters and orbital state of the members
+        # ---------------------------------------------------------------------
+        self.default_first_orbital_radius = grid_size / 4
+        self.orbital_decay_factor = (
+            64/5 * newtons_const ** 3 * m_sun ** 3
+            / lightspeed ** 5
+        )
+        self.orbits = fused_step_state.field(shape=self.number_of_members)
+        self.first_orbital_coords = ti.Vector.field(
+            3, dtype=ti.f64, shape=self.number_of_members
+        )
+        self.second_orbital_coords = ti.Vector.field(
+            3, dtype=ti.f64, shape=self.number_of_members
+        )
+        # The shapes of the perturbations are held in the slots of the 
+        # shared stamp cache, as for the engine.
+        self.perturb_stamps = shared_gaussian_stamp_cache()
+        self.perturb_stamp_keys = []
+        weakref.finalize(self, self.perturb_stamps.release, 
+                         self.perturb_stamp_keys)
+        for member, (first_sphere_mass, second_sphere_mass,
+                     first_orbital_radius) in enumerate(members):
+            if first_sphere_mass == 0:
+                first_sphere_mass = 1
+            if second_sphere_mass == 0:
+                second_sphere_mass = 1
+            if first_sphere_mass > second_sphere_mass:
+                second_sphere_mass, first_sphere_mass = (
+                    first_sphere_mass, second_sphere_mass
+                    )
+            if first_orbital_radius is None:
+                first_orbital_radius = self.default_first_orbital_radius
+            sphere_mass_ratio = first_sphere_mass / second_sphere_mass
+            # The radius (and maximum depth) of each perturbation is the 
+            # mass of its sphere, or the summed masses for the merged 
+            # object.
+            stamps = [
+                self.perturb_stamps.acquire(mass, mass)
+                for mass in (first_sphere_mass, second_sphere_mass,
+                             first_sphere_mass + second_sphere_mass)
+            ]
+            self.perturb_stamp_keys.extend(key for key, _ in stamps)
+            (first_perturb_slot,
+             second_perturb_slot,
+             merged_perturb_slot) = [slot for _, slot in stamps]
+            self.orbits[member] = fused_step_state(
+                first_sphere_mass=first_sphere_mass,
+                second_sphere_mass=second_sphere_mass,
+                sphere_mass_ratio=sphere_mass_ratio,
+                merging_distance=first_sphere_mass + second_sphere_mass,
+                astro_summed_masses=(
+                    (second_sphere_mass + first_sphere_mass) * m_sun
+                ),
+                binary_energy_loss_factor=(
+                    32/5 * newtons_const ** 4
+                    * m_sun ** 2
+                    * (first_sphere_mass * second_sphere_mass) ** 2
+                    / (first_sphere_mass + second_sphere_mass) ** 2
+                    / lightspeed ** 5
+                ),
+                first_orbital_radius=first_orbital_radius,
+                second_orbital_radius=(first_orbital_radius
+                                       * sphere_mass_ratio),
+                model_binary_separation=(first_orbital_radius
+                                         * (1 + sphere_mass_ratio)),
+                first_perturb_radius=first_sphere_mass,
+                second_perturb_radius=second_sphere_mass,
+                merged_perturb_radius=first_sphere_mass + second_sphere_mass,
+                first_perturb_slot=first_perturb_slot,
+                second_perturb_slot=second_perturb_slot,
+                merged_perturb_slot=merged_perturb_slot,
+                first_row=0,
+                end_row=grid_size
+            )
+        self._load_shared_orbit_parameters()
+
+    # -------------------------------------------------------------------------
+    # Public interface
+    # -------------------------------------------------------------------------
+    def set_params(self, **params):
+        """
+        Alter one or more of the 'adjustable_params' of all the members
+        between steps.
+
+        Raises:
+            ValueError: If a parameter is not one of 'adjustable_params'.
+        """
+        unknown = sorted(set(params) - set(self.adjustable_params))
+        if unknown:
+            raise ValueError(
+                "Unknown simulation parameter(s): " + ", ".join(unknown)
+            )
+        for name, value in params.items():
+            setattr(self, name, value)
+        if "max_damping_factor" in params:
+            self._compute_damping_map()
+        self._load_shared_orbit_parameters()
+
+    def step(self, n=1):
+        """
+        Advance every member of the ensemble by 'n' steps.
+        """
+        for _ in range(n):
+            if self.run_option in orbital_run_options:
+                advance_ensemble_orbits(
+                    self.grid_centre,
+                    self.orbits,
+                    self.first_orbital_coords,
+                    self.second_orbital_coords
+                )
+                self._overlay_perturbations()
+            elif not self.test_perturbations_placed:
+                self.test_perturbations_placed = True
+                place_ensemble_test_perturbations(
+                    self.grid_centre,
+                    self.orbits,
+                    self.first_orbital_coords,
+                    self.second_orbital_coords
+                )
+                self._overlay_perturbations()
+            ensemble_verlet_half_kick_and_drift(
+                self.reduced_grid_start,
+                self.reduced_grid_end,
+                self.damping_map,
+                self.oscillator_velocities,
+                self.oscillator_positions,
+                self.oscillator_accelerations,
+                self.timestep
+            )
+            ensemble_verlet_update_accelerations_and_half_kick(
+                self.reduced_grid_start,
+                self.reduced_grid_end,
+                self.elastic_constant,
+                self.adjacent_grid_elements,
+                self.accumulation_dtype,
+                self.oscillator_velocities,
+                self.oscillator_positions,
+                self.oscillator_accelerations,
+                self.oscillator_mass,
+                self.timestep
+            )
+            self.simulation_step_counter += 1
+
+    def state(self, include_fields=True):
+        """
+        Return a snapshot of the state of the ensemble.
+
+        Parameters:
+            - include_fields (bool): If True, NumPy copies of the fields of
+              heights and velocities are included.
+
+        Returns:
+            dict: The step counter, and the parameters, orbital state and
+            display quantities of the members, as NumPy arrays with one
+            entry per member (named as in 'SimulationEngine.state',
+            'merged' being 0 or 1). Optionally, the arrays
+            'oscillator_positions' (heights) and 'oscillator_velocities',
+            of shape (members, grid_size, grid_size).
+        """
+        snapshot = {"simulation_step_counter": self.simulation_step_counter}
+        orbits = self.orbits.to_numpy()
+        snapshot.update({name: orbits[name]
+                         for name in self.member_quantities})
+        snapshot["first_orbital_coords"] = self.first_orbital_coords.to_numpy()
+        snapshot["second_orbital_coords"] = (
+            self.second_orbital_coords.to_numpy()
+        )
+        if include_fields:
+            snapshot["oscillator_positions"] = (
+                self.oscillator_positions.to_numpy()
+            )
+            snapshot["oscillator_velocities"] = (
+                self.oscillator_velocities.to_numpy()
+            )
+        return snapshot
+
+    # -------------------------------------------------------------------------
+    # Internal helpers
+    # -------------------------------------------------------------------------
+    def _overlay_perturbations(self):
+        overlay_ensemble_perturbations(
+            self.perturb_stamps.stamps,
+            self.orbits,
+            self.first_orbital_coords,
+            self.second_orbital_coords,
+            self.oscillator_positions,
+            self.oscillator_velocities
+        )
+
+    def _load_shared_orbit_parameters(self):
+        names = self.shared_orbit_parameters + ("inspiralling",)
+        values = [getattr(self, name)
+                  for name in self.shared_orbit_parameters]
+        values.append(self.run_option == "Inspiralling")
+        load_fused_step_state(names, np.array(values, dtype=np.float64),
+                              self.orbits)
+
+    def _compute_damping_map(self):
+        compute_damping_map(
+            self.number_of_damped_borders,
+            self.reduced_grid_start,
+            self.reduced_grid_end,
+            self.damping_layer_depth,
+            self.max_damping_factor,
+            self.damping_map
+        )
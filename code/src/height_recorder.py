@@ -0,0 +1,349 @@
+# =============================================================================
+# Chunked, compressed recording of the height field of the sheet
+# =============================================================================
+# Watching the waves live leaves nothing to analyse afterwards. The
+# 'HeightRecorder' keeps the heights of the sheet every 'interval' steps of
+# an engine, in a directory of chunks of frames on disk:
+#
+#     metadata.json        the grid size, run option and domain, the 
+#                          encoding, and the chunk files with the step of 
+#                          each of their frames
+#     chunk_000000.npy.z   the frames of a chunk, as an .npy array of shape
+#     chunk_000001.npy.z   (frames, grid size, grid size), zlib compressed
+#     ...
+#
+# Copying the heights out of the engine is the only part of recording done
+# by the stepping loop: a kernel copies them into one of a few preallocated
+# buffers. A background writer thread then encodes the frames, and
+# compresses and writes each chunk once it is full. The heights can be
+# quantised to int16 (a 301 x 301 frame of f64 heights is 725 kB, 181 kB
+# in int16), and the quantised frames of a chunk stored as the differences
+# from the previous frame, which mostly leaves small values for zlib to
+# compress once the waves vary slowly between recorded steps.
+#
+#     with HeightRecorder(engine, "run.heights", interval=10,
+#                         quantisation_step=1e-4) as recorder:
+#         for _ in range(10000):
+#             engine.step()
+#             recorder.record()
+#     steps, heights = read_height_recording("run.heights")
+# =============================================================================
+import io
+import json
+import os
+import queue
+import threading
+import zlib
+
+import numpy as np
+
+from simulation_engine import copy_rows_to_array
+
+
+class HeightRecorder:
+    """
+    Records the heights of the sheet of an engine every 'interval' steps,
+    in a directory of chunks written by a background thread.
+
+    Parameters:
+        - engine (SimulationEngine): The engine whose heights are recorded.
+          It may not be the strip of a domain-decomposed run.
+        - directory (str): The directory of the recording, created if it
+          does not exist. A previous recording in it is replaced, its
+          metadata at once and its chunks as they are overwritten.
+        - interval (int): The number of steps between recorded frames.
+        - frames_per_chunk (int): The number of frames of each chunk.
+        - quantisation_step (float): If given, the heights are stored as
+          int16 multiples of this height, rounded to the nearest and
+          clipped to the range of int16. Otherwise they are stored in the
+          precision of the sheet.
+        - delta (bool): If True, each quantised frame of a chunk after the
+          first is stored as its difference from the previous frame (with
+          the wrap-around of int16, which decodes exactly). It has no 
+          effect without a 'quantisation_step'.
+        - compression_level (int): The zlib compression level of the
+          chunks, from 1 (fastest) to 9 (smallest), or 0 for uncompressed
+          .npy chunk files.
+        - buffers (int): The number of frame buffers between the stepping
+          loop and the writer thread. 'record' only waits for the writer
+          when they are all in use.
+
+    Raises:
+        ValueError: If the engine is the strip of a domain-decomposed run.
+    """
+
+    def __init__(
+            self,
+            engine,
+            directory,
+            interval=1,
+            frames_per_chunk=64,
+            quantisation_step=None,
+            delta=True,
+            compression_level=6,
+            buffers=4
+        ):
+        if engine.halo_exchange is not None:
+            raise ValueError(
+                "The strip of a domain-decomposed run cannot be recorded"
+            )
+        if quantisation_step is None:
+            delta = False
+        self.engine = engine
+        self.directory = directory
+        self.interval = interval
+        self.frames_per_chunk = frames_per_chunk
+        self.quantisation_step = quantisation_step
+        self.delta = delta
+        self.compression_level = compression_level
+        self.grid_size = engine.grid_size
+        self.last_recorded_step = None
+        os.makedirs(directory, exist_ok=True)
+        self.metadata = {
+            "grid_size": self.grid_size,
+            "run_option": engine.run_option,
+            # The cells of each row within the domain of the engine, which
+            # are the only ones rendered on replay.
+            "domain_row_spans": engine.domain_row_spans.to_numpy().tolist(),
+            "interval": interval,
+            "dtype": ("<i2" if quantisation_step is not None
+                      else np.dtype(_sheet_dtype(engine)).str),
+            "quantisation_step": quantisation_step,
+            "delta": delta,
+            "compression_level": compression_level,
+            "chunks": []
+        }
+        _write_atomically(os.path.join(directory, "metadata.json"),
+                          json.dumps(self.metadata, indent=1).encode())
+
+        # The buffers cycle from the free queue to the stepping loop, which
+        # fills them, to the frame queue, and back once the writer thread
+        # has encoded their frames. None on the frame queue stops the
+        # writer.
+        self.free_buffers = queue.Queue()
+        for _ in range(buffers):
+            self.free_buffers.put(
+                np.empty((self.grid_size, self.grid_size),
+                         dtype=_sheet_dtype(engine))
+            )
+        self.frames = queue.Queue()
+        self.writer_error = None
+        self.writer = threading.Thread(target=self._write_frames,
+                                       daemon=True)
+        self.writer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception_info):
+        self.close()
+
+    def record(self, force=False):
+        """
+        Record the current heights of the sheet if the step counter of the
+        engine has reached a multiple of 'interval' (or if 'force' is True),
+        and they have not been recorded at this step already.
+
+        Raises:
+            RuntimeError: If the writer thread has failed.
+        """
+        step = self.engine.simulation_step_counter
+        if step == self.last_recorded_step:
+            return
+        if not force and step % self.interval != 0:
+            return
+        if self.writer_error is not None:
+            raise RuntimeError("The height recorder writer failed"
+                               ) from self.writer_error
+        self.last_recorded_step = step
+        buffer = self.free_buffers.get()
+        copy_rows_to_array(0, self.engine.oscillator_positions, buffer)
+        self.frames.put((step, buffer))
+
+    def close(self):
+        """
+        Write the frames still queued and the last (partial) chunk, and stop
+        the writer thread.
+
+        Raises:
+            RuntimeError: If the writer thread has failed.
+        """
+        if self.writer.is_alive():
+            self.frames.put(None)
+            self.writer.join()
+        if self.writer_error is not None:
+            raise RuntimeError("The height recorder writer failed"
+                               ) from self.writer_error
+
+    # -------------------------------------------------------------------------
+    # Writer thread
+    # -------------------------------------------------------------------------
+    def _write_frames(self):
+        """
+        The main function of the writer thread: encode the queued frames
+        into chunks, and write each chunk once it is full.
+        """
+        chunk_steps = []
+        chunk = None
+        try:
+            while True:
+                item = self.frames.get()
+                if item is None:
+                    break
+                step, buffer = item
+                if chunk is None:
+                    chunk = np.empty(
+                        (self.frames_per_chunk, self.grid_size,
+                         self.grid_size),
+                        dtype=np.dtype(self.metadata["dtype"])
+                    )
+                frame = chunk[len(chunk_steps)]
+                if self.quantisation_step is None:
+                    frame[...] = buffer
+                else:
+                    np.clip(np.rint(buffer / self.quantisation_step),
+                            -32768, 32767, out=buffer)
+                    frame[...] = buffer
+                self.free_buffers.put(buffer)
+                chunk_steps.append(step)
+                if len(chunk_steps) == self.frames_per_chunk:
+                    self._write_chunk(chunk, chunk_steps)
+                    chunk_steps = []
+            if chunk_steps:
+                self._write_chunk(chunk[:len(chunk_steps)], chunk_steps)
+        except Exception as exception:
+            self.writer_error = exception
+            # Keep the stepping loop from waiting for a buffer forever.
+            while True:
+                item = self.frames.get()
+                if item is None:
+                    break
+                self.free_buffers.put(item[1])
+
+    def _write_chunk(self, chunk, steps):
+        """
+        Write a chunk of frames and the metadata listing it, each through a
+        temporary file renamed into place, so that a crash leaves the
+        chunks listed in the metadata readable.
+        """
+        if self.delta:
+            # The differences wrap around in int16, and the cumulative sum
+            # in int16 which decodes them wraps back.
+            chunk = chunk.copy()
+            chunk[1:] = np.diff(chunk, axis=0)
+        npy_bytes = io.BytesIO()
+        np.save(npy_bytes, chunk)
+        file_name = f"chunk_{len(self.metadata['chunks']):06d}.npy"
+        data = npy_bytes.getvalue()
+        if self.compression_level:
+            file_name += ".z"
+            data = zlib.compress(data, self.compression_level)
+        _write_atomically(os.path.join(self.directory, file_name), data)
+        self.metadata["chunks"].append({"file": file_name,
+                                        "steps": list(steps)})
+        _write_atomically(os.path.join(self.directory, "metadata.json"),
+                          json.dumps(self.metadata, indent=1).encode())
+
+
+def _sheet_dtype(engine):
+    """The NumPy data type of the fields of the sheet of an engine."""
+    return np.float64 if engine.precision == "f64" else np.float32
+
+
+def _write_atomically(path, data):
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as output_file:
+        output_file.write(data)
+    os.replace(temporary_path, path)
+
+
+class HeightRecording:
+    """
+    Random access to the frames of a recording of 'HeightRecorder', as
+    used by the replay viewer.
+
+    The chunks of an uncompressed recording ('compression_level' 0) are
+    memory mapped, so that only the frames shown are read from disk. A
+    compressed chunk is decompressed and decoded whole when one of its 
+    frames is first needed, and kept until a frame of another chunk is.
+
+    Parameters:
+        - directory (str): The directory of the recording.
+
+    Attributes:
+        - metadata (dict): The metadata of the recording (see 
+          'HeightRecorder').
+        - steps (numpy.ndarray): The step of each frame.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "metadata.json")) as metadata_file:
+            self.metadata = json.load(metadata_file)
+        self.grid_size = self.metadata["grid_size"]
+        steps = []
+        self.chunk_of_frame = []
+        for chunk_index, chunk_entry in enumerate(self.metadata["chunks"]):
+            steps.extend(chunk_entry["steps"])
+            self.chunk_of_frame.extend(
+                (chunk_index, frame)
+                for frame in range(len(chunk_entry["steps"]))
+            )
+        self.steps = np.array(steps, dtype=np.int64)
+        self.cached_chunk_index = None
+        self.cached_chunk = None
+
+    def __len__(self):
+        return len(self.steps)
+
+    def frame(self, index):
+        """
+        Return the heights of the frame 'index', of shape (grid size, grid 
+        size), in the precision of the sheet, or as float64 for quantised
+        recordings.
+        """
+        chunk_index, frame = self.chunk_of_frame[index]
+        heights = self._chunk(chunk_index)[frame]
+        if self.metadata["quantisation_step"] is not None:
+            heights = heights * self.metadata["quantisation_step"]
+        return heights
+
+    def _chunk(self, chunk_index):
+        """
+        The frames of a chunk, memory mapped or decoded, still quantised.
+        """
+        if chunk_index != self.cached_chunk_index:
+            file_name = self.metadata["chunks"][chunk_index]["file"]
+            path = os.path.join(self.directory, file_name)
+            if file_name.endswith(".z"):
+                with open(path, "rb") as chunk_file:
+                    chunk = np.load(io.BytesIO(
+                        zlib.decompress(chunk_file.read())
+                    ))
+            else:
+                chunk = np.load(path, mmap_mode="r")
+            if self.metadata["delta"]:
+                chunk = np.cumsum(chunk, axis=0, dtype=np.int16)
+            self.cached_chunk_index = chunk_index
+            self.cached_chunk = chunk
+        return self.cached_chunk
+
+
+def read_height_recording(directory):
+    """
+    Read the frames of a recording of 'HeightRecorder'.
+
+    Returns:
+        tuple: The step of each frame (a NumPy array), and the heights of
+        the frames, of shape (frames, grid size, grid size), in the
+        precision of the sheet, or as float64 for quantised recordings.
+    """
+    recording = HeightRecording(directory)
+    heights = np.empty(
+        (len(recording), recording.grid_size, recording.grid_size),
+        dtype=(np.float64 if recording.metadata["quantisation_step"] 
+               is not None else np.dtype(recording.metadata["dtype"]))
+    )
+    for index in range(len(recording)):
+        heights[index] = recording.frame(index)
+    return recording.steps, heights
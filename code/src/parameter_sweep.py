@@ -0,0 +1,296 @@
+# =============================================================================
+# Parallel parameter sweeps of the headless simulation engine
+# =============================================================================
+# Characterising the model means running it over a grid of sphere masses,
+# orbital radii, run options and damping settings. Each point of the sweep
+# is an independent run of a 'SimulationEngine', so the runs are fanned out
+# over a pool of worker processes, each with its own Taichi runtime, and
+# their results are collated into one columnar file.
+#
+# Every run is sampled at regular intervals of steps. A sample records the
+# heights of the sheet at a few probe points and the display quantities of
+# the main loop ('astro_omega', 'binary_energy_loss', 'astro_orbital_decay',
+# ...). The output has one row per sample of each run, stored as one NumPy
+# array per column in a compressed '.npz' file, with the parameters of the
+# run repeated on each of its rows:
+#
+#     points = sweep_points(first_sphere_masses=[1, 3],
+#                           second_sphere_masses=[3, 5],
+#                           run_options=["Inspiralling"])
+#     columns = run_sweep(points, "sweep.npz", number_of_steps=2000)
+#     omega_of_first_run = columns["astro_omega"][columns["run_index"] == 0]
+#
+# or from the command line:
+#
+#     python parameter_sweep.py sweep.npz --first-sphere-masses 1 3 \
+#         --run-options Inspiralling "Set first sphere orbital radius"
+# =============================================================================
+import argparse
+import functools
+import itertools
+import multiprocessing
+import os
+
+import numpy as np
+
+from simulation_engine import orbital_run_options, test_run_options
+
+# The parameters varied by a sweep, with the values of a single run of the
+# engine by default. A first orbital radius of None stands for the default
+# of the engine (a quarter of the grid size), a damping layer depth of None
+# for that of a twentieth of the grid size.
+sweep_parameters = {
+    "first_sphere_mass": [3],
+    "second_sphere_mass": [3],
+    "first_orbital_radius": [None],
+    "run_option": ["Set first sphere orbital radius"],
+    "max_damping_factor": [0.03],
+    "damping_layer_depth": [None]
+}
+
+# The quantities of the engine state recorded on each sample of a run.
+sampled_quantities = (
+    "merged",
+    "model_binary_separation",
+    "current_polar_angle",
+    "astro_omega",
+    "model_omega",
+    "binary_energy_loss",
+    "astro_orbital_decay"
+)
+
+
+def sweep_points(
+        first_sphere_masses=None,
+        second_sphere_masses=None,
+        first_orbital_radii=None,
+        run_options=None,
+        max_damping_factors=None,
+        damping_layer_depths=None
+    ):
+    """
+    Build the points of a sweep over every combination of the values given
+    for the 'sweep_parameters'.
+
+    Parameters:
+        - first_sphere_masses, second_sphere_masses, first_orbital_radii,
+          run_options, max_damping_factors, damping_layer_depths (list): 
+          The values of each of the 'sweep_parameters'. A parameter left 
+          as None keeps its default value.
+
+    Returns:
+        list: The engine arguments of each point, as dicts.
+
+    Raises:
+        ValueError: For an unknown run option.
+    """
+    values = dict(sweep_parameters)
+    for name, parameter_values in zip(sweep_parameters, [
+            first_sphere_masses,
+            second_sphere_masses,
+            first_orbital_radii,
+            run_options,
+            max_damping_factors,
+            damping_layer_depths]):
+        if parameter_values is not None:
+            values[name] = list(parameter_values)
+    for run_option in values["run_option"]:
+        if run_option not in orbital_run_options + test_run_options:
+            raise ValueError(f"Unknown run option: {run_option!r}")
+    return [dict(zip(values, combination))
+            for combination in itertools.product(*values.values())]
+
+
+def default_probe_points(grid_size):
+    """
+    Two probe points, on the x and z axes through the grid centre, three
+    eighths of the grid size away from the centre: beyond the default orbit
+    and short of the damping layer.
+    """
+    centre = int((grid_size - 1) / 2)
+    distance = grid_size * 3 // 8
+    return [(centre + distance, centre), (centre, centre + distance)]
+
+
+def available_cpus():
+    """
+    The number of CPUs this process may run on, which inside a container or
+    a cgroup can be fewer than those of the machine.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def initialise_worker(threads):
+    """
+    Initialise the Taichi runtime of a worker process of the pool, with
+    its share of the CPUs.
+    """
+    import taichi as ti
+
+    ti.init(arch=ti.cpu, default_fp=ti.f64, cpu_max_num_threads=threads)
+
+
+def run_sweep_point(
+        point,
+        number_of_steps,
+        sample_interval,
+        probe_points,
+        engine_arguments
+    ):
+    """
+    Run the engine for one point of a sweep, in a worker process.
+
+    Returns:
+        dict: The 'step' of each sample, the value of each of the
+        'sampled_quantities' on each sample, and the 'probe_heights' of
+        shape (samples, probes).
+    """
+    from simulation_engine import SimulationEngine
+
+    engine = SimulationEngine(**engine_arguments, **point)
+    samples = {"step": []}
+    samples.update({name: [] for name in sampled_quantities})
+    samples["probe_heights"] = []
+    for first_step in range(0, number_of_steps, sample_interval):
+        engine.step(min(sample_interval, number_of_steps - first_step))
+        state = engine.state(include_fields=False)
+        samples["step"].append(state["simulation_step_counter"])
+        for name in sampled_quantities:
+            samples[name].append(state[name])
+        # One copy of the sheet per sample: each access of a single cell of
+        # a field synchronises with the device.
+        heights = engine.oscillator_positions.to_numpy()
+        samples["probe_heights"].append(
+            [heights[i, j] for i, j in probe_points]
+        )
+    return {name: np.array(values) for name, values in samples.items()}
+
+
+def run_sweep(
+        points,
+        output_path,
+        number_of_steps=1000,
+        sample_interval=10,
+        probe_points=None,
+        processes=None,
+        **engine_arguments
+    ):
+    """
+    Run the engine for every point of a sweep over a pool of worker
+    processes, and collate the samples of the runs into a columnar file.
+
+    Parameters:
+        - points (list): The engine arguments of each run (see
+          'sweep_points').
+        - output_path (str): The '.npz' file written.
+        - number_of_steps (int): The number of steps of each run.
+        - sample_interval (int): The number of steps between samples.
+        - probe_points (list): The (i, j) grid coordinates of the probes.
+          Defaults to those of 'default_probe_points'.
+        - processes (int): The number of worker processes. Defaults to the
+          number of CPUs available, and to no more than the number of runs.
+          The CPUs available are shared out between the processes as
+          threads of their Taichi runtimes.
+        - engine_arguments: Further arguments of every 'SimulationEngine',
+          such as 'grid_size' or 'integrator'.
+
+    Returns:
+        dict: The columns written, as 1D NumPy arrays of one row per sample
+        of each run: the 'run_index', the 'sweep_parameters' of the run
+        (a first orbital radius or damping layer depth left to the default
+        of the engine is NaN or -1), the 'step', the 'sampled_quantities',
+        and the height at each probe ('probe_<i>_<j>').
+    """
+    grid_size = engine_arguments.get("grid_size", 301)
+    if probe_points is None:
+        probe_points = default_probe_points(grid_size)
+    cpus = available_cpus()
+    if processes is None:
+        processes = cpus
+    processes = max(1, min(processes, len(points)))
+    threads = max(1, cpus // processes)
+
+    run = functools.partial(run_sweep_point,
+                            number_of_steps=number_of_steps,
+                            sample_interval=sample_interval,
+                            probe_points=probe_points,
+                            engine_arguments=engine_arguments)
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes,
+                      initializer=initialise_worker,
+                      initargs=(threads,)) as pool:
+        results = pool.map(run, points, chunksize=1)
+
+    columns = collate_sweep(points, results, probe_points)
+    np.savez_compressed(output_path, **columns)
+    return columns
+
+
+def collate_sweep(points, results, probe_points):
+    """
+    Collate the samples of the runs of a sweep into columns of one row per
+    sample of each run (see 'run_sweep').
+    """
+    columns = {"run_index": [], "step": []}
+    columns.update({name: [] for name in sweep_parameters})
+    columns.update({name: [] for name in sampled_quantities})
+    probe_names = [f"probe_{i}_{j}" for i, j in probe_points]
+    columns.update({name: [] for name in probe_names})
+    for run_index, (point, samples) in enumerate(zip(points, results)):
+        number_of_samples = len(samples["step"])
+        columns["run_index"].append(np.full(number_of_samples, run_index))
+        columns["step"].append(samples["step"])
+        for name in sweep_parameters:
+            value = point[name]
+            if value is None:
+                value = np.nan if name == "first_orbital_radius" else -1
+            columns[name].append(np.full(number_of_samples, value))
+        for name in sampled_quantities:
+            columns[name].append(samples[name])
+        for probe, name in enumerate(probe_names):
+            columns[name].append(samples["probe_heights"][:, probe])
+    return {name: np.concatenate(values) for name, values in columns.items()}
+
+
+# =============================================================================
+# Command line entry point
+# =============================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run a parameter sweep of the headless simulation "
+                    "engine over a pool of worker processes."
+    )
+    parser.add_argument("output_path",
+                        help="the columnar output file (.npz)")
+    parser.add_argument("--first-sphere-masses", type=int, nargs="+")
+    parser.add_argument("--second-sphere-masses", type=int, nargs="+")
+    parser.add_argument("--first-orbital-radii", type=float, nargs="+")
+    parser.add_argument("--run-options", nargs="+",
+                        choices=orbital_run_options + test_run_options)
+    parser.add_argument("--max-damping-factors", type=float, nargs="+")
+    parser.add_argument("--damping-layer-depths", type=int, nargs="+")
+    parser.add_argument("--grid-size", type=int, default=301)
+    parser.add_argument("--integrator", default="Velocity Verlet")
+    parser.add_argument("--number-of-steps", type=int, default=1000)
+    parser.add_argument("--sample-interval", type=int, default=10)
+    parser.add_argument("--processes", type=int)
+    arguments = parser.parse_args()
+
+    points = sweep_points(
+        first_sphere_masses=arguments.first_sphere_masses,
+        second_sphere_masses=arguments.second_sphere_masses,
+        first_orbital_radii=arguments.first_orbital_radii,
+        run_options=arguments.run_options,
+        max_damping_factors=arguments.max_damping_factors,
+        damping_layer_depths=arguments.damping_layer_depths
+    )
+    run_sweep(points,
+              arguments.output_path,
+              number_of_steps=arguments.number_of_steps,
+              sample_interval=arguments.sample_interval,
+              processes=arguments.processes,
+              grid_size=arguments.grid_size,
+              integrator=arguments.integrator)
+    print(f"{len(points)} runs written to {arguments.output_path}")
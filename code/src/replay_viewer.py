@@ -0,0 +1,294 @@
+# =============================================================================
+# Replay viewer of recorded runs
+# =============================================================================
+# Renders the frames of a recording of 'HeightRecorder' in a GGUI window,
+# with the mesh and camera controls of the interactive application, but no
+# simulation: each rendered frame only copies the heights of one recorded
+# frame into the field from which the mesh is built. Demos and reviews of a
+# long run then need no more than a laptop able to draw the mesh at display
+# rate. Recordings written without compression ('compression_level=0') are
+# memory mapped, so that only the frames shown are read from disk.
+#
+#     python replay_viewer.py run.heights --speed 30
+#
+# Controls:
+#     Frame slider          seek, or scrub while dragging
+#     Speed slider          recorded frames per second (negative to rewind)
+#     Space / Play button   pause or resume the playback
+#     Left / Right arrows   step back or forward by one frame
+#     Left mouse drag       rotate the view, right mouse drag: zoom
+# =============================================================================
+import argparse
+import time
+
+import numpy as np
+import taichi as ti
+
+from height_recorder import HeightRecording
+from simulation_engine import copy_array_to_rows, initialize_array_of_vectors
+from surface_rendering import (
+    color_longname_to_RGB,
+    position_camera,
+    rescale_oscillator_heights,
+    rescale_surface_for_rendering,
+    set_grid_colors,
+    set_indices,
+    set_triangle_vertices,
+    update_camera_view_from_mouse,
+    update_zoom_from_mouse
+)
+
+
+def replay(
+        directory,
+        playback_speed=30.0,
+        vertical_scale=10.0,
+        grid_chequer_size=0,
+        window_resolution=(1280, 800)
+    ):
+    """
+    Play a recording back in a GGUI window, until the window is closed.
+
+    Parameters:
+        - directory (str): The directory of the recording.
+        - playback_speed (float): The initial playback speed, in recorded
+          frames per second; a negative speed plays the recording backwards.
+        - vertical_scale (float): The initial scaling of the heights, as
+          set by the "Vertical Scale" slider of the application.
+        - grid_chequer_size (int): The initial size of the chequers of the
+          surface, 0 for a uniform colour.
+        - window_resolution (tuple): The size of the window, in pixels.
+
+    Notes:
+        - Taichi must be initialised before the replay.
+    """
+    recording = HeightRecording(directory)
+    number_of_frames = len(recording)
+    if number_of_frames == 0:
+        raise ValueError(f"The recording {directory!r} holds no frames")
+    grid_size = recording.grid_size
+    render_dtype = (ti.f64 if recording.metadata["dtype"] == "<f8"
+                    else ti.f32)
+    frame_dtype = np.float64 if render_dtype == ti.f64 else np.float32
+
+    # -------------------------------------------------------------------------
+    # Fields of the rendered mesh, as in the interactive application
+    # -------------------------------------------------------------------------
+    oscillator_positions = ti.field(dtype=render_dtype,
+                                    shape=(grid_size, grid_size))
+    domain_row_spans = ti.Vector.field(2, dtype=ti.i32, shape=grid_size)
+    domain_row_spans.from_numpy(
+        np.array(recording.metadata["domain_row_spans"], dtype=np.int32)
+    )
+    grid_size_args = {
+        "n": 3,
+        "dtype": render_dtype,
+        "shape": (grid_size, grid_size)
+    }
+    height_rescaled_positions = ti.Vector.field(**grid_size_args)
+    initialize_array_of_vectors(height_rescaled_positions, grid_size)
+    surface_for_rendering = ti.Vector.field(**grid_size_args)
+    initialize_array_of_vectors(surface_for_rendering, grid_size)
+    rendering_rescale = 1 / grid_size
+
+    if "test" in recording.metadata["run_option"].lower():
+        color_name = "dodgerblue"
+    else:
+        color_name = "orange"
+    rgb_color, complementary_rgb_color = color_longname_to_RGB(
+        color_name,
+        [0, 0, 0],
+        [0, 0, 0]
+    )
+    rgb_color = tuple(rgb_color)
+    complementary_rgb_color = tuple(complementary_rgb_color)
+    grid_colors = ti.Vector.field(n=3,
+                                  dtype=render_dtype,
+                                  shape=(grid_size * grid_size))
+    num_triangles = (grid_size - 1) * (grid_size - 1) * 2
+    indices = ti.field(int, num_triangles * 3)
+    index_count = set_indices(grid_size, domain_row_spans, indices)
+    vertices = ti.Vector.field(n=3,
+                               dtype=render_dtype,
+                               shape=(grid_size * grid_size))
+
+    rendering_window = ti.ui.Window(name="Replay",
+                                    res=window_resolution,
+                                    vsync=True)
+    canvas = rendering_window.get_canvas()
+    scene = rendering_window.get_scene()
+    gui = rendering_window.get_gui()
+
+    # -------------------------------------------------------------------------
+    # Playback and camera state
+    # -------------------------------------------------------------------------
+    # The playback position is fractional, so that any speed advances it
+    # smoothly; the frame shown is the one it falls in.
+    playback_position = 0.0
+    playing = True
+    shown_frame = None
+    shown_chequer_size = None
+    previous_time = time.perf_counter()
+    prev_mouse_pos = None
+    prev_zoom_mouse_pos = None
+    LMB_already_active = False
+    RMB_already_active = False
+    horiz_angle_deg = 0.0
+    vert_angle_deg = 45.0
+    camera_zoom = 2.0
+
+    while rendering_window.running:
+        current_time = time.perf_counter()
+        if playing:
+            playback_position += playback_speed * (current_time
+                                                   - previous_time)
+            # Stop at either end of the recording.
+            if not 0 <= playback_position <= number_of_frames - 1:
+                playback_position = min(max(playback_position, 0),
+                                        number_of_frames - 1)
+                playing = False
+        previous_time = current_time
+
+        for event in rendering_window.get_events(ti.ui.PRESS):
+            if event.key == ti.ui.SPACE:
+                playing = not playing
+            elif event.key in (ti.ui.LEFT, ti.ui.RIGHT):
+                playing = False
+                playback_position = min(max(
+                    round(playback_position)
+                    + (1 if event.key == ti.ui.RIGHT else -1),
+                    0), number_of_frames - 1)
+
+        frame_index = int(playback_position)
+        with gui.sub_window("Replay", 0.01, 0.01, 0.32, 0.22) as window:
+            window.text(f"Step {recording.steps[frame_index]}, frame "
+                        f"{frame_index + 1} of {number_of_frames}")
+            selected_frame = window.slider_int("Frame",
+                                               frame_index,
+                                               0,
+                                               number_of_frames - 1)
+            if selected_frame != frame_index:
+                playback_position = float(selected_frame)
+                frame_index = selected_frame
+            playback_speed = window.slider_float("Speed (frames/s)",
+                                                 playback_speed,
+                                                 -120.0,
+                                                 120.0)
+            vertical_scale = window.slider_float("Vertical Scale",
+                                                 vertical_scale,
+                                                 0.0,
+                                                 20.0)
+            grid_chequer_size = window.slider_int("Grid Chequer Size",
+                                                  grid_chequer_size,
+                                                  0,
+                                                  100)
+            if window.button("Pause" if playing else "Play"):
+                playing = not playing
+
+        # Only a new frame is read from the recording.
+        if frame_index != shown_frame:
+            shown_frame = frame_index
+            copy_array_to_rows(
+                0,
+                oscillator_positions,
+                np.ascontiguousarray(recording.frame(frame_index),
+                                     dtype=frame_dtype)
+            )
+        if grid_chequer_size != shown_chequer_size:
+            shown_chequer_size = grid_chequer_size
+            set_grid_colors(
+                grid_size,
+                domain_row_spans,
+                grid_chequer_size,
+                rgb_color,
+                complementary_rgb_color,
+                grid_colors
+            )
+        rescale_oscillator_heights(
+            grid_size,
+            domain_row_spans,
+            vertical_scale,
+            oscillator_positions,
+            height_rescaled_positions
+        )
+        rescale_surface_for_rendering(
+            grid_size,
+            domain_row_spans,
+            rendering_rescale,
+            height_rescaled_positions,
+            surface_for_rendering
+        )
+        set_triangle_vertices(
+            grid_size,
+            domain_row_spans,
+            surface_for_rendering,
+            vertices
+        )
+        scene.mesh(
+            vertices,
+            indices=indices,
+            index_count=index_count,
+            per_vertex_color=grid_colors,
+            two_sided=True
+        )
+
+        # Adjust the view with the mouse, as in the interactive application.
+        if rendering_window.is_pressed(ti.ui.LMB):
+            (vert_angle_deg,
+             horiz_angle_deg,
+             prev_mouse_pos,
+             LMB_already_active) = update_camera_view_from_mouse(
+                 rendering_window,
+                 vert_angle_deg,
+                 horiz_angle_deg,
+                 prev_mouse_pos,
+                 LMB_already_active,
+                 None,
+                 None
+             )
+            vert_angle_deg = min(max(vert_angle_deg, -45.0), 90.0)
+        else:
+            LMB_already_active = False
+            prev_mouse_pos = None
+        if rendering_window.is_pressed(ti.ui.RMB):
+            (camera_zoom,
+             prev_zoom_mouse_pos,
+             RMB_already_active) = update_zoom_from_mouse(
+                 rendering_window,
+                 camera_zoom,
+                 prev_zoom_mouse_pos,
+                 RMB_already_active,
+                 None
+             )
+        else:
+            RMB_already_active = False
+            prev_zoom_mouse_pos = None
+        camera = ti.ui.make_camera()
+        position_camera(camera, vert_angle_deg, horiz_angle_deg, camera_zoom)
+        scene.set_camera(camera)
+        scene.ambient_light(color=(0.5, 0.5, 0.5))
+        scene.point_light(pos=(2, 4, 4), color=(1.0, 1.0, 1.0))
+        canvas.scene(scene)
+        rendering_window.show()
+
+
+# =============================================================================
+# Command line entry point
+# =============================================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay a recording of the height field of a run."
+    )
+    parser.add_argument("directory",
+                        help="the directory of the recording")
+    parser.add_argument("--speed", type=float, default=30.0,
+                        help="playback speed, in recorded frames per second")
+    parser.add_argument("--vertical-scale", type=float, default=10.0)
+    parser.add_argument("--chequer-size", type=int, default=0)
+    arguments = parser.parse_args()
+
+    ti.init(arch=ti.cpu, default_fp=ti.f64)
+    replay(arguments.directory,
+           playback_speed=arguments.speed,
+           vertical_scale=arguments.vertical_scale,
+           grid_chequer_size=arguments.chequer_size)
@@ -0,0 +1,6693 @@
+# =============================================================================
+# Headless simulation engine for the analogue gravitational wave model
+# =============================================================================
+# This module holds the numerical core of the simulation: the Taichi kernels
+# that move the binary along its orbit, stamp the gravitational wells onto the
+# elastic sheet, damp the grid borders and integrate the oscillator lattice.
+#
+# The solver state is scalar: each oscillator only moves vertically, so the
+# fields 'oscillator_positions' and 'oscillator_velocities' hold the height
+# and vertical velocity of each cell. The x and z coordinates of a cell are
+# its grid indices, and are only added when the render mesh is built.
+#
+# It deliberately imports nothing from tkinter or the Taichi GGUI, so that the
+# physics can be stepped on render-less batch nodes. The interactive
+# application ("Simple Analogue Gravitational Waves Simulation.py") drives the
+# same engine once per rendered frame.
+#
+# Taichi must be initialised by the caller before an engine is created, e.g.
+#
+#     ti.init(arch=ti.cpu, default_fp=ti.f64)
+#     engine = SimulationEngine(run_option="Inspiralling")
+#     engine.step(1000)
+#     heights = engine.state()['oscillator_positions']
+# =============================================================================
+import bisect
+import collections
+import json
+import math
+import os
+import time
+import weakref
+
+import numpy as np
+import taichi as ti
+from taichi.lang import impl
+
+# Run options understood by the engine. These are the same strings as those
+# offered by the run option dropdown of the GUI.
+orbital_run_options = ["Set first sphere orbital radius",
+                       "Inspiralling"]
+test_run_options = ["Test 1 - two of four borders damped",
+                    "Test 2 - all four borders damped"]
+
+# Time integrators for the oscillator lattice:
+# - "Legacy RK4": the original per-cell RK4 scheme (four evaluations of the 
+#   forces per step, with the neighbours held at the start of the step).
+# - "Velocity Verlet": the symplectic velocity Verlet (leapfrog) scheme (one
+#   evaluation of the forces per step, no long-run energy drift).
+# - "Stage-buffered RK4": the classical RK4 scheme applied to the lattice 
+#   as a whole, each stage being completed for all cells before the next.
+# - "Crank-Nicolson": the implicit trapezoidal scheme, solved with a 
+#   matrix-free conjugate gradient method. It is unconditionally stable, so
+#   the timestep can be made orders of magnitude larger when only the 
+#   long-wavelength radiation is of interest.
+# - "Spectral": the exact solution of the free lattice over a timestep, 
+#   computed mode by mode in the discrete sine basis of the reduced grid 
+#   (NumPy FFT) from the lattice dispersion relation. It has no stability
+#   limit on the timestep and no dispersion error beyond that of the 
+#   stencil itself; the perturbations and the linear sponge are applied in
+#   between the steps, as for the other integrators. It requires a stencil
+#   of reach 1 and the linear sponge.
+integrator_options = ["Legacy RK4",
+                      "Velocity Verlet",
+                      "Stage-buffered RK4",
+                      "Crank-Nicolson",
+                      "Spectral"]
+
+# Discrete Laplacians available for the spring lattice. Each stencil is a 
+# tuple of (x_offset, y_offset, weight) entries for the neighbours of an 
+# oscillator, the weight of the oscillator itself being minus their sum. 
+# The stencils are fixed at compile time, so the loop over the neighbours
+# is unrolled and the offsets and weights become constants.
+# - "5-point": the original nearest-neighbour springs.
+# - "Isotropic 9-point": adds the diagonal neighbours, making the leading
+#   dispersion error independent of the direction of propagation.
+# - "4th-order 13-point": fourth order accurate along each axis, reducing 
+#   grid dispersion so that a smaller grid gives the same waveform fidelity.
+stencil_options = ["5-point",
+                   "Isotropic 9-point",
+                   "4th-order 13-point"]
+laplacian_stencils = {
+    "5-point": (
+        ( 0,  1, 1.0),  # North: directly above
+        ( 1,  0, 1.0),  # East: directly to the right
+        ( 0, -1, 1.0),  # South: directly below
+        (-1,  0, 1.0)   # West: directly to the left
+    ),
+    "Isotropic 9-point": (
+        ( 0,  1, 2 / 3), ( 1,  0, 2 / 3), ( 0, -1, 2 / 3), (-1,  0, 2 / 3),
+        ( 1,  1, 1 / 6), ( 1, -1, 1 / 6), (-1, -1, 1 / 6), (-1,  1, 1 / 6)
+    ),
+    "4th-order 13-point": (
+        ( 0,  1, 4 / 3), ( 1,  0, 4 / 3), ( 0, -1, 4 / 3), (-1,  0, 4 / 3),
+        ( 0,  2, -1 / 12), ( 2,  0, -1 / 12),
+        ( 0, -2, -1 / 12), (-2,  0, -1 / 12)
+    )
+}
+
+
+def stencil_reach(stencil):
+    """The furthest a stencil of 'laplacian_stencils' reaches, in cells."""
+    return max(
+        max(abs(x_offset), abs(y_offset))
+        for x_offset, y_offset, _ in laplacian_stencils[stencil]
+    )
+
+
+# Floating point precision of the simulation. The orbital state and the 
+# scalar parameters are always f64.
+# - "f64": the original double precision throughout.
+# - "f32": single precision fields of the sheet, halving the memory 
+#   traffic of the stencil, with the stencil sum also in single precision.
+# - "f32 with f64 accumulation": single precision fields of the sheet, 
+#   with the stencil sum accumulated in double precision.
+precision_options = ["f64",
+                     "f32",
+                     "f32 with f64 accumulation"]
+
+# Memory layouts (Taichi SNode trees) of the fields of the sheet.
+# - "Dense": one row-major array per field, as originally.
+# - "Interleaved": the fields of a group (such as the heights, velocities
+#   and accelerations) share one row-major array of cells, i.e. an array 
+#   of structures rather than a structure of arrays.
+# - "Blocked": one array per field, stored as square tiles of 'tile_size'
+#   cells a side, so that the neighbours in the adjacent rows of a cell are
+#   mostly in the same tile, and so in cache.
+# - "Blocked Morton": as "Blocked", with the cells of each tile stored in 
+#   Morton (Z-curve) order.
+layout_options = ["Dense",
+                  "Interleaved",
+                  "Blocked",
+                  "Blocked Morton"]
+
+# Absorbing boundaries of the sheet, applied in a layer of cells along each
+# damped border.
+# - "Linear sponge": the original sponge, which scales the heights and 
+#   velocities down each step by a factor falling linearly from 
+#   'max_damping_factor' at the border to zero at the inner edge of the 
+#   layer.
+# - "PML": a perfectly matched layer, whose damping rate grows as a power 
+#   of the depth into the layer and is set from the reflection coefficient
+#   wanted. It reflects far less than the linear sponge in a thinner layer,
+#   so the grid can be made smaller for the same scenario.
+boundary_options = ["Linear sponge",
+                    "PML"]
+
+# Computational domains of the sheet.
+# - "Square": the whole grid, as originally.
+# - "Circular": the disc inscribed in the reduced grid, about the grid 
+#   centre, with the linear sponge applied in a ring at its rim. The waves
+#   of the binary are circular, so the damping is the same in every 
+#   direction, and the corners of the grid, about a fifth of its cells, 
+#   are not updated at all.
+domain_options = ["Square",
+                  "Circular"]
+
+# Ways of moving the binary of the "Inspiralling" run option along its 
+# shrinking orbit.
+# - "Trajectory table": the separation follows the inspiral integrated 
+#   ahead of time, in astrophysical time, by an adaptive ODE solver (see
+#   'InspiralTrajectory'), each step advancing the astrophysical time by
+#   'model_omega' / 'astro_omega' seconds. The orbital quantities of a step
+#   are computed from the interpolated separation.
+# - "Per-step update": the original update, which shrinks the separation 
+#   by the rate of decay at the start of each step times that time. It is 
+#   the update made by the 'EnsembleEngine' for each of its members.
+inspiral_options = ["Trajectory table",
+                    "Per-step update"]
+
+# -----------------------------------------------------------------------------
+# Physical constants (SI units)
+# -----------------------------------------------------------------------------
+newtons_const = 6.67430e-11   # Newton's constant
+lightspeed = 3.0e8            # Speed of light in vacuum
+m_sun = 1.989e30              # Solar mass
+
+
+# =============================================================================
+# Taichi kernels and functions
+# =============================================================================
+@ti.kernel
+def initialize_array_of_vectors(
+        array_to_be_initialized: ti.template(),
+        array_size: ti.i32
+        ):
+    """
+    Initialize a 2D array of vectors with integer grid coordinates.
+
+    This function iterates over a 'array_size x array_size' array and sets 
+    each vector within 'array_to_be_initialized' to contain its grid 
+    coordinates and a zero for the second array dimension representing the 
+    height.
+    Specifically, each vector at position '(i, j)' is initialized as 
+    '[i, 0.0, j]'.
+
+    Parameters:
+        - array_to_be_initialized (ti.template()): The 2D array of vectors to 
+          initialize, with a shape of '(array_size, array_size, 3)'.
+        - array_size (int): The size of the grid along each dimension, 
+          defining the bounds of 'i' and 'j' (0 to 'array_size - 1').
+    """
+    for i in range(array_size):
+        for j in range(array_size):
+            array_to_be_initialized[i, j][0] = i
+            array_to_be_initialized[i, j][1] = 0.0
+            array_to_be_initialized[i, j][2] = j
+
+
+@ti.kernel
+def calculate_orbital_coords(
+        grid_centre: ti.template(),
+        sphere_orbital_radius: ti.f64,
+        sphere_polar_angle: ti.f64,
+        orbital_coords: ti.template()
+    ):
+    """
+    Calculate the Cartesian coordinates of a sphere, or its perturbation,
+    on its orbital path.
+
+    This function computes the (x, y, z) coordinates of a sphere based on 
+    its orbital radius and polar angle relative to a grid centre. The polar 
+    angle is converted from degrees to radians before being used to compute 
+    the offsets in the x and z dimensions, while the y-coordinate is fixed 
+    to 0. The result is stored in the 'orbital_coords' template.
+
+    Parameters:
+        - grid_centre (ti.template): The 3D coordinates of the grid centre, 
+          typically a vector, from which the orbital position is offset.
+        - sphere_orbital_radius (ti.f64): The orbital radius of the sphere, 
+          determining the distance from the grid centre in the x-z plane.
+        - sphere_polar_angle (ti.f64): The polar angle of the sphere's orbit 
+          in degrees, used to calculate its position along the orbital path.
+        - orbital_coords (ti.template): A template to store the calculated 
+          sphere's coordinates (x, 0, z) based on the orbital parameters.
+
+    Returns:
+        None: The function does not return a value, but stores the calculated 
+        coordinates in the 'orbital_coords' template.
+
+    Notes:
+        - The y-coordinate of the sphere is fixed at 0 in this calculation.
+        - The polar angle is assumed to be in degrees and is converted to 
+          radians before calculating the offsets.
+        - The function uses the grid centre's x and z coordinates as the 
+          reference point for the sphere's orbital position.
+
+    Example:
+        If the grid centre is at (10, 0, 10), the orbital radius is 5, and the 
+        polar angle is 30 degrees, the function will compute the sphere's 
+        position relative to the grid centre.
+    """
+    orbital_coords[None] = orbital_coords_on_grid(grid_centre,
+                                                  sphere_orbital_radius,
+                                                  sphere_polar_angle)
+
+
+@ti.func
+def orbital_coords_on_grid(grid_centre, sphere_orbital_radius,
+                           sphere_polar_angle):
+    """
+    The coordinates of a sphere on its orbit, for 'calculate_orbital_coords'
+    and the orbital updates (see 'update_orbit').
+    """
+    angle_rad = ti.math.radians(sphere_polar_angle)
+    x_offset = sphere_orbital_radius * ti.cos(angle_rad)
+    y_offset = sphere_orbital_radius * ti.sin(angle_rad)
+    return ti.Vector([grid_centre[None][0] + x_offset,
+                      0.0,
+                      grid_centre[None][2] + y_offset])
+
+
+@ti.kernel
+def create_gaussian_perturb_array(
+        perturb_radius: ti.i32,
+        perturb_max_depth: ti.f64,
+        perturb_array: ti.template()
+    ):
+    """
+    Creates a 2D array of vertical positions relative to the unperturbed sheet 
+    surface, forming an axially symmetric inverted Gaussian distribution. This 
+    represents the 'gravitational well' of each orbiting mass.
+
+    The perturbation values are computed based on a Gaussian function that 
+    decreases with distance from the centre up to and including the value
+    perturb_radius.
+
+    Parameters:
+        - perturb_radius (ti.i32): The radius of the (circular) perturbation 
+          area in the 2D grid.
+        - perturb_max_depth (ti.f64): The maximum depth of the perturbation at 
+          the centre of the distribution.
+        - perturb_array (ti.template): A Taichi field (template) that stores 
+          the perturbation values at each point in the 2D grid.
+
+    Returns:
+        None: This function updates the perturb_array field in place with the 
+        computed perturbation values.
+    """
+    for offset_x, offset_y in ti.ndrange(
+        (-perturb_radius, perturb_radius + 1),
+        (-perturb_radius, perturb_radius + 1)
+    ):
+        distance_squared = offset_x * offset_x + offset_y * offset_y
+        if distance_squared <= perturb_radius * perturb_radius:
+            perturb_depth = (
+                perturb_max_depth
+                * -ti.exp(
+                    -(abs(offset_x) / abs(perturb_radius)) ** 2
+                    -(abs(offset_y) / abs(perturb_radius)) ** 2)
+            )
+            perturb_array[
+                perturb_radius + offset_x, 
+                perturb_radius + offset_y
+            ] = perturb_depth
+
+
+@ti.kernel
+def create_gaussian_stamp(
+        stamp_slot: ti.i32,
+        perturb_radius: ti.i32,
+        perturb_max_depth: ti.f64,
+        sub_cell_offset_x: ti.f64,
+        sub_cell_offset_y: ti.f64,
+        perturb_stamps: ti.template()
+    ):
+    """
+    Write the inverted Gaussian of 'create_gaussian_perturb_array' into a
+    slot of the stamps of a 'GaussianStampCache'.
+
+    Parameters:
+        - stamp_slot (ti.i32): The slot written, the first index of 
+          'perturb_stamps'.
+        - perturb_radius (ti.i32): The radius of the (circular) perturbation
+          area in the 2D grid.
+        - perturb_max_depth (ti.f64): The maximum depth of the perturbation 
+          at the centre of the distribution.
+        - sub_cell_offset_x, sub_cell_offset_y (ti.f64): The offset, in 
+          grid units, of the centre of the Gaussian from the central cell 
+          of the stamp.
+        - perturb_stamps (ti.template): The Taichi field of the stamps, of
+          shape (slots, side, side), whose slot is updated in place. The 
+          cells of the slot outside the circle of the perturbation are set
+          to zero.
+    """
+    for offset_x, offset_y in ti.ndrange(
+        (-perturb_radius, perturb_radius + 1),
+        (-perturb_radius, perturb_radius + 1)
+    ):
+        perturb_depth = 0.0
+        distance_squared = offset_x * offset_x + offset_y * offset_y
+        if distance_squared <= perturb_radius * perturb_radius:
+            perturb_depth = (
+                perturb_max_depth
+                * -ti.exp(
+                    -(abs(offset_x - sub_cell_offset_x) 
+                      / abs(perturb_radius)) ** 2
+                    -(abs(offset_y - sub_cell_offset_y) 
+                      / abs(perturb_radius)) ** 2)
+            )
+        perturb_stamps[
+            stamp_slot,
+            perturb_radius + offset_x, 
+            perturb_radius + offset_y
+        ] = perturb_depth
+
+
+@ti.kernel
+def overlay_perturb_shape_onto_grid(
+        perturb_radius: ti.i32,
+        perturb_stamps: ti.template(),
+        perturb_slot: ti.i32,
+        first_orbital_coords: ti.template(),
+        perturb_centre_grid_coords: ti.template(),
+        first_row: ti.i32,
+        end_row: ti.i32,
+        oscillator_positions: ti.template(),
+        oscillator_velocities: ti.template()
+    ):
+    """
+    Overlay the perturbation shape onto the grid of oscillators (the sheet 
+    surface).
+
+    - This function applies the perturbation to the grid surface, centred 
+      around the current orbital coordinates of each sphere.
+    - The perturbation is applied within a circular radius and affects only 
+      the vertical positions of oscillators that are at a higher elevation 
+      than the perturbation depth at each point. 
+    - Oscillators that are deeper remain unaffected, allowing them to relax
+      naturally according to the successive steps of the numerical integration.
+
+    Parameters:
+        - perturb_radius (ti.i32): The radius of the perturbation in grid 
+          units.
+        - perturb_stamps (ti.template()): The stamps of a 
+          'GaussianStampCache', of which the slot 'perturb_slot' holds the
+          vertical depth of the perturbation at each point within this 
+          radius.
+        - perturb_slot (ti.i32): The slot of the perturbation.
+        - orbital_coords (ti.template()): The current x and y coordinates on 
+          the surface representing the sphere position, floating point, 
+          upon which the perturbation shape is overlaid.
+        - perturb_centre_grid_coords (ti.template()): The actual discrete 
+          grid positions (in the array) of the elements of the perturbation
+          structure shape. The shape is aligned with the floating point
+          value for the central position.
+        - first_row (ti.i32): The first row of the sheet to which the 
+          perturbation is applied (inclusive).
+        - end_row (ti.i32): The row after the last one to which the 
+          perturbation is applied (exclusive). Only the strip of a 
+          domain-decomposed run applies it to less than the whole grid.
+        - oscillator_positions (ti.template()): A 2D array containing the 
+          height of each oscillator comprising the rendered surface.
+        - oscillator_velocities (ti.template()): A 2D array containing the
+          vertical velocity of each oscillator comprising the rendered 
+          surface.
+
+    Note:
+        - For those oscillators whose positions are modified by the function, 
+          the velocity is reset to zero.
+    """
+    overlay_perturb_shape_onto_rows(
+        perturb_radius,
+        perturb_stamps,
+        perturb_slot,
+        first_orbital_coords,
+        None,
+        first_row,
+        end_row,
+        oscillator_positions,
+        oscillator_velocities
+    )
+
+
+@ti.func
+def overlay_perturb_shape_onto_rows(
+        perturb_radius,
+        perturb_stamps,
+        perturb_slot,
+        orbital_coords,
+        member: ti.template(),
+        first_row,
+        end_row,
+        oscillator_positions,
+        oscillator_velocities
+    ):
+    """
+    Overlay a perturbation onto the rows from 'first_row' to 'end_row' of 
+    the sheet, for 'overlay_perturb_shape_onto_grid' and 
+    'overlay_perturbations'. A negative 'perturb_radius' overlays nothing.
+
+    The sphere is the element 'member' of the field 'orbital_coords', and 
+    the sheet that of the fields of the heights and velocities: None for 
+    the fields of an engine, or the index of a member of an ensemble (see 
+    'sheet_cell').
+    """
+    grid_coords_x = int(ti.round(orbital_coords[member][0]))
+    grid_coords_y = int(ti.round(orbital_coords[member][2]))
+
+    for offset_x, offset_y in ti.ndrange(
+            (-perturb_radius, perturb_radius + 1), 
+            (-perturb_radius, perturb_radius + 1)
+        ):
+        if not first_row <= grid_coords_x + offset_x < end_row:
+            continue
+        cell = sheet_cell(member, grid_coords_x + offset_x, 
+                          grid_coords_y + offset_y)
+        if perturb_stamps[
+            perturb_slot,
+            perturb_radius + offset_x, 
+            perturb_radius + offset_y
+        ] < oscillator_positions[cell]:
+            oscillator_positions[cell] = ti.cast(perturb_stamps[
+                perturb_slot,
+                perturb_radius + offset_x, 
+                perturb_radius + offset_y
+            ], oscillator_positions.dtype)
+            
+        if first_row <= grid_coords_x < end_row:
+            oscillator_velocities[
+                sheet_cell(member, grid_coords_x, grid_coords_y)
+            ] = ti.cast(0.0, oscillator_velocities.dtype)
+
+
+@ti.func
+def overlay_perturbations(
+        perturb_stamps,
+        step_state,
+        member: ti.template(),
+        first_orbital_coords,
+        second_orbital_coords,
+        oscillator_positions,
+        oscillator_velocities
+    ):
+    """
+    Overlay the perturbations set by the last orbital update of a binary
+    (see 'update_orbit' for the arguments): those of the spheres, that of
+    the merged object, or none, onto the rows of the sheet given by its 
+    state. For 'fused_step' and the 'EnsembleEngine'.
+    """
+    # The perturbations not overlaid have their loops emptied by a 
+    # negative radius.
+    state = step_state[member]
+    overlay_perturb_shape_onto_rows(
+        state.first_perturb_radius if state.stamp_kind == 1 else -1,
+        perturb_stamps, state.first_perturb_slot, first_orbital_coords, 
+        member, state.first_row, state.end_row,
+        oscillator_positions, oscillator_velocities
+    )
+    overlay_perturb_shape_onto_rows(
+        state.second_perturb_radius if state.stamp_kind == 1 else -1,
+        perturb_stamps, state.second_perturb_slot, second_orbital_coords, 
+        member, state.first_row, state.end_row,
+        oscillator_positions, oscillator_velocities
+    )
+    overlay_perturb_shape_onto_rows(
+        state.merged_perturb_radius if state.stamp_kind == 3 else -1,
+        perturb_stamps, state.merged_perturb_slot, first_orbital_coords, 
+        member, state.first_row, state.end_row,
+        oscillator_positions, oscillator_velocities
+    )
+
+
+def is_member_index(member):
+    """
+    Whether the 'member' given to a Taichi function shared by the engine 
+    and the 'EnsembleEngine' is the index of a member of an ensemble, 
+    whose fields carry a leading member axis, rather than None for the 
+    fields of an engine. Functions test this with 'ti.static'.
+    """
+    return member is not None
+
+
+@ti.func
+def sheet_cell(member: ti.template(), i, j):
+    """
+    The index of the cell (i, j) of the sheet of 'member' (see 
+    'is_member_index') in the fields of the heights and velocities.
+    """
+    if ti.static(is_member_index(member)):
+        return ti.Vector([member, i, j])
+    else:
+        return ti.Vector([i, j])
+
+
+@ti.func
+def in_reduced_grid(i, j, reduced_grid_start, reduced_grid_end):
+    """
+    Whether the cell (i, j) lies within the reduced grid, i.e. is one of the
+    oscillators updated by the time integrators.
+
+    The integrator kernels loop over the cells of a field of the sheet 
+    (a struct-for) rather than over a range of indices, so that the cells 
+    are visited in the order in which they are stored, whichever of the 
+    'layout_options' is in use. This function skips the zeroised grid 
+    edges and any padding of the tiled layouts.
+    """
+    return (reduced_grid_start <= i < reduced_grid_end
+            and reduced_grid_start <= j < reduced_grid_end)
+
+
+def is_row_spans(cells):
+    """
+    Whether the cells over which a kernel loops are given as the spans of
+    the rows of a circular domain (see 'compute_domain_row_spans'), rather
+    than as a field over whose cells to loop. Kernels test this with 
+    'ti.static', so each is compiled for one kind of loop or the other.
+    """
+    return isinstance(cells, ti.MatrixField)
+
+
+@ti.kernel
+def compute_domain_row_spans(
+        grid_size: ti.i32,
+        grid_centre: ti.template(),
+        domain_radius: ti.f64,
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        domain_row_spans: ti.template()
+    ):
+    """
+    Compute the cells of each row of the grid within a circular domain, 
+    or within the whole grid.
+
+    Parameters:
+        - grid_size (ti.i32): The size of the grid.
+        - grid_centre (ti.template()): The centre of the domain.
+        - domain_radius (ti.f64): The radius of the domain, in cells, or 
+          zero for the whole grid. The cells of the domain are those whose
+          centre lies strictly within this distance of the grid centre, 
+          and within the reduced grid.
+        - reduced_grid_start (ti.i32): The starting index of the reduced 
+          grid (inclusive).
+        - reduced_grid_end (ti.i32): The ending index of the reduced grid
+          (exclusive).
+        - domain_row_spans (ti.template()): Taichi vector field of 
+          'grid_size' entries, holding the first column of each row within
+          the domain and the column after the last one (the two being 
+          equal for the rows outside the domain).
+    """
+    centre_i = grid_centre[None][0]
+    centre_j = grid_centre[None][2]
+    for i in range(grid_size):
+        first_column = 0
+        end_column = grid_size
+        if domain_radius > 0.0:
+            first_column = reduced_grid_start
+            end_column = reduced_grid_start
+            offset = ti.cast(i - centre_i, ti.f64)
+            if (reduced_grid_start <= i < reduced_grid_end
+                    and offset * offset < domain_radius * domain_radius):
+                half_width = ti.sqrt(domain_radius * domain_radius
+                                     - offset * offset)
+                first_column = ti.max(
+                    ti.cast(ti.floor(centre_j - half_width), ti.i32) + 1,
+                    reduced_grid_start
+                )
+                end_column = ti.min(
+                    ti.cast(ti.ceil(centre_j + half_width), ti.i32),
+                    reduced_grid_end
+                )
+        domain_row_spans[i] = ti.Vector([first_column, end_column])
+
+
+@ti.kernel
+def update_oscillator_positions_velocities_RK4(
+        number_of_damped_borders: ti.i32,
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        damping_layer_depth: ti.i32,
+        active_cells: ti.template(),
+        damping_map: ti.template(),
+        elastic_constant: ti.f64,
+        adjacent_grid_elements: ti.template(),
+        accumulation_dtype: ti.template(),
+        oscillator_velocities: ti.template(),
+        oscillator_positions: ti.template(),
+        oscillator_accelerations: ti.template(),
+        oscillator_mass:ti.f64,
+        timestep: ti.f64,
+        sampling: ti.template(),
+        detector_slot: ti.i32,
+        detector_step: ti.i64,
+        detector_points: ti.template(),
+        detector_steps: ti.template(),
+        detector_heights: ti.template(),
+        detector_velocities: ti.template()
+    ):
+    """
+    Update the positions and velocities of oscillators using the fourth-order 
+    Runge-Kutta (RK4) method.
+
+    This function updates the positions and velocities of oscillators in 
+    a 2D grid based on the RK4 integration method. The update takes into 
+    account the elastic properties of the sheet and masses of the oscillators.
+    The boundary damping of the linear sponge is applied by a first loop
+    of the kernel, over the damping layers, before any oscillator is 
+    updated: the update is made in place, so the neighbours read by the 
+    stencil must all be damped already.
+
+    Parameters:
+        - number_of_damped_borders (ti.i32): The number of damped borders
+          (see 'damp_grid_boundary').
+        - reduced_grid_start (ti.i32): The starting index of the grid 
+          to be updated (inclusive).
+        - reduced_grid_end ti(.i32): The ending index of the grid to be 
+          updated (exclusive).
+        - damping_layer_depth (ti.i32): The depth of the damping layers.
+        - active_cells (ti.template()): Taichi field over whose cells the 
+          update loops: the field of heights, or the activity mask of the 
+          activity-tracked mode, which holds only the active blocks. Or 
+          the row spans of the circular domain (see 'is_row_spans').
+        - damping_map (ti.template()): Taichi field of the factor by which
+          the linear sponge scales each oscillator, computed by 
+          'compute_damping_map'.
+        - elastic_constant (ti.f64: The elastic constant for the oscillators' 
+          restoring force.
+        - adjacent_grid_elements (ti.template()): The Laplacian stencil, 
+          one of the 'laplacian_stencils', used for calculating the 
+          interactions between the oscillators.
+        - accumulation_dtype (ti.template()): The Taichi data type in which
+          the stencil sum is accumulated.
+        - oscillator_positions (ti.template()): Taichi field holding current 
+          heights of the oscillators.
+        - oscillator_velocities (ti.template()): Taichi field holding current 
+          vertical velocities of the oscillators.
+        - oscillator_accelerations (ti.template()): Taichi field holding  
+          current accelerations of the oscillators.
+        - timestep (ti.f64): The time step for each RK4 iteration.
+        - sampling, ..., detector_velocities: The virtual detectors, 
+          sampled at the end of the step (see 'sample_detectors').
+
+    Returns:
+        None: This function updates the fields, oscillator_positions and 
+        oscillator_velocities in-place and has no return value.
+    """
+    advance_cells_RK4(
+        number_of_damped_borders,
+        reduced_grid_start,
+        reduced_grid_end,
+        damping_layer_depth,
+        active_cells,
+        damping_map,
+        elastic_constant,
+        adjacent_grid_elements,
+        accumulation_dtype,
+        oscillator_velocities,
+        oscillator_positions,
+        oscillator_mass,
+        timestep
+    )
+    sample_detectors(
+        sampling,
+        detector_slot,
+        detector_step,
+        detector_points,
+        oscillator_positions,
+        oscillator_velocities,
+        detector_steps,
+        detector_heights,
+        detector_velocities
+    )
+
+
+@ti.func
+def advance_cells_RK4(
+        number_of_damped_borders,
+        reduced_grid_start,
+        reduced_grid_end,
+        damping_layer_depth,
+        active_cells,
+        damping_map,
+        elastic_constant,
+        adjacent_grid_elements,
+        accumulation_dtype,
+        oscillator_velocities,
+        oscillator_positions,
+        oscillator_mass,
+        timestep
+    ):
+    """
+    Damp the sheet, then advance the cells of 'active_cells' within the 
+    reduced grid by one RK4 step, for 
+    'update_oscillator_positions_velocities_RK4' and 'fused_step'.
+    """
+    damp_cells(
+        number_of_damped_borders, reduced_grid_start, reduced_grid_end,
+        damping_layer_depth, active_cells, damping_map,
+        oscillator_velocities, oscillator_positions
+    )
+    if ti.static(is_row_spans(active_cells)):
+        for i in range(reduced_grid_start, reduced_grid_end):
+            for j in range(active_cells[i][0], active_cells[i][1]):
+                advance_oscillator_RK4(
+                    i, j, elastic_constant,
+                    adjacent_grid_elements, accumulation_dtype,
+                    oscillator_velocities, oscillator_positions,
+                    oscillator_mass, timestep
+                )
+    else:
+        for i, j in active_cells:
+            if not in_reduced_grid(i, j, reduced_grid_start, 
+                                   reduced_grid_end):
+                continue
+            advance_oscillator_RK4(
+                i, j, elastic_constant,
+                adjacent_grid_elements, accumulation_dtype,
+                oscillator_velocities, oscillator_positions,
+                oscillator_mass, timestep
+            )
+
+
+@ti.func
+def advance_oscillator_RK4(
+        i, j,
+        elastic_constant,
+        adjacent_grid_elements,
+        accumulation_dtype,
+        oscillator_velocities,
+        oscillator_positions,
+        oscillator_mass,
+        timestep
+    ):
+    """
+    Advance by one RK4 step the oscillator at (i, j), for
+    'update_oscillator_positions_velocities_RK4'.
+    """
+    vel = oscillator_velocities[i, j] 
+    pos = oscillator_positions[i, j]
+
+    k1 = timestep * vel
+    l1 = timestep * update_oscillator_accelerations(
+        i, j, adjacent_grid_elements, accumulation_dtype,
+        oscillator_positions, pos, elastic_constant, oscillator_mass
+    )
+    k2 = timestep * (vel + 0.5 * l1)
+    l2 = timestep * update_oscillator_accelerations(
+        i, j, adjacent_grid_elements, accumulation_dtype,
+        oscillator_positions, pos + 0.5 * k1, elastic_constant, oscillator_mass
+    )
+    k3 = timestep * (vel + 0.5 * l2)
+    l3 = timestep * update_oscillator_accelerations(
+        i, j, adjacent_grid_elements, accumulation_dtype,
+        oscillator_positions, pos + 0.5 * k2, elastic_constant, oscillator_mass
+    )
+    k4 = timestep * (vel + l3)
+    l4 = timestep * update_oscillator_accelerations(
+        i, j, adjacent_grid_elements, accumulation_dtype,
+        oscillator_positions, pos + k3, elastic_constant, oscillator_mass
+    )
+    oscillator_velocities[i, j] += ti.cast(
+        (l1 + 2 * l2 + 2 * l3 + l4) / 6.0, oscillator_velocities.dtype
+    )
+    oscillator_positions[i, j] += ti.cast(
+        (k1 + 2 * k2 + 2 * k3 + k4) / 6.0, oscillator_positions.dtype
+    )
+
+
+@ti.func
+def update_oscillator_accelerations(
+        i, j,
+        adjacent_grid_elements,
+        accumulation_dtype,
+        oscillator_positions,
+        pos,
+        elastic_constant,
+        oscillator_mass
+    ):
+    """
+    Calculate the acceleration of an oscillator based on interactions with 
+    adjacent grid elements.
+
+    This function computes the accelerations of the oscillators. 
+    This is done by considering the forces on each one exerted by the 
+    adjacent oscillators. Hooke's law is then used to to compute the forces, 
+    and the acceleration are updated using Newton's second law.
+
+    Parameters:
+        - grid_pos_x (int): Row index of the current oscillator in the grid.
+        - grid_pos_y (int): Column index of the current oscillator in the grid.
+        - adjacent_grid_elements (ti.template()): The Laplacian stencil, 
+          one of the 'laplacian_stencils'. Each (x_offset, y_offset, weight)
+          entry specifies the relative position of a neighbouring 
+          oscillator and the relative stiffness of the spring joining them.
+        - accumulation_dtype (ti.template()): The Taichi data type in which
+          the forces are summed; it may be wider than that of the field of
+          heights.
+        - oscillator_positions (ti.template()): Taichi field containing 
+          current heights of all oscillators in the grid.
+        - pos (ti.f64): Current height of the oscillator. 
+        - elastic_constant (ti.f64): The elastic constant that governs the 
+          force exerted by the springs between oscillators. All springs 
+          modelled have an identical value of this constant.
+
+    Returns:
+        ti.f64: The computed vertical acceleration of the oscillator at 
+        position (i, j), given by Newton's second law, F = ma, where F is the
+        net force and m is the mass of the oscillator. All oscillators have
+        identical masses.
+
+    Notes:
+        The stencil is a compile-time constant, so the loop below is 
+        unrolled with the offsets and weights in place of field loads. The
+        neighbours reached by the stencil must lie within the grid, which
+        the zeroised grid edges guarantee for the reduced grid.
+    """
+    force = ti.cast(0.0, accumulation_dtype)
+    spring_constant = ti.cast(elastic_constant, accumulation_dtype)
+    centre_height = ti.cast(pos, accumulation_dtype)
+    for x_offset, y_offset, weight in ti.static(adjacent_grid_elements):
+        displacement = centre_height - ti.cast(
+            oscillator_positions[i + x_offset, j + y_offset],
+            accumulation_dtype
+        )
+        force -= (ti.cast(weight, accumulation_dtype) * spring_constant
+                  * displacement)
+    # Newton's second law: F = ma
+    return force / ti.cast(oscillator_mass, accumulation_dtype)
+
+
+@ti.func
+def update_stacked_oscillator_accelerations(
+        k, i, j,
+        adjacent_grid_elements,
+        accumulation_dtype,
+        oscillator_positions,
+        pos,
+        elastic_constant,
+        oscillator_mass
+    ):
+    """
+    As 'update_oscillator_accelerations', for the oscillator at (i, j) of 
+    the k-th of several sheets (or parts of a sheet) stacked along the 
+    first axis of a 3D field of heights.
+    """
+    force = ti.cast(0.0, accumulation_dtype)
+    spring_constant = ti.cast(elastic_constant, accumulation_dtype)
+    centre_height = ti.cast(pos, accumulation_dtype)
+    for x_offset, y_offset, weight in ti.static(adjacent_grid_elements):
+        displacement = centre_height - ti.cast(
+            oscillator_positions[k, i + x_offset, j + y_offset],
+            accumulation_dtype
+        )
+        force -= (ti.cast(weight, accumulation_dtype) * spring_constant
+                  * displacement)
+    # Newton's second law: F = ma
+    return force / ti.cast(oscillator_mass, accumulation_dtype)
+
+
+@ti.kernel
+def verlet_half_kick_and_drift(
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        active_cells: ti.template(),
+        damping_map: ti.template(),
+        oscillator_velocities: ti.template(),
+        oscillator_positions: ti.template(),
+        oscillator_accelerations: ti.template(),
+        timestep: ti.f64
+    ):
+    """
+    First part of a velocity Verlet step: advance the velocities of the 
+    oscillators by half a timestep using their stored accelerations, then 
+    move the oscillators by a full timestep.
+
+    Together with 'verlet_update_accelerations_and_half_kick', this forms 
+    the velocity Verlet (leapfrog) scheme. Only one evaluation of the forces
+    is needed per timestep, and the scheme is symplectic, so the energy of 
+    the undamped lattice does not drift over long runs. No neighbours are 
+    read in this part of the step, so the boundary damping of the linear 
+    sponge is applied to each oscillator here, just before its half kick, 
+    rather than in a separate pass over the sheet.
+
+    Parameters:
+        - reduced_grid_start (ti.i32): The starting index of the grid 
+          to be updated (inclusive).
+        - reduced_grid_end (ti.i32): The ending index of the grid to be 
+          updated (exclusive).
+        - active_cells (ti.template()): Taichi field over whose cells the 
+          update loops: the field of heights, or the activity mask of the 
+          activity-tracked mode, which holds only the active blocks. Or 
+          the row spans of the circular domain (see 'is_row_spans').
+        - damping_map (ti.template()): Taichi field of the factor by which
+          the linear sponge scales each oscillator, computed by 
+          'compute_damping_map'.
+        - oscillator_velocities (ti.template()): Taichi field holding the
+          vertical velocities of the oscillators, updated in-place.
+        - oscillator_positions (ti.template()): Taichi field holding the 
+          heights of the oscillators, updated in-place.
+        - oscillator_accelerations (ti.template()): Taichi field holding 
+          the accelerations computed at the end of the previous step.
+        - timestep (ti.f64): The integration timestep.
+    """
+    half_kick_and_drift_cells(
+        reduced_grid_start,
+        reduced_grid_end,
+        active_cells,
+        damping_map,
+        oscillator_velocities,
+        oscillator_positions,
+        oscillator_accelerations,
+        timestep
+    )
+
+
+@ti.func
+def half_kick_and_drift_cells(
+        reduced_grid_start,
+        reduced_grid_end,
+        active_cells,
+        damping_map,
+        oscillator_velocities,
+        oscillator_positions,
+        oscillator_accelerations,
+        timestep
+    ):
+    """
+    Damp, half kick and drift the cells of 'active_cells' within the reduced
+    grid, for 'verlet_half_kick_and_drift' and 'fused_step'.
+    """
+    if ti.static(is_row_spans(active_cells)):
+        for i in range(reduced_grid_start, reduced_grid_end):
+            for j in range(active_cells[i][0], active_cells[i][1]):
+                half_kick_and_drift_oscillator(
+                    i, j, damping_map, oscillator_velocities,
+                    oscillator_positions, oscillator_accelerations, timestep
+                )
+    else:
+        for i, j in active_cells:
+            if not in_reduced_grid(i, j, reduced_grid_start, 
+                                   reduced_grid_end):
+                continue
+            half_kick_and_drift_oscillator(
+                i, j, damping_map, oscillator_velocities,
+                oscillator_positions, oscillator_accelerations, timestep
+            )
+
+
+@ti.func
+def half_kick_and_drift_oscillator(
+        i, j,
+        damping_map,
+        oscillator_velocities,
+        oscillator_positions,
+        oscillator_accelerations,
+        timestep
+    ):
+    """
+    Damp, kick by half a timestep and drift the oscillator at (i, j), for
+    'verlet_half_kick_and_drift'.
+    """
+    damping_factor = damping_map[i, j]
+    oscillator_velocities[i, j] *= damping_factor
+    oscillator_positions[i, j] *= damping_factor
+    oscillator_velocities[i, j] += ti.cast(
+        0.5 * timestep * oscillator_accelerations[i, j],
+        oscillator_velocities.dtype
+    )
+    oscillator_positions[i, j] += ti.cast(
+        timestep * oscillator_velocities[i, j],
+        oscillator_positions.dtype
+    )
+
+
+@ti.kernel
+def verlet_update_accelerations_and_half_kick(
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        active_cells: ti.template(),
+        elastic_constant: ti.f64,
+        adjacent_grid_elements: ti.template(),
+        accumulation_dtype: ti.template(),
+        oscillator_velocities: ti.template(),
+        oscillator_positions: ti.template(),
+        oscillator_accelerations: ti.template(),
+        oscillator_mass: ti.f64,
+        timestep: ti.f64,
+        sampling: ti.template(),
+        detector_slot: ti.i32,
+        detector_step: ti.i64,
+        detector_points: ti.template(),
+        detector_steps: ti.template(),
+        detector_heights: ti.template(),
+        detector_velocities: ti.template()
+    ):
+    """
+    Second part of a velocity Verlet step: compute and store the 
+    accelerations at the new positions of the oscillators, and advance 
+    their velocities by the remaining half timestep.
+
+    Parameters:
+        - reduced_grid_start (ti.i32): The starting index of the grid 
+          to be updated (inclusive).
+        - reduced_grid_end (ti.i32): The ending index of the grid to be 
+          updated (exclusive).
+        - active_cells (ti.template()): Taichi field over whose cells the 
+          update loops: the field of heights, or the activity mask of the 
+          activity-tracked mode, which holds only the active blocks. Or 
+          the row spans of the circular domain (see 'is_row_spans').
+        - elastic_constant (ti.f64): The elastic constant for the 
+          oscillators' restoring force.
+        - adjacent_grid_elements (ti.template()): The Laplacian stencil, 
+          one of the 'laplacian_stencils'.
+        - accumulation_dtype (ti.template()): The Taichi data type in which
+          the stencil sum is accumulated.
+        - oscillator_velocities (ti.template()): Taichi field holding the
+          vertical velocities of the oscillators, updated in-place.
+        - oscillator_positions (ti.template()): Taichi field holding the 
+          heights of the oscillators.
+        - oscillator_accelerations (ti.template()): Taichi field in which 
+          the new accelerations are stored for the next step.
+        - oscillator_mass (ti.f64): The mass of each oscillator.
+        - timestep (ti.f64): The integration timestep.
+        - sampling, ..., detector_velocities: The virtual detectors, 
+          sampled at the end of the step (see 'sample_detectors').
+
+    Note:
+        - The stored accelerations do not see changes made to the heights 
+          between steps (overlaid perturbations, boundary damping) until 
+          the end of the following step.
+    """
+    update_accelerations_and_half_kick_cells(
+        reduced_grid_start,
+        reduced_grid_end,
+        active_cells,
+        elastic_constant,
+        adjacent_grid_elements,
+        accumulation_dtype,
+        oscillator_velocities,
+        oscillator_positions,
+        oscillator_accelerations,
+        oscillator_mass,
+        timestep
+    )
+    sample_detectors(
+        sampling,
+        detector_slot,
+        detector_step,
+        detector_points,
+        oscillator_positions,
+        oscillator_velocities,
+        detector_steps,
+        detector_heights,
+        detector_velocities
+    )
+
+
+@ti.func
+def update_accelerations_and_half_kick_cells(
+        reduced_grid_start,
+        reduced_grid_end,
+        active_cells,
+        elastic_constant,
+        adjacent_grid_elements,
+        accumulation_dtype,
+        oscillator_velocities,
+        oscillator_positions,
+        oscillator_accelerations,
+        oscillator_mass,
+        timestep
+    ):
+    """
+    Update the accelerations of the cells of 'active_cells' within the 
+    reduced grid and half kick them, for 
+    'verlet_update_accelerations_and_half_kick' and 'fused_step'.
+    """
+    if ti.static(is_row_spans(active_cells)):
+        for i in range(reduced_grid_start, reduced_grid_end):
+            for j in range(active_cells[i][0], active_cells[i][1]):
+                update_acceleration_and_half_kick_oscillator(
+                    i, j, elastic_constant, adjacent_grid_elements,
+                    accumulation_dtype, oscillator_velocities,
+                    oscillator_positions, oscillator_accelerations,
+                    oscillator_mass, timestep
+                )
+    else:
+        for i, j in active_cells:
+            if not in_reduced_grid(i, j, reduced_grid_start, 
+                                   reduced_grid_end):
+                continue
+            update_acceleration_and_half_kick_oscillator(
+                i, j, elastic_constant, adjacent_grid_elements,
+                accumulation_dtype, oscillator_velocities,
+                oscillator_positions, oscillator_accelerations,
+                oscillator_mass, timestep
+            )
+
+
+@ti.func
+def update_acceleration_and_half_kick_oscillator(
+        i, j,
+        elastic_constant,
+        adjacent_grid_elements,
+        accumulation_dtype,
+        oscillator_velocities,
+        oscillator_positions,
+        oscillator_accelerations,
+        oscillator_mass,
+        timestep
+    ):
+    """
+    Store the acceleration of the oscillator at (i, j) and kick it by half
+    a timestep, for 'verlet_update_accelerations_and_half_kick'.
+    """
+    acceleration = update_oscillator_accelerations(
+        i, j, adjacent_grid_elements, accumulation_dtype,
+        oscillator_positions, oscillator_positions[i, j],
+        elastic_constant, oscillator_mass
+    )
+    oscillator_accelerations[i, j] = ti.cast(
+        acceleration, oscillator_accelerations.dtype
+    )
+    oscillator_velocities[i, j] += ti.cast(
+        0.5 * timestep * acceleration, oscillator_velocities.dtype
+    )
+
+
+@ti.kernel
+def stage_buffered_RK4_stage(
+        stage: ti.template(),
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        elastic_constant: ti.f64,
+        adjacent_grid_elements: ti.template(),
+        accumulation_dtype: ti.template(),
+        oscillator_velocities: ti.template(),
+        oscillator_positions: ti.template(),
+        stage_velocities_in: ti.template(),
+        stage_positions_in: ti.template(),
+        stage_velocities_out: ti.template(),
+        stage_positions_out: ti.template(),
+        summed_velocity_slopes: ti.template(),
+        summed_position_slopes: ti.template(),
+        oscillator_mass: ti.f64,
+        timestep: ti.f64,
+        sampling: ti.template(),
+        detector_slot: ti.i32,
+        detector_step: ti.i64,
+        detector_points: ti.template(),
+        detector_steps: ti.template(),
+        detector_heights: ti.template(),
+        detector_velocities: ti.template()
+    ):
+    """
+    Perform one stage of a method-of-lines fourth-order Runge-Kutta step 
+    for the whole lattice.
+
+    Unlike 'update_oscillator_positions_velocities_RK4', every stage is 
+    evaluated for all oscillators before the next stage begins, so that 
+    the neighbours of an oscillator are also at the intermediate stage 
+    when its acceleration is computed. This is the classical RK4 scheme 
+    applied to the lattice as a whole, and serves as a reference.
+
+    Parameters:
+        - stage (ti.template()): The stage number, 1 to 4 (compile-time).
+        - reduced_grid_start (ti.i32): The starting index of the grid 
+          to be updated (inclusive).
+        - reduced_grid_end (ti.i32): The ending index of the grid to be 
+          updated (exclusive).
+        - elastic_constant (ti.f64): The elastic constant for the 
+          oscillators' restoring force.
+        - adjacent_grid_elements (ti.template()): The Laplacian stencil, 
+          one of the 'laplacian_stencils'.
+        - accumulation_dtype (ti.template()): The Taichi data type in which
+          the stencil sum is accumulated.
+        - oscillator_velocities, oscillator_positions (ti.template()): The
+          state at the start of the step, updated in-place by stage 4.
+        - stage_velocities_in, stage_positions_in (ti.template()): The 
+          intermediate state at which the slopes of this stage are 
+          evaluated. For stage 1, this is the state at the start of the 
+          step.
+        - stage_velocities_out, stage_positions_out (ti.template()): The 
+          intermediate state for the next stage (unused by stage 4).
+        - summed_velocity_slopes, summed_position_slopes (ti.template()):
+          Running weighted sums of the slopes of the stages.
+        - oscillator_mass (ti.f64): The mass of each oscillator.
+        - timestep (ti.f64): The integration timestep.
+        - sampling, ..., detector_velocities: The virtual detectors, 
+          sampled at the end of stage 4 (see 'sample_detectors').
+    """
+    for i, j in oscillator_positions:
+        if not in_reduced_grid(i, j, reduced_grid_start, reduced_grid_end):
+            continue
+        position_slope = stage_velocities_in[i, j]
+        velocity_slope = update_oscillator_accelerations(
+            i, j, adjacent_grid_elements, accumulation_dtype,
+            stage_positions_in, stage_positions_in[i, j],
+            elastic_constant, oscillator_mass
+        )
+        # The fields may be single precision (see 'precision_options'), 
+        # hence the casts of the f64 results stored in them.
+        if ti.static(stage == 1):
+            summed_position_slopes[i, j] = ti.cast(
+                position_slope, summed_position_slopes.dtype
+            )
+            summed_velocity_slopes[i, j] = ti.cast(
+                velocity_slope, summed_velocity_slopes.dtype
+            )
+        elif ti.static(stage < 4):
+            summed_position_slopes[i, j] += ti.cast(
+                2.0 * position_slope, summed_position_slopes.dtype
+            )
+            summed_velocity_slopes[i, j] += ti.cast(
+                2.0 * velocity_slope, summed_velocity_slopes.dtype
+            )
+
+        if ti.static(stage < 4):
+            # Stages 1 and 2 lead to the midpoint, stage 3 to the end point.
+            stage_fraction = 0.5 if ti.static(stage < 3) else 1.0
+            stage_positions_out[i, j] = ti.cast(
+                oscillator_positions[i, j]
+                + stage_fraction * timestep * position_slope,
+                stage_positions_out.dtype
+            )
+            stage_velocities_out[i, j] = ti.cast(
+                oscillator_velocities[i, j]
+                + stage_fraction * timestep * velocity_slope,
+                stage_velocities_out.dtype
+            )
+        else:
+            oscillator_positions[i, j] += ti.cast(
+                timestep / 6.0 
+                * (summed_position_slopes[i, j] + position_slope),
+                oscillator_positions.dtype
+            )
+            oscillator_velocities[i, j] += ti.cast(
+                timestep / 6.0 
+                * (summed_velocity_slopes[i, j] + velocity_slope),
+                oscillator_velocities.dtype
+            )
+    if ti.static(stage == 4):
+        sample_detectors(
+            sampling,
+            detector_slot,
+            detector_step,
+            detector_points,
+            oscillator_positions,
+            oscillator_velocities,
+            detector_steps,
+            detector_heights,
+            detector_velocities
+        )
+
+
+@ti.func
+def apply_crank_nicolson_matrix(
+        i, j,
+        adjacent_grid_elements,
+        accumulation_dtype,
+        field,
+        elastic_constant,
+        oscillator_mass,
+        timestep
+    ):
+    """
+    Apply the Crank-Nicolson system matrix, A = I + (dt^2 / 4) (k / m) L, 
+    to a field at position (i, j), L being the (negative) discrete Laplacian
+    of the spring lattice. 
+
+    The matrix is never formed: (k / m) L is minus the acceleration given by
+    'update_oscillator_accelerations', which evaluates the same stencil of 
+    adjacent grid elements as the explicit integrators. 
+    """
+    return field[i, j] - 0.25 * timestep * timestep * (
+        update_oscillator_accelerations(
+            i, j, adjacent_grid_elements, accumulation_dtype, field,
+            field[i, j], elastic_constant, oscillator_mass
+        )
+    )
+
+
+@ti.kernel
+def crank_nicolson_right_hand_side(
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        elastic_constant: ti.f64,
+        adjacent_grid_elements: ti.template(),
+        accumulation_dtype: ti.template(),
+        oscillator_velocities: ti.template(),
+        oscillator_positions: ti.template(),
+        implicit_solution: ti.template(),
+        implicit_residual: ti.template(),
+        oscillator_mass: ti.f64,
+        timestep: ti.f64
+    ) -> ti.f64:
+    """
+    Set up the linear system of a Crank-Nicolson step of the lattice.
+
+    Eliminating the new velocities from the trapezoidal rule 
+        x' = x + dt/2 (v + v'),  v' = v + dt/2 (a(x) + a(x')) 
+    leaves the symmetric positive definite system 
+        (I + (dt^2 / 4) (k / m) L) x' = x + dt v + (dt^2 / 4) a(x) 
+    for the new heights x'. This kernel stores the right hand side in 
+    'implicit_residual' and the explicit prediction x + dt v, used as the
+    initial guess, in 'implicit_solution'.
+
+    Parameters:
+        - reduced_grid_start (ti.i32): The starting index of the grid 
+          to be updated (inclusive).
+        - reduced_grid_end (ti.i32): The ending index of the grid to be 
+          updated (exclusive).
+        - elastic_constant (ti.f64): The elastic constant for the 
+          oscillators' restoring force.
+        - adjacent_grid_elements (ti.template()): The Laplacian stencil, 
+          one of the 'laplacian_stencils'.
+        - accumulation_dtype (ti.template()): The Taichi data type in which
+          the stencil sum is accumulated.
+        - oscillator_velocities, oscillator_positions (ti.template()): The
+          state at the start of the step.
+        - implicit_solution (ti.template()): Taichi field receiving the 
+          initial guess for the new heights.
+        - implicit_residual (ti.template()): Taichi field receiving the 
+          right hand side of the system.
+        - oscillator_mass (ti.f64): The mass of each oscillator.
+        - timestep (ti.f64): The integration timestep.
+
+    Returns:
+        ti.f64: The squared norm of the right hand side, used for the 
+        convergence criterion of the solver.
+    """
+    right_hand_side_norm_squared = 0.0
+    for i, j in oscillator_positions:
+        if not in_reduced_grid(i, j, reduced_grid_start, reduced_grid_end):
+            continue
+        acceleration = update_oscillator_accelerations(
+            i, j, adjacent_grid_elements, accumulation_dtype,
+            oscillator_positions, oscillator_positions[i, j],
+            elastic_constant, oscillator_mass
+        )
+        right_hand_side = (oscillator_positions[i, j]
+                           + timestep * oscillator_velocities[i, j]
+                           + 0.25 * timestep * timestep * acceleration)
+        implicit_residual[i, j] = right_hand_side
+        implicit_solution[i, j] = (oscillator_positions[i, j]
+                                   + timestep * oscillator_velocities[i, j])
+        right_hand_side_norm_squared += right_hand_side * right_hand_side
+    return right_hand_side_norm_squared
+
+
+@ti.kernel
+def crank_nicolson_initial_residual(
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        elastic_constant: ti.f64,
+        adjacent_grid_elements: ti.template(),
+        accumulation_dtype: ti.template(),
+        implicit_solution: ti.template(),
+        implicit_residual: ti.template(),
+        implicit_search_direction: ti.template(),
+        oscillator_mass: ti.f64,
+        timestep: ti.f64
+    ) -> ti.f64:
+    """
+    Turn the right hand side held in 'implicit_residual' into the residual 
+    of the initial guess, r = b - A x', and start the conjugate gradient 
+    iteration with the search direction p = r.
+
+    Returns:
+        ti.f64: The squared norm of the residual.
+    """
+    residual_norm_squared = 0.0
+    for i, j in implicit_solution:
+        if not in_reduced_grid(i, j, reduced_grid_start, reduced_grid_end):
+            continue
+        residual = implicit_residual[i, j] - apply_crank_nicolson_matrix(
+            i, j, adjacent_grid_elements, accumulation_dtype,
+            implicit_solution, elastic_constant, oscillator_mass, timestep
+        )
+        implicit_residual[i, j] = residual
+        implicit_search_direction[i, j] = residual
+        residual_norm_squared += residual * residual
+    return residual_norm_squared
+
+
+@ti.kernel
+def apply_crank_nicolson_operator(
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        elastic_constant: ti.f64,
+        adjacent_grid_elements: ti.template(),
+        accumulation_dtype: ti.template(),
+        implicit_search_direction: ti.template(),
+        implicit_matrix_product: ti.template(),
+        oscillator_mass: ti.f64,
+        timestep: ti.f64
+    ) -> ti.f64:
+    """
+    Compute the product A p of the Crank-Nicolson matrix with the current 
+    search direction of the conjugate gradient iteration.
+
+    Returns:
+        ti.f64: The inner product p . A p.
+    """
+    curvature = 0.0
+    for i, j in implicit_search_direction:
+        if not in_reduced_grid(i, j, reduced_grid_start, reduced_grid_end):
+            continue
+        matrix_product = apply_crank_nicolson_matrix(
+            i, j, adjacent_grid_elements, accumulation_dtype,
+            implicit_search_direction, elastic_constant, oscillator_mass,
+            timestep
+        )
+        implicit_matrix_product[i, j] = matrix_product
+        curvature += implicit_search_direction[i, j] * matrix_product
+    return curvature
+
+
+@ti.kernel
+def conjugate_gradient_update(
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        step_length: ti.f64,
+        implicit_solution: ti.template(),
+        implicit_residual: ti.template(),
+        implicit_search_direction: ti.template(),
+        implicit_matrix_product: ti.template()
+    ) -> ti.f64:
+    """
+    Advance the solution along the search direction, x' += alpha p, and 
+    update the residual, r -= alpha A p.
+
+    Returns:
+        ti.f64: The squared norm of the updated residual.
+    """
+    residual_norm_squared = 0.0
+    for i, j in implicit_solution:
+        if not in_reduced_grid(i, j, reduced_grid_start, reduced_grid_end):
+            continue
+        implicit_solution[i, j] += (step_length
+                                    * implicit_search_direction[i, j])
+        implicit_residual[i, j] -= (step_length
+                                    * implicit_matrix_product[i, j])
+        residual_norm_squared += (implicit_residual[i, j]
+                                  * implicit_residual[i, j])
+    return residual_norm_squared
+
+
+@ti.kernel
+def conjugate_gradient_new_direction(
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        direction_factor: ti.f64,
+        implicit_residual: ti.template(),
+        implicit_search_direction: ti.template()
+    ):
+    """
+    Form the next conjugate search direction, p = r + beta p.
+    """
+    for i, j in implicit_search_direction:
+        if not in_reduced_grid(i, j, reduced_grid_start, reduced_grid_end):
+            continue
+        implicit_search_direction[i, j] = (
+            implicit_residual[i, j]
+            + direction_factor * implicit_search_direction[i, j]
+        )
+
+
+@ti.kernel
+def crank_nicolson_finish(
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        oscillator_velocities: ti.template(),
+        oscillator_positions: ti.template(),
+        implicit_solution: ti.template(),
+        timestep: ti.f64,
+        sampling: ti.template(),
+        detector_slot: ti.i32,
+        detector_step: ti.i64,
+        detector_points: ti.template(),
+        detector_steps: ti.template(),
+        detector_heights: ti.template(),
+        detector_velocities: ti.template()
+    ):
+    """
+    Complete a Crank-Nicolson step from the solved new heights x': the new
+    velocities follow from the trapezoidal rule, v' = 2 (x' - x) / dt - v.
+    The virtual detectors are sampled at the end of the step (see 
+    'sample_detectors').
+    """
+    for i, j in oscillator_positions:
+        if not in_reduced_grid(i, j, reduced_grid_start, reduced_grid_end):
+            continue
+        oscillator_velocities[i, j] = ti.cast(
+            2.0 * (implicit_solution[i, j] - oscillator_positions[i, j])
+            / timestep
+            - oscillator_velocities[i, j],
+            oscillator_velocities.dtype
+        )
+        oscillator_positions[i, j] = ti.cast(implicit_solution[i, j],
+                                             oscillator_positions.dtype)
+    sample_detectors(
+        sampling,
+        detector_slot,
+        detector_step,
+        detector_points,
+        oscillator_positions,
+        oscillator_velocities,
+        detector_steps,
+        detector_heights,
+        detector_velocities
+    )
+
+
+@ti.kernel
+def compute_damping_map(
+        number_of_damped_borders: ti.i32,
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        damping_layer_depth: ti.i32,
+        max_damping_factor: ti.f64,
+        damping_map: ti.template()
+    ):
+    """
+    Compute the factor by which the linear sponge scales the velocity and 
+    the height of each oscillator on every step.
+
+    Within the damping layers, the damping coefficient decreases linearly 
+    from 'max_damping_factor' at the border towards zero at the inner edge
+    of the layer, and the factor is one less the coefficient; elsewhere the
+    factor is one. The corners belong to the lower and upper damping 
+    regions when all four borders are damped, and are left undamped 
+    otherwise, so that no cell is damped twice.
+
+    Parameters:
+        - number_of_damped_borders (ti.i32): The number of borders to apply 
+          damping to, none leaving every factor at one.
+        - reduced_grid_start (ti.i32): The starting index of the grid 
+          to which damping should be applied (inclusive).
+        - reduced_grid_end (ti.i32): The ending index of the grid to which 
+          damping should be applied (exclusive).
+        - damping_layer_depth (ti.i32): The number of grid cells from 
+          the boundary where damping should start.
+        - max_damping_factor (ti.f64): The maximum damping factor applied 
+          at the boundary.
+        - damping_map (ti.template()): Taichi field covering the sheet, in 
+          the dtype of the sheet fields, to hold the factors.
+    """
+    lower_damping_end_pos = reduced_grid_start + damping_layer_depth
+    upper_damping_start_pos = reduced_grid_end - damping_layer_depth
+    for i, j in damping_map:
+        # The number of steps of the ramp by which the cell lies within a
+        # damping layer, zero outside them.
+        ramp_steps = 0
+        if number_of_damped_borders == 4 and i < lower_damping_end_pos:
+            ramp_steps = lower_damping_end_pos - i
+        elif number_of_damped_borders == 4 and i >= upper_damping_start_pos:
+            ramp_steps = i - upper_damping_start_pos
+        elif (number_of_damped_borders > 0
+                and lower_damping_end_pos <= i < upper_damping_start_pos):
+            if j < lower_damping_end_pos:
+                ramp_steps = lower_damping_end_pos - j
+            elif j >= upper_damping_start_pos:
+                ramp_steps = j - upper_damping_start_pos
+        damping_coefficient = ti.cast(0.0, damping_map.dtype)
+        if ramp_steps > 0:
+            damping_coefficient = ti.cast(
+                max_damping_factor * ramp_steps / damping_layer_depth,
+                damping_map.dtype
+            )
+        damping_map[i, j] = 1 - damping_coefficient
+
+
+@ti.kernel
+def compute_radial_damping_map(
+        grid_centre: ti.template(),
+        domain_radius: ti.f64,
+        damping_layer_depth: ti.i32,
+        max_damping_factor: ti.f64,
+        damping_map: ti.template()
+    ):
+    """
+    As 'compute_damping_map', for the circular domain: the damping 
+    coefficient rises linearly with the distance from the grid centre 
+    across a ring of 'damping_layer_depth' cells at the rim of the domain,
+    from zero at its inner edge to 'max_damping_factor' at the rim, the
+    whole rim being damped whatever the run option.
+
+    Parameters:
+        - grid_centre (ti.template()): The centre of the domain.
+        - domain_radius (ti.f64): The radius of the domain, in cells.
+        - damping_layer_depth (ti.i32): The width of the ring, in cells.
+        - max_damping_factor (ti.f64): The damping factor at the rim.
+        - damping_map (ti.template()): Taichi field covering the sheet, in 
+          the dtype of the sheet fields, to hold the factors.
+    """
+    centre_i = grid_centre[None][0]
+    centre_j = grid_centre[None][2]
+    ring_width = ti.cast(damping_layer_depth, ti.f64)
+    for i, j in damping_map:
+        distance = ti.sqrt(ti.cast((i - centre_i) * (i - centre_i)
+                                   + (j - centre_j) * (j - centre_j),
+                                   ti.f64))
+        depth_into_ring = ti.min(distance - (domain_radius - ring_width),
+                                 ring_width)
+        damping_coefficient = ti.cast(0.0, damping_map.dtype)
+        if depth_into_ring > 0.0:
+            damping_coefficient = ti.cast(
+                max_damping_factor * depth_into_ring / ring_width,
+                damping_map.dtype
+            )
+        damping_map[i, j] = 1 - damping_coefficient
+
+
+@ti.func
+def layer_band_index(
+        band_index,
+        reduced_grid_start,
+        reduced_grid_end,
+        damping_layer_depth
+    ):
+    """
+    The grid index of the cell 'band_index' cells into the absorbing layers
+    along one axis, the first 'damping_layer_depth' being those of the 
+    lower layer and the others those of the upper layer.
+    """
+    index = reduced_grid_start + band_index
+    if band_index >= damping_layer_depth:
+        index = reduced_grid_end - 2 * damping_layer_depth + band_index
+    return index
+
+
+@ti.kernel
+def damp_grid_boundary(
+        number_of_damped_borders: ti.i32,
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        damping_layer_depth: ti.i32,
+        damping_map: ti.template(),
+        oscillator_velocities: ti.template(),
+        oscillator_positions: ti.template()
+    ):
+    """
+    Apply damping to oscillator velocities and positions at and near the 
+    grid boundaries.
+    The damping effect reduces the velocities and positions of the oscillators 
+    within the specified boundary regions, with the intensity of damping
+    increasing stepwise as the boundary is approached. 
+
+    The integrators listed in 'fused_damping_integrators' apply the same 
+    damping within their own kernels, as they update each cell, so this 
+    pass is only taken by the others.
+
+    Parameters:
+        - number_of_damped_borders (ti.i32): The number of borders to apply 
+          damping to. 
+        - reduced_grid_start (ti.i32): The starting index of the grid 
+          to which damping should be applied (inclusive).
+        - reduced_grid_end (ti.i32): The ending index of the grid to which 
+          damping should be applied (exclusive).
+        - damping_layer_depth (ti.i32): The number of grid cells from 
+          the boundary where damping should start.
+        - damping_map (ti.template()): Taichi field of the factor applied
+          to each oscillator, computed by 'compute_damping_map'.
+        - oscillator_velocities (ti.template()): Taichi field containing 
+          the current velocities of the oscillators.
+        - oscillator_positions (ti.template()): Taichi field containing 
+          the current heights of the oscillators.
+
+    Returns:
+        None: This function modifies the 'oscillator_velocities' 
+        and 'oscillator_positions' fields in-place and does not return any 
+        value.
+    """
+    damp_cells(
+        number_of_damped_borders,
+        reduced_grid_start,
+        reduced_grid_end,
+        damping_layer_depth,
+        oscillator_positions,
+        damping_map,
+        oscillator_velocities,
+        oscillator_positions
+    )
+
+
+@ti.func
+def damp_cells(
+        number_of_damped_borders,
+        reduced_grid_start,
+        reduced_grid_end,
+        damping_layer_depth,
+        active_cells,
+        damping_map,
+        oscillator_velocities,
+        oscillator_positions
+    ):
+    """
+    Scale the velocity and height of the oscillators by the damping map, 
+    for 'damp_grid_boundary' and 'advance_cells_RK4': those of the cells 
+    of the row spans of the circular domain, if 'active_cells' holds them
+    (see 'is_row_spans'), otherwise those of the damping layers.
+    """
+    if ti.static(is_row_spans(active_cells)):
+        for i in range(reduced_grid_start, reduced_grid_end):
+            for j in range(active_cells[i][0], active_cells[i][1]):
+                oscillator_velocities[i, j] *= damping_map[i, j]
+                oscillator_positions[i, j] *= damping_map[i, j]
+    else:
+        # The rows of the lower and upper damping regions (which hold the 
+        # corners), then the left and right bands of each of the other rows,
+        # each loop being parallel over the rows.
+        lower_and_upper_depth = 0
+        if number_of_damped_borders == 4:
+            lower_and_upper_depth = damping_layer_depth
+        for band_i in range(2 * lower_and_upper_depth):
+            i = layer_band_index(band_i, reduced_grid_start, reduced_grid_end,
+                                 damping_layer_depth)
+            # The factor is the same along each of these rows.
+            damping_factor = damping_map[i, reduced_grid_start]
+            for j in range(reduced_grid_start, reduced_grid_end):
+                oscillator_velocities[i, j] *= damping_factor
+                oscillator_positions[i, j] *= damping_factor
+
+        for i in range(reduced_grid_start + damping_layer_depth,
+                       reduced_grid_end - damping_layer_depth):
+            for j in range(reduced_grid_start,
+                           reduced_grid_start + damping_layer_depth):
+                oscillator_velocities[i, j] *= damping_map[i, j]
+                oscillator_positions[i, j] *= damping_map[i, j]
+            for j in range(reduced_grid_end - damping_layer_depth,
+                           reduced_grid_end):
+                oscillator_velocities[i, j] *= damping_map[i, j]
+                oscillator_positions[i, j] *= damping_map[i, j]
+
+
+@ti.kernel
+def compute_pml_profile(
+        damping_layer_depth: ti.i32,
+        max_damping_rate: ti.f64,
+        pml_order: ti.f64,
+        timestep: ti.f64,
+        pml_profile: ti.template()
+    ):
+    """
+    Compute the damping rates of the perfectly matched layer at each depth
+    into the layer, at the cells and at the springs between them, together
+    with the quantities of one timestep at those rates.
+
+    The rate grows as a power of the depth into the layer, from zero at its
+    inner edge to 'max_damping_rate' at the grid border. 
+
+    Parameters:
+        - damping_layer_depth (ti.i32): The number of grid cells of the 
+          absorbing layer.
+        - max_damping_rate (ti.f64): The damping rate at the grid border 
+          (per unit time).
+        - pml_order (ti.f64): The power of the depth into the layer by 
+          which the damping rate grows.
+        - timestep (ti.f64): The integration timestep of the lattice.
+        - pml_profile (ti.template()): Taichi vector field of 2 * 
+          'damping_layer_depth' + 1 entries, indexed by twice the distance
+          from the outermost cell of the grid (even indices being cells, 
+          odd ones the springs between them), the last entry standing for 
+          the cells and springs outside the layer. Each entry holds the 
+          damping rate, the decay over a timestep at that rate, and the 
+          time over which a constant drive acts over a timestep once 
+          decayed, (1 - decay) / rate.
+    """
+    for half_cells in pml_profile:
+        depth_into_layer = ti.max(
+            damping_layer_depth - 0.5 - 0.5 * half_cells, 0.0
+        )
+        rate = (max_damping_rate
+                * (depth_into_layer / damping_layer_depth) ** pml_order)
+        decay = ti.exp(-rate * timestep)
+        drive_time = timestep
+        if rate > 0.0:
+            drive_time = (1.0 - decay) / rate
+        pml_profile[half_cells] = ti.Vector([rate, decay, drive_time])
+
+
+@ti.func
+def pml_axis_profile(
+        index,
+        damped,
+        reduced_grid_start,
+        reduced_grid_end,
+        damping_layer_depth,
+        pml_profile
+    ):
+    """
+    The entries of 'pml_profile' along one axis at the cell of grid index 
+    'index', and at the spring between it and the next cell along the axis
+    (those outside the layer if the axis is not 'damped', or beyond the 
+    outermost cell).
+    """
+    outside = 2 * damping_layer_depth
+    cell_half_cells = outside
+    spring_half_cells = outside
+    if damped:
+        cell_half_cells = 2 * ti.min(index - reduced_grid_start,
+                                     reduced_grid_end - 1 - index)
+        spring_half_cells = ti.min(2 * (index - reduced_grid_start) + 1,
+                                   2 * (reduced_grid_end - 2 - index) + 1)
+        if spring_half_cells < 0:
+            spring_half_cells = outside
+    return (pml_profile[ti.min(cell_half_cells, outside)],
+            pml_profile[ti.min(spring_half_cells, outside)])
+
+
+@ti.func
+def pml_update_cell_auxiliaries(
+        i, j,
+        number_of_damped_borders,
+        reduced_grid_start,
+        reduced_grid_end,
+        damping_layer_depth,
+        pml_profile,
+        squared_wave_speed,
+        oscillator_positions,
+        pml_auxiliary_i,
+        pml_auxiliary_j
+    ):
+    """
+    Advance the auxiliary fields of the perfectly matched layer on the 
+    springs from the oscillator at (i, j) to its next neighbours along the
+    i and j axes, over one timestep (see 'pml_update_auxiliaries').
+    """
+    cell_i, spring_i = pml_axis_profile(
+        i, number_of_damped_borders == 4,
+        reduced_grid_start, reduced_grid_end, damping_layer_depth, 
+        pml_profile
+    )
+    cell_j, spring_j = pml_axis_profile(
+        j, True,
+        reduced_grid_start, reduced_grid_end, damping_layer_depth, 
+        pml_profile
+    )
+    height = ti.cast(oscillator_positions[i, j], ti.f64)
+    # Each auxiliary field relaxes at the rate across its springs, and is 
+    # driven by the difference of the rates across and along them times 
+    # the strain of the spring. The relaxation over the timestep is exact.
+    if i + 1 < reduced_grid_end:
+        strain = ti.cast(oscillator_positions[i + 1, j], ti.f64) - height
+        pml_auxiliary_i[i, j] = ti.cast(
+            pml_auxiliary_i[i, j] * spring_i[1]
+            + squared_wave_speed * (cell_j[0] - spring_i[0]) * strain 
+            * spring_i[2],
+            pml_auxiliary_i.dtype
+        )
+    if j + 1 < reduced_grid_end:
+        strain = ti.cast(oscillator_positions[i, j + 1], ti.f64) - height
+        pml_auxiliary_j[i, j] = ti.cast(
+            pml_auxiliary_j[i, j] * spring_j[1]
+            + squared_wave_speed * (cell_i[0] - spring_j[0]) * strain 
+            * spring_j[2],
+            pml_auxiliary_j.dtype
+        )
+
+
+@ti.func
+def pml_damp_cell(
+        i, j,
+        number_of_damped_borders,
+        reduced_grid_start,
+        reduced_grid_end,
+        damping_layer_depth,
+        pml_profile,
+        timestep,
+        oscillator_velocities,
+        oscillator_positions,
+        pml_auxiliary_i,
+        pml_auxiliary_j
+    ):
+    """
+    Apply the damping of the perfectly matched layer to the velocity of the
+    oscillator at (i, j) over one timestep (see 'pml_damp_velocities').
+    """
+    cell_i, _ = pml_axis_profile(
+        i, number_of_damped_borders == 4,
+        reduced_grid_start, reduced_grid_end, damping_layer_depth, 
+        pml_profile
+    )
+    cell_j, _ = pml_axis_profile(
+        j, True,
+        reduced_grid_start, reduced_grid_end, damping_layer_depth, 
+        pml_profile
+    )
+    auxiliary_force = (
+        pml_auxiliary_i[i, j] - pml_auxiliary_i[i - 1, j]
+        + pml_auxiliary_j[i, j] - pml_auxiliary_j[i, j - 1]
+        - cell_i[0] * cell_j[0] * oscillator_positions[i, j]
+    )
+    # The forces are applied before the decay: decaying only the velocity
+    # held before them makes the layer unstable.
+    oscillator_velocities[i, j] = ti.cast(
+        (oscillator_velocities[i, j] + auxiliary_force * timestep)
+        * cell_i[1] * cell_j[1],
+        oscillator_velocities.dtype
+    )
+
+
+@ti.kernel
+def pml_update_auxiliaries(
+        number_of_damped_borders: ti.i32,
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        damping_layer_depth: ti.i32,
+        pml_profile: ti.template(),
+        squared_wave_speed: ti.f64,
+        oscillator_positions: ti.template(),
+        pml_auxiliary_i: ti.template(),
+        pml_auxiliary_j: ti.template()
+    ):
+    """
+    Advance the auxiliary fields of the perfectly matched layer over one 
+    timestep, in the absorbing layers at the grid borders.
+
+    The layer is that of Grote and Sim (2010) for the second order wave 
+    equation, with damping rates zeta_i and zeta_j across the layers along
+    the i and j axes:
+
+        h_tt + (zeta_i + zeta_j) h_t + zeta_i zeta_j h 
+            = c^2 (laplacian h) + d(psi_i)/di + d(psi_j)/dj,
+        (psi_i)_t + zeta_i psi_i = c^2 (zeta_j - zeta_i) dh/di,
+        (psi_j)_t + zeta_j psi_j = c^2 (zeta_i - zeta_j) dh/dj.
+
+    The terms beyond the wave equation of the sheet are applied between 
+    steps of the integrator, as the original damping is, so that the layer
+    works with any integrator. The auxiliary fields live on the springs 
+    (the auxiliary field along i at (i, j) on the spring from (i, j) to 
+    (i + 1, j)), and are only non-zero within the layers.
+
+    Parameters:
+        - number_of_damped_borders (ti.i32): The number of borders to apply 
+          damping to. With two, the layers along the j axis are damped.
+        - reduced_grid_start (ti.i32): The starting index of the grid 
+          to which damping should be applied (inclusive).
+        - reduced_grid_end (ti.i32): The ending index of the grid to which 
+          damping should be applied (exclusive).
+        - damping_layer_depth (ti.i32): The number of grid cells of the 
+          absorbing layer.
+        - pml_profile (ti.template()): Taichi vector field of the damping
+          rates, as computed by 'compute_pml_profile'.
+        - squared_wave_speed (ti.f64): The square of the speed of long 
+          waves on the sheet, in cells per unit time.
+        - oscillator_positions (ti.template()): Taichi field containing 
+          the current heights of the oscillators.
+        - pml_auxiliary_i, pml_auxiliary_j (ti.template()): Taichi fields 
+          of the auxiliary fields along the i and j axes.
+    """
+    # The lower and upper layers, corners included (if damped), then the 
+    # left and right layers between them. Each layer is looped over by 
+    # rows, in parallel across the rows and serially along them, which 
+    # avoids dividing the index of each cell into its row and column.
+    lower_and_upper_depth = 0
+    if number_of_damped_borders == 4:
+        lower_and_upper_depth = damping_layer_depth
+    for band_i in range(2 * lower_and_upper_depth):
+        i = layer_band_index(band_i, reduced_grid_start, reduced_grid_end,
+                             damping_layer_depth)
+        for j in range(reduced_grid_start, reduced_grid_end):
+            pml_update_cell_auxiliaries(
+                i, j, number_of_damped_borders,
+                reduced_grid_start, reduced_grid_end, damping_layer_depth,
+                pml_profile, squared_wave_speed,
+                oscillator_positions, pml_auxiliary_i, pml_auxiliary_j
+            )
+    for i in range(reduced_grid_start + lower_and_upper_depth, 
+                   reduced_grid_end - lower_and_upper_depth):
+        for band_j in range(2 * damping_layer_depth):
+            j = layer_band_index(band_j, reduced_grid_start, 
+                                 reduced_grid_end, damping_layer_depth)
+            pml_update_cell_auxiliaries(
+                i, j, number_of_damped_borders,
+                reduced_grid_start, reduced_grid_end, damping_layer_depth,
+                pml_profile, squared_wave_speed,
+                oscillator_positions, pml_auxiliary_i, pml_auxiliary_j
+            )
+
+
+@ti.kernel
+def pml_damp_velocities(
+        number_of_damped_borders: ti.i32,
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        damping_layer_depth: ti.i32,
+        pml_profile: ti.template(),
+        timestep: ti.f64,
+        oscillator_velocities: ti.template(),
+        oscillator_positions: ti.template(),
+        pml_auxiliary_i: ti.template(),
+        pml_auxiliary_j: ti.template()
+    ):
+    """
+    Apply the damping of the perfectly matched layer to the oscillator 
+    velocities over one timestep: the forces of the auxiliary fields (as 
+    updated by 'pml_update_auxiliaries') and of the product of the rates,
+    then the exact decay at the summed damping rates across the layers.
+
+    Parameters:
+        - See 'pml_update_auxiliaries'.
+        - timestep (ti.f64): The integration timestep of the lattice.
+        - oscillator_velocities (ti.template()): Taichi field containing 
+          the current velocities of the oscillators.
+    """
+    lower_and_upper_depth = 0
+    if number_of_damped_borders == 4:
+        lower_and_upper_depth = damping_layer_depth
+    for band_i in range(2 * lower_and_upper_depth):
+        i = layer_band_index(band_i, reduced_grid_start, reduced_grid_end,
+                             damping_layer_depth)
+        for j in range(reduced_grid_start, reduced_grid_end):
+            pml_damp_cell(
+                i, j, number_of_damped_borders,
+                reduced_grid_start, reduced_grid_end, damping_layer_depth,
+                pml_profile, timestep, oscillator_velocities,
+                oscillator_positions, pml_auxiliary_i, pml_auxiliary_j
+            )
+    for i in range(reduced_grid_start + lower_and_upper_depth, 
+                   reduced_grid_end - lower_and_upper_depth):
+        for band_j in range(2 * damping_layer_depth):
+            j = layer_band_index(band_j, reduced_grid_start, 
+                                 reduced_grid_end, damping_layer_depth)
+            pml_damp_cell(
+                i, j, number_of_damped_borders,
+                reduced_grid_start, reduced_grid_end, damping_layer_depth,
+                pml_profile, timestep, oscillator_velocities,
+                oscillator_positions, pml_auxiliary_i, pml_auxiliary_j
+            )
+
+
+@ti.kernel
+def record_perturbation(
+        perturbation_schedule: ti.template(),
+        step: ti.i32,
+        slot: ti.i32,
+        perturbation_kind: ti.i32,
+        orbital_coords: ti.template()
+    ):
+    """
+    Record the overlay of a perturbation in the schedule of a temporally 
+    blocked pass, instead of applying it to the sheet at once.
+
+    Parameters:
+        - perturbation_schedule (ti.template()): Taichi field of shape 
+          (steps, 2, 3) holding, for each step of the pass and each of (up
+          to) two perturbations, its kind (0 for none) and the grid 
+          coordinates of its centre.
+        - step (ti.i32): The step of the pass.
+        - slot (ti.i32): The index of the perturbation within the step.
+        - perturbation_kind (ti.i32): 1, 2 or 3 for the perturbation of the
+          first sphere, the second sphere or the merged object.
+        - orbital_coords (ti.template()): The coordinates of the centre of 
+          the perturbation, rounded to the grid as in 
+          'overlay_perturb_shape_onto_grid'.
+    """
+    perturbation_schedule[step, slot, 0] = perturbation_kind
+    perturbation_schedule[step, slot, 1] = int(ti.round(
+        orbital_coords[None][0]
+    ))
+    perturbation_schedule[step, slot, 2] = int(ti.round(
+        orbital_coords[None][2]
+    ))
+
+
+@ti.kernel
+def record_orbit_schedule(
+        orbit_update: ti.template(),
+        pass_steps: ti.i32,
+        step_state: ti.template(),
+        grid_centre: ti.template(),
+        trajectory_times: ti.template(),
+        trajectory_separations: ti.template(),
+        first_orbital_coords: ti.template(),
+        second_orbital_coords: ti.template(),
+        perturbation_schedule: ti.template()
+    ):
+    """
+    Make the orbital updates of all the steps of a temporally blocked pass
+    on the device (see 'update_orbit'), recording the perturbations each 
+    sets in the schedule of the pass (see 'record_perturbation'), rather
+    than overlaying them.
+
+    Parameters:
+        - orbit_update, step_state, ..., second_orbital_coords: As for 
+          'fused_step'.
+        - pass_steps (ti.i32): The number of steps of the pass.
+        - perturbation_schedule (ti.template()): The schedule of the pass.
+    """
+    ti.loop_config(serialize=True)
+    for step in range(pass_steps):
+        update_orbit(orbit_update, grid_centre, trajectory_times,
+                     trajectory_separations, step_state, None,
+                     first_orbital_coords, second_orbital_coords)
+        # The spheres (kinds 1 and 2), or the merged object (kind 3) 
+        # centred on the first sphere.
+        stamp_kind = step_state[None].stamp_kind
+        first_kind = 0
+        second_kind = 0
+        if stamp_kind == 1:
+            first_kind = 1
+            second_kind = 2
+        elif stamp_kind == 3:
+            first_kind = 3
+        perturbation_schedule[step, 0, 0] = first_kind
+        perturbation_schedule[step, 0, 1] = int(ti.round(
+            first_orbital_coords[None][0]
+        ))
+        perturbation_schedule[step, 0, 2] = int(ti.round(
+            first_orbital_coords[None][2]
+        ))
+        perturbation_schedule[step, 1, 0] = second_kind
+        perturbation_schedule[step, 1, 1] = int(ti.round(
+            second_orbital_coords[None][0]
+        ))
+        perturbation_schedule[step, 1, 2] = int(ti.round(
+            second_orbital_coords[None][2]
+        ))
+
+
+@ti.kernel
+def set_tile_origins(
+        tile_origins: ti.template(),
+        tiles_per_row: ti.i32,
+        tile_size: ti.i32,
+        halo_depth: ti.i32
+    ):
+    """
+    Set the grid coordinates of the corners of the regions (tiles with 
+    their halos) of the temporally blocked stepping, the tiles being 
+    numbered row by row.
+    """
+    for tile in range(tile_origins.shape[0]):
+        tile_origins[tile, 0] = (
+            (tile // tiles_per_row) * tile_size - halo_depth
+        )
+        tile_origins[tile, 1] = (
+            (tile % tiles_per_row) * tile_size - halo_depth
+        )
+
+
+@ti.kernel
+def step_temporal_tiles(
+        pass_steps: ti.i32,
+        tile_origins: ti.template(),
+        next_tile: ti.template(),
+        tile_size: ti.i32,
+        halo_depth: ti.i32,
+        stencil_reach: ti.i32,
+        grid_size: ti.i32,
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        damping_map: ti.template(),
+        perturbation_schedule: ti.template(),
+        perturb_stamps: ti.template(),
+        first_perturb_radius: ti.i32,
+        first_perturb_slot: ti.i32,
+        second_perturb_radius: ti.i32,
+        second_perturb_slot: ti.i32,
+        merged_perturb_radius: ti.i32,
+        merged_perturb_slot: ti.i32,
+        elastic_constant: ti.f64,
+        adjacent_grid_elements: ti.template(),
+        accumulation_dtype: ti.template(),
+        oscillator_mass: ti.f64,
+        timestep: ti.f64,
+        oscillator_velocities: ti.template(),
+        oscillator_positions: ti.template(),
+        oscillator_accelerations: ti.template(),
+        tile_velocities: ti.template(),
+        tile_positions: ti.template(),
+        tile_accelerations: ti.template(),
+        stage_buffered: ti.template(),
+        tile_velocities_a: ti.template(),
+        tile_positions_a: ti.template(),
+        tile_velocities_b: ti.template(),
+        tile_positions_b: ti.template(),
+        tile_summed_velocity_slopes: ti.template(),
+        tile_summed_position_slopes: ti.template(),
+        next_velocities: ti.template(),
+        next_positions: ti.template(),
+        next_accelerations: ti.template(),
+        sampling: ti.template(),
+        detector_slot: ti.i32,
+        detector_step: ti.i64,
+        detector_points: ti.template(),
+        detector_steps: ti.template(),
+        detector_heights: ti.template(),
+        detector_velocities: ti.template()
+    ):
+    """
+    Take all the velocity Verlet or stage-buffered RK4 steps of a 
+    temporally blocked pass, in a single launch.
+
+    Each worker thread owns one scratch region, and takes the tiles of the
+    sheet one after the other from a shared counter: it copies a tile with
+    its halo into its region, advances the region by every step of the 
+    pass, the region staying in the cache of its core throughout, and 
+    copies the tile without its halo into the fields of the next state.
+
+    Parameters:
+        - pass_steps (ti.i32): The number of steps of the pass, at most the
+          'temporal_block_steps' for which the halos were sized.
+        - tile_origins (ti.template()): Taichi field holding, for each tile
+          of the sheet, the grid coordinates of the corner of its region 
+          (which may lie outside the grid).
+        - next_tile (ti.template()): Taichi field of shape () of the next
+          tile to be taken by a worker.
+        - tile_size (ti.i32): The side of a tile, in cells.
+        - halo_depth (ti.i32): The depth of the halo, in cells.
+        - stencil_reach (ti.i32): The reach of the stencil, in cells.
+        - grid_size (ti.i32): The size of the grid.
+        - reduced_grid_start, reduced_grid_end (ti.i32): The bounds of the
+          reduced grid.
+        - damping_map (ti.template()): The damping map of the sheet.
+        - perturbation_schedule (ti.template()): The perturbations to 
+          overlay on each step of the pass (see 'record_perturbation').
+        - perturb_stamps (ti.template()): The stamps of the 
+          'GaussianStampCache'.
+        - first_perturb_radius, ..., merged_perturb_slot (ti.i32): The 
+          radius and stamp slot of the perturbations of kind 1, 2 and 3.
+        - elastic_constant, ..., timestep: As for the integrator kernels.
+        - oscillator_velocities, oscillator_positions, 
+          oscillator_accelerations (ti.template()): The state of the sheet
+          at the start of the pass.
+        - tile_velocities, tile_positions, tile_accelerations 
+          (ti.template()): Taichi fields of the scratch regions of side 
+          'tile_size' + 2 * 'halo_depth', one for each worker along the 
+          first axis.
+        - stage_buffered (ti.template()): True for the stage-buffered RK4
+          integrator, False for the velocity Verlet integrator.
+        - tile_velocities_a, ..., tile_summed_position_slopes 
+          (ti.template()): The intermediate states and summed slopes of 
+          the stage-buffered RK4 integrator (see 
+          'stage_buffered_RK4_stage') for the scratch regions, or None for
+          the velocity Verlet integrator.
+        - next_velocities, next_positions, next_accelerations 
+          (ti.template()): The fields receiving the state of the sheet at
+          the end of the pass.
+        - sampling, ..., detector_velocities: The virtual detectors (see 
+          'sample_detectors'), sampled on every step of the pass, into 
+          consecutive slots of their ring buffer from 'detector_slot', 
+          with the step counters from 'detector_step'.
+    """
+    # A step of the stage-buffered RK4 applies the stencil once per stage.
+    step_reach = stencil_reach * ti.static(4 if stage_buffered else 1)
+    next_tile[None] = 0
+    # One worker per thread, each running its own loop over the tiles.
+    ti.loop_config(block_dim=1)
+    for worker in range(tile_positions.shape[0]):
+        tile = ti.atomic_add(next_tile[None], 1)
+        while tile < tile_origins.shape[0]:
+            origin_i = tile_origins[tile, 0]
+            origin_j = tile_origins[tile, 1]
+            load_temporal_tile(
+                worker, origin_i, origin_j, grid_size,
+                oscillator_velocities, oscillator_positions,
+                oscillator_accelerations,
+                tile_velocities, tile_positions, tile_accelerations
+            )
+            if ti.static(stage_buffered):
+                clear_temporal_tile_stages(
+                    worker, origin_i, origin_j, reduced_grid_start,
+                    reduced_grid_end, tile_positions_a, tile_positions_b
+                )
+            for step in range(pass_steps):
+                temporal_tile_damp_kick_and_drift(
+                    step, worker, origin_i, origin_j, step_reach, 
+                    grid_size, reduced_grid_start, reduced_grid_end, 
+                    damping_map, perturbation_schedule, perturb_stamps, 
+                    first_perturb_radius, first_perturb_slot,
+                    second_perturb_radius, second_perturb_slot,
+                    merged_perturb_radius, merged_perturb_slot,
+                    tile_velocities, tile_positions, tile_accelerations,
+                    timestep, not stage_buffered
+                )
+                if ti.static(stage_buffered):
+                    # Stage 1 starts from the state itself; the later 
+                    # stages alternate between the two intermediate states.
+                    for (stage, velocities_in, positions_in, 
+                         velocities_out, positions_out) in ti.static([
+                            (1, tile_velocities, tile_positions,
+                             tile_velocities_a, tile_positions_a),
+                            (2, tile_velocities_a, tile_positions_a,
+                             tile_velocities_b, tile_positions_b),
+                            (3, tile_velocities_b, tile_positions_b,
+                             tile_velocities_a, tile_positions_a),
+                            (4, tile_velocities_a, tile_positions_a,
+                             tile_velocities_b, tile_positions_b)
+                        ]):
+                        temporal_tile_RK4_stage(
+                            stage, step, worker, origin_i, origin_j, 
+                            stencil_reach, reduced_grid_start, 
+                            reduced_grid_end, elastic_constant,
+                            adjacent_grid_elements, accumulation_dtype,
+                            tile_velocities, tile_positions,
+                            velocities_in, positions_in, 
+                            velocities_out, positions_out,
+                            tile_summed_velocity_slopes, 
+                            tile_summed_position_slopes,
+                            oscillator_mass, timestep
+                        )
+                else:
+                    temporal_tile_update_accelerations_and_half_kick(
+                        step, worker, origin_i, origin_j, stencil_reach,
+                        reduced_grid_start, reduced_grid_end, 
+                        elastic_constant, adjacent_grid_elements, 
+                        accumulation_dtype, tile_velocities, tile_positions,
+                        tile_accelerations, oscillator_mass, timestep
+                    )
+                if ti.static(sampling):
+                    sample_tile_detectors(
+                        (detector_slot + step) % detector_steps.shape[0],
+                        worker, origin_i, origin_j, tile_size, halo_depth,
+                        detector_points, tile_positions, tile_velocities,
+                        detector_heights, detector_velocities
+                    )
+            store_temporal_tile(
+                worker, origin_i, origin_j, tile_size, halo_depth,
+                grid_size, tile_velocities, tile_positions, 
+                tile_accelerations, next_velocities, next_positions, 
+                next_accelerations
+            )
+            tile = ti.atomic_add(next_tile[None], 1)
+    if ti.static(sampling):
+        for step in range(pass_steps):
+            detector_steps[(detector_slot + step) 
+                           % detector_steps.shape[0]] = detector_step + step
+
+
+@ti.func
+def load_temporal_tile(
+        worker,
+        origin_i, origin_j,
+        grid_size,
+        oscillator_velocities,
+        oscillator_positions,
+        oscillator_accelerations,
+        tile_velocities,
+        tile_positions,
+        tile_accelerations
+    ):
+    """
+    Copy the region of the sheet whose corner is (origin_i, origin_j) into
+    the scratch region of 'worker', for 'step_temporal_tiles'. The cells 
+    outside the grid are zeroed.
+    """
+    region_size = tile_positions.shape[1]
+    # The cells within the grid are copied without a test of each; those 
+    # beyond it, in the regions of the tiles at the edges of the grid, are
+    # zeroed.
+    first_i = ti.max(0, -origin_i)
+    end_i = ti.min(region_size, grid_size - origin_i)
+    first_j = ti.max(0, -origin_j)
+    end_j = ti.min(region_size, grid_size - origin_j)
+    for local_i in range(first_i, end_i):
+        for local_j in range(first_j, end_j):
+            tile_velocities[worker, local_i, local_j] = (
+                oscillator_velocities[origin_i + local_i, origin_j + local_j]
+            )
+            tile_positions[worker, local_i, local_j] = (
+                oscillator_positions[origin_i + local_i, origin_j + local_j]
+            )
+            tile_accelerations[worker, local_i, local_j] = (
+                oscillator_accelerations[origin_i + local_i, 
+                                         origin_j + local_j]
+            )
+    if (first_i > 0 or end_i < region_size 
+            or first_j > 0 or end_j < region_size):
+        for local_i in range(region_size):
+            for local_j in range(region_size):
+                if not (first_i <= local_i < end_i 
+                        and first_j <= local_j < end_j):
+                    tile_velocities[worker, local_i, local_j] = ti.cast(
+                        0.0, tile_velocities.dtype
+                    )
+                    tile_positions[worker, local_i, local_j] = ti.cast(
+                        0.0, tile_positions.dtype
+                    )
+                    tile_accelerations[worker, local_i, local_j] = ti.cast(
+                        0.0, tile_accelerations.dtype
+                    )
+
+
+@ti.func
+def temporal_tile_damp_kick_and_drift(
+        step,
+        worker,
+        origin_i, origin_j,
+        step_reach,
+        grid_size,
+        reduced_grid_start,
+        reduced_grid_end,
+        damping_map,
+        perturbation_schedule,
+        perturb_stamps,
+        first_perturb_radius,
+        first_perturb_slot,
+        second_perturb_radius,
+        second_perturb_slot,
+        merged_perturb_radius,
+        merged_perturb_slot,
+        tile_velocities,
+        tile_positions,
+        tile_accelerations,
+        timestep,
+        kick_and_drift: ti.template()
+    ):
+    """
+    The pointwise part of a step of the scratch region of 'worker': the 
+    overlay of the perturbations recorded for the step and the boundary 
+    damping, followed, if 'kick_and_drift', by the first half kick and the
+    drift of the velocity Verlet integrator.
+
+    Each step of a temporally blocked pass invalidates a further 
+    'step_reach' cells at the rim of the region (the stencil reach times
+    the number of times the step applies the stencil), since the stencil
+    there reaches cells not updated, so only the cells still valid (and 
+    within the grid) are updated.
+    """
+    region_size = tile_positions.shape[1]
+    valid_start = step * step_reach
+    valid_end = region_size - valid_start
+    first_i = ti.max(valid_start, -origin_i)
+    end_i = ti.min(valid_end, grid_size - origin_i)
+    first_j = ti.max(valid_start, -origin_j)
+    end_j = ti.min(valid_end, grid_size - origin_j)
+
+    for slot in ti.static(range(2)):
+        perturbation_kind = perturbation_schedule[step, slot, 0]
+        perturb_radius = -1
+        perturb_slot = 0
+        if perturbation_kind == 1:
+            perturb_radius = first_perturb_radius
+            perturb_slot = first_perturb_slot
+        elif perturbation_kind == 2:
+            perturb_radius = second_perturb_radius
+            perturb_slot = second_perturb_slot
+        elif perturbation_kind == 3:
+            perturb_radius = merged_perturb_radius
+            perturb_slot = merged_perturb_slot
+        overlay_perturb_shape_onto_tile(
+            perturb_radius, perturb_stamps, perturb_slot,
+            perturbation_schedule[step, slot, 1] - origin_i,
+            perturbation_schedule[step, slot, 2] - origin_j,
+            first_i, end_i, first_j, end_j, worker,
+            tile_positions, tile_velocities
+        )
+
+    # The updates are assignments rather than augmented assignments, which
+    # Taichi compiles to atomic operations in the loop over the workers: 
+    # it cannot tell that the workers never share a cell.
+    first_i = ti.max(first_i, reduced_grid_start - origin_i)
+    end_i = ti.min(end_i, reduced_grid_end - origin_i)
+    first_j = ti.max(first_j, reduced_grid_start - origin_j)
+    end_j = ti.min(end_j, reduced_grid_end - origin_j)
+    for local_i in range(first_i, end_i):
+        for local_j in range(first_j, end_j):
+            damping_factor = damping_map[origin_i + local_i, 
+                                         origin_j + local_j]
+            velocity = tile_velocities[worker, local_i, local_j]
+            position = tile_positions[worker, local_i, local_j]
+            velocity *= damping_factor
+            position *= damping_factor
+            if ti.static(kick_and_drift):
+                velocity += ti.cast(
+                    0.5 * timestep 
+                    * tile_accelerations[worker, local_i, local_j],
+                    tile_velocities.dtype
+                )
+                position += ti.cast(timestep * velocity, 
+                                    tile_positions.dtype)
+            tile_velocities[worker, local_i, local_j] = velocity
+            tile_positions[worker, local_i, local_j] = position
+
+
+@ti.func
+def overlay_perturb_shape_onto_tile(
+        perturb_radius,
+        perturb_stamps,
+        perturb_slot,
+        centre_i, centre_j,
+        first_i, end_i,
+        first_j, end_j,
+        worker,
+        tile_positions,
+        tile_velocities
+    ):
+    """
+    Overlay a perturbation centred on the cell (centre_i, centre_j) of the
+    scratch region of 'worker' onto the cells of the region from (first_i,
+    first_j) to (end_i, end_j), exclusive, with the same result as 
+    'overlay_perturb_shape_onto_grid' on the sheet. A negative 
+    'perturb_radius' overlays nothing.
+    """
+    for local_i in range(ti.max(centre_i - perturb_radius, first_i),
+                         ti.min(centre_i + perturb_radius + 1, end_i)):
+        for local_j in range(ti.max(centre_j - perturb_radius, first_j),
+                             ti.min(centre_j + perturb_radius + 1, end_j)):
+            perturb_depth = perturb_stamps[
+                perturb_slot,
+                perturb_radius + local_i - centre_i,
+                perturb_radius + local_j - centre_j
+            ]
+            if perturb_depth < tile_positions[worker, local_i, local_j]:
+                tile_positions[worker, local_i, local_j] = ti.cast(
+                    perturb_depth, tile_positions.dtype
+                )
+    if (first_i <= centre_i < end_i and first_j <= centre_j < end_j
+            and perturb_radius >= 0):
+        tile_velocities[worker, centre_i, centre_j] = ti.cast(
+            0.0, tile_velocities.dtype
+        )
+
+
+@ti.func
+def temporal_tile_update_accelerations_and_half_kick(
+        step,
+        worker,
+        origin_i, origin_j,
+        stencil_reach,
+        reduced_grid_start,
+        reduced_grid_end,
+        elastic_constant,
+        adjacent_grid_elements: ti.template(),
+        accumulation_dtype: ti.template(),
+        tile_velocities,
+        tile_positions,
+        tile_accelerations,
+        oscillator_mass,
+        timestep
+    ):
+    """
+    The second part of a velocity Verlet step of the scratch region of 
+    'worker': the new accelerations and the second half kick, over the 
+    cells still valid once the stencil has been applied (see 
+    'temporal_tile_damp_kick_and_drift').
+    """
+    region_size = tile_positions.shape[1]
+    valid_start = (step + 1) * stencil_reach
+    valid_end = region_size - valid_start
+    first_i = ti.max(valid_start, reduced_grid_start - origin_i)
+    end_i = ti.min(valid_end, reduced_grid_end - origin_i)
+    first_j = ti.max(valid_start, reduced_grid_start - origin_j)
+    end_j = ti.min(valid_end, reduced_grid_end - origin_j)
+    for local_i in range(first_i, end_i):
+        for local_j in range(first_j, end_j):
+            acceleration = update_stacked_oscillator_accelerations(
+                worker, local_i, local_j, adjacent_grid_elements,
+                accumulation_dtype, tile_positions,
+                tile_positions[worker, local_i, local_j],
+                elastic_constant, oscillator_mass
+            )
+            tile_accelerations[worker, local_i, local_j] = ti.cast(
+                acceleration, tile_accelerations.dtype
+            )
+            tile_velocities[worker, local_i, local_j] = (
+                tile_velocities[worker, local_i, local_j] 
+                + ti.cast(0.5 * timestep * acceleration, 
+                          tile_velocities.dtype)
+            )
+
+
+@ti.func
+def temporal_tile_RK4_stage(
+        stage: ti.template(),
+        step,
+        worker,
+        origin_i, origin_j,
+        stencil_reach,
+        reduced_grid_start,
+        reduced_grid_end,
+        elastic_constant,
+        adjacent_grid_elements: ti.template(),
+        accumulation_dtype: ti.template(),
+        tile_velocities,
+        tile_positions,
+        stage_velocities_in,
+        stage_positions_in,
+        stage_velocities_out,
+        stage_positions_out,
+        summed_velocity_slopes,
+        summed_position_slopes,
+        oscillator_mass,
+        timestep
+    ):
+    """
+    A stage of a step of the stage-buffered RK4 integrator of the scratch
+    region of 'worker', with the same arithmetic as 
+    'stage_buffered_RK4_stage' on the sheet, over the cells still valid 
+    once the stencil has been applied by this stage (see 
+    'temporal_tile_damp_kick_and_drift').
+    """
+    region_size = tile_positions.shape[1]
+    valid_start = (4 * step + stage) * stencil_reach
+    valid_end = region_size - valid_start
+    first_i = ti.max(valid_start, reduced_grid_start - origin_i)
+    end_i = ti.min(valid_end, reduced_grid_end - origin_i)
+    first_j = ti.max(valid_start, reduced_grid_start - origin_j)
+    end_j = ti.min(valid_end, reduced_grid_end - origin_j)
+    for local_i in range(first_i, end_i):
+        for local_j in range(first_j, end_j):
+            position_slope = stage_velocities_in[worker, local_i, local_j]
+            velocity_slope = update_stacked_oscillator_accelerations(
+                worker, local_i, local_j, adjacent_grid_elements,
+                accumulation_dtype, stage_positions_in,
+                stage_positions_in[worker, local_i, local_j],
+                elastic_constant, oscillator_mass
+            )
+            if ti.static(stage == 1):
+                summed_position_slopes[worker, local_i, local_j] = ti.cast(
+                    position_slope, summed_position_slopes.dtype
+                )
+                summed_velocity_slopes[worker, local_i, local_j] = ti.cast(
+                    velocity_slope, summed_velocity_slopes.dtype
+                )
+            elif ti.static(stage < 4):
+                summed_position_slopes[worker, local_i, local_j] = (
+                    summed_position_slopes[worker, local_i, local_j]
+                    + ti.cast(2.0 * position_slope, 
+                              summed_position_slopes.dtype)
+                )
+                summed_velocity_slopes[worker, local_i, local_j] = (
+                    summed_velocity_slopes[worker, local_i, local_j]
+                    + ti.cast(2.0 * velocity_slope, 
+                              summed_velocity_slopes.dtype)
+                )
+
+            if ti.static(stage < 4):
+                stage_fraction = 0.5 if ti.static(stage < 3) else 1.0
+                stage_positions_out[worker, local_i, local_j] = ti.cast(
+                    tile_positions[worker, local_i, local_j]
+                    + stage_fraction * timestep * position_slope,
+                    stage_positions_out.dtype
+                )
+                stage_velocities_out[worker, local_i, local_j] = ti.cast(
+                    tile_velocities[worker, local_i, local_j]
+                    + stage_fraction * timestep * velocity_slope,
+                    stage_velocities_out.dtype
+                )
+            else:
+                tile_positions[worker, local_i, local_j] = (
+                    tile_positions[worker, local_i, local_j]
+                    + ti.cast(
+                        timestep / 6.0 
+                        * (summed_position_slopes[worker, local_i, local_j]
+                           + position_slope),
+                        tile_positions.dtype
+                    )
+                )
+                tile_velocities[worker, local_i, local_j] = (
+                    tile_velocities[worker, local_i, local_j]
+                    + ti.cast(
+                        timestep / 6.0 
+                        * (summed_velocity_slopes[worker, local_i, local_j]
+                           + velocity_slope),
+                        tile_velocities.dtype
+                    )
+                )
+
+
+@ti.func
+def clear_temporal_tile_stages(
+        worker,
+        origin_i, origin_j,
+        reduced_grid_start,
+        reduced_grid_end,
+        stage_positions_a,
+        stage_positions_b
+    ):
+    """
+    Zero the heights of the intermediate states of the scratch region of
+    'worker' outside the reduced grid, as those of the sheet, which are 
+    never written there, and which the stencil reaches from the cells at 
+    the edge of the reduced grid.
+    """
+    region_size = stage_positions_a.shape[1]
+    for local_i in range(region_size):
+        i = origin_i + local_i
+        for local_j in range(region_size):
+            j = origin_j + local_j
+            if not in_reduced_grid(i, j, reduced_grid_start, 
+                                   reduced_grid_end):
+                stage_positions_a[worker, local_i, local_j] = ti.cast(
+                    0.0, stage_positions_a.dtype
+                )
+                stage_positions_b[worker, local_i, local_j] = ti.cast(
+                    0.0, stage_positions_b.dtype
+                )
+
+
+@ti.func
+def sample_tile_detectors(
+        slot,
+        worker,
+        origin_i, origin_j,
+        tile_size,
+        halo_depth,
+        detector_points,
+        tile_positions,
+        tile_velocities,
+        detector_heights,
+        detector_velocities
+    ):
+    """
+    Record the samples of the detectors lying within the tile of the 
+    scratch region of 'worker' (not its halo, so that each detector is 
+    sampled by the one tile holding it) in a slot of their ring buffer, 
+    as 'record_detector_samples' does from the sheet.
+    """
+    for detector in range(detector_points.shape[0]):
+        local_i = detector_points[detector][0] - origin_i
+        local_j = detector_points[detector][1] - origin_j
+        if (halo_depth <= local_i < halo_depth + tile_size
+                and halo_depth <= local_j < halo_depth + tile_size):
+            detector_heights[slot, detector] = ti.cast(
+                tile_positions[worker, local_i, local_j], ti.f64
+            )
+            detector_velocities[slot, detector] = ti.cast(
+                tile_velocities[worker, local_i, local_j], ti.f64
+            )
+
+
+@ti.func
+def store_temporal_tile(
+        worker,
+        origin_i, origin_j,
+        tile_size,
+        halo_depth,
+        grid_size,
+        tile_velocities,
+        tile_positions,
+        tile_accelerations,
+        next_velocities,
+        next_positions,
+        next_accelerations
+    ):
+    """
+    Copy the tile of the scratch region of 'worker', without its halo, to
+    the fields of the next state of the sheet.
+    """
+    for local_i in range(halo_depth, 
+                         ti.min(halo_depth + tile_size, grid_size - origin_i)):
+        for local_j in range(halo_depth, 
+                             ti.min(halo_depth + tile_size, 
+                                    grid_size - origin_j)):
+            i = origin_i + local_i
+            j = origin_j + local_j
+            next_velocities[i, j] = tile_velocities[worker, local_i, local_j]
+            next_positions[i, j] = tile_positions[worker, local_i, local_j]
+            next_accelerations[i, j] = (
+                tile_accelerations[worker, local_i, local_j]
+            )
+
+
+@ti.kernel
+def activate_blocks_around_perturbation(
+        perturb_radius: ti.i32,
+        orbital_coords: ti.template(),
+        block_size: ti.i32,
+        activity_blocks: ti.template()
+    ):
+    """
+    Activate the blocks of the activity-tracked mode covered by a 
+    perturbation overlaid as in 'overlay_perturb_shape_onto_grid', and 
+    those adjacent to them.
+
+    Parameters:
+        - perturb_radius (ti.i32): The radius of the perturbation.
+        - orbital_coords (ti.template()): The coordinates of its centre.
+        - block_size (ti.i32): The side of the blocks, in cells.
+        - activity_blocks (ti.template()): The pointer SNode of the blocks.
+    """
+    number_of_blocks = activity_blocks.shape[0]
+    centre_i = int(ti.round(orbital_coords[None][0]))
+    centre_j = int(ti.round(orbital_coords[None][2]))
+    first_i = ti.max((centre_i - perturb_radius) // block_size - 1, 0)
+    last_i = ti.min((centre_i + perturb_radius) // block_size + 1,
+                    number_of_blocks - 1)
+    first_j = ti.max((centre_j - perturb_radius) // block_size - 1, 0)
+    last_j = ti.min((centre_j + perturb_radius) // block_size + 1,
+                    number_of_blocks - 1)
+    for block_i, block_j in ti.ndrange((first_i, last_i + 1),
+                                       (first_j, last_j + 1)):
+        ti.activate(activity_blocks, [ti.cast(block_i, ti.i32),
+                                      ti.cast(block_j, ti.i32)])
+
+
+@ti.kernel
+def accumulate_block_energies(
+        grid_size: ti.i32,
+        block_size: ti.template(),
+        active_cells: ti.template(),
+        oscillator_velocities: ti.template(),
+        oscillator_positions: ti.template(),
+        oscillator_mass: ti.f64,
+        elastic_constant: ti.f64,
+        block_energies: ti.template()
+    ):
+    """
+    Add up the energy of the oscillators of each active block of the 
+    activity-tracked mode, as the sum of their kinetic energies and of the
+    elastic energies they would have if their neighbours were at rest at 
+    zero height (a measure of the activity of the block, not its share of
+    the energy of the lattice).
+
+    Parameters:
+        - grid_size (ti.i32): The size of the grid.
+        - block_size (ti.template()): The side of the blocks, in cells.
+        - active_cells (ti.template()): The activity mask, holding only the
+          active blocks.
+        - oscillator_velocities, oscillator_positions (ti.template()): The
+          velocities and heights of the oscillators.
+        - oscillator_mass (ti.f64): The mass of each oscillator.
+        - elastic_constant (ti.f64): The elastic constant of the springs.
+        - block_energies (ti.template()): Taichi field of the energies of 
+          the blocks, to which those of the active blocks are added.
+    """
+    for i, j in active_cells:
+        if i < grid_size and j < grid_size:
+            velocity = ti.cast(oscillator_velocities[i, j], ti.f64)
+            height = ti.cast(oscillator_positions[i, j], ti.f64)
+            block_energies[i // block_size, j // block_size] += (
+                0.5 * oscillator_mass * velocity * velocity
+                + 0.5 * elastic_constant * height * height
+            )
+
+
+@ti.kernel
+def update_active_blocks(
+        block_energies: ti.template(),
+        energy_threshold: ti.f64,
+        activity_blocks: ti.template()
+    ) -> ti.i32:
+    """
+    Activate each block of the activity-tracked mode of which the energy, 
+    or that of an adjacent block, reaches 'energy_threshold', and 
+    deactivate the others.
+
+    Since the waves travel no more than the reach of the stencil per step,
+    a disturbance takes at least the side of a block divided by that reach
+    to cross the active blocks adjacent to those in which it is found, so 
+    the activity need only be updated at that interval.
+
+    Parameters:
+        - block_energies (ti.template()): The energies of the blocks, as 
+          computed by 'accumulate_block_energies'.
+        - energy_threshold (ti.f64): The energy below which a block (and 
+          its neighbours) counts as quiescent.
+        - activity_blocks (ti.template()): The pointer SNode of the blocks.
+
+    Returns:
+        ti.i32: The number of active blocks.
+    """
+    number_of_blocks = block_energies.shape[0]
+    number_of_active_blocks = 0
+    for block_i, block_j in block_energies:
+        active = False
+        for offset_i, offset_j in ti.static(ti.ndrange((-1, 2), (-1, 2))):
+            neighbour_i = block_i + offset_i
+            neighbour_j = block_j + offset_j
+            if (0 <= neighbour_i < number_of_blocks
+                    and 0 <= neighbour_j < number_of_blocks):
+                if block_energies[neighbour_i, neighbour_j] >= (
+                        energy_threshold):
+                    active = True
+        # The indices of the SNode are cast to i32 explicitly, or Taichi
+        # warns of an implicit cast.
+        if active:
+            ti.activate(activity_blocks, [ti.cast(block_i, ti.i32),
+                                          ti.cast(block_j, ti.i32)])
+            number_of_active_blocks += 1
+        elif ti.is_active(activity_blocks, [block_i, block_j]):
+            ti.deactivate(activity_blocks, [ti.cast(block_i, ti.i32),
+                                            ti.cast(block_j, ti.i32)])
+    return number_of_active_blocks
+
+
+@ti.kernel
+def store_active_blocks(
+        activity_blocks: ti.template(),
+        active_blocks: ti.types.ndarray(dtype=ti.u8, ndim=2)
+    ):
+    """
+    Copy the activation of the blocks of the activity-tracked mode into an
+    array (1 for an active block, else 0), for a checkpoint.
+    """
+    for block_i, block_j in ti.ndrange(active_blocks.shape[0],
+                                       active_blocks.shape[1]):
+        active_blocks[block_i, block_j] = ti.cast(
+            ti.is_active(activity_blocks, [block_i, block_j]), ti.u8
+        )
+
+
+@ti.kernel
+def restore_active_blocks(
+        active_blocks: ti.types.ndarray(dtype=ti.u8, ndim=2),
+        activity_blocks: ti.template()
+    ):
+    """
+    Activate the blocks of the activity-tracked mode marked as active in
+    the array of 'store_active_blocks', and deactivate the others.
+    """
+    for block_i, block_j in ti.ndrange(active_blocks.shape[0],
+                                       active_blocks.shape[1]):
+        if active_blocks[block_i, block_j]:
+            ti.activate(activity_blocks, [ti.cast(block_i, ti.i32),
+                                          ti.cast(block_j, ti.i32)])
+        else:
+            ti.deactivate(activity_blocks, [ti.cast(block_i, ti.i32),
+                                            ti.cast(block_j, ti.i32)])
+
+
+@ti.func
+def sample_detectors(
+        sampling: ti.template(),
+        slot,
+        step,
+        detector_points,
+        oscillator_positions,
+        oscillator_velocities,
+        detector_steps,
+        detector_heights,
+        detector_velocities
+    ):
+    """
+    Record the height and velocity of the oscillator under each virtual 
+    detector in a slot of the ring buffer of the detectors, at the end of
+    the kernel which completes a step, so that sampling the detectors costs
+    no launch of its own.
+
+    Parameters:
+        - sampling (ti.template()): Whether the detectors are sampled; if 
+          not, the remaining arguments are ignored (the fields may be 
+          None).
+        - slot (ti.i32): The slot of the ring buffer written.
+        - step (ti.i64): The step counter of the engine, recorded with the
+          samples.
+        - detector_points (ti.template()): Taichi field of the (i, j) grid 
+          coordinates of the detectors.
+        - oscillator_positions, oscillator_velocities (ti.template()): The
+          heights and velocities of the oscillators.
+        - detector_steps (ti.template()): Taichi field of the step of each
+          slot.
+        - detector_heights, detector_velocities (ti.template()): Taichi 
+          fields of shape (slots, detectors) of the samples.
+    """
+    if ti.static(sampling):
+        record_detector_samples(
+            slot,
+            step,
+            detector_points,
+            oscillator_positions,
+            oscillator_velocities,
+            detector_steps,
+            detector_heights,
+            detector_velocities
+        )
+
+
+@ti.func
+def record_detector_samples(
+        slot,
+        step,
+        detector_points,
+        oscillator_positions,
+        oscillator_velocities,
+        detector_steps,
+        detector_heights,
+        detector_velocities
+    ):
+    """
+    Record the samples of the detectors in a slot of their ring buffer, for
+    'sample_detectors' and 'fused_step'.
+    """
+    detector_steps[slot] = step
+    for detector in range(detector_points.shape[0]):
+        i = detector_points[detector][0]
+        j = detector_points[detector][1]
+        detector_heights[slot, detector] = ti.cast(
+            oscillator_positions[i, j], ti.f64
+        )
+        detector_velocities[slot, detector] = ti.cast(
+            oscillator_velocities[i, j], ti.f64
+        )
+
+
+def ring_detector_points(grid_size, radius, number_of_detectors):
+    """
+    The grid coordinates of detectors spaced evenly around a ring about the
+    grid centre, starting on the x axis, each at the cell nearest to its 
+    place on the ring.
+
+    Parameters:
+        - grid_size (int): The size of the grid.
+        - radius (float): The radius of the ring, in cells.
+        - number_of_detectors (int): The number of detectors on the ring.
+
+    Returns:
+        list: The (i, j) grid coordinates of the detectors.
+    """
+    grid_centre = int((grid_size - 1) / 2)
+    points = []
+    for detector in range(number_of_detectors):
+        angle = 2 * math.pi * detector / number_of_detectors
+        points.append((round(grid_centre + radius * math.cos(angle)),
+                       round(grid_centre + radius * math.sin(angle))))
+    return points
+
+
+# The parameters and the state of a 'SimulationEngine' used by its orbital
+# updates (see 'update_orbit') and its fused steps (see 'fused_step'), held
+# on the device between steps, so that a step takes no scalar arguments; an
+# 'EnsembleEngine' holds one for each of its members. The members are the
+# attributes of the engine of the same names ('merged' as an integer), 
+# but for 'inspiralling' (whether the orbit shrinks, with the "Per-step
+# update" inspiral), 'trajectory_decay_constant' and 
+# 'trajectory_merge_time' (those of the trajectory table followed, with 
+# the "Trajectory table" inspiral), 'first_row' and 'end_row' (the rows 
+# of 'strip_rows') and 'stamp_kind', the perturbation to overlay on the 
+# current step: 0 for none, 1 for those of the two spheres, 3 for that of 
+# the merged object.
+fused_step_state = ti.types.struct(
+    first_sphere_mass=ti.i32,
+    second_sphere_mass=ti.i32,
+    sphere_mass_ratio=ti.f64,
+    merging_distance=ti.f64,
+    astro_summed_masses=ti.f64,
+    binary_energy_loss_factor=ti.f64,
+    orbital_decay_factor=ti.f64,
+    default_first_orbital_radius=ti.f64,
+    default_polar_angle_step=ti.f64,
+    step_duration=ti.f64,
+    astro_length_scaling=ti.f64,
+    inspiralling=ti.i32,
+    trajectory_decay_constant=ti.f64,
+    trajectory_merge_time=ti.f64,
+    first_perturb_radius=ti.i32,
+    second_perturb_radius=ti.i32,
+    merged_perturb_radius=ti.i32,
+    first_perturb_slot=ti.i32,
+    second_perturb_slot=ti.i32,
+    merged_perturb_slot=ti.i32,
+    first_row=ti.i32,
+    end_row=ti.i32,
+    reduced_grid_start=ti.i32,
+    reduced_grid_end=ti.i32,
+    number_of_damped_borders=ti.i32,
+    damping_layer_depth=ti.i32,
+    elastic_constant=ti.f64,
+    oscillator_mass=ti.f64,
+    timestep=ti.f64,
+    simulation_step_counter=ti.i64,
+    detector_samples_written=ti.i64,
+    first_orbital_radius=ti.f64,
+    second_orbital_radius=ti.f64,
+    model_binary_separation=ti.f64,
+    previous_polar_angle=ti.f64,
+    current_polar_angle=ti.f64,
+    astro_binary_separation=ti.f64,
+    astro_first_sphere_orbital_speed=ti.f64,
+    astro_omega=ti.f64,
+    model_omega=ti.f64,
+    binary_energy_loss=ti.f64,
+    astro_orbital_decay=ti.f64,
+    inspiral_time=ti.f64,
+    merged=ti.i32,
+    stamp_kind=ti.i32
+)
+
+
+@ti.kernel
+def load_fused_step_state(
+        names: ti.template(),
+        values: ti.types.ndarray(),
+        step_state: ti.template()
+    ):
+    """
+    Set the members 'names' of the 'fused_step_state' held by the field 
+    'step_state' to 'values', in the same order: that of an engine (of 
+    shape ()), or those of all the members of an ensemble alike.
+    """
+    for element in ti.grouped(step_state):
+        for index in ti.static(range(len(names))):
+            member = ti.static(getattr(step_state, names[index]))
+            member[element] = ti.cast(values[index], member.dtype)
+
+
+@ti.kernel
+def store_fused_step_state(
+        names: ti.template(),
+        step_state: ti.template(),
+        values: ti.types.ndarray()
+    ):
+    """
+    Copy the members 'names' of the 'fused_step_state' held by the field 
+    'step_state' into 'values', in the same order.
+    """
+    for index in ti.static(range(len(names))):
+        values[index] = ti.cast(
+            ti.static(getattr(step_state, names[index]))[None], ti.f64
+        )
+
+
+@ti.kernel
+def fused_step(
+        orbit_update: ti.template(),
+        integrator: ti.template(),
+        sampling: ti.template(),
+        step_state: ti.template(),
+        grid_centre: ti.template(),
+        trajectory_times: ti.template(),
+        trajectory_separations: ti.template(),
+        first_orbital_coords: ti.template(),
+        second_orbital_coords: ti.template(),
+        perturb_stamps: ti.template(),
+        active_cells: ti.template(),
+        damping_map: ti.template(),
+        adjacent_grid_elements: ti.template(),
+        accumulation_dtype: ti.template(),
+        oscillator_velocities: ti.template(),
+        oscillator_positions: ti.template(),
+        oscillator_accelerations: ti.template(),
+        detector_points: ti.template(),
+        detector_steps: ti.template(),
+        detector_heights: ti.template(),
+        detector_velocities: ti.template()
+    ):
+    """
+    Take a whole step of an engine in a single kernel launch: the orbital
+    update, the overlay of the perturbations, the step of the legacy RK4 or
+    velocity Verlet integrator (with the linear sponge applied by the 
+    integrator) and the sampling of the virtual detectors.
+
+    A step of a small grid otherwise costs a dozen kernel launches, most of
+    them for the scalar arithmetic of the orbital update, and the launches,
+    rather than the sheet, dominate its time. Here the orbital state stays
+    on the device, in a 'fused_step_state' with the parameters of the step,
+    and is updated by the serial code at the top of the kernel; the 
+    overlays, the integrator and the sampling follow as the parallel loops
+    of the kernel, each over the cells it touches, in the order in which 
+    the separate kernels would run.
+
+    Parameters:
+        - orbit_update (ti.template()): The orbital update made: "Per-step
+          update" (also that of an orbit of constant radius), "Trajectory 
+          table" (see 'inspiral_options'), or None for none (test runs, 
+          whose perturbations are placed by the engine).
+        - integrator (ti.template()): "Legacy RK4" or "Velocity Verlet".
+        - sampling (ti.template()): Whether the detectors are sampled.
+        - step_state (ti.template()): Taichi field of shape () of the 
+          'fused_step_state' of the engine, updated in place.
+        - grid_centre (ti.template()): The centre of the grid.
+        - trajectory_times, trajectory_separations (ti.template()): Taichi
+          fields of the times and separations of the nodes of the 
+          'InspiralTrajectory' followed by the "Trajectory table" update.
+        - first_orbital_coords, second_orbital_coords (ti.template()): The
+          coordinates of the spheres, updated in place.
+        - perturb_stamps (ti.template()): The stamps of the 
+          'GaussianStampCache' holding the shapes of the perturbations of 
+          the first sphere, of the second sphere and of the merged object,
+          in the slots given by the state.
+        - active_cells, ..., oscillator_accelerations: The fields given to
+          'update_oscillator_positions_velocities_RK4', or to the two 
+          velocity Verlet kernels.
+        - detector_points, ..., detector_velocities: The fields given to 
+          'sample_detectors'.
+    """
+    update_orbit(orbit_update, grid_centre, trajectory_times,
+                 trajectory_separations, step_state, None,
+                 first_orbital_coords, second_orbital_coords)
+    overlay_perturbations(perturb_stamps, step_state, None,
+                          first_orbital_coords, second_orbital_coords,
+                          oscillator_positions, oscillator_velocities)
+
+    state = step_state[None]
+    if ti.static(integrator == "Legacy RK4"):
+        advance_cells_RK4(
+            state.number_of_damped_borders, state.reduced_grid_start, 
+            state.reduced_grid_end, state.damping_layer_depth, active_cells,
+            damping_map, state.elastic_constant, adjacent_grid_elements,
+            accumulation_dtype, oscillator_velocities, oscillator_positions,
+            state.oscillator_mass, state.timestep
+        )
+    else:
+        half_kick_and_drift_cells(
+            state.reduced_grid_start, state.reduced_grid_end, active_cells,
+            damping_map, oscillator_velocities, oscillator_positions,
+            oscillator_accelerations, state.timestep
+        )
+        update_accelerations_and_half_kick_cells(
+            state.reduced_grid_start, state.reduced_grid_end, active_cells,
+            state.elastic_constant, adjacent_grid_elements,
+            accumulation_dtype, oscillator_velocities, oscillator_positions,
+            oscillator_accelerations, state.oscillator_mass, state.timestep
+        )
+
+    step_state[None].simulation_step_counter += 1
+    if ti.static(sampling):
+        record_detector_samples(
+            ti.cast(state.detector_samples_written % detector_steps.shape[0],
+                    ti.i32),
+            step_state[None].simulation_step_counter, detector_points,
+            oscillator_positions, oscillator_velocities, detector_steps,
+            detector_heights, detector_velocities
+        )
+        step_state[None].detector_samples_written += 1
+
+
+@ti.kernel
+def update_engine_orbit(
+        orbit_update: ti.template(),
+        step_state: ti.template(),
+        grid_centre: ti.template(),
+        trajectory_times: ti.template(),
+        trajectory_separations: ti.template(),
+        first_orbital_coords: ti.template(),
+        second_orbital_coords: ti.template()
+    ):
+    """
+    Make the orbital update of one step of an engine whose steps are not 
+    fused, as 'fused_step' does, and set the perturbations to overlay, 
+    which the engine then overlays itself.
+
+    Parameters:
+        - orbit_update, ..., second_orbital_coords: As for 'fused_step'.
+    """
+    update_orbit(orbit_update, grid_centre, trajectory_times,
+                 trajectory_separations, step_state, None,
+                 first_orbital_coords, second_orbital_coords)
+
+
+@ti.func
+def update_orbit(
+        orbit_update: ti.template(),
+        grid_centre,
+        trajectory_times,
+        trajectory_separations,
+        step_state,
+        member: ti.template(),
+        first_orbital_coords,
+        second_orbital_coords
+    ):
+    """
+    Make the orbital update of one step of a binary, with 'advance_orbit' 
+    or 'follow_inspiral_trajectory' as selected by 'orbit_update' (see 
+    'fused_step'; None for none), and set its 'stamp_kind'.
+
+    The binary is the element 'member' of the field 'step_state' of 
+    'fused_step_state' structs, and its spheres the elements 'member' of
+    the fields of the orbital coordinates: None for the fields of shape () 
+    of an engine, or the index of a member of an ensemble.
+    """
+    if ti.static(orbit_update == "Per-step update"):
+        advance_orbit(grid_centre, step_state, member, first_orbital_coords,
+                      second_orbital_coords)
+    elif ti.static(orbit_update == "Trajectory table"):
+        follow_inspiral_trajectory(
+            grid_centre, trajectory_times, trajectory_separations,
+            step_state, member, first_orbital_coords, second_orbital_coords
+        )
+    else:
+        step_state[member].stamp_kind = 0
+
+
+@ti.func
+def advance_orbit(
+        grid_centre,
+        step_state,
+        member: ti.template(),
+        first_orbital_coords,
+        second_orbital_coords
+    ):
+    """
+    Move a binary along its orbit by one step, shrinking the orbit if it is
+    inspiralling (the "Per-step update" inspiral), and set the 
+    perturbations to overlay: those of the spheres, or that of the merged 
+    object at the grid centre on the step on which the binary merges (once
+    only, since a stationary mass produces no gravitational waves). See 
+    'update_orbit' for the arguments.
+    """
+    state = step_state[member]
+    state.stamp_kind = 0
+    merging = 0
+    if state.merged == 0:
+        state.second_orbital_radius = (state.first_orbital_radius
+                                       * state.sphere_mass_ratio)
+        state.model_binary_separation = (state.first_orbital_radius
+                                         + state.second_orbital_radius)
+        state.previous_polar_angle = state.current_polar_angle
+        delta_polar_angle = 0.0
+        if state.model_binary_separation >= state.merging_distance:
+            state.astro_binary_separation = (state.model_binary_separation
+                                             * state.astro_length_scaling)
+            # Leave the binary where it is if no time has elapsed, which
+            # also avoids the zerodivide condition for the model omega.
+            if state.step_duration != 0.0:
+                # The polar angle step scales with the orbital radius to 
+                # the power of -3/2, as for a Keplerian orbit. The 
+                # increment is not wrapped, so that the model omega 
+                # reflects any step over 360 degrees.
+                delta_polar_angle = (
+                    state.default_polar_angle_step
+                    * (state.first_orbital_radius
+                       / state.default_first_orbital_radius) ** -3/2
+                )
+                state.model_omega = (delta_polar_angle / state.step_duration
+                                     * ti.math.pi / 180)
+                state.current_polar_angle = (state.previous_polar_angle
+                                             + delta_polar_angle)
+            state.astro_omega = ti.math.sqrt(
+                newtons_const
+                * state.astro_summed_masses
+                / (state.astro_binary_separation
+                   * state.astro_binary_separation
+                   * state.astro_binary_separation)
+            )
+            if state.inspiralling:
+                # The rate of orbital decay (m/s) of general relativity.
+                astro_orbital_decay = (state.orbital_decay_factor
+                                       * state.first_sphere_mass
+                                       * state.second_sphere_mass)
+                astro_orbital_decay *= (
+                    (state.first_sphere_mass + state.second_sphere_mass)
+                    / (state.astro_binary_separation ** 3)
+                )
+                state.astro_orbital_decay = astro_orbital_decay
+                model_orbital_decay = (
+                    state.astro_orbital_decay / state.astro_length_scaling
+                    * state.model_omega / state.astro_omega
+                )
+                # If the orbital shrinkage exceeds the remaining distance
+                # between the binary components, treat the system as 
+                # merged.
+                if model_orbital_decay >= (state.model_binary_separation
+                                           - state.merging_distance):
+                    state.model_binary_separation = 0.0
+                else:
+                    state.first_orbital_radius -= (
+                        state.first_orbital_radius
+                        * model_orbital_decay
+                        / state.model_binary_separation)
+        else:
+            state.model_binary_separation = 0.0
+
+        if state.model_binary_separation == 0.0:
+            merging = 1
+        else:
+            # The orbit sizes may have been reduced by the inspiral.
+            state.second_orbital_radius = (state.first_orbital_radius
+                                           * state.sphere_mass_ratio)
+            state.model_binary_separation = (state.first_orbital_radius
+                                             + state.second_orbital_radius)
+            state.astro_binary_separation = (state.model_binary_separation
+                                             * state.astro_length_scaling)
+            state.astro_omega = ti.math.sqrt(
+                newtons_const
+                * state.astro_summed_masses
+                / (state.astro_binary_separation
+                   * state.astro_binary_separation
+                   * state.astro_binary_separation)
+            )
+            if state.step_duration != 0.0:
+                state.current_polar_angle %= 360
+            state.astro_first_sphere_orbital_speed = (
+                state.astro_omega
+                * (state.first_orbital_radius * state.astro_length_scaling)
+            )
+            # The rate of energy loss to gravitational radiation.
+            state.binary_energy_loss = (state.binary_energy_loss_factor
+                                        * state.astro_binary_separation ** 4
+                                        * state.astro_omega ** 6)
+            place_binary(grid_centre, state, member, first_orbital_coords,
+                         second_orbital_coords)
+            state.stamp_kind = 1
+    step_state[member] = state
+    if merging:
+        merge_binary(grid_centre, step_state, member, first_orbital_coords)
+
+
+@ti.func
+def follow_inspiral_trajectory(
+        grid_centre,
+        trajectory_times,
+        trajectory_separations,
+        step_state,
+        member: ti.template(),
+        first_orbital_coords,
+        second_orbital_coords
+    ):
+    """
+    Move an inspiralling binary along its orbit by one step, with the 
+    separation taken from its trajectory table (the "Trajectory table" 
+    inspiral), and set the perturbations to overlay: those of the spheres,
+    or that of the merged object once the trajectory reaches the merging
+    separation. The 'inspiral_time' of the state must be that of its 
+    orbital radius along the table. The powers are taken with float 
+    exponents, as by Python. See 'update_orbit' for the arguments.
+    """
+    state = step_state[member]
+    state.stamp_kind = 0
+    merging = 0
+    if state.merged == 0:
+        state.second_orbital_radius = (state.first_orbital_radius
+                                       * state.sphere_mass_ratio)
+        state.model_binary_separation = (state.first_orbital_radius
+                                         + state.second_orbital_radius)
+        state.previous_polar_angle = state.current_polar_angle
+        if state.model_binary_separation < state.merging_distance:
+            merging = 1
+        else:
+            separation = (state.model_binary_separation
+                          * state.astro_length_scaling)
+            state.astro_orbital_decay = (state.trajectory_decay_constant
+                                         / separation ** 3.0)
+            # Leave the binary where it is if no time has elapsed.
+            if state.step_duration != 0.0:
+                delta_polar_angle = (
+                    state.default_polar_angle_step
+                    * (state.first_orbital_radius
+                       / state.default_first_orbital_radius) ** -3.0 / 2
+                )
+                state.model_omega = (delta_polar_angle / state.step_duration
+                                     * ti.math.pi / 180)
+                state.current_polar_angle = ((state.previous_polar_angle
+                                              + delta_polar_angle) % 360)
+                # The step stands for the time in which the astrophysical
+                # binary turns by the angle the model turns through in a 
+                # second.
+                state.inspiral_time += state.model_omega / ti.math.sqrt(
+                    newtons_const * state.astro_summed_masses
+                    / separation ** 3.0
+                )
+                if state.inspiral_time >= state.trajectory_merge_time:
+                    merging = 1
+                else:
+                    state.first_orbital_radius = (
+                        trajectory_separation_at(
+                            trajectory_times, trajectory_separations,
+                            state.trajectory_decay_constant,
+                            state.inspiral_time
+                        )
+                        / state.astro_length_scaling
+                        / (1 + state.sphere_mass_ratio)
+                    )
+        if merging == 0:
+            state.second_orbital_radius = (state.first_orbital_radius
+                                           * state.sphere_mass_ratio)
+            state.model_binary_separation = (state.first_orbital_radius
+                                             + state.second_orbital_radius)
+            state.astro_binary_separation = (state.model_binary_separation
+                                             * state.astro_length_scaling)
+            state.astro_omega = ti.math.sqrt(
+                newtons_const * state.astro_summed_masses
+                / state.astro_binary_separation ** 3.0
+            )
+            state.astro_first_sphere_orbital_speed = (
+                state.astro_omega
+                * state.first_orbital_radius * state.astro_length_scaling
+            )
+            state.binary_energy_loss = (
+                state.binary_energy_loss_factor
+                * state.astro_binary_separation ** 4.0
+                * state.astro_omega ** 6.0
+            )
+            place_binary(grid_centre, state, member, first_orbital_coords,
+                         second_orbital_coords)
+            state.stamp_kind = 1
+    step_state[member] = state
+    if merging:
+        merge_binary(grid_centre, step_state, member, first_orbital_coords)
+
+
+@ti.func
+def trajectory_separation_at(
+        trajectory_times,
+        trajectory_separations,
+        trajectory_decay_constant,
+        time
+    ):
+    """
+    The separation of a trajectory table at a time before its merge time,
+    as given by 'InspiralTrajectory.separation_at'.
+    """
+    # Bisect for the node from which the interval holding the time starts.
+    node = 0
+    end_node = trajectory_times.shape[0] - 1
+    while end_node - node > 1:
+        middle = (node + end_node) // 2
+        if trajectory_times[middle] <= time:
+            node = middle
+        else:
+            end_node = middle
+    start_time = trajectory_times[node]
+    interval = trajectory_times[node + 1] - start_time
+    s = (time - start_time) / interval
+    start = trajectory_separations[node]
+    end = trajectory_separations[node + 1]
+    start_slope = -trajectory_decay_constant / start ** 3.0 * interval
+    end_slope = -trajectory_decay_constant / end ** 3.0 * interval
+    return (start
+            + s * (start_slope
+                   + s * (3 * (end - start) - 2 * start_slope - end_slope
+                          + s * (2 * (start - end) + start_slope
+                                 + end_slope))))
+
+
+@ti.func
+def place_binary(grid_centre, state, member: ti.template(),
+                 first_orbital_coords, second_orbital_coords):
+    """
+    Place the spheres of the 'fused_step_state' 'state' of a binary at their
+    polar angle on their orbits (see 'update_orbit' for the arguments).
+    """
+    first_orbital_coords[member] = orbital_coords_on_grid(
+        grid_centre,
+        state.first_orbital_radius,
+        state.current_polar_angle
+    )
+    second_orbital_coords[member] = orbital_coords_on_grid(
+        grid_centre,
+        state.second_orbital_radius,
+        state.current_polar_angle + 180
+    )
+
+
+@ti.func
+def merge_binary(grid_centre, step_state, member: ti.template(),
+                 first_orbital_coords):
+    """
+    Reset the orbital quantities of a merged binary, and set the 
+    perturbation of the merged object to overlay at the grid centre (see 
+    'update_orbit' for the arguments).
+    """
+    step_state[member].merged = 1
+    step_state[member].first_orbital_radius = 0.0
+    step_state[member].second_orbital_radius = 0.0
+    step_state[member].model_binary_separation = 0.0
+    step_state[member].astro_binary_separation = 0.0
+    step_state[member].astro_first_sphere_orbital_speed = 0.0
+    step_state[member].model_omega = 0.0
+    step_state[member].astro_omega = 0.0
+    step_state[member].binary_energy_loss = 0.0
+    step_state[member].astro_orbital_decay = 0.0
+    first_orbital_coords[member] = orbital_coords_on_grid(
+        grid_centre, 0.0, step_state[member].current_polar_angle
+    )
+    step_state[member].stamp_kind = 3
+
+
+@ti.kernel
+def total_energy_of_sheet(
+        grid_size: ti.i32,
+        first_row: ti.i32,
+        end_row: ti.i32,
+        domain_row_spans: ti.template(),
+        elastic_constant: ti.f64,
+        oscillator_positions: ti.template(),
+        oscillator_mass: ti.i32,
+        oscillator_velocities: ti.template()
+    ) -> ti.f64:
+    """
+    Calculate the total energy of the grid: sum of potential and kinetic energy
+    of all the oscillators.
+
+    This function computes the total energy of a grid of oscillators by 
+    summing up the potential and kinetic energy for each oscillator. 
+    The potential energy is calculated based on the elastic constant and 
+    the vertical displacement of each oscillator; the kinetic energy is 
+    deterined based on the mass and velocity of each oscillator. The total 
+    energy is then scaled down (arbitrarily) by a factor of 1e9.
+
+    Parameters:
+        - grid_size (ti.i32): The size of the grid.
+        - first_row, end_row (ti.i32): The rows over which the energy is 
+          summed (from first_row inclusive to end_row exclusive): the whole
+          grid, except for the strip of a domain-decomposed run.
+        - domain_row_spans (ti.template()): The cells of each row within 
+          the computational domain (see 'compute_domain_row_spans'), the 
+          oscillators outside it being at rest at zero height.
+        - elastic_constant (ti.f64): The elastic constant.
+        - oscillator_positions (ti.template()): Taichi field containing 
+          the heights of the oscillators, used for the potential energy 
+          calculation.
+        - oscillator_mass (ti.i32): The mass of each oscillator, used to 
+          calculate the kinetic energy.
+        - oscillator_velocities (ti.template()): Taichi field containing the 
+          vertical velocities of the oscillators, used for the kinetic energy
+          calculation.
+
+    Returns:
+        ti.f64: The total energy of the grid, which is the sum of potential
+        and kinetic energy, divided by 1e9.
+    """
+    total_potential_energy = 0.0
+    total_kinetic_energy = 0.0
+    for i in range(first_row, end_row):
+        for j in range(domain_row_spans[i][0], domain_row_spans[i][1]):
+            total_potential_energy += (0.5 * elastic_constant
+                                       * oscillator_positions[i, j]
+                                       * oscillator_positions[i, j])
+            total_kinetic_energy += (0.5 * oscillator_mass
+                                     * oscillator_velocities[i, j]
+                                     * oscillator_velocities[i, j])
+    return (total_potential_energy + total_kinetic_energy) / 1e9
+
+
+@ti.kernel
+def lattice_energy_of_sheet(
+        grid_size: ti.i32,
+        first_row: ti.i32,
+        end_row: ti.i32,
+        domain_row_spans: ti.template(),
+        elastic_constant: ti.f64,
+        adjacent_grid_elements: ti.template(),
+        oscillator_positions: ti.template(),
+        oscillator_mass: ti.f64,
+        oscillator_velocities: ti.template()
+    ) -> ti.f64:
+    """
+    Calculate the mechanical energy (Hamiltonian) of the oscillator lattice.
+
+    Unlike 'total_energy_of_sheet', the potential energy is that stored in 
+    the springs between adjacent oscillators, 0.5 * w * k * (h_a - h_b)^2 
+    for each spring of stencil weight w, so the result is conserved by the
+    equations of motion of the undamped lattice. It is used to measure the
+    energy drift of the time integrators.
+
+    Parameters:
+        - grid_size (ti.i32): The size of the grid.
+        - first_row, end_row (ti.i32): The rows over which the energy is 
+          summed (from first_row inclusive to end_row exclusive): the whole
+          grid, except for the strip of a domain-decomposed run.
+        - domain_row_spans (ti.template()): The cells of each row within 
+          the computational domain (see 'compute_domain_row_spans'), the 
+          oscillators outside it being at rest at zero height.
+        - elastic_constant (ti.f64): The elastic constant.
+        - adjacent_grid_elements (ti.template()): The Laplacian stencil, 
+          one of the 'laplacian_stencils'.
+        - oscillator_positions (ti.template()): Taichi field containing 
+          the heights of the oscillators.
+        - oscillator_mass (ti.f64): The mass of each oscillator.
+        - oscillator_velocities (ti.template()): Taichi field containing the 
+          vertical velocities of the oscillators.
+
+    Returns:
+        ti.f64: The sum of the spring and kinetic energies of the lattice.
+    """
+    total_spring_energy = 0.0
+    total_kinetic_energy = 0.0
+    for i in range(first_row, end_row):
+        for j in range(domain_row_spans[i][0], domain_row_spans[i][1]):
+            # Each spring is met from both of its ends, hence half of 
+            # 0.5 * w * k * extension^2 from each, unless the other end is
+            # outside the domain.
+            for x_offset, y_offset, weight in ti.static(
+                    adjacent_grid_elements):
+                neighbour_i = i + x_offset
+                neighbour_j = j + y_offset
+                if (0 <= neighbour_i < grid_size 
+                        and 0 <= neighbour_j < grid_size):
+                    extension = (oscillator_positions[neighbour_i, 
+                                                      neighbour_j]
+                                 - oscillator_positions[i, j])
+                    spring_share = 0.25
+                    if not (domain_row_spans[neighbour_i][0] <= neighbour_j
+                            < domain_row_spans[neighbour_i][1]):
+                        spring_share = 0.5
+                    total_spring_energy += (spring_share * weight 
+                                            * elastic_constant
+                                            * extension * extension)
+            total_kinetic_energy += (0.5 * oscillator_mass
+                                     * oscillator_velocities[i, j]
+                                     * oscillator_velocities[i, j])
+    return total_spring_energy + total_kinetic_energy
+
+
+@ti.kernel
+def load_spectral_state(
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        oscillator_positions: ti.template(),
+        oscillator_velocities: ti.template(),
+        spectral_state: ti.types.ndarray(dtype=ti.f64, ndim=3)
+    ):
+    """
+    Copy the heights and velocities of the reduced grid into the NumPy 
+    array on which the spectral integrator works, as 'spectral_state[0]' 
+    and 'spectral_state[1]' respectively.
+
+    The array is passed to the kernel without a copy, unlike that returned
+    by 'to_numpy', and it holds the reduced grid alone, whatever the 
+    layout of the fields.
+    """
+    for i, j in ti.ndrange((reduced_grid_start, reduced_grid_end),
+                           (reduced_grid_start, reduced_grid_end)):
+        spectral_state[0, i - reduced_grid_start, j - reduced_grid_start] = (
+            oscillator_positions[i, j]
+        )
+        spectral_state[1, i - reduced_grid_start, j - reduced_grid_start] = (
+            oscillator_velocities[i, j]
+        )
+
+
+@ti.kernel
+def store_spectral_state(
+        reduced_grid_start: ti.i32,
+        reduced_grid_end: ti.i32,
+        oscillator_positions: ti.template(),
+        oscillator_velocities: ti.template(),
+        spectral_state: ti.types.ndarray(dtype=ti.f64, ndim=3),
+        sampling: ti.template(),
+        detector_slot: ti.i32,
+        detector_step: ti.i64,
+        detector_points: ti.template(),
+        detector_steps: ti.template(),
+        detector_heights: ti.template(),
+        detector_velocities: ti.template()
+    ):
+    """
+    Copy the heights and velocities computed by the spectral integrator 
+    back into the reduced grid; the reverse of 'load_spectral_state'. The
+    virtual detectors are sampled at the end of the step (see 
+    'sample_detectors').
+    """
+    for i, j in ti.ndrange((reduced_grid_start, reduced_grid_end),
+                           (reduced_grid_start, reduced_grid_end)):
+        oscillator_positions[i, j] = ti.cast(
+            spectral_state[0, i - reduced_grid_start, j - reduced_grid_start],
+            oscillator_positions.dtype
+        )
+        oscillator_velocities[i, j] = ti.cast(
+            spectral_state[1, i - reduced_grid_start, j - reduced_grid_start],
+            oscillator_velocities.dtype
+        )
+    sample_detectors(
+        sampling,
+        detector_slot,
+        detector_step,
+        detector_points,
+        oscillator_positions,
+        oscillator_velocities,
+        detector_steps,
+        detector_heights,
+        detector_velocities
+    )
+
+
+@ti.kernel
+def copy_rows_to_array(
+        first_row: ti.i32,
+        field: ti.template(),
+        rows: ti.types.ndarray(ndim=2)
+    ):
+    """
+    Copy the rows of a field of the sheet from 'first_row' onwards into an
+    array of shape (number of rows, grid size), such as a buffer of the 
+    halo exchange of a domain-decomposed run.
+    """
+    for k, j in ti.ndrange(rows.shape[0], rows.shape[1]):
+        rows[k, j] = field[first_row + k, j]
+
+
+@ti.kernel
+def copy_array_to_rows(
+        first_row: ti.i32,
+        field: ti.template(),
+        rows: ti.types.ndarray(ndim=2)
+    ):
+    """
+    Copy an array of shape (number of rows, grid size) into the rows of a
+    field of the sheet from 'first_row' onwards; the reverse of 
+    'copy_rows_to_array'.
+    """
+    for k, j in ti.ndrange(rows.shape[0], rows.shape[1]):
+        field[first_row + k, j] = ti.cast(rows[k, j], field.dtype)
+
+
+# =============================================================================
+# Spectral propagator (NumPy)
+# =============================================================================
+def sine_transform(array):
+    """
+    The type-I discrete sine transform of an array over its last two axes.
+
+    Each axis is transformed with the real FFT of its odd extension, of 
+    length 2 (n + 1) for an axis of length n. The transform is its own 
+    inverse up to a factor of 2 / (n + 1) per axis.
+
+    Parameters:
+        - array (numpy.ndarray): The array, of shape (..., n, n).
+
+    Returns:
+        numpy.ndarray: The transformed array, of the same shape.
+    """
+    # The last axis is transformed, then swapped with the one before it.
+    for _ in range(2):
+        size = array.shape[-1]
+        odd_extension = np.zeros(array.shape[:-1] + (2 * size + 2,))
+        odd_extension[..., 1:size + 1] = array
+        odd_extension[..., size + 2:] = -array[..., ::-1]
+        array = -0.5 * np.fft.rfft(odd_extension)[..., 1:size + 1].imag
+        array = array.swapaxes(-1, -2)
+    return array
+
+
+def lattice_angular_frequencies(
+        stencil,
+        size,
+        elastic_constant,
+        oscillator_mass
+    ):
+    """
+    The angular frequencies of the normal modes of the spring lattice on a
+    square of 'size' x 'size' oscillators whose edges are held at zero.
+
+    The normal modes are the basis functions of 'sine_transform', with the
+    wavenumbers p, q = pi n / (size + 1), n = 1 ... size, along the two 
+    axes. The lattice dispersion relation gives their frequencies as
+        omega^2 = (k / m) sum(w (1 - cos(p x_offset) cos(q y_offset)))
+    over the (x_offset, y_offset, w) entries of the stencil. This holds for
+    the stencils of reach 1 only: a stencil reaching further couples the 
+    cells next to the zeroised edges to cells beyond them, which the odd 
+    extension of the sine basis gets wrong.
+
+    Parameters:
+        - stencil (str): One of 'stencil_options'.
+        - size (int): The number of oscillators along each side.
+        - elastic_constant (float): The spring constant of the lattice.
+        - oscillator_mass (float): The mass of each oscillator.
+
+    Returns:
+        numpy.ndarray: The angular frequencies, of shape (size, size).
+    """
+    wavenumbers = np.pi * np.arange(1, size + 1) / (size + 1)
+    p, q = np.meshgrid(wavenumbers, wavenumbers, indexing="ij")
+    squared_frequencies = np.zeros_like(p)
+    for x_offset, y_offset, weight in laplacian_stencils[stencil]:
+        squared_frequencies += weight * (
+            1.0 - np.cos(p * x_offset) * np.cos(q * y_offset)
+        )
+    return np.sqrt(elastic_constant / oscillator_mass * squared_frequencies)
+
+
+# =============================================================================
+# Inspiral trajectory tables (NumPy)
+# =============================================================================
+# The separation of an inspiralling binary shrinks at the rate of orbital
+# decay of 'advance_orbit', which depends on the separation only, so its
+# whole trajectory is that of a single ODE in astrophysical time:
+#     da/dt = -K / a^3,    dphi/dt = omega(a) = sqrt(G M / a^3),
+# with K = orbital_decay_factor m1 m2 (m1 + m2). It is integrated once,
+# from an initial separation down to the merging separation, by the
+# adaptive Dormand-Prince 5(4) method, whose steps shrink as the decay
+# accelerates towards the merger. The nodes of the solution, with the
+# derivatives there, are interpolated by cubic Hermite polynomials, and the
+# tables are cached by the masses and separations, so that every engine of
+# the same binary shares its table.
+dormand_prince_nodes = (0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0, 1.0)
+dormand_prince_coefficients = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+    (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84)
+)
+# The weights of the fifth order solution (those of the last stage above)
+# minus those of the embedded fourth order one, giving the error estimate.
+dormand_prince_error_weights = (71 / 57600, 0.0, -71 / 16695, 71 / 1920,
+                                -17253 / 339200, 22 / 525, -1 / 40)
+inspiral_trajectory_cache = {}
+
+
+class InspiralTrajectory:
+    """
+    The inspiral of a binary from an initial separation down to the
+    merging separation, as a table of the nodes of an adaptive integration
+    in astrophysical time (see 'inspiral_trajectory').
+
+    Parameters:
+        - first_sphere_mass, second_sphere_mass (int): The masses of the
+          spheres [M⊙].
+        - initial_separation (float): The astrophysical separation (m) at
+          time zero.
+        - merging_separation (float): The separation (m) at which the
+          binary merges.
+        - tolerance (float): The relative error allowed per step of the
+          integration.
+
+    Attributes:
+        - times (numpy.ndarray): The time (s) of each node.
+        - separations (numpy.ndarray): The separation (m) at each node.
+        - phases (numpy.ndarray): The orbital phase (rad) at each node.
+        - omegas (numpy.ndarray): The orbital angular velocity (rad/s) at
+          each node.
+        - orbital_decays (numpy.ndarray): The rate (m/s) at which the
+          separation shrinks at each node.
+        - energy_losses (numpy.ndarray): The power (W) radiated at each
+          node.
+        - merge_time (float): The time (s) at which the binary merges, the
+          time of the last node.
+    """
+
+    def __init__(
+            self,
+            first_sphere_mass,
+            second_sphere_mass,
+            initial_separation,
+            merging_separation,
+            tolerance=1e-10
+        ):
+        self.summed_masses = (first_sphere_mass + second_sphere_mass) * m_sun
+        self.decay_constant = (
+            64/5 * newtons_const ** 3 * m_sun ** 3 / lightspeed ** 5
+            * first_sphere_mass * second_sphere_mass
+            * (first_sphere_mass + second_sphere_mass)
+        )
+        self.energy_loss_factor = (
+            32/5 * newtons_const ** 4
+            * m_sun ** 2
+            * (first_sphere_mass * second_sphere_mass) ** 2
+            / (first_sphere_mass + second_sphere_mass) ** 2
+            / lightspeed ** 5
+        )
+        self.merging_separation = merging_separation
+        self._integrate(initial_separation, merging_separation, tolerance)
+        self.omegas = self.omega(self.separations)
+        self.orbital_decays = self.decay_constant / self.separations ** 3
+        self.energy_losses = (self.energy_loss_factor
+                              * self.separations ** 4 * self.omegas ** 6)
+        self.merge_time = self.times[-1]
+        # Python lists are bisected faster than NumPy arrays are searched
+        # for a single time.
+        self.node_times = self.times.tolist()
+        self.node_separations = self.separations.tolist()
+
+    def omega(self, separation):
+        """The orbital angular velocity (rad/s) at a separation (m)."""
+        return np.sqrt(newtons_const * self.summed_masses / separation ** 3)
+
+    def separation_at(self, time):
+        """
+        The separation (m) at a time (s) between zero and the merge time,
+        interpolated between the nodes on either side.
+        """
+        node = min(max(bisect.bisect_right(self.node_times, time) - 1, 0),
+                   len(self.node_times) - 2)
+        return self._interpolate(node, time)
+
+    def time_at_separation(self, separation):
+        """
+        The time (s) at which the binary reaches a separation (m) between
+        the merging and the initial separations, found by bisection of the
+        interpolated separation.
+        """
+        # The separations decrease along the nodes.
+        node = len(self.node_separations) - bisect.bisect_left(
+            self.node_separations[::-1], separation
+        ) - 1
+        node = min(max(node, 0), len(self.node_times) - 2)
+        lower, upper = self.node_times[node], self.node_times[node + 1]
+        for _ in range(64):
+            middle = 0.5 * (lower + upper)
+            if middle in (lower, upper):
+                break
+            if self._interpolate(node, middle) > separation:
+                lower = middle
+            else:
+                upper = middle
+        return lower
+
+    def _interpolate(self, node, time):
+        """
+        The separation at a time within the interval from a node to the
+        next, by the cubic Hermite polynomial through their separations and
+        rates of decay.
+        """
+        start_time = self.node_times[node]
+        interval = self.node_times[node + 1] - start_time
+        s = (time - start_time) / interval
+        start = self.node_separations[node]
+        end = self.node_separations[node + 1]
+        start_slope = -self.decay_constant / start ** 3 * interval
+        end_slope = -self.decay_constant / end ** 3 * interval
+        return (start
+                + s * (start_slope
+                       + s * (3 * (end - start) - 2 * start_slope - end_slope
+                              + s * (2 * (start - end) + start_slope
+                                     + end_slope))))
+
+    def _derivatives(self, state):
+        separation = state[0]
+        return np.array([-self.decay_constant / separation ** 3,
+                         self.omega(separation)])
+
+    def _integrate(self, initial_separation, merging_separation, tolerance):
+        """
+        Integrate the separation and phase of the binary from time zero
+        until the separation falls to the merging separation, keeping each
+        accepted step as a node. The last node is then moved back to the
+        time at which the interpolated separation crosses the merging 
+        separation.
+        """
+        time = 0.0
+        state = np.array([initial_separation, 0.0])
+        # A first step over which the separation shrinks by about 0.1%.
+        step = 1e-3 * initial_separation ** 4 / self.decay_constant
+        times = [time]
+        states = [state]
+        # A trial step beyond the merger of the point masses (a = 0) gives
+        # NaN stages, and is rejected by the error test.
+        with np.errstate(invalid="ignore", divide="ignore"):
+            while state[0] > merging_separation:
+                stages = [self._derivatives(state)]
+                for coefficients in dormand_prince_coefficients[1:]:
+                    stages.append(self._derivatives(
+                        state + step * sum(c * k for c, k
+                                           in zip(coefficients, stages))
+                    ))
+                new_state = state + step * sum(
+                    c * k for c, k 
+                    in zip(dormand_prince_coefficients[-1], stages)
+                )
+                error = step * sum(
+                    e * k for e, k 
+                    in zip(dormand_prince_error_weights, stages)
+                )
+                scale = tolerance * np.maximum(np.abs(state),
+                                               np.abs(new_state))
+                error_ratio = max(np.max(np.abs(error) / scale), 1e-10)
+                if error_ratio <= 1.0 and new_state[0] > 0.0:
+                    time += step
+                    state = new_state
+                    times.append(time)
+                    states.append(state)
+                    step *= min(5.0, 0.9 * error_ratio ** -0.2)
+                else:
+                    step *= 0.2 if np.isnan(error_ratio) else max(
+                        0.2, 0.9 * error_ratio ** -0.2
+                    )
+        self.node_times = times
+        self.node_separations = [state[0] for state in states]
+        merge_time = self.time_at_separation(merging_separation)
+        # The phase at the merger, by the Hermite polynomial through the
+        # phases and angular velocities at the ends of the last step.
+        interval = times[-1] - times[-2]
+        s = (merge_time - times[-2]) / interval
+        start, end = states[-2][1], states[-1][1]
+        start_slope = self.omega(states[-2][0]) * interval
+        end_slope = self.omega(states[-1][0]) * interval
+        merge_phase = (start
+                       + s * (start_slope
+                              + s * (3 * (end - start) - 2 * start_slope
+                                     - end_slope
+                                     + s * (2 * (start - end) + start_slope
+                                            + end_slope))))
+        times[-1] = merge_time
+        states[-1] = np.array([merging_separation, merge_phase])
+        self.times = np.array(times)
+        states = np.array(states)
+        self.separations = states[:, 0]
+        self.phases = states[:, 1]
+
+
+def inspiral_trajectory(
+        first_sphere_mass,
+        second_sphere_mass,
+        initial_separation,
+        merging_separation
+    ):
+    """
+    The 'InspiralTrajectory' of a binary, integrated on first use and then
+    kept in 'inspiral_trajectory_cache'.
+    """
+    key = (first_sphere_mass, second_sphere_mass,
+           initial_separation, merging_separation)
+    if key not in inspiral_trajectory_cache:
+        inspiral_trajectory_cache[key] = InspiralTrajectory(*key)
+    return inspiral_trajectory_cache[key]
+
+
+# =============================================================================
+# Gaussian stamp cache (Taichi)
+# =============================================================================
+# The perturbations are overlaid from stamps of the inverted Gaussian of
+# 'create_gaussian_perturb_array', one for each radius and depth, i.e. for
+# each mass. Rather than in a field of its own, allocated by each engine,
+# every stamp is held in a slot of a single field, shared by the engines of
+# the Taichi program as a least recently used cache keyed by the radius, 
+# depth and sub-cell offset of the stamp. The kernels overlaying a stamp 
+# take the field and its slot, a runtime integer, so that a change of the
+# masses during a run neither allocates a field nor compiles a kernel 
+# again, and the engines of later runs find their stamps already built.
+gaussian_stamp_cache = None
+
+
+class GaussianStampCache:
+    """
+    A least recently used cache of the stamps of the perturbations, built
+    by 'create_gaussian_stamp' in the slots of a single Taichi field.
+
+    Parameters:
+        - capacity (int): The initial number of slots.
+        - max_radius (int): The initial largest radius of a stamp fitting
+          in a slot.
+
+    Attributes:
+        - stamps (Taichi field): The stamps, of shape (capacity, 
+          2 * max_radius + 1, 2 * max_radius + 1), that of radius r in 
+          [slot, :2 * r + 1, :2 * r + 1].
+        - hits, misses (int): The number of stamps acquired which were 
+          found in the cache, and built.
+
+    Notes:
+        - A stamp acquired by an engine is never evicted until it has been
+          released. When every slot is in use, or a stamp larger than the 
+          slots is acquired, the field is reallocated larger, keeping the 
+          stamps in their slots (and the kernels taking it are compiled 
+          again).
+    """
+
+    def __init__(self, capacity=32, max_radius=40):
+        self.program = impl.get_runtime().prog
+        # The slots of the stamps by key, least recently used first, the
+        # slots holding no stamp, and the number of holders of each stamp
+        # in use.
+        self.slots = collections.OrderedDict()
+        self.free_slots = []
+        self.users = collections.Counter()
+        self.hits = 0
+        self.misses = 0
+        self.capacity = 0
+        self.max_radius = 0
+        self.stamps = None
+        self._allocate(capacity, max_radius)
+
+    def acquire(
+            self,
+            perturb_radius,
+            perturb_max_depth,
+            sub_cell_offset=(0.0, 0.0)
+        ):
+        """
+        The slot of the stamp of a perturbation, built if it is not in the
+        cache, and held in the cache until released.
+
+        Parameters:
+            - perturb_radius (int): The radius of the perturbation.
+            - perturb_max_depth (float): Its depth at the centre.
+            - sub_cell_offset (tuple): The offset of its centre from the 
+              central cell of the stamp, in grid units. The overlays round
+              the centre of a perturbation to the grid, so use stamps 
+              without offset.
+
+        Returns:
+            tuple: The key of the stamp, to release it with, and its slot.
+        """
+        key = (int(perturb_radius),
+               float(perturb_max_depth),
+               tuple(float(offset) for offset in sub_cell_offset))
+        if key in self.slots:
+            self.slots.move_to_end(key)
+            self.hits += 1
+        else:
+            self.slots[key] = self._build(*key)
+            self.misses += 1
+        self.users[key] += 1
+        return key, self.slots[key]
+
+    def release(self, keys):
+        """
+        Release the stamps of 'keys', as returned by 'acquire', leaving them
+        in the cache until evicted.
+        """
+        for key in keys:
+            self.users[key] -= 1
+            if self.users[key] <= 0:
+                del self.users[key]
+
+    def _build(self, perturb_radius, perturb_max_depth, sub_cell_offset):
+        """
+        Build a stamp in a free slot, or in that of the least recently used
+        stamp not in use, and return the slot.
+        """
+        if perturb_radius > self.max_radius:
+            self._allocate(self.capacity, perturb_radius)
+        if not self.free_slots:
+            unused = next((key for key in self.slots 
+                           if key not in self.users), None)
+            if unused is None:
+                self._allocate(2 * self.capacity, self.max_radius)
+            else:
+                self.free_slots.append(self.slots.pop(unused))
+        slot = self.free_slots.pop()
+        create_gaussian_stamp(
+            slot,
+            perturb_radius,
+            perturb_max_depth,
+            *sub_cell_offset,
+            self.stamps
+        )
+        return slot
+
+    def _allocate(self, capacity, max_radius):
+        """
+        (Re)allocate the field of the stamps, copying those built so far.
+        """
+        side = 2 * max_radius + 1
+        stamps = ti.field(dtype=ti.f64, shape=(capacity, side, side))
+        if self.stamps is not None:
+            previous = self.stamps.to_numpy()
+            resized = np.zeros((capacity, side, side))
+            resized[:self.capacity, 
+                    :previous.shape[1], 
+                    :previous.shape[2]] = previous
+            stamps.from_numpy(resized)
+        # Slots are taken from the end of the list, lowest first.
+        self.free_slots = (list(range(capacity - 1, self.capacity - 1, -1))
+                           + self.free_slots)
+        self.stamps = stamps
+        self.capacity = capacity
+        self.max_radius = max_radius
+
+
+def shared_gaussian_stamp_cache():
+    """
+    The 'GaussianStampCache' shared by the engines, created on first use,
+    and again once Taichi has been reinitialised (which frees its field).
+    """
+    global gaussian_stamp_cache
+    if (gaussian_stamp_cache is None
+            or gaussian_stamp_cache.program is not impl.get_runtime().prog):
+        gaussian_stamp_cache = GaussianStampCache()
+    return gaussian_stamp_cache
+
+
+# =============================================================================
+# Checkpoint files
+# =============================================================================
+# A checkpoint is a single binary file: the 8-byte 'checkpoint_magic', the 
+# length of a JSON header as a little-endian 64-bit integer, the header, 
+# and the raw arrays of the fields, each aligned to 'checkpoint_alignment'
+# bytes. The header holds the arguments and scalar state of the engine, 
+# and the data type, shape and offset in the file of each array, so that 
+# the arrays can be memory mapped on restore rather than read in whole.
+checkpoint_magic = b"GWCKPT01"
+checkpoint_alignment = 64
+
+
+def write_checkpoint_file(path, header, arrays):
+    """
+    Write a checkpoint file atomically: the file is written in full next to
+    'path', flushed to disk and then renamed to 'path', so that a crash 
+    leaves either the previous checkpoint or the new one, never a part of
+    one.
+
+    Parameters:
+        - path (str): The checkpoint file.
+        - header (dict): The JSON-serialisable part of the checkpoint.
+        - arrays (dict): The NumPy arrays of the checkpoint, by name.
+    """
+    def aligned(offset):
+        return -(-offset // checkpoint_alignment) * checkpoint_alignment
+
+    # The offsets of the arrays depend on the length of the header, which
+    # depends on the offsets, so the header is laid out with room to spare
+    # for the digits of the offsets.
+    header = dict(header, arrays={
+        name: {"dtype": array.dtype.str,
+               "shape": list(array.shape),
+               "offset": 0}
+        for name, array in arrays.items()
+    })
+    reserved_length = len(json.dumps(header)) + 32 * (len(arrays) + 1)
+    offset = aligned(len(checkpoint_magic) + 8 + reserved_length)
+    for name, array in arrays.items():
+        header["arrays"][name]["offset"] = offset
+        offset = aligned(offset + array.nbytes)
+    encoded_header = json.dumps(header).encode()
+    encoded_header += b" " * (reserved_length - len(encoded_header))
+
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as checkpoint_file:
+        checkpoint_file.write(checkpoint_magic)
+        checkpoint_file.write(len(encoded_header).to_bytes(8, "little"))
+        checkpoint_file.write(encoded_header)
+        for name, array in arrays.items():
+            checkpoint_file.seek(header["arrays"][name]["offset"])
+            checkpoint_file.write(np.ascontiguousarray(array).tobytes())
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(temporary_path, path)
+    # Make the rename itself durable, where directories can be synced.
+    if hasattr(os, "O_DIRECTORY"):
+        directory = os.open(os.path.dirname(os.path.abspath(path)),
+                            os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+def read_checkpoint_file(path):
+    """
+    Read the header of a checkpoint file, and memory map its arrays.
+
+    Returns:
+        tuple: The header (dict), and the arrays by name (read-only 
+        'numpy.memmap' views of the file).
+
+    Raises:
+        ValueError: If the file is not a checkpoint file.
+    """
+    with open(path, "rb") as checkpoint_file:
+        if checkpoint_file.read(len(checkpoint_magic)) != checkpoint_magic:
+            raise ValueError(f"Not a checkpoint file: {path!r}")
+        header_length = int.from_bytes(checkpoint_file.read(8), "little")
+        header = json.loads(checkpoint_file.read(header_length))
+    arrays = {
+        name: np.memmap(path,
+                        dtype=np.dtype(layout["dtype"]),
+                        mode="r",
+                        offset=layout["offset"],
+                        shape=tuple(layout["shape"]))
+        for name, layout in header.pop("arrays").items()
+    }
+    return header, arrays
+
+
+# =============================================================================
+# Simulation engine
+# =============================================================================
+class SimulationEngine:
+    """
+    Headless owner of the oscillator fields and of the orbital state of the
+    binary system.
+
+    One call of 'step' performs the same work as one iteration of the main
+    loop of the interactive application: the binary is moved along its orbit
+    (and, for the "Inspiralling" run option, its orbit is shrunk), the
+    perturbations representing the gravitational wells are overlaid onto the
+    sheet, the grid borders are damped and the oscillator lattice is
+    advanced by one timestep of the selected time integrator. No window,
+    slider or vsync wait is involved.
+
+    Parameters:
+        - grid_size (int): The length of one side of the square grid. An odd
+          value places a single cell at the grid centre.
+        - first_sphere_mass (int): Mass of the first sphere [M⊙].
+        - second_sphere_mass (int): Mass of the second sphere [M⊙]. As in
+          the GUI, a zero mass is replaced by one and the masses are swapped
+          if necessary, so that the first sphere is never the heavier one.
+          Both can be changed during the run (see 'set_params').
+        - first_orbital_radius (float): Initial orbital radius of the first
+          sphere, in grid units. Defaults to a quarter of the grid size.
+        - run_option (str): One of 'orbital_run_options' or
+          'test_run_options'.
+        - astro_length_scaling (float): The real astronomical distance (m)
+          represented by one grid element.
+        - elastic_constant, oscillator_mass, timestep, max_damping_factor,
+          default_polar_angle_step, step_duration, integrator,
+          implicit_tolerance, implicit_max_iterations: See 'set_params'.
+        - stencil (str): One of 'stencil_options', the discrete Laplacian
+          of the spring lattice. It is compiled into the kernels, so it is 
+          fixed for the lifetime of the engine. The spectral integrator 
+          requires a stencil of reach 1.
+        - precision (str): One of 'precision_options', the floating point
+          precision of the fields of the sheet and of the stencil sum.
+        - layout (str): One of 'layout_options', the memory layout of the
+          fields of the sheet.
+        - tile_size (int): The side of the square tiles of the blocked 
+          layouts, in cells (a power of 2 for "Blocked Morton").
+        - temporal_block_steps: See 'set_params'.
+        - temporal_tile_size (int): The side of the square regions of the 
+          temporally blocked stepping (a tile and its halo, as deep as the
+          stencil reach times 'temporal_block_steps', times four for the 
+          stage-buffered RK4), in cells. It must be a power of 2, for 
+          Taichi to iterate over the regions efficiently.
+        - activity_tracking (bool): If True, the sheet is divided into 
+          blocks, and only the active blocks (those reached by the waves or
+          by the perturbations) are updated, so that the cost of a step 
+          scales with the active area rather than with the area of the 
+          grid. It requires the legacy RK4 or velocity Verlet integrator,
+          and is not combined with temporal blocking.
+        - activity_block_size (int): The side of the blocks of the 
+          activity-tracked mode, in cells.
+        - activity_threshold: See 'set_params'.
+        - boundary (str): One of 'boundary_options', the absorbing 
+          boundary of the sheet. The PML is not combined with temporal 
+          blocking or the spectral integrator.
+        - damping_layer_depth (int): The depth of the absorbing layer, in
+          cells. Defaults to a twentieth of the grid size.
+        - pml_reflection, pml_order: See 'set_params'.
+        - inspiral (str): One of 'inspiral_options', how the orbit of the
+          "Inspiralling" run option shrinks.
+        - fused_steps: See 'set_params'.
+        - domain (str): One of 'domain_options', the computational domain
+          of the sheet. The circular domain is damped by the linear sponge
+          in a ring 'damping_layer_depth' cells wide, requires the legacy
+          RK4 or velocity Verlet integrator, and is not combined with 
+          temporal blocking or activity tracking. The energies returned by
+          'total_energy' and 'lattice_energy' are summed over the domain.
+        - strip (tuple): The (first_row, end_row) of the rows owned by the
+          engine, when it is one strip of a domain-decomposed run (see 
+          'domain_decomposition.DecomposedSimulation'). Its fields then 
+          hold these rows, and a halo on either side as deep as the 
+          stencil reach; 'state' and the energies cover its own rows only.
+          It requires the velocity Verlet integrator, the linear sponge, 
+          the square domain and the Dense layout.
+        - halo_exchange: The halo exchange of the strip with its 
+          neighbours (see 'domain_decomposition.SharedMemoryHaloExchange'),
+          required with 'strip'. Its 'sides' lists the sides ("lower" or
+          "upper") on which the strip has a neighbour; 'outgoing_rows' 
+          gives the array to fill with the rows sent on a side; and 
+          'exchange' sends them and returns the rows received, by side.
+
+    Notes:
+        - Taichi must be initialised (with 'default_fp=ti.f64') before the
+          engine is created, since the engine allocates its fields at once.
+        - The display quantities of the main loop ('astro_omega',
+          'model_omega', 'binary_energy_loss', ...) are kept as attributes
+          and are also returned by 'state'.
+        - 'save_checkpoint' writes the full state of the engine to a file,
+          from which 'from_checkpoint' creates an engine continuing the 
+          run exactly where it was saved.
+    """
+
+    # Parameters which may be altered between steps with 'set_params'.
+    adjustable_params = (
+        "first_orbital_radius",
+        "first_sphere_mass",
+        "second_sphere_mass",
+        "elastic_constant",
+        "oscillator_mass",
+        "timestep",
+        "max_damping_factor",
+        "default_polar_angle_step",
+        "step_duration",
+        "integrator",
+        "implicit_tolerance",
+        "implicit_max_iterations",
+        "temporal_block_steps",
+        "activity_threshold",
+        "pml_reflection",
+        "pml_order",
+        "fused_steps"
+    )
+
+    # The engine method implementing each of the 'integrator_options'.
+    integrator_methods = {
+        "Legacy RK4": "_integrate_legacy_RK4",
+        "Velocity Verlet": "_integrate_velocity_Verlet",
+        "Stage-buffered RK4": "_integrate_stage_buffered_RK4",
+        "Crank-Nicolson": "_integrate_crank_nicolson",
+        "Spectral": "_integrate_spectral"
+    }
+
+    # The integrators whose kernels apply the linear sponge themselves, 
+    # rather than in a separate launch before the step: velocity Verlet to
+    # each cell as it updates it, the legacy RK4 scheme in a first loop of 
+    # its kernel (it updates the cells in place, so they must all be damped
+    # before any is updated).
+    fused_damping_integrators = ("Legacy RK4", "Velocity Verlet")
+
+    # The integrators which loop over the cells given by '_updated_cells', 
+    # and so can skip those outside the active blocks of the activity-
+    # tracked mode or outside the circular domain.
+    selective_integrators = ("Legacy RK4", "Velocity Verlet")
+
+    # The integrators which temporal blocking can take through a tile, with
+    # the number of times a step of each applies the stencil. The legacy 
+    # RK4 updates the cells in place, so that each reads neighbours some of
+    # which are already updated, in the order of the loop over the sheet, 
+    # which the tiles would change.
+    temporal_integrators = {"Velocity Verlet": 1, "Stage-buffered RK4": 4}
+
+    # The arguments with which 'from_checkpoint' recreates a checkpointed 
+    # engine, saved with their current values.
+    checkpoint_arguments = (
+        "grid_size",
+        "first_sphere_mass",
+        "second_sphere_mass",
+        "run_option",
+        "astro_length_scaling",
+        "elastic_constant",
+        "oscillator_mass",
+        "timestep",
+        "max_damping_factor",
+        "default_polar_angle_step",
+        "step_duration",
+        "integrator",
+        "implicit_tolerance",
+        "implicit_max_iterations",
+        "stencil",
+        "precision",
+        "layout",
+        "tile_size",
+        "temporal_block_steps",
+        "temporal_tile_size",
+        "activity_tracking",
+        "activity_block_size",
+        "activity_threshold",
+        "boundary",
+        "damping_layer_depth",
+        "pml_reflection",
+        "pml_order",
+        "domain",
+        "inspiral",
+        "fused_steps"
+    )
+
+    # The scalar state of the orbit and of the run, restored on top of that
+    # of the recreated engine.
+    checkpoint_state = (
+        "first_orbital_radius",
+        "second_orbital_radius",
+        "model_binary_separation",
+        "previous_polar_angle",
+        "current_polar_angle",
+        "merged",
+        "test_perturbations_placed",
+        "simulation_step_counter",
+        "astro_omega",
+        "model_omega",
+        "binary_energy_loss",
+        "astro_binary_separation",
+        "astro_first_sphere_orbital_speed",
+        "astro_orbital_decay",
+        "implicit_iterations",
+        "active_block_fraction",
+        "inspiral_initial_separation",
+        "inspiral_time",
+        "inspiral_radius"
+    )
+
+    # The attributes copied into the 'fused_step_state' before the orbital
+    # updates or the fused steps, those of the counters of the steps, only
+    # copied before fused steps, and those of the orbital state which it 
+    # holds between steps, copied back after them.
+    fused_step_parameters = (
+        "first_sphere_mass",
+        "second_sphere_mass",
+        "sphere_mass_ratio",
+        "merging_distance",
+        "astro_summed_masses",
+        "binary_energy_loss_factor",
+        "orbital_decay_factor",
+        "default_first_orbital_radius",
+        "default_polar_angle_step",
+        "step_duration",
+        "astro_length_scaling",
+        "first_perturb_radius",
+        "second_perturb_radius",
+        "merged_perturb_radius",
+        "first_perturb_slot",
+        "second_perturb_slot",
+        "merged_perturb_slot",
+        "reduced_grid_start",
+        "reduced_grid_end",
+        "number_of_damped_borders",
+        "damping_layer_depth",
+        "elastic_constant",
+        "oscillator_mass",
+        "timestep"
+    )
+    fused_step_counters = (
+        "simulation_step_counter",
+        "detector_samples_written"
+    )
+    fused_orbit_state = (
+        "first_orbital_radius",
+        "second_orbital_radius",
+        "model_binary_separation",
+        "previous_polar_angle",
+        "current_polar_angle",
+        "astro_binary_separation",
+        "astro_first_sphere_orbital_speed",
+        "astro_omega",
+        "model_omega",
+        "binary_energy_loss",
+        "astro_orbital_decay",
+        "inspiral_time",
+        "merged"
+    )
+
+    def __init__(
+            self,
+            grid_size=301,
+            first_sphere_mass=3,
+            second_sphere_mass=3,
+            first_orbital_radius=None,
+            run_option="Set first sphere orbital radius",
+            astro_length_scaling=1e3,
+            elastic_constant=1e12,
+            oscillator_mass=1.0,
+            timestep=1e-7,
+            max_damping_factor=0.03,
+            default_polar_angle_step=1.0,
+            step_duration=1 / 60,
+            integrator="Legacy RK4",
+            implicit_tolerance=1e-10,
+            implicit_max_iterations=500,
+            stencil="5-point",
+            precision="f64",
+            layout="Dense",
+            tile_size=16,
+            temporal_block_steps=1,
+            temporal_tile_size=128,
+            activity_tracking=False,
+            activity_block_size=16,
+            activity_threshold=1e-6,
+            boundary="Linear sponge",
+            damping_layer_depth=None,
+            pml_reflection=1e-4,
+            pml_order=3,
+            domain="Square",
+            inspiral="Trajectory table",
+            fused_steps=True,
+            strip=None,
+            halo_exchange=None
+        ):
+        if run_option not in orbital_run_options + test_run_options:
+            raise ValueError(f"Unknown run option: {run_option!r}")
+        if integrator not in integrator_options:
+            raise ValueError(f"Unknown integrator: {integrator!r}")
+        if stencil not in stencil_options:
+            raise ValueError(f"Unknown stencil: {stencil!r}")
+        if precision not in precision_options:
+            raise ValueError(f"Unknown precision: {precision!r}")
+        if layout not in layout_options:
+            raise ValueError(f"Unknown layout: {layout!r}")
+        if boundary not in boundary_options:
+            raise ValueError(f"Unknown boundary: {boundary!r}")
+        if domain not in domain_options:
+            raise ValueError(f"Unknown domain: {domain!r}")
+        if inspiral not in inspiral_options:
+            raise ValueError(f"Unknown inspiral: {inspiral!r}")
+        self._check_temporal_blocking(
+            integrator,
+            temporal_block_steps,
+            temporal_tile_size,
+            stencil_reach(stencil),
+            boundary
+        )
+        self._check_activity_tracking(
+            integrator,
+            temporal_block_steps,
+            activity_tracking
+        )
+        self._check_domain(
+            integrator,
+            temporal_block_steps,
+            activity_tracking,
+            boundary,
+            domain
+        )
+        self._check_spectral(integrator, stencil, boundary)
+        if (strip is None) != (halo_exchange is None):
+            raise ValueError(
+                "A strip of a domain-decomposed run requires both 'strip' "
+                "and 'halo_exchange'"
+            )
+        self._check_strip(
+            integrator,
+            temporal_block_steps,
+            activity_tracking,
+            boundary,
+            domain,
+            layout,
+            strip,
+            stencil_reach(stencil)
+        )
+        if (layout == "Blocked Morton"
+                and (tile_size < 2 or tile_size & (tile_size - 1))):
+            raise ValueError(
+                f"The tile size of the Morton layout must be a power of 2, "
+                f"not {tile_size}"
+            )
+        self.grid_size = grid_size
+        self.run_option = run_option
+        self.stencil = stencil
+        self.precision = precision
+        # Data type of the fields of the sheet, and the (compile-time) data
+        # type in which the stencil sum is accumulated.
+        self.state_dtype = ti.f64 if precision == "f64" else ti.f32
+        self.accumulation_dtype = ti.f32 if precision == "f32" else ti.f64
+        self.layout = layout
+        self.tile_size = tile_size
+        self.temporal_block_steps = temporal_block_steps
+        self.temporal_tile_size = temporal_tile_size
+        self.activity_tracking = activity_tracking
+        self.activity_block_size = activity_block_size
+        self.activity_threshold = activity_threshold
+        self.boundary = boundary
+        self.domain = domain
+        self.inspiral = inspiral
+        self.fused_steps = fused_steps
+        # The rows of the sheet owned by the engine: all of them, except 
+        # for a strip of a domain-decomposed run, whose fields hold its own
+        # rows and a halo on either side, kept up to date by the halo 
+        # exchange.
+        if strip is None:
+            strip = (0, grid_size)
+        self.strip_rows = tuple(strip)
+        self.halo_exchange = halo_exchange
+        self.pml_reflection = pml_reflection
+        self.pml_order = pml_order
+        self.astro_length_scaling = astro_length_scaling
+
+        # ---------------------------------------------------------------------
+        # Model sheet parameters
+        # ---------------------------------------------------------------------
+        self.elastic_constant = elastic_constant
+        self.oscillator_mass = oscillator_mass
+        self.timestep = timestep
+        self.max_damping_factor = max_damping_factor
+        self.default_polar_angle_step = default_polar_angle_step
+        self.step_duration = step_duration
+        self.integrator = integrator
+        self.implicit_tolerance = implicit_tolerance
+        self.implicit_max_iterations = implicit_max_iterations
+        # Conjugate gradient iterations taken by the last implicit step.
+        self.implicit_iterations = 0
+
+        # ---------------------------------------------------------------------
+        # Sphere masses
+        # ---------------------------------------------------------------------
+        self.first_sphere_mass, self.second_sphere_mass = (
+            self._ordered_sphere_masses(first_sphere_mass, 
+                                        second_sphere_mass)
+        )
+
+        # ---------------------------------------------------------------------
+        # Grid and damping parameters
+        # ---------------------------------------------------------------------
+        self.grid_centre = ti.Vector.field(3, dtype=ti.i32, shape=())
+        self.grid_centre[None][0] = int((grid_size - 1) / 2)
+        self.grid_centre[None][2] = int((grid_size - 1) / 2)
+
+        # Having two opposite borders damped with the other two undamped
+        # allows a visual comparison to be made in the first test run.
+        if run_option == "Test 1 - two of four borders damped":
+            self.number_of_damped_borders = 2
+        else:
+            self.number_of_damped_borders = 4
+        # The zeroised edges must be as deep as the reach of the stencil,
+        # so that no oscillator of the reduced grid has a neighbour outside
+        # the grid.
+        self.depth_zeroised_grid_edges = stencil_reach(stencil)
+        if damping_layer_depth is None:
+            damping_layer_depth = grid_size // 20
+        self.damping_layer_depth = damping_layer_depth
+        # The damping rates of the PML at each depth into the layer, which
+        # depend on the wave speed and timestep and so are recomputed 
+        # whenever 'set_params' alters them. The auxiliary fields of the 
+        # PML are allocated once the fields of the sheet have been.
+        if boundary == "PML":
+            self.pml_profile = ti.Vector.field(
+                3, dtype=ti.f64, shape=2 * damping_layer_depth + 1
+            )
+            self._compute_pml_profile()
+
+        # Only the positions and velocities within the 'effective' grid,
+        # which excludes the zeroised layers at the edges, are updated.
+        self.reduced_grid_start = self.depth_zeroised_grid_edges
+        self.reduced_grid_end = grid_size - self.depth_zeroised_grid_edges
+        # The circular domain is the disc inscribed in the reduced grid. 
+        # The cells of each row within the domain are precomputed, and the
+        # oscillators outside it are never updated, so stay at rest.
+        if domain == "Circular":
+            self.domain_radius = (self.reduced_grid_end
+                                  - self.reduced_grid_start) / 2
+        else:
+            self.domain_radius = 0.0
+        self.domain_row_spans = ti.Vector.field(2, dtype=ti.i32,
+                                                shape=grid_size)
+        compute_domain_row_spans(
+            grid_size,
+            self.grid_centre,
+            self.domain_radius,
+            self.reduced_grid_start,
+            self.reduced_grid_end,
+            self.domain_row_spans
+        )
+        # The cells of a strip which it updates itself: those of its rows 
+        # within the reduced grid.
+        if self.halo_exchange is not None:
+            strip_row_spans = np.zeros((grid_size, 2), dtype=np.int32)
+            first_row = max(self.strip_rows[0], self.reduced_grid_start)
+            end_row = min(self.strip_rows[1], self.reduced_grid_end)
+            strip_row_spans[first_row:end_row] = (self.reduced_grid_start,
+                                                  self.reduced_grid_end)
+            self.strip_row_spans = ti.Vector.field(2, dtype=ti.i32,
+                                                   shape=grid_size)
+            self.strip_row_spans.from_numpy(strip_row_spans)
+
+        # ---------------------------------------------------------------------
+        # Perturbation parameters
+        # ---------------------------------------------------------------------
+        self.first_perturb_grid_coords = ti.Vector.field(3,
+                                                         dtype=ti.i32,
+                                                         shape=())
+        self.second_perturb_grid_coords = ti.Vector.field(3,
+                                                          dtype=ti.i32,
+                                                          shape=())
+        # The shapes of the perturbations are held in the slots of the 
+        # shared stamp cache. The keys of those acquired by the engine are
+        # kept, to release them when the masses change or the engine is 
+        # freed.
+        self.perturb_stamps = shared_gaussian_stamp_cache()
+        self.perturb_stamp_keys = []
+        weakref.finalize(self, self.perturb_stamps.release, 
+                         self.perturb_stamp_keys)
+        self._apply_sphere_masses()
+
+        # ---------------------------------------------------------------------
+        # Sheet surface fields
+        # ---------------------------------------------------------------------
+        # Offsets and weights of the adjacent grid elements used to 
+        # calculate the forces acting on each oscillator. This is passed to
+        # the kernels as a compile-time constant.
+        self.adjacent_grid_elements = laplacian_stencils[stencil]
+
+        # Only the height of each oscillator carries any dynamics, so the 
+        # state is held as scalar fields, in the precision and memory 
+        # layout selected.
+        sheet_fields = self._allocate_sheet_fields(
+            ["positions", "velocities", "accelerations"],
+            self.state_dtype
+        )
+        self.oscillator_positions = sheet_fields["positions"]
+        self.oscillator_velocities = sheet_fields["velocities"]
+        self.oscillator_accelerations = sheet_fields["accelerations"]
+        if boundary == "PML":
+            pml_fields = self._allocate_sheet_fields(
+                ["auxiliary_i", "auxiliary_j"],
+                self.state_dtype
+            )
+            self.pml_auxiliary_i = pml_fields["auxiliary_i"]
+            self.pml_auxiliary_j = pml_fields["auxiliary_j"]
+        # The factor by which the linear sponge scales each oscillator on 
+        # every step, recomputed whenever 'set_params' alters 
+        # 'max_damping_factor'.
+        self.damping_map = self._allocate_sheet_fields(
+            ["damping_map"],
+            self.state_dtype
+        )["damping_map"]
+        self._compute_damping_map()
+        # Intermediate stage fields of the stage-buffered RK4 integrator,
+        # allocated when that integrator is first used.
+        self.stage_fields = None
+        # Work fields of the conjugate gradient solver of the implicit
+        # integrator, likewise allocated when first used.
+        self.implicit_fields = None
+        # Factors by which the spectral integrator advances each normal 
+        # mode over a timestep, and the (elastic_constant, oscillator_mass,
+        # timestep) they were computed for. The array holding the state of
+        # the reduced grid during a spectral step is allocated when that
+        # integrator is first used.
+        self.spectral_propagator = None
+        self.spectral_propagator_params = None
+        self.spectral_state = None
+        # Fields of the temporally blocked stepping (the next state, the
+        # scratch regions of the tiles and the schedule of perturbations),
+        # likewise allocated when first used, for a given number of steps.
+        self.temporal_fields = None
+        self.temporal_fields_steps = 0
+        # While the perturbations of a temporally blocked pass are being
+        # recorded: the step of the pass, and the perturbations recorded 
+        # for it so far.
+        self.recording_step = None
+        self.recorded_perturbations = 0
+        # The activity mask of the activity-tracked mode: a pointer SNode 
+        # of blocks, each holding a dense block of cells when active, so 
+        # that a struct-for over the mask visits only the active cells. 
+        # The sheet itself stays dense; the quiescent cells are simply not
+        # updated.
+        if activity_tracking:
+            number_of_blocks = -(-grid_size // activity_block_size)
+            self.activity_blocks = ti.root.pointer(
+                ti.ij, (number_of_blocks, number_of_blocks)
+            )
+            self.activity_mask = ti.field(dtype=ti.u8)
+            self.activity_blocks.dense(
+                ti.ij, (activity_block_size, activity_block_size)
+            ).place(self.activity_mask)
+            self.block_energies = ti.field(
+                dtype=ti.f64,
+                shape=(number_of_blocks, number_of_blocks)
+            )
+            # A disturbance takes at least this many steps to cross a block.
+            self.activity_update_interval = max(
+                1, activity_block_size // self.depth_zeroised_grid_edges
+            )
+        self.active_block_fraction = 1.0
+        # The virtual detectors, if any (see 'add_detectors'): the field of
+        # their grid coordinates, the fields of the ring buffer of their 
+        # samples, the number of samples written to the ring buffer and the
+        # number of them drained so far, and the drained samples.
+        self.detector_points = None
+        self.detector_fields = None
+        self.detector_samples_written = 0
+        self.detector_samples_drained = 0
+        self.drained_detector_samples = []
+
+        # ---------------------------------------------------------------------
+        # Orbital state
+        # ---------------------------------------------------------------------
+        vector_parameters = {
+            "n": 3,
+            "dtype": ti.f64,
+            "shape": ()
+        }
+        self.first_orbital_coords = ti.Vector.field(**vector_parameters)
+        self.second_orbital_coords = ti.Vector.field(**vector_parameters)
+
+        self.default_first_orbital_radius = grid_size / 4
+        if first_orbital_radius is None:
+            first_orbital_radius = self.default_first_orbital_radius
+        self.first_orbital_radius = first_orbital_radius
+        self.second_orbital_radius = (first_orbital_radius
+                                      * self.sphere_mass_ratio)
+        self.model_binary_separation = (self.first_orbital_radius
+                                        + self.second_orbital_radius)
+        self.previous_polar_angle = 0.0
+        self.current_polar_angle = 0.0
+        self.merged = False
+        self.test_perturbations_placed = False
+        self.simulation_step_counter = 0
+        # The position of an inspiralling binary on its trajectory table:
+        # the initial separation of the table, and the astrophysical time
+        # (s) along it of the orbital radius 'inspiral_radius'. The time 
+        # is looked up again whenever the orbital radius has been set to 
+        # another value.
+        self.inspiral_initial_separation = None
+        self.inspiral_time = None
+        self.inspiral_radius = None
+        # The parameters and orbital state held on the device by the 
+        # orbital updates and the fused steps, and the names and values of
+        # the attributes which they were last copied from or to (see 
+        # '_load_fused_step_state'); and the trajectory table which the 
+        # updates follow, with the fields of the times and separations of 
+        # its nodes.
+        self.fused_step_state = fused_step_state.field(shape=())
+        self.fused_step_values = None
+        self.device_trajectory = None
+
+        calculate_orbital_coords(
+            self.grid_centre,
+            self.first_orbital_radius,
+            self.current_polar_angle,
+            self.first_orbital_coords
+        )
+        calculate_orbital_coords(
+            self.grid_centre,
+            self.second_orbital_radius,
+            self.current_polar_angle + 180,
+            self.second_orbital_coords
+        )
+
+        # ---------------------------------------------------------------------
+        # Astrophysical parameters
+        # ---------------------------------------------------------------------
+        self.astro_omega = 0.0
+        self.model_omega = 0.0
+        self.binary_energy_loss = 0.0
+        self.astro_binary_separation = 0.0
+        self.astro_first_sphere_orbital_speed = 0.0
+        self.astro_orbital_decay = 0.0
+
+        # The orbital decay factor is defined to have a positive value.
+        self.orbital_decay_factor = (
+            64/5 * newtons_const ** 3 * m_sun ** 3
+            / lightspeed ** 5
+        )
+
+    # -------------------------------------------------------------------------
+    # Public interface
+    # -------------------------------------------------------------------------
+    def set_params(self, **params):
+        """
+        Alter one or more simulation parameters between steps.
+
+        Parameters:
+            - first_orbital_radius (float): Orbital radius of the first
+              sphere, in grid units. Ignored once the binary has merged.
+            - first_sphere_mass, second_sphere_mass (int): The masses of 
+              the spheres [M⊙], replaced and ordered as by the constructor.
+              The shapes of their perturbations are taken from the shared
+              'GaussianStampCache'. The second sphere moves to the orbit
+              balancing the first one, and an inspiralling binary 
+              continues from there along the trajectory of the new masses.
+            - elastic_constant (float): Spring constant between adjacent
+              oscillators.
+            - oscillator_mass (float): Mass of each oscillator.
+            - timestep (float): Integration timestep of the lattice.
+            - max_damping_factor (float): Damping factor at the grid border.
+            - default_polar_angle_step (float): Polar angle increment per
+              step (degrees) at the default orbital radius.
+            - step_duration (float): Wall clock time (s) attributed to one
+              step when computing the model angular velocity. A value of
+              zero leaves the binary stationary for that step, as on the
+              first frame of the interactive application.
+            - integrator (str): One of 'integrator_options'.
+            - implicit_tolerance (float): Relative residual at which the
+              conjugate gradient solve of the implicit integrator stops.
+            - implicit_max_iterations (int): Upper limit on the conjugate
+              gradient iterations per implicit step.
+            - temporal_block_steps (int): The number of steps by which
+              'step' advances each tile of the sheet before moving on to 
+              the next (temporal blocking), cutting the memory traffic per
+              step when many steps are taken at a time. A value of 1 (the 
+              default) steps the whole sheet at a time. Temporal blocking 
+              requires the velocity Verlet or stage-buffered RK4 integrator
+              (see 'temporal_integrators') and the linear sponge.
+            - activity_threshold (float): In the activity-tracked mode, the
+              height below which an oscillator counts as at rest: a block 
+              is deactivated once its energy, and that of each adjacent 
+              block, is below that of a single oscillator displaced by this
+              height (and then no longer updated until reactivated).
+            - pml_reflection (float): The reflection coefficient for 
+              which the PML is designed: the amplitude of a wave at normal 
+              incidence after crossing the layer and back, in the continuum
+              limit. The reflection of the discrete lattice is larger (see
+              the boundary reflection benchmark).
+            - pml_order (float): The power of the depth into the layer by
+              which the damping rate of the PML grows.
+            - fused_steps (bool): If True (the default), 'step' takes each
+              step of the legacy RK4 or velocity Verlet integrator with the
+              linear sponge in a single kernel launch (see 'fused_step'), 
+              unless activity tracking or temporal blocking is in use, or 
+              the engine is the strip of a domain-decomposed run.
+
+        Raises:
+            ValueError: If a parameter is not one of 'adjustable_params',
+            the integrator is not one of 'integrator_options', or temporal
+            blocking, activity tracking or the circular domain is in use 
+            with an integrator which does not support it, the spectral
+            integrator with a stencil or boundary which it does not 
+            support, the engine is the strip of a domain-decomposed run
+            and the integrator is not velocity Verlet, or the perturbations
+            of new masses or a new orbital radius would reach beyond the 
+            edges of the grid.
+        """
+        unknown = sorted(set(params) - set(self.adjustable_params))
+        if unknown:
+            raise ValueError(
+                "Unknown simulation parameter(s): " + ", ".join(unknown)
+            )
+        if params.get("integrator", self.integrator) not in integrator_options:
+            raise ValueError(f"Unknown integrator: {params['integrator']!r}")
+        self._check_temporal_blocking(
+            params.get("integrator", self.integrator),
+            params.get("temporal_block_steps", self.temporal_block_steps),
+            self.temporal_tile_size,
+            self.depth_zeroised_grid_edges,
+            self.boundary
+        )
+        self._check_activity_tracking(
+            params.get("integrator", self.integrator),
+            params.get("temporal_block_steps", self.temporal_block_steps),
+            self.activity_tracking
+        )
+        self._check_domain(
+            params.get("integrator", self.integrator),
+            params.get("temporal_block_steps", self.temporal_block_steps),
+            self.activity_tracking,
+            self.boundary,
+            self.domain
+        )
+        self._check_strip(
+            params.get("integrator", self.integrator),
+            params.get("temporal_block_steps", self.temporal_block_steps),
+            self.activity_tracking,
+            self.boundary,
+            self.domain,
+            self.layout,
+            None if self.halo_exchange is None else self.strip_rows,
+            self.depth_zeroised_grid_edges
+        )
+        self._check_spectral(
+            params.get("integrator", self.integrator),
+            self.stencil,
+            self.boundary
+        )
+        sphere_masses = self._ordered_sphere_masses(
+            params.pop("first_sphere_mass", self.first_sphere_mass),
+            params.pop("second_sphere_mass", self.second_sphere_mass)
+        )
+        if not self.merged and (
+                "first_orbital_radius" in params
+                or sphere_masses != (self.first_sphere_mass,
+                                     self.second_sphere_mass)):
+            self._check_perturbations(
+                self.grid_size,
+                params.get("first_orbital_radius", self.first_orbital_radius),
+                *sphere_masses
+            )
+        for name, value in params.items():
+            if name == "first_orbital_radius" and self.merged:
+                continue  # A merged binary has no orbit left to adjust.
+            setattr(self, name, value)
+        if sphere_masses != (self.first_sphere_mass, self.second_sphere_mass):
+            self._change_sphere_masses(*sphere_masses)
+        if self.boundary == "PML":
+            self._compute_pml_profile()
+        if "max_damping_factor" in params:
+            self._compute_damping_map()
+
+    def step(self, n=1):
+        """
+        Advance the simulation by 'n' steps.
+
+        Parameters:
+            - n (int): The number of steps (each one orbital update plus
+              one timestep of the lattice) to perform.
+
+        Notes:
+            - With temporal blocking ('temporal_block_steps' > 1), the steps
+              are taken in passes of up to 'temporal_block_steps' steps (and
+              no more than the ring buffer of the detectors holds), in 
+              each of which the orbital updates are made first and the 
+              perturbations they overlay are replayed within the tiles.
+            - The virtual detectors (see 'add_detectors') are sampled after
+              each step by the kernel which completes it, or within the 
+              tiles of a pass of temporal blocking.
+            - With 'fused_steps', each step is a single kernel launch, and
+              the orbital state is copied to the device before the steps 
+              and back after them.
+        """
+        if self.temporal_block_steps > 1:
+            max_pass_steps = self.temporal_block_steps
+            if self.detector_points is not None:
+                max_pass_steps = min(max_pass_steps,
+                                     self.detector_fields["steps"].shape[0])
+            while n > 0:
+                pass_steps = min(n, max_pass_steps)
+                self._step_temporal_block(pass_steps)
+                n -= pass_steps
+            return
+        if self._fused_steps_supported():
+            self._step_fused(n)
+            return
+
+        for _ in range(n):
+            self._advance_perturbations()
+            if (self.activity_tracking
+                    and self.simulation_step_counter
+                    % self.activity_update_interval == 0):
+                self._update_activity()
+            self._damp_boundary()
+            getattr(self, self.integrator_methods[self.integrator])()
+            self.simulation_step_counter += 1
+            if self.detector_points is not None:
+                self.detector_samples_written += 1
+
+    def step_for(self, time_budget, min_steps=1):
+        """
+        Advance the simulation by as many steps as fit into a wall clock
+        time budget (the "uncapped" substepping mode of the GUI).
+
+        Parameters:
+            - time_budget (float): The wall clock time (s) available for
+              stepping.
+            - min_steps (int): The number of steps taken even if the budget
+              is exhausted, so that the simulation always progresses.
+
+        Returns:
+            int: The number of steps taken.
+
+        Notes:
+            - With temporal blocking, the steps are taken a whole pass of 
+              'temporal_block_steps' steps at a time.
+        """
+        steps_per_call = max(1, self.temporal_block_steps)
+        steps_taken = 0
+        start_time = time.perf_counter()
+        while (steps_taken < min_steps
+               or time.perf_counter() - start_time < time_budget):
+            self.step(steps_per_call)
+            steps_taken += steps_per_call
+        return steps_taken
+
+    def state(self, include_fields=True):
+        """
+        Return a snapshot of the simulation state.
+
+        Parameters:
+            - include_fields (bool): If True, NumPy copies of the oscillator
+              position and velocity fields are included. Copying the fields
+              costs a full read of the grid, so it can be switched off when
+              only the orbital quantities are needed.
+
+        Returns:
+            dict: The step counter, orbital state and display quantities,
+            plus (optionally) the arrays 'oscillator_positions' (heights)
+            and 'oscillator_velocities' of shape (grid_size, grid_size),
+            in the precision of the sheet (float32 in the single precision
+            modes).
+        """
+        snapshot = {
+            "simulation_step_counter": self.simulation_step_counter,
+            "merged": self.merged,
+            "first_orbital_radius": self.first_orbital_radius,
+            "second_orbital_radius": self.second_orbital_radius,
+            "model_binary_separation": self.model_binary_separation,
+            "current_polar_angle": self.current_polar_angle,
+            "astro_binary_separation": self.astro_binary_separation,
+            "astro_first_sphere_orbital_speed": (
+                self.astro_first_sphere_orbital_speed
+            ),
+            "astro_omega": self.astro_omega,
+            "model_omega": self.model_omega,
+            "binary_energy_loss": self.binary_energy_loss,
+            "astro_orbital_decay": self.astro_orbital_decay,
+            "active_block_fraction": self.active_block_fraction
+        }
+        if include_fields:
+            # The tiled layouts pad the fields to a whole number of tiles,
+            # and the fields of a strip hold its halos.
+            grid = (slice(0, self.grid_size), slice(0, self.grid_size))
+            if self.halo_exchange is not None:
+                halo_depth = self.depth_zeroised_grid_edges
+                grid = (slice(halo_depth, halo_depth + self.strip_rows[1]
+                              - self.strip_rows[0]),
+                        slice(0, self.grid_size))
+            snapshot["oscillator_positions"] = (
+                self.oscillator_positions.to_numpy()[grid]
+            )
+            snapshot["oscillator_velocities"] = (
+                self.oscillator_velocities.to_numpy()[grid]
+            )
+        return snapshot
+
+    def total_energy(self):
+        """
+        Return the total (potential plus kinetic) energy of the sheet,
+        divided by 1e9, as computed by 'total_energy_of_sheet'.
+        """
+        return total_energy_of_sheet(
+            self.grid_size,
+            *self.strip_rows,
+            self.domain_row_spans,
+            self.elastic_constant,
+            self.oscillator_positions,
+            int(self.oscillator_mass),
+            self.oscillator_velocities
+        )
+
+    def lattice_energy(self):
+        """
+        Return the mechanical energy of the lattice (spring plus kinetic
+        energy), as computed by 'lattice_energy_of_sheet'. This quantity is
+        conserved by the undamped equations of motion.
+        """
+        return lattice_energy_of_sheet(
+            self.grid_size,
+            *self.strip_rows,
+            self.domain_row_spans,
+            self.elastic_constant,
+            self.adjacent_grid_elements,
+            self.oscillator_positions,
+            self.oscillator_mass,
+            self.oscillator_velocities
+        )
+
+    def save_checkpoint(self, path):
+        """
+        Save the full state of the engine to a checkpoint file (see 
+        'write_checkpoint_file'), replacing any previous checkpoint at 
+        'path' atomically.
+
+        The checkpoint holds the 'checkpoint_arguments' and 
+        'checkpoint_state', the fields of the sheet (heights, velocities, 
+        accelerations and the auxiliary fields of the PML), the orbital 
+        coordinates, the active blocks of the activity-tracked mode, and
+        the virtual detectors with the samples not yet read by 
+        'detector_samples'.
+
+        Raises:
+            ValueError: If the engine is the strip of a domain-decomposed
+            run.
+        """
+        if self.halo_exchange is not None:
+            raise ValueError(
+                "The strip of a domain-decomposed run cannot be checkpointed"
+            )
+        header = {
+            "engine_arguments": {name: getattr(self, name)
+                                 for name in self.checkpoint_arguments},
+            "state": {name: getattr(self, name)
+                      for name in self.checkpoint_state}
+        }
+        arrays = {name: getattr(self, name).to_numpy()
+                  for name in self._checkpoint_fields()}
+        if self.activity_tracking:
+            number_of_blocks = self.block_energies.shape[0]
+            arrays["active_blocks"] = np.zeros(
+                (number_of_blocks, number_of_blocks), dtype=np.uint8
+            )
+            store_active_blocks(self.activity_blocks,
+                                arrays["active_blocks"])
+        if self.detector_points is not None:
+            # The samples not yet read are drained from the ring buffer 
+            # and kept, to be returned by 'detector_samples' as before.
+            unread_samples = self.detector_samples()
+            self.drained_detector_samples = [unread_samples]
+            header["detectors"] = {
+                "buffer_steps": self.detector_fields["steps"].shape[0],
+                "samples_written": self.detector_samples_written
+            }
+            arrays["detector_points"] = self.detector_points.to_numpy()
+            arrays.update({f"detector_{name}": values
+                           for name, values in unread_samples.items()})
+        write_checkpoint_file(path, header, arrays)
+
+    @classmethod
+    def from_checkpoint(cls, path):
+        """
+        Create an engine from a checkpoint file written by 
+        'save_checkpoint'. Stepping it continues the checkpointed run 
+        exactly where it was saved.
+
+        The fields are restored from a memory map of the file, so that 
+        only the pages of the file which are copied into the fields are 
+        read, without an intermediate copy in memory.
+
+        Raises:
+            ValueError: If the file is not a checkpoint file.
+        """
+        header, arrays = read_checkpoint_file(path)
+        engine = cls(**header["engine_arguments"])
+        for name, value in header["state"].items():
+            setattr(engine, name, value)
+        for name in engine._checkpoint_fields():
+            getattr(engine, name).from_numpy(arrays[name])
+        if engine.activity_tracking:
+            restore_active_blocks(np.array(arrays["active_blocks"]),
+                                  engine.activity_blocks)
+        if "detectors" in header:
+            engine.add_detectors(np.array(arrays["detector_points"]),
+                                 header["detectors"]["buffer_steps"])
+            engine.detector_samples_written = (
+                header["detectors"]["samples_written"]
+            )
+            engine.detector_samples_drained = engine.detector_samples_written
+            engine.drained_detector_samples = [{
+                name: np.array(arrays[f"detector_{name}"])
+                for name in ["steps", "heights", "velocities"]
+            }]
+        return engine
+
+    def add_detectors(self, points, buffer_steps=1024):
+        """
+        Place virtual detectors, which sample the height and velocity of 
+        the oscillator under each of them after every step, replacing any
+        detectors placed before (and their samples not yet read).
+
+        The samples are written by a kernel into a ring buffer of fields, 
+        with no reading back into Python per step. Whenever the ring buffer
+        fills up, 'step' drains it into NumPy arrays in bulk, so that no 
+        sample is lost; 'detector_samples' returns all the samples taken
+        since it was last called.
+
+        With temporal blocking, the detectors are sampled within the tiles 
+        of a pass, after each of its steps, as the tile holding each 
+        detector reaches that step. A pass then fills one slot of the ring
+        buffer per step, so the passes are no longer than the buffer.
+
+        Parameters:
+            - points (list): The (i, j) grid coordinates of the detectors,
+              e.g. as given by 'ring_detector_points'.
+            - buffer_steps (int): The number of samples held by the ring 
+              buffer.
+
+        Raises:
+            ValueError: If a detector lies outside the grid, or the engine
+            is the strip of a domain-decomposed run.
+        """
+        if self.halo_exchange is not None:
+            raise ValueError(
+                "Detectors cannot be placed on the strip of a "
+                "domain-decomposed run"
+            )
+        points = np.array(points, dtype=np.int32).reshape(-1, 2)
+        if not ((0 <= points) & (points < self.grid_size)).all():
+            raise ValueError("Detectors must lie within the grid")
+        number_of_detectors = len(points)
+        self.detector_points = ti.Vector.field(2,
+                                               dtype=ti.i32,
+                                               shape=number_of_detectors)
+        self.detector_points.from_numpy(points)
+        self.detector_fields = {
+            "steps": ti.field(dtype=ti.i64, shape=buffer_steps),
+            "heights": ti.field(dtype=ti.f64, 
+                                shape=(buffer_steps, number_of_detectors)),
+            "velocities": ti.field(dtype=ti.f64,
+                                   shape=(buffer_steps, number_of_detectors))
+        }
+        self.detector_samples_written = 0
+        self.detector_samples_drained = 0
+        self.drained_detector_samples = []
+
+    def detector_samples(self):
+        """
+        Return the samples of the virtual detectors taken since the last 
+        call (or since they were placed).
+
+        Returns:
+            dict: The 'steps' after which the samples were taken, of shape
+            (samples,), and the 'heights' and 'velocities' of shape 
+            (samples, detectors), as float64 NumPy arrays.
+        """
+        if self.detector_points is None:
+            number_of_detectors = 0
+        else:
+            number_of_detectors = self.detector_points.shape[0]
+            self._drain_detectors()
+        samples = {
+            "steps": np.zeros(0, dtype=np.int64),
+            "heights": np.zeros((0, number_of_detectors)),
+            "velocities": np.zeros((0, number_of_detectors))
+        }
+        if self.drained_detector_samples:
+            samples = {
+                name: np.concatenate([drained[name] for drained 
+                                      in self.drained_detector_samples])
+                for name in samples
+            }
+        self.drained_detector_samples = []
+        return samples
+
+    # -------------------------------------------------------------------------
+    # Time integrators
+    # -------------------------------------------------------------------------
+    def _integrate_legacy_RK4(self):
+        update_oscillator_positions_velocities_RK4(
+            self.number_of_damped_borders,
+            self.reduced_grid_start,
+            self.reduced_grid_end,
+            self.damping_layer_depth,
+            self._updated_cells(),
+            self.damping_map,
+            self.elastic_constant,
+            self.adjacent_grid_elements,
+            self.accumulation_dtype,
+            self.oscillator_velocities,
+            self.oscillator_positions,
+            self.oscillator_accelerations,
+            self.oscillator_mass,
+            self.timestep,
+            *self._detector_arguments(self.simulation_step_counter + 1)
+        )
+
+    def _integrate_velocity_Verlet(self):
+        verlet_half_kick_and_drift(
+            self.reduced_grid_start,
+            self.reduced_grid_end,
+            self._updated_cells(),
+            self.damping_map,
+            self.oscillator_velocities,
+            self.oscillator_positions,
+            self.oscillator_accelerations,
+            self.timestep
+        )
+        if self.halo_exchange is not None:
+            self._exchange_halos()
+        verlet_update_accelerations_and_half_kick(
+            self.reduced_grid_start,
+            self.reduced_grid_end,
+            self._updated_cells(),
+            self.elastic_constant,
+            self.adjacent_grid_elements,
+            self.accumulation_dtype,
+            self.oscillator_velocities,
+            self.oscillator_positions,
+            self.oscillator_accelerations,
+            self.oscillator_mass,
+            self.timestep,
+            *self._detector_arguments(self.simulation_step_counter + 1)
+        )
+
+    def _integrate_stage_buffered_RK4(self):
+        if self.stage_fields is None:
+            # Two intermediate states (used alternately by the stages) and
+            # the running sums of the slopes. The grid edges are never 
+            # written, so they stay at zero, like those of the sheet.
+            self.stage_fields = self._allocate_sheet_fields(
+                ["velocities_a", "positions_a",
+                 "velocities_b", "positions_b",
+                 "summed_velocity_slopes", "summed_position_slopes"],
+                self.state_dtype
+            )
+        stage_fields = self.stage_fields
+        state = (self.oscillator_velocities, self.oscillator_positions)
+        buffer_a = (stage_fields["velocities_a"], stage_fields["positions_a"])
+        buffer_b = (stage_fields["velocities_b"], stage_fields["positions_b"])
+        # The detectors are sampled by the last stage.
+        detector_arguments = self._detector_arguments(
+            self.simulation_step_counter + 1
+        )
+        # Stage 1 starts from the state itself; the later stages alternate
+        # between the two buffers.
+        for stage, stage_in, stage_out in [(1, state, buffer_a),
+                                           (2, buffer_a, buffer_b),
+                                           (3, buffer_b, buffer_a),
+                                           (4, buffer_a, buffer_b)]:
+            stage_buffered_RK4_stage(
+                stage,
+                self.reduced_grid_start,
+                self.reduced_grid_end,
+                self.elastic_constant,
+                self.adjacent_grid_elements,
+                self.accumulation_dtype,
+                self.oscillator_velocities,
+                self.oscillator_positions,
+                *stage_in,
+                *stage_out,
+                stage_fields["summed_velocity_slopes"],
+                stage_fields["summed_position_slopes"],
+                self.oscillator_mass,
+                self.timestep,
+                *detector_arguments
+            )
+
+    def _integrate_crank_nicolson(self):
+        if self.implicit_fields is None:
+            # The grid edges are never written, so they stay at zero, which
+            # is the fixed (Dirichlet) boundary of the linear system. These
+            # fields are f64 whatever the precision of the state, since the
+            # solve could not reach its tolerance in single precision.
+            self.implicit_fields = self._allocate_sheet_fields(
+                ["solution", "residual", "search_direction",
+                 "matrix_product"],
+                ti.f64
+            )
+        implicit_fields = self.implicit_fields
+        grid_range = (self.reduced_grid_start, self.reduced_grid_end)
+        operator_args = (self.elastic_constant,
+                         self.adjacent_grid_elements,
+                         self.accumulation_dtype)
+        step_args = (self.oscillator_mass, self.timestep)
+
+        right_hand_side_norm_squared = crank_nicolson_right_hand_side(
+            *grid_range,
+            *operator_args,
+            self.oscillator_velocities,
+            self.oscillator_positions,
+            implicit_fields["solution"],
+            implicit_fields["residual"],
+            *step_args
+        )
+        residual_norm_squared = crank_nicolson_initial_residual(
+            *grid_range,
+            *operator_args,
+            implicit_fields["solution"],
+            implicit_fields["residual"],
+            implicit_fields["search_direction"],
+            *step_args
+        )
+        # Conjugate gradient iteration, stopped when the residual is small
+        # relative to the right hand side.
+        converged_norm_squared = (self.implicit_tolerance ** 2
+                                  * right_hand_side_norm_squared)
+        self.implicit_iterations = 0
+        while (residual_norm_squared > converged_norm_squared
+               and self.implicit_iterations < self.implicit_max_iterations):
+            curvature = apply_crank_nicolson_operator(
+                *grid_range,
+                *operator_args,
+                implicit_fields["search_direction"],
+                implicit_fields["matrix_product"],
+                *step_args
+            )
+            new_residual_norm_squared = conjugate_gradient_update(
+                *grid_range,
+                residual_norm_squared / curvature,
+                implicit_fields["solution"],
+                implicit_fields["residual"],
+                implicit_fields["search_direction"],
+                implicit_fields["matrix_product"]
+            )
+            conjugate_gradient_new_direction(
+                *grid_range,
+                new_residual_norm_squared / residual_norm_squared,
+                implicit_fields["residual"],
+                implicit_fields["search_direction"]
+            )
+            residual_norm_squared = new_residual_norm_squared
+            self.implicit_iterations += 1
+
+        crank_nicolson_finish(
+            *grid_range,
+            self.oscillator_velocities,
+            self.oscillator_positions,
+            implicit_fields["solution"],
+            self.timestep,
+            *self._detector_arguments(self.simulation_step_counter + 1)
+        )
+
+    def _integrate_spectral(self):
+        size = self.reduced_grid_end - self.reduced_grid_start
+        if self.spectral_state is None:
+            self.spectral_state = np.empty((2, size, size))
+        propagator_params = (self.elastic_constant,
+                             self.oscillator_mass,
+                             self.timestep)
+        if self.spectral_propagator_params != propagator_params:
+            frequencies = lattice_angular_frequencies(
+                self.stencil,
+                size,
+                *propagator_params[:2]
+            )
+            phases = frequencies * self.timestep
+            # The normalisation of the inverse sine transform is folded 
+            # into the factors.
+            normalisation = (2 / (size + 1)) ** 2
+            self.spectral_propagator = (
+                normalisation * np.cos(phases),
+                normalisation * np.sin(phases) / frequencies,
+                -normalisation * np.sin(phases) * frequencies
+            )
+            self.spectral_propagator_params = propagator_params
+        cosines, position_sines, velocity_sines = self.spectral_propagator
+
+        # The edges of the grid are left untouched at zero.
+        state_args = (self.reduced_grid_start,
+                      self.reduced_grid_end,
+                      self.oscillator_positions,
+                      self.oscillator_velocities,
+                      self.spectral_state)
+        load_spectral_state(*state_args)
+        position_modes, velocity_modes = sine_transform(self.spectral_state)
+        self.spectral_state[...] = sine_transform(np.stack([
+            cosines * position_modes + position_sines * velocity_modes,
+            velocity_sines * position_modes + cosines * velocity_modes
+        ]))
+        store_spectral_state(
+            *state_args,
+            *self._detector_arguments(self.simulation_step_counter + 1)
+        )
+
+    # -------------------------------------------------------------------------
+    # Internal helpers
+    # -------------------------------------------------------------------------
+    def _detector_arguments(self, step, sampling=True):
+        """
+        The arguments of a kernel which completes a step, by which it 
+        samples the virtual detectors into the next slot of their ring 
+        buffer (see 'sample_detectors'), draining the buffer first if it is
+        full. The caller counts the sample once the kernel is launched.
+
+        Parameters:
+            - step (int): The step counter recorded with the samples.
+            - sampling (bool): False for a kernel which leaves the sampling
+              to another.
+        """
+        if self.detector_points is None or not sampling:
+            return (False, 0, 0, None, None, None, None)
+        return (True,
+                self._next_detector_slot(),
+                step,
+                self.detector_points,
+                self.detector_fields["steps"],
+                self.detector_fields["heights"],
+                self.detector_fields["velocities"])
+
+    def _next_detector_slot(self):
+        """
+        The slot of the ring buffer of the detectors into which the next 
+        samples go, draining the ring buffer first if it is full.
+        """
+        buffer_steps = self.detector_fields["steps"].shape[0]
+        if (self.detector_samples_written - self.detector_samples_drained
+                == buffer_steps):
+            self._drain_detectors()
+        return self.detector_samples_written % buffer_steps
+
+    def _drain_detectors(self):
+        """
+        Copy the samples of the ring buffer of the detectors not drained 
+        yet into NumPy arrays, in the order in which they were taken.
+        """
+        pending = self.detector_samples_written - self.detector_samples_drained
+        if pending == 0:
+            return
+        buffer_steps = self.detector_fields["steps"].shape[0]
+        # The slots of the pending samples, which may wrap around the end
+        # of the ring buffer.
+        slots = (np.arange(self.detector_samples_drained,
+                           self.detector_samples_written) % buffer_steps)
+        self.drained_detector_samples.append({
+            name: field.to_numpy()[slots]
+            for name, field in self.detector_fields.items()
+        })
+        self.detector_samples_drained = self.detector_samples_written
+
+    def _checkpoint_fields(self):
+        """The names of the fields saved by 'save_checkpoint'."""
+        names = ["oscillator_positions",
+                 "oscillator_velocities",
+                 "oscillator_accelerations",
+                 "first_orbital_coords",
+                 "second_orbital_coords"]
+        if self.boundary == "PML":
+            names += ["pml_auxiliary_i", "pml_auxiliary_j"]
+        return names
+
+    def _allocate_sheet_fields(self, names, dtype):
+        """
+        Allocate a group of scalar fields covering the sheet, in the memory
+        layout selected (see 'layout_options').
+
+        Parameters:
+            - names (list): The names of the fields.
+            - dtype: The Taichi data type of the fields.
+
+        Returns:
+            dict: The fields, by name. With the tiled layouts, their shape 
+            is padded to a whole number of tiles. Those of a strip of a 
+            domain-decomposed run hold its rows and its halos, with an 
+            offset so that they are indexed as in the grid.
+        """
+        if self.halo_exchange is not None:
+            # The rows of the strip and its halos, indexed as in the grid.
+            halo_depth = self.depth_zeroised_grid_edges
+            first_row, end_row = self.strip_rows
+            return {
+                name: ti.field(dtype=dtype,
+                               shape=(end_row - first_row + 2 * halo_depth,
+                                      self.grid_size),
+                               offset=(first_row - halo_depth, 0))
+                for name in names
+            }
+        if self.layout == "Dense":
+            return {
+                name: ti.field(dtype=dtype,
+                               shape=(self.grid_size, self.grid_size))
+                for name in names
+            }
+        fields = {name: ti.field(dtype=dtype) for name in names}
+        if self.layout == "Interleaved":
+            ti.root.dense(ti.ij, (self.grid_size, self.grid_size)).place(
+                *fields.values()
+            )
+            return fields
+
+        number_of_tiles = -(-self.grid_size // self.tile_size)
+        for field in fields.values():
+            cells = ti.root.dense(ti.ij, number_of_tiles)
+            if self.layout == "Blocked":
+                cells = cells.dense(ti.ij, self.tile_size)
+            else:
+                # Nested 2 x 2 blocks, each stored row-major, put the cells
+                # of a tile in Morton order.
+                for _ in range(self.tile_size.bit_length() - 1):
+                    cells = cells.dense(ti.ij, 2)
+            cells.place(field)
+        return fields
+
+    @staticmethod
+    def _ordered_sphere_masses(first_sphere_mass, second_sphere_mass):
+        """
+        The masses of the spheres as used by the engine, as in the GUI: a 
+        zero mass is replaced by one, and the masses are swapped if 
+        necessary, so that the first sphere is never the heavier one.
+        """
+        if first_sphere_mass == 0:
+            first_sphere_mass = 1
+        if second_sphere_mass == 0:
+            second_sphere_mass = 1
+        if first_sphere_mass > second_sphere_mass:
+            second_sphere_mass, first_sphere_mass = (
+                first_sphere_mass, second_sphere_mass
+                )
+        return first_sphere_mass, second_sphere_mass
+
+    def _apply_sphere_masses(self):
+        """
+        Compute the parameters depending on the masses of the spheres, and
+        acquire the stamps of their perturbations from the stamp cache, 
+        releasing those previously held.
+        """
+        first_sphere_mass = self.first_sphere_mass
+        second_sphere_mass = self.second_sphere_mass
+        self.sphere_mass_ratio = first_sphere_mass / second_sphere_mass
+
+        radius_augmentation_factor = 1
+        self.first_perturb_radius = (first_sphere_mass
+                                     * radius_augmentation_factor)
+        self.second_perturb_radius = (second_sphere_mass
+                                      * radius_augmentation_factor)
+        self.merged_perturb_radius = (
+            (first_sphere_mass + second_sphere_mass)
+            * radius_augmentation_factor
+        )
+        self.merging_distance = (self.first_perturb_radius
+                                 + self.second_perturb_radius)
+
+        previous_keys = list(self.perturb_stamp_keys)
+        stamps = [
+            self.perturb_stamps.acquire(perturb_radius, perturb_max_depth)
+            for perturb_radius, perturb_max_depth in (
+                (self.first_perturb_radius, first_sphere_mass),
+                (self.second_perturb_radius, second_sphere_mass),
+                (self.merged_perturb_radius,
+                 first_sphere_mass + second_sphere_mass)
+            )
+        ]
+        self.perturb_stamp_keys[:] = [key for key, _ in stamps]
+        self.perturb_stamps.release(previous_keys)
+        (self.first_perturb_slot,
+         self.second_perturb_slot,
+         self.merged_perturb_slot) = [slot for _, slot in stamps]
+        # The perturbations by kind, as numbered in the schedule of the 
+        # temporally blocked stepping: radius, stamp slot and grid 
+        # coordinates.
+        self.perturbations = {
+            1: (self.first_perturb_radius,
+                self.first_perturb_slot,
+                self.first_perturb_grid_coords),
+            2: (self.second_perturb_radius,
+                self.second_perturb_slot,
+                self.second_perturb_grid_coords),
+            3: (self.merged_perturb_radius,
+                self.merged_perturb_slot,
+                self.first_perturb_grid_coords)
+        }
+
+        self.astro_summed_masses = (
+            (second_sphere_mass + first_sphere_mass) * m_sun
+        )
+        self.binary_energy_loss_factor = (
+            32/5 * newtons_const ** 4
+            * m_sun ** 2
+            * (first_sphere_mass * second_sphere_mass) ** 2
+            / (first_sphere_mass + second_sphere_mass) ** 2
+            / lightspeed ** 5
+        )
+
+    def _change_sphere_masses(self, first_sphere_mass, second_sphere_mass):
+        """
+        Change the masses of the spheres during a run (see 'set_params').
+        """
+        self.first_sphere_mass = first_sphere_mass
+        self.second_sphere_mass = second_sphere_mass
+        self._apply_sphere_masses()
+        if not self.merged:
+            # The second sphere keeps the centre of mass at the centre of
+            # the grid.
+            self.second_orbital_radius = (self.first_orbital_radius
+                                          * self.sphere_mass_ratio)
+            self.model_binary_separation = (self.first_orbital_radius
+                                            + self.second_orbital_radius)
+        # The trajectory table of the new masses is looked up on the next 
+        # step of an inspiralling binary.
+        self.inspiral_initial_separation = None
+        self.inspiral_time = None
+        self.inspiral_radius = None
+
+    def _advance_perturbations(self):
+        """
+        Make the orbital update of one step, or place the perturbations of
+        a test run on its first step.
+        """
+        if self.run_option in orbital_run_options:
+            self._advance_orbit()
+        elif not self.test_perturbations_placed:
+            self._place_test_perturbations()
+
+    def _overlay_perturbation(self, perturbation_kind, orbital_coords):
+        """
+        Overlay a perturbation (1, 2 or 3 for the first sphere, the second
+        sphere or the merged object) centred on 'orbital_coords' onto the 
+        sheet, or record it in the schedule of the temporally blocked pass
+        under way.
+        """
+        if self.recording_step is not None:
+            record_perturbation(
+                self.temporal_fields["perturbation_schedule"],
+                self.recording_step,
+                self.recorded_perturbations,
+                perturbation_kind,
+                orbital_coords
+            )
+            self.recorded_perturbations += 1
+            return
+
+        perturb_radius, perturb_slot, perturb_grid_coords = (
+            self.perturbations[perturbation_kind]
+        )
+        overlay_perturb_shape_onto_grid(
+            perturb_radius,
+            self.perturb_stamps.stamps,
+            perturb_slot,
+            orbital_coords,
+            perturb_grid_coords,
+            *self.strip_rows,
+            self.oscillator_positions,
+            self.oscillator_velocities
+        )
+        if self.activity_tracking:
+            activate_blocks_around_perturbation(
+                perturb_radius,
+                orbital_coords,
+                self.activity_block_size,
+                self.activity_blocks
+            )
+
+    @staticmethod
+    def _check_temporal_blocking(
+            integrator,
+            temporal_block_steps,
+            temporal_tile_size,
+            reach,
+            boundary
+        ):
+        if temporal_block_steps <= 1:
+            return
+        if boundary != "Linear sponge":
+            raise ValueError(
+                f"Temporal blocking does not support the {boundary!r} "
+                "boundary"
+            )
+        if integrator not in SimulationEngine.temporal_integrators:
+            raise ValueError(
+                "Temporal blocking requires the Velocity Verlet or "
+                f"Stage-buffered RK4 integrator, not {integrator!r}, whose "
+                "in-place update depends on the order of the cells"
+            )
+        if temporal_tile_size & (temporal_tile_size - 1):
+            raise ValueError(
+                "The temporal tile size must be a power of 2, "
+                f"not {temporal_tile_size}"
+            )
+        halo_depth = (reach * temporal_block_steps
+                      * SimulationEngine.temporal_integrators[integrator])
+        if temporal_tile_size <= 2 * halo_depth:
+            raise ValueError(
+                f"A temporal tile size of {temporal_tile_size} leaves no "
+                f"room for a tile within a halo of {halo_depth} cells"
+            )
+
+    @staticmethod
+    def _check_activity_tracking(
+            integrator,
+            temporal_block_steps,
+            activity_tracking
+        ):
+        if not activity_tracking:
+            return
+        # The intermediate states of the other integrators span the whole
+        # sheet, and would be stale in the blocks skipped.
+        if integrator not in SimulationEngine.selective_integrators:
+            raise ValueError(
+                "Activity tracking requires the Legacy RK4 or Velocity "
+                f"Verlet integrator, not {integrator!r}"
+            )
+        if temporal_block_steps > 1:
+            raise ValueError(
+                "Activity tracking cannot be combined with temporal blocking"
+            )
+
+    @staticmethod
+    def _check_domain(
+            integrator,
+            temporal_block_steps,
+            activity_tracking,
+            boundary,
+            domain
+        ):
+        if domain == "Square":
+            return
+        if integrator not in SimulationEngine.selective_integrators:
+            raise ValueError(
+                "The circular domain requires the Legacy RK4 or Velocity "
+                f"Verlet integrator, not {integrator!r}"
+            )
+        if temporal_block_steps > 1:
+            raise ValueError(
+                "The circular domain cannot be combined with temporal "
+                "blocking"
+            )
+        if activity_tracking:
+            raise ValueError(
+                "The circular domain cannot be combined with activity "
+                "tracking"
+            )
+        if boundary != "Linear sponge":
+            raise ValueError(
+                f"The circular domain does not support the {boundary!r} "
+                "boundary"
+            )
+
+    @staticmethod
+    def _check_perturbations(
+            grid_size,
+            first_orbital_radius,
+            first_sphere_mass,
+            second_sphere_mass
+        ):
+        """
+        Check that the perturbations of the spheres on their orbits, and 
+        that of the merged object at the grid centre, lie within the grid:
+        'overlay_perturb_shape_onto_rows' does not clip them to it. The
+        radius of a perturbation is the mass of its sphere, and its centre
+        the cell nearest to the sphere.
+        """
+        grid_centre = int((grid_size - 1) / 2)
+        second_orbital_radius = (first_orbital_radius * first_sphere_mass
+                                 / second_sphere_mass)
+        for orbital_radius, perturb_radius in (
+                (first_orbital_radius, first_sphere_mass),
+                (second_orbital_radius, second_sphere_mass),
+                (0, first_sphere_mass + second_sphere_mass)
+            ):
+            # The centre is rounded half away from zero, as by 'ti.round'.
+            if (math.floor(grid_centre - orbital_radius + 0.5) 
+                    - perturb_radius < 0
+                    or math.floor(grid_centre + orbital_radius + 0.5)
+                    + perturb_radius > grid_size - 1):
+                raise ValueError(
+                    f"Spheres of masses {first_sphere_mass} and "
+                    f"{second_sphere_mass} with a first orbital radius of "
+                    f"{first_orbital_radius:g} overlay perturbations beyond "
+                    f"the edges of a grid of size {grid_size}"
+                )
+
+    @staticmethod
+    def _check_spectral(integrator, stencil, boundary):
+        if integrator != "Spectral":
+            return
+        if stencil_reach(stencil) > 1:
+            raise ValueError(
+                f"The spectral integrator does not support the {stencil!r} "
+                "stencil, which reaches beyond the adjacent cells"
+            )
+        if boundary != "Linear sponge":
+            raise ValueError(
+                f"The spectral integrator does not support the {boundary!r} "
+                "boundary"
+            )
+
+    @staticmethod
+    def _check_strip(
+            integrator,
+            temporal_block_steps,
+            activity_tracking,
+            boundary,
+            domain,
+            layout,
+            strip,
+            reach
+        ):
+        if strip is None:
+            return
+        if integrator != "Velocity Verlet":
+            raise ValueError(
+                "A strip of a domain-decomposed run requires the Velocity "
+                f"Verlet integrator, not {integrator!r}"
+            )
+        if temporal_block_steps > 1 or activity_tracking:
+            raise ValueError(
+                "A strip of a domain-decomposed run cannot be combined with "
+                "temporal blocking or activity tracking"
+            )
+        if boundary != "Linear sponge" or domain != "Square":
+            raise ValueError(
+                "A strip of a domain-decomposed run requires the linear "
+                "sponge and the square domain"
+            )
+        if layout != "Dense":
+            raise ValueError(
+                "A strip of a domain-decomposed run requires the Dense "
+                f"layout, not {layout!r}"
+            )
+        if strip[1] - strip[0] < reach:
+            raise ValueError(
+                f"A strip of {strip[1] - strip[0]} rows is narrower than "
+                f"its halo of {reach} rows"
+            )
+
+    def _exchange_halos(self):
+        """
+        Send the heights of the rows of a strip next to each of its 
+        neighbours to that neighbour, and receive the heights of its halos
+        from them, through the halo exchange of the domain-decomposed run.
+        """
+        halo_depth = self.depth_zeroised_grid_edges
+        first_row, end_row = self.strip_rows
+        # The first row of the rows sent and of the halo received, on 
+        # either side of the strip.
+        side_rows = {"lower": (first_row, first_row - halo_depth),
+                     "upper": (end_row - halo_depth, end_row)}
+        for side in self.halo_exchange.sides:
+            copy_rows_to_array(side_rows[side][0],
+                               self.oscillator_positions,
+                               self.halo_exchange.outgoing_rows(side))
+        incoming_rows = self.halo_exchange.exchange()
+        for side in self.halo_exchange.sides:
+            copy_array_to_rows(side_rows[side][1],
+                               self.oscillator_positions,
+                               incoming_rows[side])
+
+    def _compute_damping_map(self):
+        """
+        Compute the factors of the linear sponge (see 'compute_damping_map'
+        and 'compute_radial_damping_map'), all one when the PML is in use 
+        instead.
+        """
+        if self.domain == "Circular":
+            compute_radial_damping_map(
+                self.grid_centre,
+                self.domain_radius,
+                self.damping_layer_depth,
+                self.max_damping_factor,
+                self.damping_map
+            )
+            return
+        number_of_damped_borders = self.number_of_damped_borders
+        if self.boundary != "Linear sponge":
+            number_of_damped_borders = 0
+        compute_damping_map(
+            number_of_damped_borders,
+            self.reduced_grid_start,
+            self.reduced_grid_end,
+            self.damping_layer_depth,
+            self.max_damping_factor,
+            self.damping_map
+        )
+
+    def _compute_pml_profile(self):
+        """
+        Compute the damping rates of the PML for the wave speed and 
+        timestep in use.
+
+        The damping rate at the border is that for which a wave at normal
+        incidence is attenuated by 'pml_reflection' over its return trip
+        through the layer, for a rate growing as the 'pml_order' power of
+        the depth: zeta_max = (order + 1) c ln(1 / R) / (2 L).
+        """
+        max_damping_rate = (
+            (self.pml_order + 1) * self._wave_speed()
+            * math.log(1 / self.pml_reflection)
+            / (2 * self.damping_layer_depth)
+        )
+        compute_pml_profile(
+            self.damping_layer_depth,
+            max_damping_rate,
+            self.pml_order,
+            self.timestep,
+            self.pml_profile
+        )
+
+    def _wave_speed(self):
+        """The speed of long waves on the sheet, in cells per unit time."""
+        return (self.elastic_constant / self.oscillator_mass) ** 0.5
+
+    def _damp_boundary(self):
+        """
+        Apply the absorbing boundary selected to the sheet, unless it is the
+        linear sponge and the integrator applies it itself.
+        """
+        if self.boundary == "PML":
+            boundary_arguments = (
+                self.number_of_damped_borders,
+                self.reduced_grid_start,
+                self.reduced_grid_end,
+                self.damping_layer_depth,
+                self.pml_profile
+            )
+            pml_update_auxiliaries(
+                *boundary_arguments,
+                self._wave_speed() ** 2,
+                self.oscillator_positions,
+                self.pml_auxiliary_i,
+                self.pml_auxiliary_j
+            )
+            pml_damp_velocities(
+                *boundary_arguments,
+                self.timestep,
+                self.oscillator_velocities,
+                self.oscillator_positions,
+                self.pml_auxiliary_i,
+                self.pml_auxiliary_j
+            )
+        elif self.integrator not in self.fused_damping_integrators:
+            damp_grid_boundary(
+                self.number_of_damped_borders,
+                self.reduced_grid_start,
+                self.reduced_grid_end,
+                self.damping_layer_depth,
+                self.damping_map,
+                self.oscillator_velocities,
+                self.oscillator_positions
+            )
+
+    def _updated_cells(self):
+        """
+        The field over whose cells the explicit integrators loop: the
+        activity mask in the activity-tracked mode, the row spans of the 
+        circular domain or of a strip, otherwise the field of heights.
+        """
+        if self.activity_tracking:
+            return self.activity_mask
+        if self.domain == "Circular":
+            return self.domain_row_spans
+        if self.halo_exchange is not None:
+            return self.strip_row_spans
+        return self.oscillator_positions
+
+    def _update_activity(self):
+        """
+        Activate the blocks reached by the waves, and deactivate those 
+        which have become quiescent (see 'update_active_blocks').
+        """
+        self.block_energies.fill(0.0)
+        accumulate_block_energies(
+            self.grid_size,
+            self.activity_block_size,
+            self.activity_mask,
+            self.oscillator_velocities,
+            self.oscillator_positions,
+            self.oscillator_mass,
+            self.elastic_constant,
+            self.block_energies
+        )
+        number_of_active_blocks = update_active_blocks(
+            self.block_energies,
+            0.5 * self.elastic_constant * self.activity_threshold ** 2,
+            self.activity_blocks
+        )
+        self.active_block_fraction = (number_of_active_blocks
+                                      / self.block_energies.shape[0] ** 2)
+
+    def _fused_steps_supported(self):
+        """Whether 'step' takes its steps with 'fused_step'."""
+        return (self.fused_steps
+                and self.integrator in self.fused_damping_integrators
+                and self.boundary == "Linear sponge"
+                and not self.activity_tracking
+                and self.halo_exchange is None)
+
+    def _step_fused(self, n):
+        """
+        Take 'n' steps, each with a single launch of 'fused_step', the 
+        parameters and the orbital state being held on the device from the
+        first to the last.
+        """
+        orbit_update, trajectory = self._orbit_update()
+        sampling = self.detector_points is not None
+        was_merged = self.merged
+
+        self._load_fused_step_state(trajectory, self.fused_step_counters)
+        for _ in range(n):
+            if orbit_update is None:
+                # The perturbations of a test run are placed once, by the
+                # engine.
+                self._advance_perturbations()
+            if sampling:
+                self._next_detector_slot()
+            fused_step(
+                orbit_update,
+                self.integrator,
+                sampling,
+                self.fused_step_state,
+                self.grid_centre,
+                *((None, None) if trajectory is None else trajectory[1:]),
+                self.first_orbital_coords,
+                self.second_orbital_coords,
+                self.perturb_stamps.stamps,
+                self._updated_cells(),
+                self.damping_map,
+                self.adjacent_grid_elements,
+                self.accumulation_dtype,
+                self.oscillator_velocities,
+                self.oscillator_positions,
+                self.oscillator_accelerations,
+                self.detector_points,
+                *((None, None, None) if not sampling else
+                  (self.detector_fields["steps"],
+                   self.detector_fields["heights"],
+                   self.detector_fields["velocities"]))
+            )
+            self.simulation_step_counter += 1
+            if sampling:
+                self.detector_samples_written += 1
+        # Without an orbit to update, the orbital state is left as it was.
+        if orbit_update is not None and not was_merged:
+            self._store_fused_step_state(orbit_update)
+        # The state on the device is that of the attributes, until these
+        # are altered.
+        self.fused_step_values = self._fused_step_values(
+            trajectory, self.fused_step_counters
+        )
+
+    def _orbit_update(self):
+        """
+        The orbital update made on each step (see 'update_orbit'), and the
+        trajectory table followed by it, as given by '_device_trajectory',
+        if any.
+        """
+        orbit_update = None
+        trajectory = None
+        if self.run_option in orbital_run_options:
+            orbit_update = "Per-step update"
+        if (self.run_option == "Inspiralling"
+                and self.inspiral == "Trajectory table"):
+            # The trajectory table is only needed by a binary which has not
+            # merged yet, but is kept for the steps after the merger, to 
+            # take them with the same compiled kernel. A binary closer than
+            # the merging distance merges on its next update either way.
+            if (not self.merged
+                    and (self.first_orbital_radius
+                         + self.first_orbital_radius * self.sphere_mass_ratio
+                         >= self.merging_distance)):
+                trajectory = self._device_trajectory()
+            else:
+                trajectory = self.device_trajectory
+            if trajectory is not None:
+                orbit_update = "Trajectory table"
+        return orbit_update, trajectory
+
+    def _load_fused_step_state(self, trajectory, counters=()):
+        """
+        Copy the parameters of the steps and the orbital state into the
+        'fused_step_state', with those of the trajectory table given by 
+        '_device_trajectory', if any, and the 'counters' (some of the 
+        'fused_step_counters'), unless it holds them already.
+        """
+        names, values = self._fused_step_values(trajectory, counters)
+        if (names, values) == self.fused_step_values:
+            return
+        # In groups of at most 32 members, which Taichi unrolls without 
+        # warning about the compile time.
+        for first in range(0, len(names), 32):
+            load_fused_step_state(
+                names[first:first + 32],
+                np.array(values[first:first + 32]),
+                self.fused_step_state
+            )
+
+    def _fused_step_values(self, trajectory, counters=()):
+        """
+        The names of the members of the 'fused_step_state' copied by
+        '_load_fused_step_state', and their values.
+        """
+        values = {name: getattr(self, name)
+                  for name in (self.fused_step_parameters
+                               + counters
+                               + self.fused_orbit_state)}
+        values["inspiralling"] = self.run_option == "Inspiralling"
+        values["first_row"], values["end_row"] = self.strip_rows
+        if trajectory is not None:
+            values["trajectory_decay_constant"] = trajectory[0].decay_constant
+            values["trajectory_merge_time"] = trajectory[0].merge_time
+        # The time along the trajectory table is None until looked up.
+        return (tuple(values),
+                [float(value or 0.0) for value in values.values()])
+
+    def _store_fused_step_state(self, orbit_update):
+        """
+        Copy the orbital state of the 'fused_step_state', updated by the 
+        'orbit_update' given to 'update_orbit', back into the attributes 
+        of the engine.
+
+        Returns:
+            int: The 'stamp_kind' of the last update.
+        """
+        names = self.fused_orbit_state + ("stamp_kind",)
+        values = np.empty(len(names))
+        store_fused_step_state(names, self.fused_step_state, values)
+        state = dict(zip(names, values.tolist()))
+        stamp_kind = int(state.pop("stamp_kind"))
+        state["merged"] = bool(state["merged"])
+        # The time along the trajectory table is only kept by the table.
+        if orbit_update != "Trajectory table":
+            del state["inspiral_time"]
+        elif not state["merged"]:
+            self.inspiral_radius = state["first_orbital_radius"]
+        for name, value in state.items():
+            setattr(self, name, value)
+        return stamp_kind
+
+    def _device_trajectory(self):
+        """
+        The trajectory table followed by the binary (see 
+        '_inspiral_trajectory'), with Taichi fields of the times and 
+        separations of its nodes, as taken by 'fused_step'.
+        """
+        trajectory = self._inspiral_trajectory()
+        if (self.device_trajectory is None
+                or self.device_trajectory[0] is not trajectory):
+            number_of_nodes = len(trajectory.times)
+            times = ti.field(dtype=ti.f64, shape=number_of_nodes)
+            times.from_numpy(trajectory.times)
+            separations = ti.field(dtype=ti.f64, shape=number_of_nodes)
+            separations.from_numpy(trajectory.separations)
+            self.device_trajectory = (trajectory, times, separations)
+        return self.device_trajectory
+
+    def _step_temporal_block(self, pass_steps):
+        """
+        Take 'pass_steps' steps with the velocity Verlet or stage-buffered
+        RK4 integrator, advancing each tile of the sheet by all of them in
+        turn, in a scratch region small enough to stay in cache (see 
+        'step_temporal_tiles').
+
+        Notes:
+            - The sheet is split into square tiles, each copied together 
+              with a halo as deep as the stencil reach times the number of
+              stencil applications of the pass (one per step for the 
+              velocity Verlet integrator, four for the stage-buffered RK4)
+              into a region of side 'temporal_tile_size'. Each stencil 
+              application invalidates a further stencil reach at the rim 
+              of the regions, leaving the tiles themselves valid at the end
+              of the pass. The halos of adjacent tiles overlap and are 
+              recomputed by each (overlapped tiling), so that the tiles are
+              independent of each other, and the sheet is read and written
+              once per pass rather than once per step.
+            - A pass is two kernel launches: the orbital updates of all 
+              its steps, recorded in a schedule of the perturbations to 
+              overlay within the tiles at their step, and the steps of the
+              tiles.
+        """
+        # The halos and scratch regions depend on the integrator, which may
+        # have been changed since they were allocated.
+        if (self.temporal_fields_steps < pass_steps
+                or self.temporal_fields["integrator"] != self.integrator):
+            self._allocate_temporal_fields(self.temporal_block_steps)
+        temporal_fields = self.temporal_fields
+
+        orbit_update, trajectory = self._orbit_update()
+        if orbit_update is None:
+            # The perturbations of a test run are placed once, by the 
+            # engine.
+            temporal_fields["perturbation_schedule"].fill(0)
+            for step in range(pass_steps):
+                self.recording_step = step
+                self.recorded_perturbations = 0
+                self._advance_perturbations()
+            self.recording_step = None
+        else:
+            was_merged = self.merged
+            self._load_fused_step_state(trajectory)
+            record_orbit_schedule(
+                orbit_update,
+                pass_steps,
+                self.fused_step_state,
+                self.grid_centre,
+                *((None, None) if trajectory is None else trajectory[1:]),
+                self.first_orbital_coords,
+                self.second_orbital_coords,
+                temporal_fields["perturbation_schedule"]
+            )
+            if not was_merged:
+                self._store_fused_step_state(orbit_update)
+            self.fused_step_values = self._fused_step_values(trajectory)
+
+        # The detectors are sampled on every step of the pass, into as many
+        # consecutive slots of their ring buffer (see 'step', which limits
+        # the passes to its length).
+        sampling = self.detector_points is not None
+        if sampling:
+            buffer_steps = self.detector_fields["steps"].shape[0]
+            if (self.detector_samples_written - self.detector_samples_drained
+                    + pass_steps > buffer_steps):
+                self._drain_detectors()
+        step_temporal_tiles(
+            pass_steps,
+            temporal_fields["tile_origins"],
+            temporal_fields["next_tile"],
+            temporal_fields["tile_size"],
+            temporal_fields["halo_depth"],
+            self.depth_zeroised_grid_edges,
+            self.grid_size,
+            self.reduced_grid_start,
+            self.reduced_grid_end,
+            self.damping_map,
+            temporal_fields["perturbation_schedule"],
+            self.perturb_stamps.stamps,
+            *self.perturbations[1][:2],
+            *self.perturbations[2][:2],
+            *self.perturbations[3][:2],
+            self.elastic_constant,
+            self.adjacent_grid_elements,
+            self.accumulation_dtype,
+            self.oscillator_mass,
+            self.timestep,
+            self.oscillator_velocities,
+            self.oscillator_positions,
+            self.oscillator_accelerations,
+            temporal_fields["tile_velocities"],
+            temporal_fields["tile_positions"],
+            temporal_fields["tile_accelerations"],
+            self.integrator == "Stage-buffered RK4",
+            *(temporal_fields.get(name) for name in [
+                "tile_velocities_a", "tile_positions_a",
+                "tile_velocities_b", "tile_positions_b",
+                "tile_summed_velocity_slopes", "tile_summed_position_slopes"
+            ]),
+            temporal_fields["velocities"],
+            temporal_fields["positions"],
+            temporal_fields["accelerations"],
+            *self._detector_arguments(self.simulation_step_counter + 1,
+                                      sampling=sampling)
+        )
+        self.simulation_step_counter += pass_steps
+        if sampling:
+            self.detector_samples_written += pass_steps
+
+        # The fields of the next state become those of the sheet, and the
+        # previous ones receive the state at the end of the next pass.
+        for name in ["velocities", "positions", "accelerations"]:
+            sheet_attribute = "oscillator_" + name
+            previous_field = getattr(self, sheet_attribute)
+            setattr(self, sheet_attribute, temporal_fields[name])
+            temporal_fields[name] = previous_field
+
+    def _allocate_temporal_fields(self, pass_steps):
+        # The stencil reach is the depth of the zeroised grid edges.
+        halo_depth = (self.depth_zeroised_grid_edges * pass_steps
+                      * self.temporal_integrators[self.integrator])
+        region_size = self.temporal_tile_size
+        tile_size = region_size - 2 * halo_depth
+        tiles_per_row = -(-self.grid_size // tile_size)
+        # One scratch region for each thread of the CPU backend.
+        workers = max(1, impl.current_cfg().cpu_max_num_threads)
+
+        self.temporal_fields = self._allocate_sheet_fields(
+            ["velocities", "positions", "accelerations"],
+            self.state_dtype
+        )
+        tile_names = ["tile_velocities", "tile_positions", 
+                      "tile_accelerations"]
+        if self.integrator == "Stage-buffered RK4":
+            tile_names += ["tile_velocities_a", "tile_positions_a",
+                           "tile_velocities_b", "tile_positions_b",
+                           "tile_summed_velocity_slopes", 
+                           "tile_summed_position_slopes"]
+        for name in tile_names:
+            self.temporal_fields[name] = ti.field(
+                dtype=self.state_dtype,
+                shape=(workers, region_size, region_size)
+            )
+        self.temporal_fields["tile_origins"] = ti.field(
+            dtype=ti.i32,
+            shape=(tiles_per_row * tiles_per_row, 2)
+        )
+        set_tile_origins(
+            self.temporal_fields["tile_origins"],
+            tiles_per_row,
+            tile_size,
+            halo_depth
+        )
+        self.temporal_fields["next_tile"] = ti.field(dtype=ti.i32, shape=())
+        self.temporal_fields["perturbation_schedule"] = ti.field(
+            dtype=ti.i32,
+            shape=(pass_steps, 2, 3)
+        )
+        self.temporal_fields["tile_size"] = tile_size
+        self.temporal_fields["integrator"] = self.integrator
+        self.temporal_fields["halo_depth"] = halo_depth
+        self.temporal_fields_steps = pass_steps
+
+    def _advance_orbit(self):
+        """
+        Move the binary along its orbit by one step on the device (see 
+        'update_orbit'), and overlay the perturbations of the spheres onto
+        the sheet. Once the binary has merged, the merged perturbation is 
+        placed at the grid centre (once only, since a stationary mass 
+        produces no gravitational waves).
+        """
+        if self.merged:
+            return
+        orbit_update, trajectory = self._orbit_update()
+        self._load_fused_step_state(trajectory)
+        update_engine_orbit(
+            orbit_update,
+            self.fused_step_state,
+            self.grid_centre,
+            *((None, None) if trajectory is None else trajectory[1:]),
+            self.first_orbital_coords,
+            self.second_orbital_coords
+        )
+        stamp_kind = self._store_fused_step_state(orbit_update)
+        self.fused_step_values = self._fused_step_values(trajectory)
+        if stamp_kind == 1:
+            self._overlay_perturbation(1, self.first_orbital_coords)
+            self._overlay_perturbation(2, self.second_orbital_coords)
+        elif stamp_kind == 3:
+            self._overlay_perturbation(3, self.first_orbital_coords)
+
+    def _inspiral_trajectory(self):
+        """
+        The trajectory table followed by the binary, whose separation must 
+        be at least the merging distance, looking up the time of its 
+        orbital radius along the table if the radius has been set since.
+        """
+        # The table starts from the separation of an orbit of the first
+        # sphere reaching the edge of the grid, or from a larger one set.
+        separation = ((self.first_orbital_radius
+                       + self.first_orbital_radius * self.sphere_mass_ratio)
+                      * self.astro_length_scaling)
+        if (self.inspiral_initial_separation is None
+                or separation > self.inspiral_initial_separation):
+            self.inspiral_initial_separation = max(
+                separation,
+                self.grid_size / 2 * (1 + self.sphere_mass_ratio)
+                * self.astro_length_scaling
+            )
+            self.inspiral_radius = None
+        trajectory = inspiral_trajectory(
+            self.first_sphere_mass,
+            self.second_sphere_mass,
+            self.inspiral_initial_separation,
+            self.merging_distance * self.astro_length_scaling
+        )
+        if self.first_orbital_radius != self.inspiral_radius:
+            self.inspiral_time = trajectory.time_at_separation(separation)
+            self.inspiral_radius = self.first_orbital_radius
+        return trajectory
+
+    def _place_test_perturbations(self):
+        """
+        Overlay the two stationary perturbations of the test runs, placed
+        symmetrically about the grid centre along the x axis (once only).
+        """
+        self.test_perturbations_placed = True
+        self.first_orbital_coords[None] = ti.Vector([
+            self.grid_centre[None][0] + self.first_orbital_radius,
+            0.0,
+            self.grid_centre[None][2]
+        ])
+        self.second_orbital_coords[None] = ti.Vector([
+            self.grid_centre[None][0] - self.first_orbital_radius,
+            0.0,
+            self.grid_centre[None][2]
+        ])
+        self._overlay_perturbation(1, self.first_orbital_coords)
+        self._overlay_perturbation(2, self.second_orbital_coords)
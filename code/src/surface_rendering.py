@@ -0,0 +1,424 @@
+# =============================================================================
+# Rendering of the sheet surface in the Taichi GGUI
+# =============================================================================
+# The kernels which turn the heights of the sheet into the mesh drawn by the
+# GGUI, and the camera controls of the rendering window. They are shared by
+# the interactive application ("Simple Analogue Gravitational Waves
+# Simulation.py"), which renders the heights of a live engine, and the replay
+# viewer ('replay_viewer.py'), which renders those of a recording.
+# =============================================================================
+import math
+
+from matplotlib import colors as mcolors  # Used for converting string to RGB
+import taichi as ti
+
+
+@ti.kernel
+def rescale_oscillator_heights(
+        grid_size: ti.i32,
+        domain_row_spans: ti.template(),
+        vertical_scale: ti.f64,
+        oscillator_positions: ti.template(),
+        height_rescaled_positions: ti.template()
+    ):
+    """
+    Build the oscillator position vectors from the scalar heights and 
+    rescale their vertical component.
+
+    This function multiplies the height (y-coordinate) of each oscillator 
+    in the grid by a scaling factor. The horizontal (x) and depth (z) 
+    components of the positions are the grid indices of the oscillator, 
+    since the simulation itself only stores the heights. The scaled 
+    positions are stored in a new Taichi field of vectors.
+
+    Parameters:
+        - grid_size (ti.i32): The size of the grid, assuming a square grid 
+          of 'grid_size' x 'grid_size'.
+        - domain_row_spans (ti.template()): The cells of each row within 
+          the computational domain of the engine (see 
+          'compute_domain_row_spans'); the others are skipped.
+        - vertical_scale (ti.f64): The scaling factor to apply to 
+          the vertical (y) component of each oscillator's position.
+        - oscillator_positions (ti.template()): Taichi field containing 
+          the heights of the oscillators.
+        - height_rescaled_positions (ti.template()): Taichi field 
+          where the height-rescaled positions will be stored.
+
+    Returns:
+        None: This function updates the 'height_rescaled_positions' 
+        field in-place and does not return any value.
+    """
+    for i in range(grid_size):
+        for j in range(domain_row_spans[i][0], domain_row_spans[i][1]):
+            height_rescaled_positions[i, j] = ti.cast(ti.Vector([
+                i,
+                oscillator_positions[i, j] * vertical_scale,
+                j
+            ]), height_rescaled_positions.dtype)
+
+
+@ti.kernel
+def rescale_surface_for_rendering(
+        grid_size: ti.i32,
+        domain_row_spans: ti.template(),
+        rendering_rescale: ti.f64,
+        grid_surface: ti.template(),
+        surface_for_rendering: ti.template()
+    ):
+    """
+    The oscillator vectors representing the grid surface are rescaled for 
+    rendering by Taichi. This rescaling is necessary because Taichi regards
+    the 3D region it renders in the animation window as a 1 x 1 x 1 cube.
+    Only the cells within the domain of the engine ('domain_row_spans') 
+    are rescaled.
+    """
+    for i in range(grid_size):
+        for j in range(domain_row_spans[i][0], domain_row_spans[i][1]):
+            surface_for_rendering[i, j] = ti.cast(
+                grid_surface[i, j] * rendering_rescale,
+                surface_for_rendering.dtype
+            )
+
+
+def color_longname_to_RGB(
+        color_name,
+        rgb_color,
+        complementary_rgb_color
+    ):
+    """
+    The function determines the initial and complementary colors for 
+    rendering the simulated surface by converting a human-readable color name 
+    to its RGB representation and computing its complementary color by 
+    subtracting each RGB component of the initial color from 1.0. 
+
+    The two colors are used to render a chequerboard pattern unless the 
+    user selects a maximal chequer size, in which case the entire surface 
+    is treated as a single chequer of the initial color.
+
+    Parameters:
+        color_name (str): The name of the color to process, as recognized 
+        by Matplotlib.
+
+    Returns:
+        tuple:
+            - rgb_color (float): The normalized RGB values 
+              of the primary color.
+            - complementary_rgb_color (float): The normalized 
+              RGB values of the complementary color.
+    """
+    rgb_color = mcolors.to_rgb(color_name)
+    for i in range(3):
+        complementary_rgb_color[i] = 1.0 - rgb_color[i]
+    rgb_color = list(rgb_color)
+    return rgb_color, complementary_rgb_color
+
+
+@ti.kernel
+def set_grid_colors(
+        grid_size: ti.i32,
+        domain_row_spans: ti.template(),
+        grid_chequer_size: ti.i32,
+        rgb_color: ti.template(),
+        complementary_rgb_color: ti.template(),
+        grid_colors: ti.template()
+    ):
+    """
+    Set colors for a grid with a chequered (chessboard-style) pattern. 
+    The chequer size can be varied during runtime.
+
+    Parameters:
+        - grid_size (ti.i32): The size of the grid.
+        - domain_row_spans (ti.template()): The cells of each row within 
+          the computational domain of the engine (see 
+          'compute_domain_row_spans'); the others are skipped.
+        - grid_chequer_size (ti.i32): The size of each chequer on the grid.
+        - rgb_color (ti.template()): Template for the normalized 
+          RGB color.
+        - complementary_rgb_color (ti.template()): Template for the
+          complementary normalized RGB color.
+        - grid_colors (ti.template()): Template for the grid colors.
+    """
+    if grid_chequer_size == 0:
+        for i in range(grid_size):
+            for j in range(domain_row_spans[i][0], domain_row_spans[i][1]):
+                grid_colors[i * grid_size + j] = ti.cast(rgb_color,
+                                                         grid_colors.dtype)
+    else:
+        for i in range(grid_size):
+            for j in range(domain_row_spans[i][0], domain_row_spans[i][1]):
+                if (i // grid_chequer_size 
+                        + j // grid_chequer_size) % 2 == 0:
+                    grid_colors[i * grid_size + j] = ti.cast(
+                        rgb_color, grid_colors.dtype
+                    )
+                else:
+                    grid_colors[i * grid_size + j] = ti.cast(
+                        complementary_rgb_color, grid_colors.dtype
+                    )
+
+
+@ti.kernel
+def set_indices(
+        grid_size: ti.i32,
+        domain_row_spans: ti.template(),
+        indices: ti.template()
+    ) -> ti.i32:
+    """
+    Set triangle indices for constructing the grid surface. This function is 
+    executed at the beginning of the run, only once, because the indices do
+    not change even when the form of the surface does.
+
+    Only the squares of the grid whose four corners lie within the domain 
+    of the engine are drawn, their indices being packed at the start of 
+    'indices', in the same order as for the whole grid.
+
+    Parameters:
+        - grid_size (ti.i32): The size of the grid.
+        - domain_row_spans (ti.template()): The cells of each row within 
+          the computational domain of the engine (see 
+          'compute_domain_row_spans').
+        - indices (ti.template()): Template for the triangle indices.
+
+    Returns:
+        ti.i32: The number of indices set.
+    """
+    square_id = 0
+    ti.loop_config(serialize=True)
+    for i in range(grid_size - 1):
+        first_j = ti.max(domain_row_spans[i][0], domain_row_spans[i + 1][0])
+        end_j = ti.min(domain_row_spans[i][1], domain_row_spans[i + 1][1])
+        for j in range(first_j, end_j - 1):
+            # 1st triangle of the square
+            indices[square_id * 6 + 0] = i * grid_size + j
+            indices[square_id * 6 + 1] = (i + 1) * grid_size + j
+            indices[square_id * 6 + 2] = i * grid_size + (j + 1)
+            # 2nd triangle of the square
+            indices[square_id * 6 +
+                    3] = (i + 1) * grid_size + j + 1
+            indices[square_id * 6 + 4] = i * grid_size + (j + 1)
+            indices[square_id * 6 + 5] = (i + 1) * grid_size + j
+            square_id += 1
+    return square_id * 6
+
+
+@ti.kernel
+def set_triangle_vertices(
+        grid_size: ti.i32,
+        domain_row_spans: ti.template(),
+        grid_surface: ti.template(),
+        vertices: ti.template()
+    ):
+    """
+    Set triangle vertices from oscillator positions. This is called for each
+    frame of the simulation. The surface is rendered using a triangular mesh
+    to approximate its shape.
+
+    Parameters:
+        - grid_size (ti.i32): The size of the grid.
+        - domain_row_spans (ti.template()): The cells of each row within 
+          the computational domain of the engine (see 
+          'compute_domain_row_spans'); the others are skipped.
+          oscillator_positions (ti.template()): Template for the positions of 
+          the oscillators.
+        - triangle_vertices (ti.template()): Template for the 
+          triangle vertices.
+    """
+    for i in range(grid_size):
+        for j in range(domain_row_spans[i][0], domain_row_spans[i][1]):
+            vertices[i * grid_size + j] = grid_surface[i, j]
+
+
+def update_camera_view_from_mouse(
+        rendering_window,
+        vert_angle_deg,
+        horiz_angle_deg,
+        prev_mouse_pos,
+        LMB_already_active,
+        slider_vert_angle_deg,
+        slider_horiz_angle_deg
+        ):
+    """
+    Updates the camera view angles based on mouse movement during a left 
+    mouse button drag.
+
+    This function adjusts the vertical and horizontal angles of the camera's 
+    point of view (POV) according to mouse movements while the left mouse 
+    button (LMB) is pressed. The updated angles are also reflected on GUI 
+    sliders for visual feedback.
+
+    Parameters:
+        - rendering_window (ti.ui.Window): The application window where mouse 
+          events are captured.
+        - vert_angle_deg (float): The current vertical angle (in degrees) of 
+          the camera POV.
+        - horiz_angle_deg (float): The current horizontal angle (in degrees) of 
+          the camera POV.
+        - prev_mouse_pos (tuple): The last recorded mouse position (x, y). 
+          Used to calculate the movement delta.
+        - LMB_already_active (bool): Tracks whether the left mouse button was 
+          already active to prevent reinitializing the drag state.
+        - slider_vert_angle_deg (tk.Scale): GUI slider to display the vertical
+          angle, or None if there is none (as in the replay viewer).
+        - slider_horiz_angle_deg (tk.Scale): GUI slider to display the 
+          horizontal angle, or None.
+
+    Returns:
+        tuple:
+            - vert_angle_deg (float): The updated vertical angle (in degrees).
+            - horiz_angle_deg (float): The updated horizontal angle (in 
+              degrees).
+            - prev_mouse_pos (tuple): The updated mouse position as a tuple 
+              (x, y).
+            - LMB_already_active (bool): Updated state of the LMB activity.
+
+    Notes:
+        - Horizontal angle adjustments wrap within [-180, 180] degrees to 
+          ensure continuity.
+        - Vertical angle adjustments are "clamped" via GUI slider mechanisms, 
+          ensuring they stay within valid limits defined externally.
+        - Sensitivity factors (horizontal: 200.0, vertical: 100.0) scale the 
+          impact of mouse movement on angle changes.
+    """
+    # Handle mouse drag for popint of view (POV) adjustments
+    current_mouse_pos = rendering_window.get_cursor_pos()
+    if LMB_already_active:
+        if prev_mouse_pos is not None:
+            mouse_shift_x = current_mouse_pos[0] - prev_mouse_pos[0]
+            mouse_shift_y = current_mouse_pos[1] - prev_mouse_pos[1]
+
+            # Update horiz_angle_deg (left-right rotation, or yaw)
+            horiz_angle_deg_sensitivity = 200.0
+            horiz_angle_deg += mouse_shift_x * horiz_angle_deg_sensitivity
+            horiz_angle_deg = (horiz_angle_deg + 180) % 360 - 180
+
+            # Update vert_angle_deg (up-down rotation, or pitch)
+            vert_angle_deg_sensitivity = 200.0
+            vert_angle_deg -= mouse_shift_y * vert_angle_deg_sensitivity
+
+            if slider_vert_angle_deg is not None:
+                slider_vert_angle_deg.set(vert_angle_deg)
+                slider_horiz_angle_deg.set(horiz_angle_deg)
+        prev_mouse_pos = current_mouse_pos
+    else:
+        LMB_already_active = True
+
+    return vert_angle_deg, horiz_angle_deg, prev_mouse_pos, LMB_already_active
+
+
+def update_zoom_from_mouse(
+        rendering_window,
+        camera_zoom,
+        prev_zoom_mouse_pos,
+        RMB_already_active,
+        slider_camera_zoom
+        ):
+    """
+    Adjusts the camera zoom level based on mouse movement while the right 
+    mouse button (RMB) is pressed.
+
+    This function modifies the 'camera_zoom' value by interpreting vertical 
+    mouse drag movements as zoom in/out commands. The zoom level is clamped 
+    within the range of 1 to 15 for consistency. Updates are reflected in a 
+    GUI slider for user feedback.
+
+    Parameters:
+        - rendering_window (ti.ui.Window): The application window capturing 
+          mouse events.
+        - camera_zoom (float): The current zoom level of the camera.
+        - prev_zoom_mouse_pos (tuple): The previous mouse position (x, y), 
+          used to calculate movement deltas.
+        - RMB_already_active (bool): Tracks whether the RMB was already active 
+          to manage drag state transitions.
+        - slider_camera_zoom (tk.Scale): GUI slider to display and adjust 
+          the camera zoom, or None if there is none.
+
+    Returns:
+        tuple:
+            - camera_zoom (float): The updated zoom level.
+            - prev_zoom_mouse_pos (tuple): The updated mouse position as 
+              (x, y).
+            - RMB_already_active (bool): Updated state of the RMB activity.
+
+    Notes:
+        - Inverted Y-axis mouse movement ('mouse_shift_y') is used for zoom 
+          adjustments (upward movement zooms out; downward zooms in).
+        - The zoom sensitivity is controlled by a scaling factor (10.0).
+        - The function ensures thread safety and GUI consistency by "clamping" 
+          the zoom level and updating the associated slider.
+    """
+    current_zoom_mouse_pos = rendering_window.get_cursor_pos()
+    if RMB_already_active:
+        if prev_zoom_mouse_pos is not None:
+            # Inverted y-axis
+            mouse_shift_y = (
+                - prev_zoom_mouse_pos[1] 
+                + current_zoom_mouse_pos[1]
+            )
+            zoom_sensitivity = 10.0
+            camera_zoom += mouse_shift_y * zoom_sensitivity
+            
+            # Clamp camera_zoom within the range 1 to 15
+            camera_zoom = max(1, min(camera_zoom, 15))
+            
+            if slider_camera_zoom is not None:
+                slider_camera_zoom.set(camera_zoom)
+        prev_zoom_mouse_pos = current_zoom_mouse_pos
+    else:
+        RMB_already_active = True
+
+    return camera_zoom, prev_zoom_mouse_pos, RMB_already_active
+
+
+def position_camera(
+        camera,
+        vert_angle_deg,
+        horiz_angle_deg,
+        camera_zoom
+    ):
+    """
+    Place the camera on a sphere around the centre of the rendered surface,
+    looking at that centre.
+
+    Parameters:
+        - camera (ti.ui.Camera): The camera of the scene.
+        - vert_angle_deg (float): The vertical angle (in degrees) of the 
+          camera POV, kept just short of 90 degrees.
+        - horiz_angle_deg (float): The horizontal angle (in degrees) of the
+          camera POV.
+        - camera_zoom (float): The zoom level, by which the distance of the
+          camera from the centre is divided.
+    """
+    view_distance = 2.0
+    view_distance /= camera_zoom
+    
+    # Prevent the vertical angle from reaching exactly 90 degrees (since 
+    # the surface cannot be unambiguously rendered at exactly this angle).
+    if vert_angle_deg > 89.99:
+        vert_angle_deg = 89.99  
+
+    vert_angle_rad = math.radians(vert_angle_deg)
+    horiz_angle_rad = math.radians(horiz_angle_deg)
+    
+    # Define the fixed point in space that the camera will always be
+    # oriented at.
+    look_at_x = 0.5
+    look_at_y = 0.0
+    look_at_z = 0.5
+    camera_position_x = (look_at_x 
+                         + view_distance * math.cos(vert_angle_rad) 
+                           * math.cos(horiz_angle_rad))
+    camera_position_y = (look_at_z 
+                         + view_distance * math.cos(vert_angle_rad) 
+                           * math.sin(horiz_angle_rad))
+    camera_height = (look_at_y 
+                     + view_distance * math.sin(vert_angle_rad))
+
+    # Set (point of) view using camera parameters
+    camera.position(
+        camera_position_x,
+        camera_height,
+        camera_position_y
+    )
+    camera.lookat(look_at_x,
+                  look_at_y,
+                  look_at_z)
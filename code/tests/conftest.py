@@ -0,0 +1,24 @@
+# =============================================================================
+# Test configuration
+# =============================================================================
+# The tests import the modules of 'code/src' as the application does, and
+# run them on the CPU backend of Taichi in double precision. Taichi never
+# frees the fields of an engine, and fails once a process has allocated
+# those of a few dozen engines, so it is reinitialised before each test.
+#
+#     python -m pytest code/tests
+# =============================================================================
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+import pytest
+import taichi as ti
+
+
+@pytest.fixture(autouse=True)
+def taichi_runtime():
+    ti.init(arch=ti.cpu, default_fp=ti.f64, log_level=ti.ERROR)
+    yield
+    ti.reset()
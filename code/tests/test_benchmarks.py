@@ -0,0 +1,105 @@
+# =============================================================================
+# Tests of the accuracy reports of the benchmarks
+# =============================================================================
+# The reports are run with small grids and short runs, and checked for the
+# physics they are meant to show, rather than for their timings.
+# =============================================================================
+import math
+
+import pytest
+
+from benchmarks import (
+    compare_domains,
+    compare_precision_accuracy,
+    compare_spectral_propagator,
+    measure_boundary_reflection
+)
+from simulation_engine import precision_options
+
+
+# =============================================================================
+# Floating point precision
+# =============================================================================
+def test_precision_accuracy_report():
+    results = compare_precision_accuracy(grid_size=61, number_of_steps=300)
+    assert list(results) == precision_options
+    reference = results["f64"]
+    assert reference["height_rms_error"] == 0
+    assert reference["probe_phase_drift"] == 0
+    # The single precision runs differ from the f64 run by the rounding 
+    # errors of single precision, grown over the run, but not by more.
+    for precision in ("f32", "f32 with f64 accumulation"):
+        result = results[precision]
+        assert 1e-8 < result["relative_height_rms_error"] < 1e-5
+        assert abs(result["probe_phase_drift"]) < 1e-5
+        assert result["steps_per_second"] > 0
+
+
+# =============================================================================
+# Absorbing boundaries
+# =============================================================================
+# A grid of 101 cells, whose reference grid is larger by 150 cells on each
+# side, with the waves released 10 cells from the centre.
+reflection_arguments = dict(
+    grid_size=101,
+    reference_margin=150,
+    first_orbital_radius=10,
+    incident_step=150,
+    sample_steps=(600, 800, 1000, 1200)
+)
+
+
+def test_pml_reflects_less_than_linear_sponge():
+    results = measure_boundary_reflection(
+        configurations=(("Linear sponge", 10), ("PML", 5), ("PML", 10)),
+        **reflection_arguments
+    )
+    sponge = results[("Linear sponge", 10)]["reflection_coefficient"]
+    # The sponge reflects a few percent of the waves. The PML reflects far
+    # less in a layer of the same depth, and less even in half the depth.
+    assert 0.01 < sponge < 0.2
+    assert results[("PML", 10)]["reflection_coefficient"] < sponge / 10
+    assert results[("PML", 5)]["reflection_coefficient"] < sponge / 2
+    assert (results[("PML", 5)]["layer_fraction"]
+            < results[("PML", 10)]["layer_fraction"])
+
+
+def test_circular_domain_updates_fewer_cells():
+    results = compare_domains(damping_layer_depth=10, **reflection_arguments)
+    square, circular = results["Square"], results["Circular"]
+    # The disc inscribed in the reduced grid leaves out about a fifth of
+    # its cells, while its damping ring reflects about as much as the 
+    # layers of the square grid.
+    assert (circular["updated_fraction"]
+            == pytest.approx(math.pi / 4 * square["updated_fraction"],
+                             rel=0.02))
+    assert circular["reflection_coefficient"] < 0.2
+    assert (circular["reflection_coefficient"]
+            < 1.5 * square["reflection_coefficient"])
+
+
+# =============================================================================
+# Spectral propagator
+# =============================================================================
+def test_spectral_propagator_exact_whatever_its_timestep():
+    results = compare_spectral_propagator(
+        grid_size=101,
+        simulated_time=2e-5,
+        explicit_timesteps=(4e-7, 1e-7, 2.5e-8),
+        spectral_steps=(1, 10, 100)
+    )
+    # The spectral runs agree with its single step to rounding, while the
+    # error of velocity Verlet falls as the square of its timestep.
+    for number_of_steps in (10, 100):
+        spectral = results[("Spectral", 2e-5 / number_of_steps)]
+        assert spectral["relative_height_rms_error"] < 1e-12
+    verlet_errors = [
+        results[("Velocity Verlet", 2e-5 / number_of_steps)]
+        ["relative_height_rms_error"]
+        for number_of_steps in (50, 200, 800)
+    ]
+    for error, smaller_timestep_error in zip(verlet_errors,
+                                             verlet_errors[1:]):
+        assert math.log(error / smaller_timestep_error, 4) == pytest.approx(
+            2, abs=0.25
+        )
@@ -0,0 +1,56 @@
+# =============================================================================
+# Tests of the streaming spectrogram
+# =============================================================================
+# Samples of a known sinusoid, fed in batches of any size, must give frames
+# on every hop whose chirp frequency is that of the sinusoid.
+# =============================================================================
+import numpy as np
+import pytest
+
+from detector_spectrogram import StreamingSpectrogram
+
+
+def test_recovers_sinusoid_frequency():
+    # A sinusoid of 0.0371 cycles per step, sampled every second step, at
+    # three detectors with their own amplitudes and phases, and some noise.
+    frequency = 0.0371
+    sample_spacing = 2
+    steps = sample_spacing * np.arange(1, 1001)
+    random = np.random.default_rng(0)
+    heights = (np.array([1.0, 0.5, 2.0])
+               * np.sin(2 * np.pi * frequency * steps[:, None]
+                        + np.array([0.0, 1.0, 2.5]))
+               + 0.05 * random.standard_normal((len(steps), 3)))
+
+    spectrogram = StreamingSpectrogram(3, window_length=256, hop_length=32)
+    assert spectrogram.chirp_frequency() == 0.0
+    frames = 0
+    first = 0
+    for batch in (1, 7, 100, 300, 45, 547):
+        frames += spectrogram.update({
+            "steps": steps[first:first + batch],
+            "heights": heights[first:first + batch],
+            "velocities": np.zeros((batch, 3))
+        })
+        first += batch
+    assert first == len(steps)
+
+    # One frame on every hop once the window is full.
+    assert frames == spectrogram.frames_computed == 1 + (1000 - 256) // 32
+    assert spectrogram.sample_spacing == sample_spacing
+    history = spectrogram.history()
+    assert np.array_equal(history["steps"],
+                          sample_spacing * np.arange(256, 1001, 32))
+    # The peak lies within a tenth of a bin (1 / (256 * 2) cycles per 
+    # step) of the frequency of the sinusoid.
+    resolution = 1 / (256 * sample_spacing)
+    assert np.all(np.abs(history["chirp_frequencies"] - frequency)
+                  < 0.1 * resolution)
+    assert spectrogram.chirp_angular_frequency(0.5) == pytest.approx(
+        2 * np.pi * spectrogram.chirp_frequency() / 0.5
+    )
+
+
+def test_rejects_hop_longer_than_window():
+    with pytest.raises(ValueError):
+        StreamingSpectrogram(3, window_length=64, hop_length=65)
@@ -0,0 +1,32 @@
+# =============================================================================
+# Tests of the domain-decomposed simulation
+# =============================================================================
+# A run split into strips, each advanced in its own worker process, must be
+# the same, bit for bit, as that of a single engine with the same
+# arguments, whether the strips split the orbit of the binary or not.
+# =============================================================================
+import numpy as np
+import pytest
+
+from domain_decomposition import DecomposedSimulation
+from simulation_engine import SimulationEngine
+
+
+@pytest.mark.parametrize("number_of_strips", [2, 3])
+def test_strips_match_single_engine(number_of_strips):
+    arguments = dict(grid_size=61, integrator="Velocity Verlet",
+                     run_option="Inspiralling", default_polar_angle_step=20.0)
+    with DecomposedSimulation(number_of_strips=number_of_strips,
+                              **arguments) as simulation:
+        simulation.step(40)
+        simulation.set_params(max_damping_factor=0.08)
+        simulation.step(35)
+        state = simulation.state()
+
+    engine = SimulationEngine(fused_steps=False, **arguments)
+    engine.step(40)
+    engine.set_params(max_damping_factor=0.08)
+    engine.step(35)
+    engine_state = engine.state()
+    for name in ("oscillator_positions", "oscillator_velocities"):
+        assert np.array_equal(state[name], engine_state[name]), name
@@ -0,0 +1,52 @@
+# =============================================================================
+# Tests of the batched ensemble
+# =============================================================================
+# Each member of an 'EnsembleEngine' must follow the same run, bit for bit,
+# as a 'SimulationEngine' with the velocity Verlet integrator, the
+# "Per-step update" inspiral and the same arguments.
+# =============================================================================
+import numpy as np
+import pytest
+
+from ensemble_engine import EnsembleEngine
+from simulation_engine import SimulationEngine
+
+grid_size = 61
+
+members = [(3, 3, None), (5, 2, 16.0), (1, 1, 8.0), (0, 4, 12.0)]
+
+
+@pytest.mark.parametrize("run_option", [
+    "Set first sphere orbital radius",
+    "Inspiralling",
+    "Test 2 - all four borders damped"
+])
+def test_members_match_engines(run_option):
+    arguments = dict(grid_size=grid_size, run_option=run_option,
+                     default_polar_angle_step=20.0)
+    ensemble = EnsembleEngine(members=members, **arguments)
+    ensemble.step(60)
+    ensemble.set_params(step_duration=1 / 30, default_polar_angle_step=30.0)
+    ensemble.step(15)
+    state = ensemble.state()
+
+    for member, (first_sphere_mass, second_sphere_mass,
+                 first_orbital_radius) in enumerate(members):
+        engine = SimulationEngine(
+            first_sphere_mass=first_sphere_mass,
+            second_sphere_mass=second_sphere_mass,
+            first_orbital_radius=first_orbital_radius,
+            integrator="Velocity Verlet",
+            inspiral="Per-step update",
+            fused_steps=False,
+            **arguments
+        )
+        engine.step(60)
+        engine.set_params(step_duration=1 / 30,
+                          default_polar_angle_step=30.0)
+        engine.step(15)
+        engine_state = engine.state()
+        for name in ("oscillator_positions", "oscillator_velocities"):
+            assert np.array_equal(state[name][member],
+                                  engine_state[name]), (member, name)
+        assert state["merged"][member] == engine.merged
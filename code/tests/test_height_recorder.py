@@ -0,0 +1,61 @@
+# =============================================================================
+# Tests of the height recorder
+# =============================================================================
+# A recording read back must hold the heights of the sheet at each recorded
+# step: exactly when they are stored raw, and to within half a quantisation
+# step when they are quantised, whether or not the frames are stored as 
+# differences or compressed.
+# =============================================================================
+import numpy as np
+import pytest
+
+from height_recorder import HeightRecorder, read_height_recording
+from simulation_engine import SimulationEngine
+
+
+def record_run(directory, **recorder_arguments):
+    """
+    Record an orbital run of 60 steps every 5 steps, in chunks of 4 frames
+    (the last one partial), and return the steps and heights recorded 
+    together with those of the engine at the same steps.
+    """
+    engine = SimulationEngine(grid_size=61, integrator="Velocity Verlet",
+                              default_polar_angle_step=20.0)
+    expected_heights = []
+    with HeightRecorder(engine, directory, interval=5, frames_per_chunk=4,
+                        **recorder_arguments) as recorder:
+        for _ in range(60):
+            engine.step()
+            recorder.record()
+            if engine.simulation_step_counter % 5 == 0:
+                expected_heights.append(
+                    engine.state()["oscillator_positions"]
+                )
+    steps, heights = read_height_recording(directory)
+    return steps, heights, np.array(expected_heights)
+
+
+@pytest.mark.parametrize("compression_level", [0, 6])
+def test_raw_round_trip(tmp_path, compression_level):
+    steps, heights, expected_heights = record_run(
+        str(tmp_path / "run.heights"), compression_level=compression_level
+    )
+    assert np.array_equal(steps, np.arange(5, 61, 5))
+    assert heights.dtype == expected_heights.dtype
+    assert np.array_equal(heights, expected_heights)
+
+
+@pytest.mark.parametrize("delta", [False, True])
+@pytest.mark.parametrize("compression_level", [0, 6])
+def test_quantised_round_trip(tmp_path, delta, compression_level):
+    quantisation_step = 1e-3
+    steps, heights, expected_heights = record_run(
+        str(tmp_path / "run.heights"),
+        quantisation_step=quantisation_step,
+        delta=delta,
+        compression_level=compression_level
+    )
+    assert np.array_equal(steps, np.arange(5, 61, 5))
+    assert np.max(np.abs(expected_heights)) > 100 * quantisation_step
+    assert np.all(np.abs(heights - expected_heights)
+                  <= quantisation_step / 2 * (1 + 1e-9))
@@ -0,0 +1,64 @@
+# =============================================================================
+# Tests of the parallel parameter sweeps
+# =============================================================================
+# A small sweep is fanned out over worker processes, and its columnar output
+# checked for one row per sample of each run, holding the samples of the 
+# same run made in this process.
+# =============================================================================
+import numpy as np
+
+from parameter_sweep import (
+    default_probe_points,
+    run_sweep,
+    sampled_quantities,
+    sweep_parameters,
+    sweep_points
+)
+from simulation_engine import SimulationEngine
+
+
+def test_sweep_columns(tmp_path):
+    grid_size = 61
+    points = sweep_points(first_sphere_masses=[1, 3],
+                          run_options=["Inspiralling",
+                                       "Test 2 - all four borders damped"])
+    assert len(points) == 4
+    output_path = str(tmp_path / "sweep.npz")
+    columns = run_sweep(points, output_path, number_of_steps=45,
+                        sample_interval=10, processes=2, grid_size=grid_size)
+
+    # Samples after 10, 20, 30 and 40 steps, and at the end of each run.
+    steps = [10, 20, 30, 40, 45]
+    probe_names = [f"probe_{i}_{j}"
+                   for i, j in default_probe_points(grid_size)]
+    assert set(columns) == ({"run_index", "step"} | set(sweep_parameters)
+                            | set(sampled_quantities) | set(probe_names))
+    for name, column in columns.items():
+        assert column.shape == (len(points) * len(steps),), name
+    assert np.array_equal(columns["run_index"], np.repeat(range(4), 5))
+    assert np.array_equal(columns["step"], np.tile(steps, 4))
+    for run_index, point in enumerate(points):
+        rows = columns["run_index"] == run_index
+        assert np.all(columns["first_sphere_mass"][rows]
+                      == point["first_sphere_mass"])
+        assert np.all(columns["run_option"][rows] == point["run_option"])
+    # Parameters left to the defaults of the engine.
+    assert np.all(np.isnan(columns["first_orbital_radius"]))
+    assert np.all(columns["damping_layer_depth"] == -1)
+
+    with np.load(output_path) as written:
+        assert set(written.files) == set(columns)
+        for name in columns:
+            floating = columns[name].dtype.kind == "f"
+            assert np.array_equal(written[name], columns[name],
+                                  equal_nan=floating), name
+
+    engine = SimulationEngine(grid_size=grid_size, **points[1])
+    rows = columns["run_index"] == 1
+    for row, step in enumerate(steps):
+        engine.step(step - engine.simulation_step_counter)
+        heights = engine.oscillator_positions.to_numpy()
+        for (i, j), name in zip(default_probe_points(grid_size),
+                                probe_names):
+            assert columns[name][rows][row] == heights[i, j]
+        assert columns["astro_omega"][rows][row] == engine.astro_omega
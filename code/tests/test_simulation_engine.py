@@ -0,0 +1,451 @@
+# =============================================================================
+# Tests of the simulation engine
+# =============================================================================
+# The engine is run headless on small grids, and checked for the physics of
+# its integrators, stencils and boundaries. The stepping modes reorganise
+# the work of a step without changing its arithmetic, so each must 
+# reproduce the separate launches of the reference stepper 
+# ('fused_steps=False') bit for bit, heights, velocities and detector 
+# samples alike.
+# =============================================================================
+import functools
+import math
+
+import numpy as np
+import pytest
+
+from simulation_engine import (
+    SimulationEngine,
+    laplacian_stencils,
+    ring_detector_points
+)
+
+
+def closed_system(grid_size=61, **arguments):
+    """
+    An engine on the closed system of the energy drift benchmark: the two
+    stationary perturbations of the test runs, overlaid on the first step,
+    with the boundary damping switched off.
+    """
+    engine = SimulationEngine(
+        grid_size=grid_size,
+        run_option="Test 2 - all four borders damped",
+        max_damping_factor=0.0,
+        **arguments
+    )
+    engine.step()
+    return engine
+
+
+def relative_energy_changes(engine, number_of_samples, sample_interval):
+    initial_energy = engine.lattice_energy()
+    changes = []
+    for _ in range(number_of_samples):
+        engine.step(sample_interval)
+        changes.append(engine.lattice_energy() / initial_energy - 1.0)
+    return np.array(changes)
+
+
+# =============================================================================
+# Time integrators
+# =============================================================================
+def test_velocity_Verlet_energy_bounded_legacy_RK4_drifts():
+    verlet = relative_energy_changes(
+        closed_system(integrator="Velocity Verlet"), 10, 300
+    )
+    legacy_RK4 = relative_energy_changes(
+        closed_system(integrator="Legacy RK4"), 10, 300
+    )
+    # The symplectic integrator fluctuates about a fixed energy, whereas
+    # the RK4 scheme loses energy steadily.
+    assert np.max(np.abs(verlet)) < 5e-3
+    assert abs(verlet[-1] - verlet[0]) < 1e-3
+    assert np.all(np.diff(legacy_RK4) < 0)
+    assert legacy_RK4[-1] < 5 * legacy_RK4[0]
+    assert abs(legacy_RK4[-1] - legacy_RK4[0]) > abs(verlet[-1] - verlet[0])
+
+
+def test_crank_nicolson_stable_beyond_explicit_limit():
+    # Four times the largest stable timestep of velocity Verlet.
+    timestep = 2e-6
+    crank_nicolson = relative_energy_changes(
+        closed_system(integrator="Crank-Nicolson", timestep=timestep), 4, 25
+    )
+    verlet = relative_energy_changes(
+        closed_system(integrator="Velocity Verlet", timestep=timestep), 1, 40
+    )
+    # The implicit midpoint rule conserves the energy of the linear 
+    # lattice to the tolerance of its solve, while velocity Verlet blows 
+    # up (its energy may overflow to infinity).
+    assert np.max(np.abs(crank_nicolson)) < 1e-8
+    assert not verlet[0] < 1e3
+
+
+def test_crank_nicolson_conjugate_gradient_converges():
+    heights = {}
+    iterations = {}
+    for tolerance in (1e-4, 1e-8, 1e-12):
+        engine = closed_system(integrator="Crank-Nicolson", timestep=2e-6,
+                               implicit_tolerance=tolerance)
+        engine.step(10)
+        heights[tolerance] = engine.state()["oscillator_positions"]
+        iterations[tolerance] = engine.implicit_iterations
+    assert (0 < iterations[1e-4] < iterations[1e-8] < iterations[1e-12]
+            < engine.implicit_max_iterations)
+    assert np.max(np.abs(heights[1e-8] - heights[1e-12])) < 1e-6
+    assert np.max(np.abs(heights[1e-4] - heights[1e-12])) > 1e-6
+
+
+# =============================================================================
+# Laplacian stencils
+# =============================================================================
+@pytest.mark.parametrize("stencil, order", [
+    ("5-point", 2),
+    ("Isotropic 9-point", 2),
+    ("4th-order 13-point", 4)
+])
+def test_stencil_order_of_accuracy(stencil, order):
+    """
+    The error of the stencil in the Laplacian of a smooth function falls 
+    as the power 'order' of the spacing of the lattice.
+    """
+    def function(x, y):
+        return math.sin(x) * math.cos(2 * y)
+
+    def laplacian_error(spacing):
+        x, y = 0.3, 0.7
+        laplacian = sum(
+            weight * (function(x + spacing * x_offset,
+                               y + spacing * y_offset) - function(x, y))
+            for x_offset, y_offset, weight in laplacian_stencils[stencil]
+        ) / spacing ** 2
+        return abs(laplacian + 5 * function(x, y))
+
+    for spacing in (0.2, 0.1):
+        measured_order = math.log2(laplacian_error(spacing)
+                                   / laplacian_error(spacing / 2))
+        assert measured_order == pytest.approx(order, abs=0.05)
+
+
+# =============================================================================
+# Inspiral
+# =============================================================================
+def test_trajectory_table_follows_per_step_inspiral():
+    """
+    The inspiral interpolated from the trajectory table follows the 
+    original per-step update, which integrates the same decay one step at
+    a time, closely until the merger (at about step 240 for this slow 
+    orbit), where the first-order error of the per-step update grows.
+    """
+    runs = {}
+    for inspiral in ("Trajectory table", "Per-step update"):
+        engine = SimulationEngine(grid_size=61, run_option="Inspiralling",
+                                  integrator="Velocity Verlet",
+                                  default_polar_angle_step=0.01,
+                                  inspiral=inspiral)
+        quantities = []
+        for _ in range(250):
+            engine.step()
+            quantities.append((engine.model_binary_separation,
+                               engine.astro_omega,
+                               engine.binary_energy_loss))
+        runs[inspiral] = np.array(quantities)
+    table, per_step = runs["Trajectory table"], runs["Per-step update"]
+    merging_steps = [np.argmax(run[:, 0] == 0) for run in (table, per_step)]
+    assert 200 < merging_steps[0] <= merging_steps[1] <= merging_steps[0] + 3
+    assert np.all(np.diff(table[:merging_steps[0], 0]) < 0)
+    relative_differences = np.abs(table[:200] / per_step[:200] - 1)
+    # Separation, orbital angular frequency and energy loss.
+    assert np.all(relative_differences < [5e-3, 5e-3, 2e-2])
+
+
+# =============================================================================
+# Stepping modes
+# =============================================================================
+grid_size = 61
+
+run_options = (
+    "Set first sphere orbital radius",
+    "Inspiralling",
+    "Test 2 - all four borders damped"
+)
+
+stepping_modes = {
+    "fused": {},
+    "temporal blocking": dict(temporal_block_steps=4, temporal_tile_size=16),
+    "activity tracking": dict(activity_tracking=True),
+    "Morton layout": dict(layout="Blocked Morton", fused_steps=False),
+    "Morton layout, fused": dict(layout="Blocked Morton")
+}
+
+
+def create_engine(run_option, **arguments):
+    """
+    An engine on a small grid with a fast orbit (which an inspiralling
+    binary follows to its merger within the steps of 'run_engine'), and
+    a ring of virtual detectors.
+    """
+    engine = SimulationEngine(
+        grid_size=grid_size,
+        run_option=run_option,
+        default_polar_angle_step=20.0,
+        **arguments
+    )
+    engine.add_detectors(ring_detector_points(grid_size, 20, 8),
+                         buffer_steps=128)
+    return engine
+
+
+def run_engine(run_option, **arguments):
+    """
+    The heights, velocities and detector samples of a run of 75 steps,
+    taken in calls of several sizes.
+    """
+    engine = create_engine(run_option, **arguments)
+    engine.step(40)
+    for _ in range(5):
+        engine.step(7)
+    state = engine.state()
+    detector_samples = engine.detector_samples()
+    return {
+        "oscillator_positions": state["oscillator_positions"],
+        "oscillator_velocities": state["oscillator_velocities"],
+        "detector_steps": detector_samples["steps"],
+        "detector_heights": detector_samples["heights"],
+        "detector_velocities": detector_samples["velocities"]
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def reference_run(run_option, integrator):
+    return run_engine(run_option, integrator=integrator, fused_steps=False)
+
+
+def assert_identical(run, reference):
+    for name, array in reference.items():
+        assert np.array_equal(run[name], array), name
+
+
+@pytest.mark.parametrize("mode", sorted(stepping_modes))
+@pytest.mark.parametrize("run_option", run_options)
+def test_stepping_mode_matches_reference(run_option, mode):
+    run = run_engine(run_option, integrator="Velocity Verlet",
+                     **stepping_modes[mode])
+    assert_identical(run, reference_run(run_option, "Velocity Verlet"))
+
+
+@pytest.mark.parametrize("run_option", run_options)
+def test_fused_legacy_RK4_matches_reference(run_option):
+    run = run_engine(run_option, integrator="Legacy RK4")
+    assert_identical(run, reference_run(run_option, "Legacy RK4"))
+
+
+@pytest.mark.parametrize("integrator", ["Legacy RK4", "Velocity Verlet"])
+@pytest.mark.parametrize("run_option", run_options[:2])
+def test_fused_steps_follow_changed_params(run_option, integrator):
+    """
+    The orbital state held on the device between fused steps is the same
+    as that of the reference stepper across changes of the parameters, on
+    an orbit slow enough to last the run.
+    """
+    states = []
+    for fused_steps in (False, True):
+        engine = SimulationEngine(grid_size=grid_size, run_option=run_option,
+                                  integrator=integrator,
+                                  default_polar_angle_step=0.01,
+                                  fused_steps=fused_steps)
+        engine.step(10)
+        engine.set_params(first_sphere_mass=5, max_damping_factor=0.05)
+        engine.step(10)
+        engine.set_params(default_polar_angle_step=0.005, step_duration=0.02)
+        engine.step(10)
+        assert not engine.merged
+        states.append(engine.state())
+    reference_state, fused_state = states
+    for name in ("oscillator_positions", "oscillator_velocities",
+                 "model_binary_separation", "current_polar_angle",
+                 "astro_omega", "binary_energy_loss"):
+        assert np.array_equal(fused_state[name], reference_state[name]), name
+
+
+@pytest.mark.parametrize("run_option", run_options)
+def test_temporally_blocked_stage_buffered_RK4_matches_reference(run_option):
+    run = run_engine(run_option, integrator="Stage-buffered RK4",
+                     temporal_block_steps=2, temporal_tile_size=32)
+    assert_identical(run, reference_run(run_option, "Stage-buffered RK4"))
+
+
+@pytest.mark.parametrize("buffer_steps", [3, 128])
+def test_temporally_blocked_detectors_sample_every_step(buffer_steps):
+    """
+    The detectors of a temporally blocked run are sampled after each step
+    of a pass, not only at its end, even when the passes are longer than
+    their ring buffer.
+    """
+    samples = []
+    for arguments in (dict(fused_steps=False),
+                      dict(temporal_block_steps=8, temporal_tile_size=32)):
+        engine = create_engine("Inspiralling", integrator="Velocity Verlet",
+                               **arguments)
+        engine.add_detectors(ring_detector_points(grid_size, 20, 8),
+                             buffer_steps=buffer_steps)
+        engine.step(23)
+        samples.append(engine.detector_samples())
+    reference_samples, blocked_samples = samples
+    assert np.array_equal(blocked_samples["steps"], np.arange(1, 24))
+    for name in reference_samples:
+        assert np.array_equal(blocked_samples[name],
+                              reference_samples[name]), name
+
+
+def test_temporal_blocking_rejects_legacy_RK4():
+    with pytest.raises(ValueError, match="Legacy RK4"):
+        SimulationEngine(grid_size=grid_size, integrator="Legacy RK4",
+                         temporal_block_steps=4)
+    engine = SimulationEngine(grid_size=grid_size,
+                              integrator="Velocity Verlet",
+                              temporal_block_steps=4)
+    with pytest.raises(ValueError, match="Legacy RK4"):
+        engine.set_params(integrator="Legacy RK4")
+
+
+def test_active_blocks_follow_the_waves():
+    engine = SimulationEngine(grid_size=201, integrator="Velocity Verlet",
+                              activity_tracking=True)
+    active_block_fractions = []
+    for number_of_steps in (1, 50, 200):
+        engine.step(number_of_steps)
+        active_block_fractions.append(engine.active_block_fraction)
+    # Only the blocks around the spheres are active at first, and more of
+    # them as the waves spread out over the sheet.
+    assert 0 < active_block_fractions[0] < 0.25
+    assert (active_block_fractions[0] < active_block_fractions[1]
+            < active_block_fractions[2] < 1)
+
+
+# =============================================================================
+# Absorbing boundaries
+# =============================================================================
+def original_damping_factors(engine, number_of_damped_borders):
+    """
+    The factors by which the original loops of 'damp_grid_boundary' scaled
+    the oscillators of the reduced grid: the lower and upper layers across
+    it when all four borders are damped, and the left and right layers 
+    between them.
+    """
+    start, end = engine.reduced_grid_start, engine.reduced_grid_end
+    depth = engine.damping_layer_depth
+    factors = np.ones((end - start, end - start))
+    lower_end, upper_start = depth, end - start - depth
+
+    def factor(ramp_steps):
+        return 1 - engine.max_damping_factor * ramp_steps / depth
+
+    if number_of_damped_borders == 4:
+        for i in range(lower_end):
+            factors[i, :] *= factor(lower_end - i)
+        for i in range(upper_start, end - start):
+            factors[i, :] *= factor(i - upper_start)
+    for j in range(lower_end):
+        factors[lower_end:upper_start, j] *= factor(lower_end - j)
+    for j in range(upper_start, end - start):
+        factors[lower_end:upper_start, j] *= factor(j - upper_start)
+    return factors
+
+
+@pytest.mark.parametrize("run_option, number_of_damped_borders", [
+    ("Test 1 - two of four borders damped", 2),
+    ("Test 2 - all four borders damped", 4)
+])
+def test_damping_map_matches_original_damping(run_option,
+                                              number_of_damped_borders):
+    engine = SimulationEngine(grid_size=101, run_option=run_option,
+                              max_damping_factor=0.05)
+    assert engine.number_of_damped_borders == number_of_damped_borders
+    reduced_grid = (slice(engine.reduced_grid_start,
+                          engine.reduced_grid_end),) * 2
+    for max_damping_factor in (0.05, 0.02):
+        # A change of the damping factor is carried into the map.
+        engine.set_params(max_damping_factor=max_damping_factor)
+        assert np.allclose(
+            engine.damping_map.to_numpy()[reduced_grid],
+            original_damping_factors(engine, number_of_damped_borders),
+            rtol=0, atol=1e-15
+        )
+
+
+def test_circular_domain_leaves_corners_untouched():
+    engine = SimulationEngine(grid_size=101, integrator="Velocity Verlet",
+                              domain="Circular")
+    engine.step(300)
+    heights = engine.state()["oscillator_positions"]
+    offsets = np.arange(engine.grid_size) - engine.grid_centre[None][0]
+    distances = np.hypot(offsets[:, None], offsets[None, :])
+    # The waves fill the disc, and nothing outside it is updated.
+    assert np.all(heights[distances > engine.domain_radius] == 0)
+    assert np.count_nonzero(heights) == np.count_nonzero(
+        distances <= engine.domain_radius
+    )
+
+
+# =============================================================================
+# Live changes of the spheres
+# =============================================================================
+def test_sphere_changes_beyond_grid_rejected():
+    """
+    Masses or an orbital radius whose perturbations would reach beyond 
+    the edges of the grid are rejected, leaving the run as it was.
+    """
+    engine = SimulationEngine(grid_size=101, run_option="Inspiralling")
+    engine.step(3)
+    first_orbital_radius = engine.first_orbital_radius
+    with pytest.raises(ValueError):
+        engine.set_params(first_sphere_mass=20, second_sphere_mass=45)
+    with pytest.raises(ValueError):
+        engine.set_params(first_orbital_radius=48.0)
+    assert (engine.first_sphere_mass, engine.second_sphere_mass) == (3, 3)
+    assert engine.first_orbital_radius == first_orbital_radius
+    engine.set_params(first_sphere_mass=5, second_sphere_mass=12)
+    engine.step(3)
+    assert (engine.first_sphere_mass, engine.second_sphere_mass) == (5, 12)
+
+# =============================================================================
+# Checkpoints
+# =============================================================================
+@pytest.mark.parametrize("arguments", [
+    dict(integrator="Velocity Verlet", fused_steps=False),
+    dict(integrator="Velocity Verlet"),
+    dict(integrator="Legacy RK4")
+])
+def test_checkpoint_round_trip(tmp_path, arguments):
+    """
+    A run resumed from a checkpoint continues exactly as the run which 
+    saved it, detector samples included.
+    """
+    path = str(tmp_path / "run.ckpt")
+    engine = create_engine("Inspiralling", **arguments)
+    engine.step(30)
+    first_samples = engine.detector_samples()
+    engine.step(10)
+    engine.save_checkpoint(path)
+    engine.step(1)
+
+    resumed = SimulationEngine.from_checkpoint(path)
+    resumed.step(35)
+    resumed_samples = resumed.detector_samples()
+    detector_samples = {
+        name: np.concatenate([first_samples[name], resumed_samples[name]])
+        for name in first_samples
+    }
+
+    reference = create_engine("Inspiralling", **arguments)
+    reference.step(75)
+    reference_samples = reference.detector_samples()
+    for name in reference_samples:
+        assert np.array_equal(detector_samples[name],
+                              reference_samples[name]), name
+    state = resumed.state()
+    reference_state = reference.state()
+    for name in ("simulation_step_counter", "oscillator_positions",
+                 "oscillator_velocities"):
+        assert np.array_equal(state[name], reference_state[name]), name